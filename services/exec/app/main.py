@@ -4,7 +4,7 @@ from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from prometheus_client import Counter, Histogram, generate_latest
+from prometheus_client import generate_latest
 from starlette.responses import Response
 
 from .routes import orders, quotes
@@ -13,9 +13,6 @@ from .routes import orders, quotes
 prometheus_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc")
 Path(prometheus_dir).mkdir(parents=True, exist_ok=True)
 
-order_counter = Counter("exec_orders_total", "Total orders received")
-order_latency = Histogram("exec_order_latency_seconds", "Order processing latency")
-
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
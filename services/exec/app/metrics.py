@@ -0,0 +1,8 @@
+from prometheus_client import Counter, Histogram
+
+order_counter = Counter("exec_orders_total", "Total orders received")
+order_latency = Histogram(
+    "exec_order_latency_seconds",
+    "Order processing latency",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
@@ -0,0 +1,273 @@
+"""
+Pre-trade risk checks.
+
+A RiskEngine holds one account's positions, working orders and P&L in memory.
+Fills and quotes update it incrementally, and check() decides whether an order
+may go to the broker:
+
+  max_position         absolute quantity per key, working orders included
+  max_gross_notional   sum of |quantity * price| over all keys
+  max_net_notional     |sum of quantity * price| over all keys
+  max_orders_per_second  accepted orders in any one-second window
+  price_band           limit/stop prices within this fraction of the last quote
+  max_daily_loss       realized plus unrealized loss since reset_day()
+
+Orders that reduce a position pass the position, notional and loss limits, so
+a breached account can still be flattened. Every limit is optional.
+
+Totals are kept as running sums that each fill and quote adjusts, so a check is
+a handful of dict lookups and comparisons, well under ten microseconds. The
+module needs no Django: the runtime keys it by asset id, and the exec gateway
+keys it by "EXCHANGE:SYMBOL". The gateway's image cannot see this tree, so
+services/exec/app/risk.py is a copy, formatted for that service;
+tests/test_risk.py checks that the two parse to the same code.
+"""
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Hashable, Optional
+
+# Keyword argument -> setting (Django) or environment variable (exec gateway).
+SETTINGS = {
+    "max_position": "RISK_MAX_POSITION",
+    "max_gross_notional": "RISK_MAX_GROSS_NOTIONAL",
+    "max_net_notional": "RISK_MAX_NET_NOTIONAL",
+    "max_orders_per_second": "RISK_MAX_ORDERS_PER_SECOND",
+    "price_band": "RISK_PRICE_BAND_PCT",
+    "max_daily_loss": "RISK_MAX_DAILY_LOSS",
+}
+
+
+class RiskLimits:
+    """Limits of one account; None (or 0 in settings) disables a check."""
+
+    def __init__(
+        self,
+        max_position: Optional[float] = None,
+        max_gross_notional: Optional[float] = None,
+        max_net_notional: Optional[float] = None,
+        max_orders_per_second: Optional[int] = None,
+        price_band: Optional[float] = None,
+        max_daily_loss: Optional[float] = None,
+    ):
+        for name, value in locals().items():
+            if name != "self" and value is not None and value < 0:
+                raise ValueError(f"{name} must not be negative")
+        self.max_position = max_position
+        self.max_gross_notional = max_gross_notional
+        self.max_net_notional = max_net_notional
+        self.max_orders_per_second = max_orders_per_second
+        self.price_band = price_band
+        self.max_daily_loss = max_daily_loss
+
+    @classmethod
+    def from_settings(cls, source=None) -> "RiskLimits":
+        """
+        Limits from the RISK_* Django settings, or from a mapping with the same
+        names such as os.environ. RISK_PRICE_BAND_PCT is in percent.
+        """
+        if source is None:
+            from django.conf import settings
+
+            values = {arg: getattr(settings, name, 0) for arg, name in SETTINGS.items()}
+        else:
+            values = {
+                arg: float(source.get(name) or 0) for arg, name in SETTINGS.items()
+            }
+
+        limits = {arg: value or None for arg, value in values.items()}
+        if limits["price_band"] is not None:
+            limits["price_band"] /= 100.0
+        if limits["max_orders_per_second"] is not None:
+            limits["max_orders_per_second"] = int(limits["max_orders_per_second"])
+        return cls(**limits)
+
+
+class _Exposure:
+    __slots__ = ("quantity", "cost", "mark", "buying", "selling")
+
+    def __init__(self):
+        self.quantity = 0.0
+        # Signed cost of the open quantity at its average entry price.
+        self.cost = 0.0
+        self.mark: Optional[float] = None
+        # Quantities of accepted orders that have not filled yet.
+        self.buying = 0.0
+        self.selling = 0.0
+
+
+class RiskEngine:
+    def __init__(
+        self,
+        limits: Optional[RiskLimits] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limits = limits or RiskLimits.from_settings()
+        self.clock = clock
+        self.gross = 0.0
+        self.net = 0.0
+        self.unrealized = 0.0
+        self.realized = 0.0
+        self.stats = {"checked": 0, "rejected": 0}
+
+        self._exposures: Dict[Hashable, _Exposure] = {}
+        self._accepted: Deque[float] = deque()
+        self._day_start = 0.0
+
+    @property
+    def pnl(self) -> float:
+        return self.realized + self.unrealized
+
+    @property
+    def daily_pnl(self) -> float:
+        return self.pnl - self._day_start
+
+    def reset_day(self) -> None:
+        """Start counting the daily loss limit from the current P&L."""
+        self._day_start = self.pnl
+
+    def quantity(self, key) -> float:
+        exposure = self._exposures.get(key)
+        return 0.0 if exposure is None else exposure.quantity
+
+    def _exposure(self, key) -> _Exposure:
+        exposure = self._exposures.get(key)
+        if exposure is None:
+            exposure = self._exposures[key] = _Exposure()
+        return exposure
+
+    def _book(self, exposure: _Exposure, sign: float) -> None:
+        # Add (sign 1) or remove (sign -1) a key's share of the running totals.
+        if exposure.mark is None or not exposure.quantity:
+            return
+        value = exposure.quantity * exposure.mark
+        self.gross += sign * abs(value)
+        self.net += sign * value
+        self.unrealized += sign * (value - exposure.cost)
+
+    def on_quote(self, key, price: float) -> None:
+        exposure = self._exposure(key)
+        self._book(exposure, -1)
+        exposure.mark = price
+        self._book(exposure, 1)
+
+    def on_fill(
+        self, key, quantity: float, price: float, commission: float = 0.0
+    ) -> None:
+        """Apply a fill of signed quantity (buys positive) of an accepted order."""
+        exposure = self._exposure(key)
+        if quantity > 0:
+            exposure.buying = max(exposure.buying - quantity, 0.0)
+        else:
+            exposure.selling = max(exposure.selling + quantity, 0.0)
+
+        self._book(exposure, -1)
+        held = exposure.quantity
+        if held and (held > 0) != (quantity > 0):
+            closing = min(abs(quantity), abs(held))
+            direction = 1.0 if held > 0 else -1.0
+            average = exposure.cost / held
+            self.realized += direction * closing * (price - average)
+            exposure.cost -= direction * closing * average
+            exposure.quantity -= direction * closing
+            quantity += direction * closing
+            if not exposure.quantity:
+                exposure.cost = 0.0
+        exposure.quantity += quantity
+        exposure.cost += quantity * price
+        self.realized -= commission
+        if exposure.mark is None:
+            exposure.mark = price
+        self._book(exposure, 1)
+
+    def release(self, key, side: str, quantity: float) -> None:
+        """Forget the unfilled quantity of an accepted order that was cancelled or rejected."""
+        exposure = self._exposure(key)
+        if side == "buy":
+            exposure.buying = max(exposure.buying - quantity, 0.0)
+        else:
+            exposure.selling = max(exposure.selling - quantity, 0.0)
+
+    def check(
+        self,
+        key,
+        side: str,
+        quantity: float,
+        price: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> Optional[str]:
+        """
+        None if the order may be sent, else why not. An accepted order counts
+        as working until on_fill() or release().
+        """
+        self.stats["checked"] += 1
+        reason = self._violation(key, side, quantity, price, now)
+        if reason is not None:
+            self.stats["rejected"] += 1
+        return reason
+
+    def _violation(self, key, side, quantity, price, now) -> Optional[str]:
+        if side not in ("buy", "sell"):
+            return f"Unknown side {side!r}"
+        if quantity <= 0:
+            return "Quantity must be positive"
+
+        limits = self.limits
+        exposure = self._exposure(key)
+        mark = exposure.mark
+
+        if limits.max_orders_per_second:
+            now = self.clock() if now is None else now
+            accepted = self._accepted
+            while accepted and accepted[0] <= now - 1.0:
+                accepted.popleft()
+            if len(accepted) >= limits.max_orders_per_second:
+                return f"Order rate limit of {limits.max_orders_per_second}/s reached"
+
+        if limits.price_band and price is not None and mark:
+            if abs(price - mark) > limits.price_band * mark:
+                return (
+                    f"Price {price:.2f} is outside the {limits.price_band:.1%} band "
+                    f"around the last price {mark:.2f}"
+                )
+
+        signed = quantity if side == "buy" else -quantity
+        working = exposure.quantity + exposure.buying - exposure.selling
+        if side == "buy":
+            before = exposure.quantity + exposure.buying
+        else:
+            before = exposure.quantity - exposure.selling
+        after = before + signed
+
+        if abs(after) > abs(before):
+            if limits.max_position and abs(after) > limits.max_position:
+                return f"Position of {after:+g} would exceed the limit of {limits.max_position:g}"
+
+            if limits.max_gross_notional or limits.max_net_notional:
+                value_price = price if price is not None else mark
+                if value_price is None:
+                    return "No price to value the order against the notional limits"
+                held = 0.0 if mark is None else exposure.quantity * mark
+                projected = (working + signed) * value_price
+                gross = self.gross - abs(held) + abs(projected)
+                net = self.net - held + projected
+                if limits.max_gross_notional and gross > limits.max_gross_notional:
+                    return (
+                        f"Gross notional of {gross:,.0f} would exceed the limit of "
+                        f"{limits.max_gross_notional:,.0f}"
+                    )
+                if limits.max_net_notional and abs(net) > limits.max_net_notional:
+                    return (
+                        f"Net notional of {net:,.0f} would exceed the limit of "
+                        f"{limits.max_net_notional:,.0f}"
+                    )
+
+            if limits.max_daily_loss and -self.daily_pnl >= limits.max_daily_loss:
+                return f"Daily loss limit of {limits.max_daily_loss:,.0f} reached"
+
+        if limits.max_orders_per_second:
+            self._accepted.append(now)
+        if signed > 0:
+            exposure.buying += quantity
+        else:
+            exposure.selling += quantity
+        return None
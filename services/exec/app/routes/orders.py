@@ -1,10 +1,35 @@
-from typing import List
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+from zoneinfo import ZoneInfo
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
+from ..metrics import order_counter, order_latency
+
+# A copy of the web service's apps/live/risk.py.
+from ..risk import RiskEngine, RiskLimits
+from .quotes import _get_many
+
 router = APIRouter()
 
+# Orders still working past this many seconds are assumed dead and released.
+WORKING_TTL_SECONDS = float(os.getenv("EXEC_WORKING_TTL_SECONDS", "86400"))
+# New orders are rejected while this many are working.
+MAX_WORKING_ORDERS = int(os.getenv("EXEC_MAX_WORKING_ORDERS", "10000"))
+# The daily loss limit restarts when the date changes here.
+MARKET_TIMEZONE = ZoneInfo("Asia/Kolkata")
+
+risk = RiskEngine(RiskLimits.from_settings(os.environ))
+# Accepted orders the gateway still counts as working, oldest first:
+# id -> (key, side, unfilled quantity, accepted at).
+working: OrderedDict[str, Tuple[str, str, int, float]] = OrderedDict()
+trading_day: Optional[date] = None
+
 
 class OrderRequest(BaseModel):
     symbol: str
@@ -22,11 +47,58 @@ class OrderResponse(BaseModel):
     message: str
 
 
+class Fill(BaseModel):
+    quantity: int
+    price: float
+    commission: float = 0.0
+
+
+def _roll_day() -> None:
+    global trading_day
+    today = datetime.now(MARKET_TIMEZONE).date()
+    if trading_day is not None and today != trading_day:
+        risk.reset_day()
+    trading_day = today
+
+
+def _expire(now: float) -> None:
+    while working:
+        order_id, (key, side, quantity, accepted_at) = next(iter(working.items()))
+        if accepted_at > now - WORKING_TTL_SECONDS:
+            return
+        del working[order_id]
+        risk.release(key, side, quantity)
+
+
 @router.post("/", response_model=OrderResponse)
 async def place_order(order: OrderRequest):
-    import uuid
+    order_counter.inc()
+    with order_latency.time():
+        return await _place_order(order)
+
+
+async def _place_order(order: OrderRequest) -> OrderResponse:
+    key = f"{order.exchange.upper()}:{order.symbol.upper()}"
+    quote = (await _get_many([key])).get(key)
+    if quote is not None:
+        risk.on_quote(key, quote.last_price)
+
+    _roll_day()
+    now = time.monotonic()
+    _expire(now)
+    if len(working) >= MAX_WORKING_ORDERS:
+        return OrderResponse(
+            order_id="",
+            status="rejected",
+            message=f"{MAX_WORKING_ORDERS} orders are already working",
+        )
+
+    reason = risk.check(key, order.side, order.quantity, order.price)
+    if reason is not None:
+        return OrderResponse(order_id="", status="rejected", message=reason)
 
     order_id = str(uuid.uuid4())
+    working[order_id] = (key, order.side, order.quantity, now)
 
     return OrderResponse(
         order_id=order_id,
@@ -45,6 +117,30 @@ async def get_order_status(order_id: str):
     }
 
 
+@router.post("/{order_id}/fills")
+async def record_fill(order_id: str, fill: Fill):
+    """Settle a (partial) fill reported by the executor; a full fill ends the order."""
+    if order_id not in working:
+        raise HTTPException(status_code=404, detail=f"Order {order_id} is not working")
+    if fill.quantity <= 0:
+        raise HTTPException(status_code=400, detail="Fill quantity must be positive")
+
+    key, side, unfilled, accepted_at = working[order_id]
+    quantity = min(fill.quantity, unfilled)
+    risk.on_fill(
+        key, quantity if side == "buy" else -quantity, fill.price, fill.commission
+    )
+    if quantity < unfilled:
+        working[order_id] = (key, side, unfilled - quantity, accepted_at)
+        return {"order_id": order_id, "status": "partially_filled"}
+    del working[order_id]
+    return {"order_id": order_id, "status": "filled"}
+
+
 @router.delete("/{order_id}")
 async def cancel_order(order_id: str):
+    """Release a working order's unfilled quantity; also used for broker rejections."""
+    if order_id in working:
+        key, side, quantity, _ = working.pop(order_id)
+        risk.release(key, side, quantity)
     return {"order_id": order_id, "status": "cancelled"}
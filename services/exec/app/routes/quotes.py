@@ -1,32 +1,93 @@
-from typing import List
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
+from redis import asyncio as aioredis
 
 router = APIRouter()
 
+# Same layout the web service's LatestQuoteStore writes (apps/data/quotes.py).
+QUOTE_KEY = "quotes:{}"
+SYMBOL_INDEX = "quotes:symbols"
+
+STALE_AFTER_SECONDS = float(os.getenv("QUOTE_STALE_AFTER_SECONDS", "60"))
+
+redis = aioredis.Redis(
+    host=os.getenv("REDIS_HOST", "redis"),
+    port=int(os.getenv("REDIS_PORT", "6379")),
+    db=int(os.getenv("REDIS_DB", "0")),
+    decode_responses=True,
+)
+
 
 class Quote(BaseModel):
     symbol: str
     exchange: str
     last_price: float
-    bid: float
-    ask: float
-    volume: int
+    bid: Optional[float] = None
+    ask: Optional[float] = None
+    volume: Optional[int] = None
+    timestamp: datetime
+    updated_at: datetime
+    stale: bool
 
 
-@router.get("/{exchange}/{symbol}", response_model=Quote)
-async def get_quote(exchange: str, symbol: str):
+def _to_quote(values: Dict[str, str]) -> Quote:
+    timestamp = float(values["timestamp"])
     return Quote(
-        symbol=symbol,
-        exchange=exchange,
-        last_price=1000.0,
-        bid=999.5,
-        ask=1000.5,
-        volume=100000,
+        symbol=values["symbol"],
+        exchange=values["exchange"],
+        last_price=float(values["last_price"]),
+        bid=float(values["bid"]) if values.get("bid") else None,
+        ask=float(values["ask"]) if values.get("ask") else None,
+        volume=int(float(values["volume"])) if values.get("volume") else None,
+        timestamp=datetime.fromtimestamp(timestamp, tz=timezone.utc),
+        updated_at=datetime.fromtimestamp(float(values["updated_at"]), tz=timezone.utc),
+        stale=time.time() - timestamp > STALE_AFTER_SECONDS,
     )
 
 
+async def _get_many(keys: List[str]) -> Dict[str, Quote]:
+    asset_ids = await redis.hmget(SYMBOL_INDEX, keys)
+    found = [
+        (key, asset_id)
+        for key, asset_id in zip(keys, asset_ids, strict=True)
+        if asset_id
+    ]
+    if not found:
+        return {}
+
+    async with redis.pipeline(transaction=False) as pipe:
+        for _, asset_id in found:
+            pipe.hgetall(QUOTE_KEY.format(asset_id))
+        rows = await pipe.execute()
+    return {
+        key: _to_quote(values)
+        for (key, _), values in zip(found, rows, strict=True)
+        if values
+    }
+
+
+@router.get("/", response_model=Dict[str, Quote])
+async def get_quotes(
+    symbols: str = Query(..., description="Comma-separated EXCHANGE:SYMBOL")
+):
+    keys = [s.strip().upper() for s in symbols.split(",") if s.strip()]
+    return await _get_many(keys)
+
+
+@router.get("/{exchange}/{symbol}", response_model=Quote)
+async def get_quote(exchange: str, symbol: str):
+    key = f"{exchange.upper()}:{symbol.upper()}"
+    quotes = await _get_many([key])
+    if key not in quotes:
+        raise HTTPException(status_code=404, detail=f"No quote for {key}")
+    return quotes[key]
+
+
 @router.post("/subscribe")
 async def subscribe_quotes(symbols: List[str]):
     return {"status": "subscribed", "symbols": symbols}
@@ -1,29 +1,48 @@
 import json
 
 from channels.generic.websocket import AsyncWebsocketConsumer
+from django.core.serializers.json import DjangoJSONEncoder
+
+from apps.live.fanout import Subscription, get_quote_fanout
 
 
 class QuotesConsumer(AsyncWebsocketConsumer):
+    """
+    Streams the latest quote of each subscribed symbol. Quotes come from the
+    process's QuoteFanout, so a client that reads slowly gets fewer, newer
+    quotes instead of a growing backlog.
+    """
+
     async def connect(self):
-        await self.channel_layer.group_add("quotes", self.channel_name)
+        self.fanout = get_quote_fanout()
+        self.subscription = Subscription(self.quotes_update)
         await self.accept()
 
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard("quotes", self.channel_name)
+        self.fanout.unsubscribe(self.subscription)
 
     async def receive(self, text_data):
         data = json.loads(text_data)
+        symbols = [str(s).upper() for s in data.get("symbols", [])]
 
         if data.get("action") == "subscribe":
-            symbols = data.get("symbols", [])
+            self.fanout.subscribe(self.subscription, symbols)
             await self.send(
                 text_data=json.dumps(
                     {"type": "subscribed", "symbols": symbols, "message": "Subscribed to quotes"}
                 )
             )
+        elif data.get("action") == "unsubscribe":
+            self.fanout.unsubscribe(self.subscription, symbols)
+            await self.send(text_data=json.dumps({"type": "unsubscribed", "symbols": symbols}))
 
-    async def quote_update(self, event):
-        await self.send(text_data=json.dumps(event["data"]))
+    async def quotes_update(self, quotes):
+        await self.send(
+            text_data=json.dumps(
+                {"type": "quotes", "quotes": [q.to_dict() for q in quotes]},
+                cls=DjangoJSONEncoder,
+            )
+        )
 
 
 class OrdersConsumer(AsyncWebsocketConsumer):
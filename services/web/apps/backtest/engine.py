@@ -7,8 +7,13 @@ import pandas as pd
 from django.utils import timezone
 
 from apps.backtest.models import BacktestMetrics, EquityCurve, WeeklyReturn
+from apps.data.adjustments import ADJUSTMENT_MODES, apply_adjustments, load_factors
+from apps.data.calendar import TradingCalendar, get_calendar
 from apps.data.models import Asset, Bar
+from apps.data.resample import read_bars
+from apps.data.universe import UniverseMask
 from apps.live.models import Order, Trade
+from apps.live.positions import PositionBook
 from apps.strategies.models import StrategyRun
 from apps.strategies.sdk import FeeModel, SlippageModel
 
@@ -20,12 +25,13 @@ class BacktestEngine:
         initial_capital: float,
         slippage_model: SlippageModel,
         fee_model: FeeModel,
+        accounting: str = "fifo",
     ):
         self.strategy_run = strategy_run
         self.initial_capital = initial_capital
         self.cash = initial_capital
         self.equity = initial_capital
-        self.positions: Dict[int, float] = {}
+        self.book = PositionBook(method=accounting)
         self.slippage_model = slippage_model
         self.fee_model = fee_model
 
@@ -36,52 +42,117 @@ class BacktestEngine:
         self.peak_equity = initial_capital
         self.current_drawdown = 0.0
 
+        self.calendar: TradingCalendar = get_calendar("NSE")
+
+    @property
+    def positions(self) -> Dict[int, float]:
+        return self.book.positions()
+
     def run(
         self,
         universe: List[Asset],
         start_date: datetime,
         end_date: datetime,
         on_bar_callback,
+        timeframe: str = "1D",
+        membership: Optional[UniverseMask] = None,
+        adjustment: str = "adjusted",
     ):
-        bars_qs = Bar.objects.filter(
-            asset__in=universe,
-            timestamp__gte=start_date,
-            timestamp__lte=end_date,
-        ).order_by("timestamp", "asset")
+        if adjustment not in ADJUSTMENT_MODES:
+            raise ValueError(f"Unknown adjustment mode: {adjustment}")
+        if universe:
+            self.calendar = get_calendar(universe[0].exchange.code)
+
+        bars_df = read_bars(
+            Bar.objects.filter(
+                asset__in=universe,
+                timeframe=timeframe,
+                timestamp__gte=start_date,
+                timestamp__lte=end_date,
+            ).order_by("timestamp", "asset")
+        )
+        if bars_df.empty:
+            return
 
-        bars_df = pd.DataFrame(bars_qs.values())
+        # Bars are stored raw; without adjusting them a split would show up
+        # as a price gap the strategy trades on.
+        if adjustment == "adjusted":
+            factors = load_factors(bars_df["asset_id"].unique().tolist(), self.calendar.timezone)
+            bars_df = apply_adjustments(bars_df, factors)
+
+        # Only step through exchange sessions; bars stamped on holidays or
+        # outside trading hours are data errors, not extra periods.
+        if timeframe == "1D":
+            days = self.calendar.local_days(bars_df["timestamp"])
+            in_session = self.calendar.is_session_day(days)
+        else:
+            in_session = self.calendar.locate(bars_df["timestamp"])[0] >= 0
+        bars_df = bars_df[in_session]
         if bars_df.empty:
             return
 
+        if membership is not None:
+            # One mask lookup per bar row; membership then costs nothing in the loop.
+            stamps = pd.DatetimeIndex(bars_df["timestamp"])
+            timestamps = stamps.unique().sort_values()
+            active = membership.active(self.calendar.local_days(timestamps))
+            rows = timestamps.searchsorted(stamps)
+            slots = membership.slots_of(bars_df["asset_id"])
+            bars_df = bars_df.assign(member=(slots >= 0) & active[rows, np.maximum(slots, 0)])
+        else:
+            bars_df = bars_df.assign(member=True)
+
         bars_by_timestamp = bars_df.groupby("timestamp")
 
         for timestamp, group in bars_by_timestamp:
             bars_dict = {}
+            members = set()
             for _, row in group.iterrows():
                 asset_id = row["asset_id"]
                 bars_dict[asset_id] = row
+                if row["member"]:
+                    members.add(asset_id)
 
             current_prices = {aid: float(row["close"]) for aid, row in bars_dict.items()}
 
-            signals = on_bar_callback(timestamp, bars_dict, self.positions)
+            # Strategies see current members, plus former members still held
+            # so they can be exited.
+            positions = self.positions
+            visible = {
+                aid: row for aid, row in bars_dict.items() if aid in members or aid in positions
+            }
+            signals = on_bar_callback(timestamp, visible, positions)
 
-            self._process_signals(signals, current_prices, timestamp)
+            self._process_signals(signals, current_prices, timestamp, members)
 
             self._update_equity(current_prices, timestamp)
 
         self._finalize()
 
-    def _process_signals(self, signals: List[Dict], current_prices: Dict[int, float], timestamp):
+    def _process_signals(
+        self,
+        signals: List[Dict],
+        current_prices: Dict[int, float],
+        timestamp,
+        members: Optional[set] = None,
+    ):
         for signal in signals:
             asset_id = signal["asset_id"]
             target_quantity = signal["quantity"]
-            current_quantity = self.positions.get(asset_id, 0.0)
+            current_quantity = self.book.quantity(asset_id)
 
             delta = target_quantity - current_quantity
 
             if abs(delta) < 1e-6:
                 continue
 
+            # Outside the universe a position may only shrink towards flat.
+            if members is not None and asset_id not in members:
+                if current_quantity * target_quantity < 0 or abs(target_quantity) > abs(
+                    current_quantity
+                ):
+                    continue
+
             side = "buy" if delta > 0 else "sell"
             quantity = abs(int(delta))
             price = current_prices.get(asset_id, 0.0)
@@ -98,10 +169,15 @@ class BacktestEngine:
                 if required_cash > self.cash:
                     continue
                 self.cash -= required_cash
-                self.positions[asset_id] = self.positions.get(asset_id, 0.0) + quantity
             else:
                 self.cash += cost - commission
-                self.positions[asset_id] = self.positions.get(asset_id, 0.0) - quantity
+            self.book.fill(
+                asset_id,
+                quantity if side == "buy" else -quantity,
+                execution_price,
+                commission,
+                timestamp,
+            )
 
             self.orders_data.append(
                 {
@@ -116,9 +192,9 @@ class BacktestEngine:
             )
 
     def _update_equity(self, current_prices: Dict[int, float], timestamp):
-        positions_value = sum(
-            qty * current_prices.get(aid, 0.0) for aid, qty in self.positions.items()
-        )
+        # Assets without a bar this period keep their last price.
+        self.book.mark(current_prices)
+        positions_value = self.book.market_value()
         self.equity = self.cash + positions_value
 
         if self.equity > self.peak_equity:
@@ -154,33 +230,36 @@ class BacktestEngine:
                 drawdown=row["drawdown"],
             )
 
+        Trade.objects.bulk_create(
+            [trade.to_model(self.strategy_run.id) for trade in self.book.trades], batch_size=1000
+        )
+
         self._calculate_metrics(equity_df)
         self._calculate_weekly_returns(equity_df)
 
     def _calculate_metrics(self, equity_df: pd.DataFrame):
         total_return = (self.equity - self.initial_capital) / self.initial_capital
 
-        days = len(equity_df)
-        years = days / 252.0 if days > 0 else 1.0
+        periods_per_year, years = self._annualization(equity_df["timestamp"])
         annual_return = (1 + total_return) ** (1 / years) - 1 if years > 0 else 0
 
         returns = equity_df["daily_return"].dropna()
         sharpe_ratio = None
         if len(returns) > 0 and returns.std() > 0:
-            sharpe_ratio = (returns.mean() / returns.std()) * np.sqrt(252)
+            sharpe_ratio = (returns.mean() / returns.std()) * np.sqrt(periods_per_year)
 
         sortino_ratio = None
         downside_returns = returns[returns < 0]
         if len(downside_returns) > 0 and downside_returns.std() > 0:
-            sortino_ratio = (returns.mean() / downside_returns.std()) * np.sqrt(252)
+            sortino_ratio = (returns.mean() / downside_returns.std()) * np.sqrt(periods_per_year)
 
         max_drawdown = equity_df["drawdown"].max()
 
-        total_trades = len(self.orders_data) // 2
-        winning_trades = 0
-        losing_trades = 0
-        avg_win = 0
-        avg_loss = 0
+        pnls = np.array([trade.pnl for trade in self.book.trades])
+        wins = pnls[pnls > 0]
+        losses = pnls[pnls < 0]
+        total_trades = len(pnls)
+        durations = [trade.duration_minutes for trade in self.book.trades]
 
         BacktestMetrics.objects.create(
             strategy_run=self.strategy_run,
@@ -190,20 +269,32 @@ class BacktestEngine:
             sortino_ratio=sortino_ratio,
             max_drawdown=max_drawdown,
             max_drawdown_duration_days=None,
-            win_rate=0,
-            profit_factor=None,
+            win_rate=len(wins) / total_trades if total_trades else 0,
+            profit_factor=wins.sum() / -losses.sum() if len(losses) else None,
             total_trades=total_trades,
-            winning_trades=winning_trades,
-            losing_trades=losing_trades,
-            avg_win=avg_win,
-            avg_loss=avg_loss,
-            avg_trade_duration_minutes=None,
+            winning_trades=len(wins),
+            losing_trades=len(losses),
+            avg_win=wins.mean() if len(wins) else 0,
+            avg_loss=losses.mean() if len(losses) else 0,
+            avg_trade_duration_minutes=float(np.mean(durations)) if durations else None,
             turnover=sum(o["execution_price"] * o["quantity"] for o in self.orders_data),
             total_commission=sum(o["commission"] for o in self.orders_data),
             total_slippage=0,
             implementation_shortfall_bps=None,
         )
 
+    def _annualization(self, timestamps: pd.Series):
+        """(periods per year, years covered), counted in exchange sessions."""
+        days = self.calendar.local_days(timestamps)
+        first, last = days.min().astype(object), days.max().astype(object)
+
+        sessions = max(len(self.calendar.sessions_between(first, last)), 1)
+        sessions_per_year = self.calendar.sessions_per_year(
+            first.replace(month=1, day=1), last.replace(month=12, day=31)
+        )
+        years = sessions / sessions_per_year
+        return len(timestamps) / years, years
+
     def _calculate_weekly_returns(self, equity_df: pd.DataFrame):
         equity_df = equity_df.copy()
         equity_df["timestamp"] = pd.to_datetime(equity_df["timestamp"])
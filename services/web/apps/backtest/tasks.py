@@ -7,7 +7,9 @@ from django.utils import timezone
 from apps.backtest.engine import BacktestEngine
 from apps.backtest.evaluator import WeeklyTargetEvaluator
 from apps.data.models import Asset
+from apps.data.universe import UniverseMask, universe_assets
 from apps.strategies.models import StrategyRun
+from apps.strategies.registry import strategy_registry
 from apps.strategies.sdk import FeeModel, SlippageModel
 from apps.strategies.sdk.fees import IndianEquityFeeModel
 from apps.strategies.sdk.slippage import FixedSlippageModel
@@ -21,8 +23,23 @@ def run_backtest(strategy_run_id: int):
         strategy_run.started_at = datetime.now()
         strategy_run.save()
 
-        universe_symbols = strategy_run.strategy.universe
-        universe = Asset.objects.filter(symbol__in=universe_symbols)
+        start_date = strategy_run.start_date
+        end_date = strategy_run.end_date or timezone.now().date()
+
+        # A list is a static set of symbols; {"index": "NIFTY50"} follows the
+        # index's point-in-time membership.
+        universe_spec = strategy_run.strategy.universe
+        membership = None
+        if isinstance(universe_spec, dict):
+            index = universe_spec["index"]
+            universe = universe_assets(index, start_date, end_date)
+            membership = UniverseMask.for_index(
+                index, [asset.id for asset in universe], start_date, end_date
+            )
+        else:
+            universe = list(
+                Asset.objects.filter(symbol__in=universe_spec).select_related("exchange")
+            )
 
         slippage_model = FixedSlippageModel(
             slippage_bps=settings.PAPER_SLIPPAGE_BPS
@@ -36,15 +53,23 @@ def run_backtest(strategy_run_id: int):
             fee_model=fee_model,
         )
 
-        def simple_callback(timestamp, bars_dict, positions):
-            signals = []
-            return signals
+        strategy = strategy_run.strategy
+        parameters = {**strategy.parameters, **strategy_run.parameters}
+        on_bar_callback = strategy_registry.bind(
+            strategy.class_path,
+            parameters,
+            engine,
+            universe,
+        )
 
         engine.run(
-            universe=list(universe),
-            start_date=strategy_run.start_date,
-            end_date=strategy_run.end_date or timezone.now().date(),
-            on_bar_callback=simple_callback,
+            universe=universe,
+            start_date=start_date,
+            end_date=end_date,
+            on_bar_callback=on_bar_callback,
+            timeframe=parameters.get("timeframe", "1D"),
+            membership=membership,
+            adjustment=parameters.get("adjustment", "adjusted"),
         )
 
         evaluator = WeeklyTargetEvaluator()
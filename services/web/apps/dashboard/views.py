@@ -61,7 +61,27 @@ def backtest_results(request, run_id):
 
 
 def live_monitor(request):
-    live_runs = StrategyRun.objects.filter(run_type__in=["live", "paper"], status="running")
+    from django.db.models import OuterRef, Subquery
+
+    from apps.live.models import SessionMetrics
+
+    latest = (
+        SessionMetrics.objects.filter(strategy_run=OuterRef("pk"))
+        .order_by("-timestamp")
+        .values("pk")[:1]
+    )
+    live_runs = list(
+        StrategyRun.objects.filter(run_type__in=["live", "paper"], status="running")
+        .select_related("strategy")
+        .annotate(latest_metrics_id=Subquery(latest))
+    )
+    metrics = SessionMetrics.objects.in_bulk(
+        [run.latest_metrics_id for run in live_runs if run.latest_metrics_id]
+    )
+    for run in live_runs:
+        run.metrics = metrics.get(run.latest_metrics_id)
+        if run.metrics is not None:
+            run.pnl = run.metrics.realized_pnl + run.metrics.unrealized_pnl
 
     context = {
         "live_runs": live_runs,
@@ -72,8 +92,14 @@ def live_monitor(request):
 
 def data_browser(request):
     from apps.data.models import Asset
-
-    assets = Asset.objects.filter(is_active=True)[:100]
+    from apps.data.quotes import get_quote_store
+
+    assets = list(
+        Asset.objects.filter(is_active=True).select_related("exchange", "asset_class")[:100]
+    )
+    quotes = get_quote_store().get_many(asset.id for asset in assets)
+    for asset in assets:
+        asset.quote = quotes.get(asset.id)
 
     context = {
         "assets": assets,
@@ -0,0 +1,158 @@
+"""
+Corporate-action adjustment factors.
+
+Bars are stored raw. Each split, bonus or dividend gets one AdjustmentFactor
+row; cumulative factors are the product of every factor on or after the row's
+ex-date, so a bar is adjusted by the cumulative factor of the first action
+whose ex-date falls after it. Adjusted prices are applied when bars are read.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.utils import timezone
+
+from apps.data.calendar import TradingCalendar
+from apps.data.models import AdjustmentFactor, Bar, CorporateAction
+
+PRICE_COLUMNS = ["open", "high", "low", "close"]
+
+ADJUSTMENT_MODES = ("raw", "adjusted")
+
+
+def action_factors(action: CorporateAction) -> Optional[Tuple[float, float]]:
+    """(price_factor, volume_factor) for an action, or None if it does not adjust bars."""
+    if action.action_type == "split" and action.ratio:
+        # ratio is new shares per old share, e.g. 5 for a 10 -> 2 face value split
+        ratio = float(action.ratio)
+        return 1.0 / ratio, ratio
+
+    if action.action_type == "bonus" and action.ratio:
+        # ratio is bonus shares issued per share held, e.g. 1 for a 1:1 bonus
+        ratio = 1.0 + float(action.ratio)
+        return 1.0 / ratio, ratio
+
+    if action.action_type == "dividend" and action.amount:
+        previous_close = (
+            Bar.objects.filter(
+                asset_id=action.asset_id,
+                timeframe="1D",
+                timestamp__lt=timezone.make_aware(
+                    datetime.combine(action.ex_date, datetime.min.time())
+                ),
+            )
+            .order_by("-timestamp")
+            .values_list("close", flat=True)
+            .first()
+        )
+        if previous_close and float(previous_close) > float(action.amount):
+            return 1.0 - float(action.amount) / float(previous_close), 1.0
+
+    return None
+
+
+@transaction.atomic
+def record_action(action: CorporateAction) -> Optional[AdjustmentFactor]:
+    factors = action_factors(action)
+    CorporateAction.objects.filter(pk=action.pk).update(is_processed=True)
+
+    if factors is None:
+        AdjustmentFactor.objects.filter(corporate_action=action).delete()
+        rebuild_cumulative(action.asset_id)
+        return None
+
+    factor, _ = AdjustmentFactor.objects.update_or_create(
+        corporate_action=action,
+        defaults={
+            "asset_id": action.asset_id,
+            "ex_date": action.ex_date,
+            "price_factor": factors[0],
+            "volume_factor": factors[1],
+        },
+    )
+    rebuild_cumulative(action.asset_id)
+    return factor
+
+
+def rebuild_cumulative(asset_id: int) -> int:
+    # One row per corporate action, so this is tiny next to the bar history.
+    factors = list(AdjustmentFactor.objects.filter(asset_id=asset_id).order_by("ex_date", "id"))
+    if not factors:
+        return 0
+
+    price = np.cumprod([f.price_factor for f in reversed(factors)])[::-1]
+    volume = np.cumprod([f.volume_factor for f in reversed(factors)])[::-1]
+    for factor, cumulative_price, cumulative_volume in zip(factors, price, volume, strict=True):
+        factor.cumulative_price_factor = float(cumulative_price)
+        factor.cumulative_volume_factor = float(cumulative_volume)
+
+    AdjustmentFactor.objects.bulk_update(
+        factors, ["cumulative_price_factor", "cumulative_volume_factor"]
+    )
+    return len(factors)
+
+
+class FactorTable:
+    def __init__(self, ex_dates: np.ndarray, price: np.ndarray, volume: np.ndarray):
+        self.ex_dates = ex_dates
+        self.price = np.append(price, 1.0)
+        self.volume = np.append(volume, 1.0)
+
+    def lookup(self, timestamps: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        index = np.searchsorted(self.ex_dates, timestamps, side="right")
+        return self.price[index], self.volume[index]
+
+
+def load_factors(
+    asset_ids: Iterable[int], tz: str = TradingCalendar.timezone
+) -> Dict[int, FactorTable]:
+    rows = pd.DataFrame.from_records(
+        list(
+            AdjustmentFactor.objects.filter(asset_id__in=list(asset_ids))
+            .order_by("asset_id", "ex_date", "id")
+            .values_list(
+                "asset_id", "ex_date", "cumulative_price_factor", "cumulative_volume_factor"
+            )
+        ),
+        columns=["asset_id", "ex_date", "price", "volume"],
+    )
+    if rows.empty:
+        return {}
+
+    # An action takes effect from the start of its ex-date in exchange time.
+    rows["ex_date"] = pd.to_datetime(rows["ex_date"]).dt.tz_localize(tz).dt.tz_convert("UTC")
+
+    tables = {}
+    for asset_id, group in rows.groupby("asset_id", sort=False):
+        # Keep the first row of each ex-date: its cumulative factor covers
+        # every action on that date.
+        group = group.drop_duplicates("ex_date", keep="first")
+        tables[asset_id] = FactorTable(
+            group["ex_date"].to_numpy(dtype="datetime64[ns]"),
+            group["price"].to_numpy(),
+            group["volume"].to_numpy(),
+        )
+    return tables
+
+
+def apply_adjustments(bars: pd.DataFrame, factors: Dict[int, FactorTable]) -> pd.DataFrame:
+    """Adjust a frame of raw bars (asset_id, timestamp, OHLCV columns)."""
+    if bars.empty or not factors:
+        return bars
+
+    bars = bars.copy()
+    timestamps = bars["timestamp"].dt.tz_convert("UTC").dt.tz_localize(None).to_numpy()
+    asset_ids = bars["asset_id"].to_numpy()
+
+    price = np.ones(len(bars))
+    volume = np.ones(len(bars))
+    for asset_id, table in factors.items():
+        mask = asset_ids == asset_id
+        if mask.any():
+            price[mask], volume[mask] = table.lookup(timestamps[mask])
+
+    bars[PRICE_COLUMNS] = bars[PRICE_COLUMNS].to_numpy() * price[:, None]
+    bars["volume"] = np.rint(bars["volume"].to_numpy() * volume).astype("int64")
+    return bars
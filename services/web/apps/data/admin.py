@@ -1,6 +1,18 @@
 from django.contrib import admin
 
-from .models import Asset, AssetClass, Bar, CorporateAction, Currency, Exchange
+from .models import (
+    AdjustmentFactor,
+    Asset,
+    AssetClass,
+    Bar,
+    CorporateAction,
+    Currency,
+    DataQualityIssue,
+    DataQualityScore,
+    Exchange,
+    IngestionCheckpoint,
+    UniverseMembership,
+)
 
 
 @admin.register(Exchange)
@@ -43,3 +55,55 @@ class CorporateActionAdmin(admin.ModelAdmin):
     list_filter = ["action_type", "is_processed"]
     search_fields = ["asset__symbol"]
     date_hierarchy = "ex_date"
+
+
+@admin.register(AdjustmentFactor)
+class AdjustmentFactorAdmin(admin.ModelAdmin):
+    list_display = [
+        "asset",
+        "ex_date",
+        "price_factor",
+        "volume_factor",
+        "cumulative_price_factor",
+        "cumulative_volume_factor",
+    ]
+    search_fields = ["asset__symbol"]
+    date_hierarchy = "ex_date"
+
+
+@admin.register(IngestionCheckpoint)
+class IngestionCheckpointAdmin(admin.ModelAdmin):
+    list_display = ["source", "exchange", "trade_date", "status", "rows", "duration_ms"]
+    list_filter = ["source", "exchange", "status"]
+    date_hierarchy = "trade_date"
+
+
+@admin.register(DataQualityIssue)
+class DataQualityIssueAdmin(admin.ModelAdmin):
+    list_display = ["asset", "timeframe", "timestamp", "rule", "severity", "value"]
+    list_filter = ["rule", "severity", "timeframe"]
+    search_fields = ["asset__symbol"]
+    date_hierarchy = "timestamp"
+
+
+@admin.register(DataQualityScore)
+class DataQualityScoreAdmin(admin.ModelAdmin):
+    list_display = [
+        "asset",
+        "timeframe",
+        "score",
+        "bars_checked",
+        "errors",
+        "warnings",
+        "last_timestamp",
+    ]
+    list_filter = ["timeframe"]
+    search_fields = ["asset__symbol"]
+
+
+@admin.register(UniverseMembership)
+class UniverseMembershipAdmin(admin.ModelAdmin):
+    list_display = ["index", "asset", "valid_from", "valid_to"]
+    list_filter = ["index"]
+    search_fields = ["asset__symbol"]
+    date_hierarchy = "valid_from"
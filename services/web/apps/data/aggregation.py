@@ -0,0 +1,178 @@
+"""
+Tick-to-minute bar aggregation.
+
+Tick files (CSV, optionally compressed) carry timestamp, price and qty
+columns, plus a symbol column when several instruments share a file;
+otherwise the file stem is used as the symbol. Naive timestamps are read as
+exchange-local time. Files are streamed in blocks and reduced to partial
+minute bars per block, so memory grows with the number of bars rather than
+the number of ticks.
+"""
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+from apps.data.calendar import TradingCalendar, get_calendar
+from apps.data.loaders.bulk import BulkBarWriter
+
+TICK_COLUMN_TYPES = {
+    "symbol": pa.string(),
+    "timestamp": pa.timestamp("ns"),
+    "price": pa.float64(),
+    "qty": pa.int64(),
+}
+
+TICK_FILE_SUFFIXES = (".csv", ".gz", ".bz2", ".zst")
+
+GROUP_KEYS = ["symbol", "bucket"]
+
+
+class MinuteBarAggregator:
+    def __init__(
+        self,
+        writer: BulkBarWriter,
+        calendar: Optional[TradingCalendar] = None,
+        block_size: int = 8 << 20,
+        compact_rows: int = 500_000,
+    ):
+        self.writer = writer
+        self.calendar = calendar or get_calendar(writer.exchange.code)
+        self.compact_rows = compact_rows
+        self.read_options = pacsv.ReadOptions(block_size=block_size)
+        self.convert_options = pacsv.ConvertOptions(
+            column_types=TICK_COLUMN_TYPES,
+            include_columns=list(TICK_COLUMN_TYPES),
+            include_missing_columns=True,
+        )
+
+    def iter_files(self, paths: Iterable) -> Iterator[Path]:
+        for path in map(Path, paths):
+            if path.is_dir():
+                yield from sorted(
+                    p for p in path.rglob("*") if p.is_file() and p.suffix in TICK_FILE_SUFFIXES
+                )
+            elif path.exists():
+                yield path
+
+    def process(self, paths: Iterable) -> Dict:
+        totals = {"files": 0, "ticks": 0, "bars": 0}
+        for path in self.iter_files(paths):
+            stats = self.process_file(path)
+            totals["files"] += 1
+            totals["ticks"] += stats["ticks"]
+            totals["bars"] += stats["bars"]
+        return totals
+
+    def process_file(self, path: Path) -> Dict:
+        path = Path(path)
+        default_symbol = path.name.split(".")[0].upper()
+
+        reader = pacsv.open_csv(
+            str(path), read_options=self.read_options, convert_options=self.convert_options
+        )
+
+        partials: List[pd.DataFrame] = []
+        partial_rows = 0
+        ticks = 0
+
+        for batch in reader:
+            frame = batch.to_pandas()
+            ticks += len(frame)
+            if frame["symbol"].isna().all():
+                frame["symbol"] = default_symbol
+
+            partial = self.partial_bars(frame)
+            partials.append(partial)
+            partial_rows += len(partial)
+
+            if partial_rows > self.compact_rows:
+                partials = [self.combine(pd.concat(partials, ignore_index=True))]
+                partial_rows = len(partials[0])
+
+        if not partials:
+            return {"ticks": 0, "bars": 0}
+
+        bars = self.combine(pd.concat(partials, ignore_index=True))
+        written = self.writer.upsert(self.to_bar_frame(bars), timeframe="1m")
+        return {"ticks": ticks, "bars": written}
+
+    def partial_bars(self, ticks: pd.DataFrame) -> pd.DataFrame:
+        ticks = ticks.dropna(subset=["timestamp", "price"])
+        ticks = ticks[ticks["qty"].fillna(0) > 0]
+
+        local = ticks["timestamp"]
+        if local.dt.tz is None:
+            local = local.dt.tz_localize(self.calendar.timezone)
+        else:
+            local = local.dt.tz_convert(self.calendar.timezone)
+
+        session, _ = self.calendar.locate(local)
+        in_session = session >= 0
+
+        ticks = ticks.loc[in_session]
+        local = local.loc[in_session]
+
+        ticks = pd.DataFrame(
+            {
+                "symbol": ticks["symbol"].str.strip().str.upper(),
+                "bucket": local.dt.floor("min"),
+                "ts": local,
+                "price": ticks["price"],
+                "qty": ticks["qty"],
+                "notional": ticks["price"] * ticks["qty"],
+            }
+        ).sort_values(["symbol", "ts"], kind="stable")
+
+        return (
+            ticks.groupby(GROUP_KEYS, sort=False)
+            .agg(
+                first_ts=("ts", "first"),
+                last_ts=("ts", "last"),
+                open=("price", "first"),
+                high=("price", "max"),
+                low=("price", "min"),
+                close=("price", "last"),
+                volume=("qty", "sum"),
+                turnover=("notional", "sum"),
+                trades=("price", "size"),
+            )
+            .reset_index()
+        )
+
+    @staticmethod
+    def combine(partials: pd.DataFrame) -> pd.DataFrame:
+        partials = partials.sort_values(GROUP_KEYS + ["first_ts"], kind="stable")
+        return (
+            partials.groupby(GROUP_KEYS, sort=False)
+            .agg(
+                first_ts=("first_ts", "min"),
+                last_ts=("last_ts", "max"),
+                open=("open", "first"),
+                high=("high", "max"),
+                low=("low", "min"),
+                close=("close", "last"),
+                volume=("volume", "sum"),
+                turnover=("turnover", "sum"),
+                trades=("trades", "sum"),
+            )
+            .reset_index()
+        )
+
+    @staticmethod
+    def to_bar_frame(bars: pd.DataFrame) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "symbol": bars["symbol"],
+                "timestamp": bars["bucket"].dt.tz_convert("UTC"),
+                "open": bars["open"],
+                "high": bars["high"],
+                "low": bars["low"],
+                "close": bars["close"],
+                "volume": bars["volume"].astype("int64"),
+                "turnover": bars["turnover"],
+                "trades": bars["trades"].astype("int64"),
+            }
+        )
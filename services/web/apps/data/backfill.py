@@ -0,0 +1,185 @@
+"""
+Historical bhavcopy backfill with per-date checkpoints.
+
+Dates are split across a bounded pool of workers (local processes or Celery
+tasks); each completed date is recorded in IngestionCheckpoint so a restarted
+backfill only loads what is still missing. A date with no archived bhavcopy
+is checkpointed as "missing" rather than loaded from elsewhere, and is tried
+again on the next run.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from typing import Callable, Dict, List, Optional
+
+from django.db import connections
+from django.utils import timezone
+
+from apps.data import metrics
+from apps.data.calendar import get_calendar
+from apps.data.loaders import get_loader
+from apps.data.loaders.archive import ArchiveMissingError
+from apps.data.models import IngestionCheckpoint
+
+SOURCE = "bhavcopy"
+
+_loaders: Dict[str, object] = {}
+
+
+def _get_loader(exchange: str):
+    loader = _loaders.get(exchange)
+    if loader is None:
+        loader = _loaders[exchange] = get_loader(exchange)
+    return loader
+
+
+def load_trade_date(exchange: str, trade_date: date) -> Dict:
+    """
+    Load one date and checkpoint it. A date missing from the archive is
+    returned as "missing"; any other error marks the checkpoint failed and
+    is re-raised.
+    """
+    IngestionCheckpoint.objects.update_or_create(
+        source=SOURCE,
+        exchange=exchange,
+        trade_date=trade_date,
+        defaults={"status": "running", "error_message": ""},
+    )
+
+    started = time.perf_counter()
+    try:
+        with metrics.stage(exchange, "1D", "load"):
+            rows = _get_loader(exchange).load_date(trade_date)
+    except ArchiveMissingError as e:
+        IngestionCheckpoint.objects.filter(
+            source=SOURCE, exchange=exchange, trade_date=trade_date
+        ).update(status="missing", error_message=str(e))
+        return {"date": str(trade_date), "status": "missing", "rows": 0, "error": str(e)}
+    except Exception as e:
+        IngestionCheckpoint.objects.filter(
+            source=SOURCE, exchange=exchange, trade_date=trade_date
+        ).update(status="failed", error_message=str(e))
+        raise
+
+    duration_ms = (time.perf_counter() - started) * 1000
+    mark_completed(exchange, trade_date, rows, duration_ms)
+
+    return {
+        "date": str(trade_date),
+        "status": "completed",
+        "rows": rows,
+        "duration_ms": duration_ms,
+    }
+
+
+def failed_result(trade_date: date, error: Exception) -> Dict:
+    return {"date": str(trade_date), "status": "failed", "rows": 0, "error": str(error)}
+
+
+def try_trade_date(exchange: str, trade_date: date) -> Dict:
+    """load_trade_date, with a failure returned as a failed result."""
+    try:
+        return load_trade_date(exchange, trade_date)
+    except Exception as e:
+        return failed_result(trade_date, e)
+
+
+def mark_completed(exchange: str, trade_date: date, rows: int, duration_ms: float) -> None:
+    IngestionCheckpoint.objects.update_or_create(
+        source=SOURCE,
+        exchange=exchange,
+        trade_date=trade_date,
+        defaults={
+            "status": "completed",
+            "rows": rows,
+            "duration_ms": duration_ms,
+            "error_message": "",
+            "completed_at": timezone.now(),
+        },
+    )
+
+
+def pending_dates(exchange: str, start: date, end: date) -> List[date]:
+    completed = set(
+        IngestionCheckpoint.objects.filter(
+            source=SOURCE,
+            exchange=exchange,
+            status="completed",
+            trade_date__gte=start,
+            trade_date__lte=end,
+        ).values_list("trade_date", flat=True)
+    )
+    return [d for d in get_calendar(exchange).trading_days(start, end) if d not in completed]
+
+
+def split_dates(dates: List[date], parts: int) -> List[List[date]]:
+    parts = max(1, min(parts, len(dates)))
+    return [dates[i::parts] for i in range(parts)]
+
+
+def summarize(results: List[Dict], elapsed_seconds: float) -> Dict:
+    rows = sum(r["rows"] for r in results)
+    failed = [r["date"] for r in results if r["status"] == "failed"]
+    missing = [r["date"] for r in results if r["status"] == "missing"]
+    return {
+        "dates": len(results),
+        "completed": sum(1 for r in results if r["status"] == "completed"),
+        "missing": missing,
+        "failed": failed,
+        "rows": rows,
+        "seconds": round(elapsed_seconds, 3),
+        "rows_per_second": round(rows / elapsed_seconds, 1) if elapsed_seconds > 0 else 0.0,
+    }
+
+
+def _init_worker():
+    import django
+
+    django.setup()
+
+
+class BackfillRunner:
+    def __init__(
+        self,
+        exchange: str,
+        workers: int = 4,
+        progress: Optional[Callable[[Dict], None]] = None,
+    ):
+        self.exchange = exchange.upper()
+        self.workers = workers
+        self.progress = progress
+
+    def run(self, start: date, end: date) -> Dict:
+        dates = pending_dates(self.exchange, start, end)
+        started = time.perf_counter()
+
+        if self.workers <= 1 or len(dates) <= 1:
+            results = []
+            for trade_date in dates:
+                results.append(self._report(try_trade_date(self.exchange, trade_date)))
+        else:
+            results = self._run_pool(dates)
+
+        summary = summarize(results, time.perf_counter() - started)
+        summary["exchange"] = self.exchange
+        return summary
+
+    def _run_pool(self, dates: List[date]) -> List[Dict]:
+        # Forked workers must not share the parent's database socket.
+        connections.close_all()
+
+        results = []
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as pool:
+            futures = {pool.submit(load_trade_date, self.exchange, d): d for d in dates}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = failed_result(futures[future], e)
+                results.append(self._report(result))
+        return results
+
+    def _report(self, result: Dict) -> Dict:
+        if self.progress:
+            self.progress(result)
+        return result
@@ -0,0 +1,347 @@
+"""
+Exchange trading calendars.
+
+Sessions are precomputed once per exchange into sorted numpy arrays (session
+dates plus UTC open/close instants) and a dense day-number lookup table, so
+"is this a session", "next/previous session" and "sessions between" are O(1)
+or a single binary search, and whole timestamp columns can be mapped to
+sessions and in-session minute offsets with one searchsorted.
+
+Holidays are known for the years in HOLIDAY_YEARS, extended by
+MARKET_HOLIDAYS_FILE. Asking about a day before them raises ValueError. Past
+the last known year the calendar runs on through the year after the current
+one, treating every weekday as a session and logging a warning, so daily
+ingestion and live trading keep working until the holiday list is updated.
+"""
+import csv
+import logging
+from datetime import date, datetime, time
+from typing import Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+NSE_HOLIDAYS = [
+    # 2023
+    "2023-01-26",
+    "2023-03-07",
+    "2023-03-30",
+    "2023-04-04",
+    "2023-04-07",
+    "2023-04-14",
+    "2023-05-01",
+    "2023-06-29",
+    "2023-08-15",
+    "2023-09-19",
+    "2023-10-02",
+    "2023-10-24",
+    "2023-11-14",
+    "2023-11-27",
+    "2023-12-25",
+    # 2024
+    "2024-01-22",
+    "2024-01-26",
+    "2024-03-08",
+    "2024-03-25",
+    "2024-03-29",
+    "2024-04-11",
+    "2024-04-17",
+    "2024-05-01",
+    "2024-05-20",
+    "2024-06-17",
+    "2024-07-17",
+    "2024-08-15",
+    "2024-10-02",
+    "2024-11-01",
+    "2024-11-15",
+    "2024-11-20",
+    "2024-12-25",
+    # 2025
+    "2025-02-26",
+    "2025-03-14",
+    "2025-03-31",
+    "2025-04-10",
+    "2025-04-14",
+    "2025-04-18",
+    "2025-05-01",
+    "2025-08-15",
+    "2025-08-27",
+    "2025-10-02",
+    "2025-10-21",
+    "2025-10-22",
+    "2025-11-05",
+    "2025-12-25",
+    # 2026
+    "2026-01-26",
+    "2026-03-03",
+    "2026-03-26",
+    "2026-03-31",
+    "2026-04-03",
+    "2026-04-14",
+    "2026-05-01",
+    "2026-05-28",
+    "2026-06-26",
+    "2026-09-14",
+    "2026-10-02",
+    "2026-10-20",
+    "2026-11-10",
+    "2026-11-24",
+    "2026-12-25",
+]
+
+# Sessions held outside the regular calendar (weekend/holiday sessions, and
+# Muhurat trading on Diwali), with their own open/close times.
+NSE_SPECIAL_SESSIONS = {
+    "2023-11-12": (time(18, 15), time(19, 15)),
+    "2024-01-20": (time(9, 15), time(15, 30)),
+    "2024-11-01": (time(18, 0), time(19, 0)),
+    "2025-02-01": (time(9, 15), time(15, 30)),
+    "2025-10-21": (time(13, 45), time(14, 45)),
+}
+
+# BSE's published equity holidays and special sessions for 2023-2026 fall on
+# the same dates as NSE's; kept as separate lists so either can diverge.
+BSE_HOLIDAYS = list(NSE_HOLIDAYS)
+BSE_SPECIAL_SESSIONS = dict(NSE_SPECIAL_SESSIONS)
+
+EXCHANGE_HOLIDAYS = {
+    "NSE": NSE_HOLIDAYS,
+    "BSE": BSE_HOLIDAYS,
+}
+
+EXCHANGE_SPECIAL_SESSIONS = {
+    "NSE": NSE_SPECIAL_SESSIONS,
+    "BSE": BSE_SPECIAL_SESSIONS,
+}
+
+# First and last year whose complete holiday list is above.
+HOLIDAY_YEARS = {
+    "NSE": (2023, 2026),
+    "BSE": (2023, 2026),
+}
+
+
+def read_holiday_file(path: str) -> Dict[str, List[str]]:
+    """
+    Holidays by exchange from a CSV with exchange and date columns. Every
+    year that appears for an exchange is taken to be listed in full.
+    """
+    holidays: Dict[str, List[str]] = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            holidays.setdefault(row["exchange"].strip().upper(), []).append(row["date"].strip())
+    return holidays
+
+
+def exchange_holidays(
+    exchange: str, extra: Optional[Iterable[str]] = None
+) -> Tuple[List[str], date, date]:
+    """An exchange's holidays and the span of years they cover."""
+    holidays = list(EXCHANGE_HOLIDAYS.get(exchange, []))
+    years = set()
+    if exchange in HOLIDAY_YEARS:
+        first, last = HOLIDAY_YEARS[exchange]
+        years.update(range(first, last + 1))
+    for day in extra or []:
+        holidays.append(day)
+        years.add(date.fromisoformat(day).year)
+
+    if not years:
+        raise ValueError(f"No holiday data for {exchange}")
+    missing = sorted(set(range(min(years), max(years) + 1)) - years)
+    if missing:
+        raise ValueError(f"No {exchange} holidays listed for {', '.join(map(str, missing))}")
+    return holidays, date(min(years), 1, 1), date(max(years), 12, 31)
+
+
+class TradingCalendar:
+    timezone = "Asia/Kolkata"
+    session_open = time(9, 15)
+    session_close = time(15, 30)
+
+    def __init__(
+        self,
+        exchange: str = "NSE",
+        holidays: Optional[Iterable[str]] = None,
+        special_sessions: Optional[Dict[str, Tuple[time, time]]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ):
+        self.exchange = exchange
+        if holidays is None or start is None or end is None:
+            known, first, last = exchange_holidays(exchange)
+            holidays = known if holidays is None else holidays
+            start = start or first
+            end = end or last
+        if special_sessions is None:
+            special_sessions = EXCHANGE_SPECIAL_SESSIONS.get(exchange, {})
+
+        self.holidays = {date.fromisoformat(str(h)) for h in holidays}
+        self.special_sessions = {
+            date.fromisoformat(str(d)): bounds for d, bounds in special_sessions.items()
+        }
+        self.start = start
+        # Last day with known holidays; the calendar runs on to last_day.
+        self.end = end
+        self.last_day = date(max(end.year, self.today().year) + 1, 12, 31)
+        self._warned = set()
+        self._build()
+
+    def _build(self) -> None:
+        days = np.arange(
+            np.datetime64(self.start, "D"),
+            np.datetime64(self.last_day, "D") + 1,
+            dtype="datetime64[D]",
+        )
+        is_session = np.is_busday(days)
+        if self.holidays:
+            is_session &= ~np.isin(days, np.array(sorted(self.holidays), dtype="datetime64[D]"))
+        if self.special_sessions:
+            special = np.array(sorted(self.special_sessions), dtype="datetime64[D]")
+            is_session |= np.isin(days, special)
+
+        self._is_session = is_session
+        # Number of sessions up to and including each calendar day
+        self._sessions_through = np.cumsum(is_session)
+        self.sessions = days[is_session]
+
+        open_offset = np.full(len(self.sessions), _minutes(self.session_open), dtype=np.int64)
+        close_offset = np.full(len(self.sessions), _minutes(self.session_close), dtype=np.int64)
+        for day, (open_, close) in self.special_sessions.items():
+            i = self.session_index(day)
+            if i is not None:
+                open_offset[i], close_offset[i] = _minutes(open_), _minutes(close)
+
+        midnight = pd.DatetimeIndex(self.sessions).tz_localize(self.timezone)
+        self.opens = (midnight + pd.to_timedelta(open_offset, unit="min")).tz_convert("UTC")
+        self.closes = (midnight + pd.to_timedelta(close_offset, unit="min")).tz_convert("UTC")
+        self._open_ns = self.opens.asi8
+        self._close_ns = self.closes.asi8
+
+    def _offset(self, day: date) -> int:
+        self._check_span(np.datetime64(day, "D"), np.datetime64(day, "D"))
+        return (day - self.start).days
+
+    def _check_span(self, first: np.datetime64, last: np.datetime64) -> None:
+        if first < np.datetime64(self.start, "D") or last > np.datetime64(self.last_day, "D"):
+            raise ValueError(
+                f"{first} - {last} is outside the {self.exchange} calendar "
+                f"({self.start} - {self.last_day})"
+            )
+        if last > np.datetime64(self.end, "D"):
+            year = last.astype(object).year
+            if year not in self._warned:
+                self._warned.add(year)
+                logger.warning(
+                    "No %s holidays known after %s; treating every weekday in %d as a session",
+                    self.exchange,
+                    self.end,
+                    year,
+                )
+
+    def today(self) -> date:
+        return datetime.now(ZoneInfo(self.timezone)).date()
+
+    def is_trading_day(self, day: date) -> bool:
+        return bool(self._is_session[self._offset(day)])
+
+    def local_days(self, timestamps) -> np.ndarray:
+        """Exchange-local calendar date of each timestamp, as datetime64[D]."""
+        local = pd.DatetimeIndex(timestamps).tz_convert(self.timezone).tz_localize(None)
+        return local.to_numpy().astype("datetime64[D]")
+
+    def is_session_day(self, days: np.ndarray) -> np.ndarray:
+        days = days.astype("datetime64[D]")
+        if len(days):
+            self._check_span(days.min(), days.max())
+        offsets = (days - np.datetime64(self.start, "D")).astype(np.int64)
+        return self._is_session[offsets]
+
+    def session_index(self, day: date) -> Optional[int]:
+        offset = self._offset(day)
+        if not self._is_session[offset]:
+            return None
+        return int(self._sessions_through[offset]) - 1
+
+    def previous_trading_day(self, day: date) -> date:
+        offset = self._offset(day)
+        count = int(self._sessions_through[offset]) - int(self._is_session[offset])
+        if count == 0:
+            raise ValueError(f"No {self.exchange} session before {day}")
+        return self.sessions[count - 1].astype(object)
+
+    def next_trading_day(self, day: date) -> date:
+        count = int(self._sessions_through[self._offset(day)])
+        if count >= len(self.sessions):
+            raise ValueError(f"No {self.exchange} session after {day}")
+        return self.sessions[count].astype(object)
+
+    def sessions_between(self, start: date, end: date) -> np.ndarray:
+        if start <= end:
+            self._check_span(np.datetime64(start, "D"), np.datetime64(end, "D"))
+        lo = np.searchsorted(self.sessions, np.datetime64(start, "D"), side="left")
+        hi = np.searchsorted(self.sessions, np.datetime64(end, "D"), side="right")
+        return self.sessions[lo:hi]
+
+    def trading_days(self, start: date, end: date) -> List[date]:
+        return self.sessions_between(start, end).astype(object).tolist()
+
+    def session_bounds(self, day: date) -> Tuple[datetime, datetime]:
+        i = self.session_index(day)
+        if i is None:
+            raise ValueError(f"{day} is not a {self.exchange} session")
+        return self.opens[i].to_pydatetime(), self.closes[i].to_pydatetime()
+
+    def sessions_per_year(self, start: date, end: date) -> float:
+        sessions = len(self.sessions_between(start, end))
+        years = ((end - start).days + 1) / 365.25
+        return sessions / years if years > 0 else float(sessions)
+
+    def locate(self, timestamps) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Map timestamps to (session index, minute within session). Both are -1
+        for timestamps outside every session.
+        """
+        stamps = pd.DatetimeIndex(timestamps)
+        if len(stamps):
+            self._check_span(*self.local_days([stamps.min(), stamps.max()]))
+        ns = stamps.tz_convert("UTC").asi8
+        session = np.searchsorted(self._open_ns, ns, side="right") - 1
+        valid = session >= 0
+        clipped = np.where(valid, session, 0)
+        valid &= ns < self._close_ns[clipped]
+
+        minute = (ns - self._open_ns[clipped]) // 60_000_000_000
+        return np.where(valid, session, -1), np.where(valid, minute, -1)
+
+    def minute_index(self, timestamp: datetime) -> int:
+        return int(self.locate([timestamp])[1][0])
+
+    def is_open(self, moment: Optional[datetime] = None) -> bool:
+        """Whether moment (default now) falls within a session."""
+        moment = moment or datetime.now(ZoneInfo(self.timezone))
+        return bool(self.locate([moment])[0][0] >= 0)
+
+
+def _minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+_calendars: Dict[str, TradingCalendar] = {}
+
+
+def get_calendar(exchange: str = "NSE") -> TradingCalendar:
+    exchange = exchange.upper()
+    calendar = _calendars.get(exchange)
+    if calendar is None:
+        from django.conf import settings
+
+        extra = []
+        if settings.MARKET_HOLIDAYS_FILE:
+            extra = read_holiday_file(settings.MARKET_HOLIDAYS_FILE).get(exchange, [])
+        holidays, start, end = exchange_holidays(exchange, extra)
+        calendar = _calendars[exchange] = TradingCalendar(exchange, holidays, start=start, end=end)
+    return calendar
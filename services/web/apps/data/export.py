@@ -0,0 +1,291 @@
+"""
+Parquet research export of the bars table.
+
+Files are laid out as root/timeframe=<tf>/year=<yyyy>/month=<m>/part-0.parquet
+with months taken in exchange time. Rows are sorted by (asset_id, timestamp)
+and written with row-group statistics, so readers skip files and row groups
+that cannot match a symbol or time filter.
+
+Every bar upsert records a BarIngestBatch with the time range it wrote. A
+sync rewrites each month touched by a batch not yet exported, then flags
+those batches exported. Updated bars and transactions that commit out of
+order are therefore picked up, at the cost of rewriting whole months. The
+first sync of a timeframe, or a full one, exports every month.
+"""
+import fcntl
+import json
+import os
+import shutil
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from django.conf import settings
+from django.db.models import FloatField
+from django.db.models.functions import Cast, TruncMonth
+
+from apps.data.calendar import TradingCalendar
+from apps.data.models import Bar, BarIngestBatch
+
+MANIFEST = "_manifest.json"
+
+SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("asset_id", pa.int64()),
+        ("symbol", pa.string()),
+        ("exchange", pa.string()),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("open", pa.float64()),
+        ("high", pa.float64()),
+        ("low", pa.float64()),
+        ("close", pa.float64()),
+        ("volume", pa.int64()),
+        ("turnover", pa.float64()),
+        ("trades", pa.int64()),
+    ]
+)
+
+PARTITIONING = ds.partitioning(
+    pa.schema([("year", pa.int16()), ("month", pa.int8())]), flavor="hive"
+)
+
+# What readers see: the file schema plus the hive partition keys.
+DATASET_SCHEMA = SCHEMA.append(pa.field("year", pa.int16())).append(pa.field("month", pa.int8()))
+
+ENGINES = ("pandas", "polars", "arrow")
+
+FLOAT_FIELDS = ["open", "high", "low", "close", "turnover"]
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+class ParquetExporter:
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        tz: str = TradingCalendar.timezone,
+        batch_size: int = 100_000,
+        row_group_size: int = 128 * 1024,
+    ):
+        root = root or settings.BARS_EXPORT_DIR
+        if not root:
+            raise ValueError("No export directory: set BARS_EXPORT_DIR or pass root")
+        self.root = Path(root)
+        self.tz = ZoneInfo(tz)
+        self.batch_size = batch_size
+        self.row_group_size = row_group_size
+
+    def load_manifest(self) -> Dict:
+        path = self.root / MANIFEST
+        if not path.exists():
+            return {"timeframes": {}}
+        return json.loads(path.read_text())
+
+    def save_manifest(self, manifest: Dict) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f".{MANIFEST}.tmp"
+        tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+        os.replace(tmp, self.root / MANIFEST)
+
+    def partition_dir(self, timeframe: str, month: date) -> Path:
+        return self.root / f"timeframe={timeframe}" / f"year={month.year}" / f"month={month.month}"
+
+    def month_bounds(self, month: date) -> Tuple[datetime, datetime]:
+        end = _next_month(month)
+        return (
+            datetime(month.year, month.month, 1, tzinfo=self.tz),
+            datetime(end.year, end.month, 1, tzinfo=self.tz),
+        )
+
+    def all_months(self, timeframe: str) -> List[date]:
+        return sorted(
+            month.date()
+            for month in Bar.objects.filter(timeframe=timeframe)
+            .annotate(month=TruncMonth("timestamp", tzinfo=self.tz))
+            .order_by()
+            .values_list("month", flat=True)
+            .distinct()
+        )
+
+    def touched_months(self, batches: List[Tuple]) -> List[date]:
+        """Months in exchange time overlapped by the batches' written ranges."""
+        months: Set[date] = set()
+        for _, first, last in batches:
+            month = first.astimezone(self.tz).date().replace(day=1)
+            end = last.astimezone(self.tz).date().replace(day=1)
+            while month <= end:
+                months.add(month)
+                month = _next_month(month)
+        return sorted(months)
+
+    def sync(self, timeframes: Optional[Iterable[str]] = None, full: bool = False) -> Dict:
+        self.root.mkdir(parents=True, exist_ok=True)
+        # Ingest tasks for several exchanges can finish together; serialise them.
+        with open(self.root / ".sync.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            return self._sync(timeframes, full)
+
+    def _sync(self, timeframes: Optional[Iterable[str]], full: bool) -> Dict:
+        manifest = self.load_manifest()
+        if timeframes is None:
+            timeframes = Bar.objects.order_by().values_list("timeframe", flat=True).distinct()
+
+        totals = {"timeframes": 0, "partitions": 0, "rows": 0}
+        for timeframe in sorted(set(timeframes)):
+            # Taken before reading bars: a batch committed during the sync
+            # stays unexported and is picked up by the next one.
+            batches = list(
+                BarIngestBatch.objects.filter(timeframe=timeframe, exported=False).values_list(
+                    "id", "first_timestamp", "last_timestamp"
+                )
+            )
+
+            state = manifest["timeframes"].get(timeframe)
+            if full or state is None:
+                shutil.rmtree(self.root / f"timeframe={timeframe}", ignore_errors=True)
+                state = {"partitions": []}
+                months = self.all_months(timeframe)
+            else:
+                months = self.touched_months(batches)
+
+            partitions = set(state["partitions"])
+            for month in months:
+                totals["rows"] += self.write_partition(timeframe, month)
+                totals["partitions"] += 1
+                partitions.add(month.strftime("%Y-%m"))
+
+            state["partitions"] = sorted(partitions)
+            manifest["timeframes"][timeframe] = state
+            self.save_manifest(manifest)
+            BarIngestBatch.objects.filter(id__in=[b[0] for b in batches]).update(exported=True)
+            totals["timeframes"] += 1
+
+        return totals
+
+    def write_partition(self, timeframe: str, month: date) -> int:
+        directory = self.partition_dir(timeframe, month)
+        # Dot-prefixed paths are skipped by dataset discovery until renamed.
+        tmp = directory.with_name(f".{directory.name}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        rows = self.write_file(tmp / "part-0.parquet", timeframe, month)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp, directory)
+        return rows
+
+    def write_file(self, path: Path, timeframe: str, month: date) -> int:
+        start, end = self.month_bounds(month)
+        queryset = (
+            Bar.objects.filter(timeframe=timeframe, timestamp__gte=start, timestamp__lt=end)
+            .annotate(**{f"{name}_float": Cast(name, FloatField()) for name in FLOAT_FIELDS})
+            .order_by("asset_id", "timestamp")
+            .values_list(
+                "id",
+                "asset_id",
+                "asset__symbol",
+                "asset__exchange__code",
+                "timestamp",
+                "open_float",
+                "high_float",
+                "low_float",
+                "close_float",
+                "volume",
+                "turnover_float",
+                "trades",
+            )
+        )
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        rows = 0
+        with pq.ParquetWriter(tmp, SCHEMA, compression="zstd", write_statistics=True) as writer:
+            batch = []
+            for row in queryset.iterator(chunk_size=self.batch_size):
+                batch.append(row)
+                if len(batch) == self.batch_size:
+                    rows += self._write_batch(writer, batch)
+                    batch = []
+            if batch:
+                rows += self._write_batch(writer, batch)
+        os.replace(tmp, path)
+        return rows
+
+    def _write_batch(self, writer: pq.ParquetWriter, batch: List[tuple]) -> int:
+        table = pa.Table.from_arrays(
+            [
+                pa.array(values, type=field.type)
+                for values, field in zip(zip(*batch, strict=True), SCHEMA, strict=True)
+            ],
+            schema=SCHEMA,
+        )
+        writer.write_table(table, row_group_size=self.row_group_size)
+        return len(batch)
+
+
+def load_bars(
+    timeframe: str = "1D",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    symbols: Optional[Iterable[str]] = None,
+    columns: Optional[List[str]] = None,
+    engine: str = "pandas",
+    root: Optional[str] = None,
+    tz: str = TradingCalendar.timezone,
+):
+    """
+    Read a slice of exported bars as a pandas or Polars frame (or an Arrow
+    table), pruning partitions and row groups on the time and symbol filters.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}, expected one of {', '.join(ENGINES)}")
+
+    root = Path(root or settings.BARS_EXPORT_DIR) / f"timeframe={timeframe}"
+    if not root.exists():
+        raise ValueError(f"No exported {timeframe} bars under {root.parent}")
+
+    dataset = ds.dataset(root, format="parquet", schema=DATASET_SCHEMA, partitioning=PARTITIONING)
+    month = pc.field("year").cast(pa.int32()) * 12 + pc.field("month").cast(pa.int32())
+    zone = ZoneInfo(tz)
+    timestamp_type = SCHEMA.field("timestamp").type
+
+    condition = None
+
+    def where(expression):
+        nonlocal condition
+        condition = expression if condition is None else condition & expression
+
+    if start is not None:
+        # Naive bounds are taken in exchange time, like the partitions.
+        start = start if start.tzinfo else start.replace(tzinfo=zone)
+        local = start.astimezone(zone)
+        where(month >= local.year * 12 + local.month)
+        where(pc.field("timestamp") >= pa.scalar(start, type=timestamp_type))
+    if end is not None:
+        # Naive bounds are taken in exchange time, like the partitions.
+        end = end if end.tzinfo else end.replace(tzinfo=zone)
+        local = end.astimezone(zone)
+        where(month <= local.year * 12 + local.month)
+        where(pc.field("timestamp") <= pa.scalar(end, type=timestamp_type))
+    if symbols is not None:
+        where(pc.field("symbol").isin(list(symbols)))
+
+    columns = columns or SCHEMA.names
+    table = dataset.to_table(columns=columns, filter=condition)
+    order = [(name, "ascending") for name in ["asset_id", "timestamp"] if name in columns]
+    if order:
+        table = table.sort_by(order)
+
+    if engine == "arrow":
+        return table
+    if engine == "polars":
+        import polars as pl
+
+        return pl.from_arrow(table)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
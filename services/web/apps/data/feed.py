@@ -0,0 +1,124 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from apps.data.adjustments import ADJUSTMENT_MODES, FactorTable, apply_adjustments, load_factors
+from apps.data.models import Asset, Bar
+from apps.data.resample import INTRADAY_MINUTES, BarResampler, read_bars
+from apps.strategies.sdk import DataFeed
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume", "turnover", "trades"]
+
+
+class DatabaseDataFeed(DataFeed):
+    """
+    DataFeed over the bars table. Intraday timeframes derived from 1m bars
+    are brought up to date the first time an asset is read at that
+    timeframe, so callers never see a stale 5m/15m/30m/1H series.
+
+    Bars are stored raw; with adjustment="adjusted" corporate-action factors
+    are applied to each frame as it is read.
+    """
+
+    def __init__(
+        self,
+        exchange: str = "NSE",
+        timeframe: str = "1D",
+        materialize: bool = True,
+        adjustment: str = "adjusted",
+    ):
+        if adjustment not in ADJUSTMENT_MODES:
+            raise ValueError(f"Unknown adjustment mode: {adjustment}")
+
+        self.exchange = exchange.upper()
+        self.timeframe = timeframe
+        self.materialize = materialize
+        self.adjustment = adjustment
+        self.resampler = BarResampler(self.exchange)
+        self._asset_ids: Dict[str, int] = {}
+        self._fresh: Set[Tuple[int, str]] = set()
+        self._factors: Dict[int, Optional[FactorTable]] = {}
+
+    def asset_ids(self, symbols: List[str]) -> Dict[str, int]:
+        missing = [s for s in symbols if s not in self._asset_ids]
+        if missing:
+            self._asset_ids.update(
+                Asset.objects.filter(exchange__code=self.exchange, symbol__in=missing).values_list(
+                    "symbol", "id"
+                )
+            )
+        return {s: self._asset_ids[s] for s in symbols if s in self._asset_ids}
+
+    def refresh(self) -> None:
+        self._fresh.clear()
+        self._factors.clear()
+
+    def _adjust(self, bars: pd.DataFrame) -> pd.DataFrame:
+        if self.adjustment == "raw" or bars.empty:
+            return bars
+
+        asset_ids = bars["asset_id"].unique().tolist()
+        missing = [a for a in asset_ids if a not in self._factors]
+        if missing:
+            loaded = load_factors(missing, self.resampler.calendar.timezone)
+            self._factors.update({a: loaded.get(a) for a in missing})
+
+        factors = {a: self._factors[a] for a in asset_ids if self._factors[a] is not None}
+        return apply_adjustments(bars, factors)
+
+    def _ensure(self, asset_ids: List[int], timeframe: str) -> None:
+        if not self.materialize or timeframe not in INTRADAY_MINUTES:
+            return
+
+        stale = [a for a in asset_ids if (a, timeframe) not in self._fresh]
+        if stale:
+            self.resampler.run(stale, [timeframe])
+            self._fresh.update((a, timeframe) for a in stale)
+
+    def _bars(self, symbols: List[str], timeframe: str):
+        ids = self.asset_ids(symbols)
+        self._ensure(list(ids.values()), timeframe)
+        return ids, Bar.objects.filter(asset_id__in=ids.values(), timeframe=timeframe)
+
+    @staticmethod
+    def _to_frame(bars: pd.DataFrame) -> pd.DataFrame:
+        return bars.set_index("timestamp")[OHLCV_COLUMNS]
+
+    def get_bars(
+        self,
+        symbols: List[str],
+        start: datetime,
+        end: datetime,
+        timeframe: str = "1D",
+    ) -> Dict[str, pd.DataFrame]:
+        ids, queryset = self._bars(symbols, timeframe)
+        bars = read_bars(
+            queryset.filter(timestamp__gte=start, timestamp__lte=end).order_by(
+                "asset_id", "timestamp"
+            )
+        )
+
+        bars = self._adjust(bars)
+
+        by_asset = dict(iter(bars.groupby("asset_id", sort=False)))
+        empty = self._to_frame(bars.iloc[:0])
+        return {
+            symbol: self._to_frame(by_asset[asset_id]) if asset_id in by_asset else empty
+            for symbol, asset_id in ids.items()
+        }
+
+    def get_latest_bar(self, symbol: str, timestamp: datetime) -> Optional[pd.Series]:
+        window = self.get_historical_window(symbol, timestamp, 1)
+        if window.empty:
+            return None
+        return window.iloc[-1]
+
+    def get_historical_window(
+        self, symbol: str, timestamp: datetime, lookback_bars: int
+    ) -> pd.DataFrame:
+        _, queryset = self._bars([symbol], self.timeframe)
+        bars = read_bars(
+            queryset.filter(timestamp__lte=timestamp).order_by("-timestamp")[:lookback_bars]
+        )
+        return self._to_frame(self._adjust(bars.iloc[::-1]))
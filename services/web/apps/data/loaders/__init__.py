@@ -2,3 +2,16 @@ from .bhavcopy import BSEBhavcopyLoader, NSEBhavcopyLoader
 from .corporate_actions import CorporateActionsLoader
 
 __all__ = ["NSEBhavcopyLoader", "BSEBhavcopyLoader", "CorporateActionsLoader"]
+
+
+def get_loader(exchange: str = "NSE"):
+    loaders = {
+        "NSE": NSEBhavcopyLoader,
+        "BSE": BSEBhavcopyLoader,
+    }
+
+    loader_class = loaders.get(exchange.upper())
+    if not loader_class:
+        raise ValueError(f"Unknown exchange: {exchange}")
+
+    return loader_class()
@@ -0,0 +1,200 @@
+"""
+Streaming reader for archived NSE/BSE bhavcopy ZIPs.
+
+ZIP members are parsed straight from the compressed stream with pyarrow's
+incremental CSV reader using explicit column types, then renamed to the
+BulkBarWriter schema. No member is extracted to disk and no per-row Python
+objects are built before the bars themselves.
+"""
+import re
+import zipfile
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+from django.utils import timezone
+
+from apps.data import metrics
+
+
+class ArchiveMissingError(Exception):
+    """No archived bhavcopy for a trade date."""
+
+
+class BhavcopyLayout:
+    def __init__(
+        self,
+        exchange: str,
+        column_types: Dict[str, pa.DataType],
+        rename: Dict[str, str],
+        member_pattern: str,
+        member_date_format: str,
+        archive_name: str,
+        series_column: Optional[str] = None,
+        series: Tuple[str, ...] = (),
+    ):
+        self.exchange = exchange
+        self.column_types = column_types
+        self.rename = rename
+        self.member_pattern = re.compile(member_pattern, re.IGNORECASE)
+        self.member_date_format = member_date_format
+        self.archive_name = archive_name
+        self.series_column = series_column
+        self.series = series
+
+    def matches(self, member_name: str) -> bool:
+        return self.member_pattern.search(Path(member_name).name) is not None
+
+    def trade_date(self, member_name: str) -> Optional[date]:
+        match = self.member_pattern.search(Path(member_name).name)
+        if not match:
+            return None
+        return datetime.strptime(match.group(1).upper(), self.member_date_format).date()
+
+    def archive_filename(self, trade_date: date) -> str:
+        return self.archive_name.format(date=trade_date.strftime(self.member_date_format).upper())
+
+
+NSE_LAYOUT = BhavcopyLayout(
+    exchange="NSE",
+    column_types={
+        "SYMBOL": pa.string(),
+        "SERIES": pa.string(),
+        "OPEN": pa.float64(),
+        "HIGH": pa.float64(),
+        "LOW": pa.float64(),
+        "CLOSE": pa.float64(),
+        "TOTTRDQTY": pa.int64(),
+        "TOTTRDVAL": pa.float64(),
+        "TOTALTRADES": pa.int64(),
+        "ISIN": pa.string(),
+    },
+    rename={
+        "SYMBOL": "symbol",
+        "OPEN": "open",
+        "HIGH": "high",
+        "LOW": "low",
+        "CLOSE": "close",
+        "TOTTRDQTY": "volume",
+        "TOTTRDVAL": "turnover",
+        "TOTALTRADES": "trades",
+        "ISIN": "isin",
+    },
+    member_pattern=r"^cm(\d{2}[A-Za-z]{3}\d{4})bhav\.csv$",
+    member_date_format="%d%b%Y",
+    archive_name="cm{date}bhav.csv.zip",
+    series_column="SERIES",
+    series=("EQ",),
+)
+
+BSE_LAYOUT = BhavcopyLayout(
+    exchange="BSE",
+    column_types={
+        "SC_CODE": pa.int64(),
+        "SC_NAME": pa.string(),
+        "OPEN": pa.float64(),
+        "HIGH": pa.float64(),
+        "LOW": pa.float64(),
+        "CLOSE": pa.float64(),
+        "NO_TRADES": pa.int64(),
+        "NO_OF_SHRS": pa.int64(),
+        "NET_TURNOV": pa.float64(),
+    },
+    rename={
+        "SC_NAME": "symbol",
+        "OPEN": "open",
+        "HIGH": "high",
+        "LOW": "low",
+        "CLOSE": "close",
+        "NO_OF_SHRS": "volume",
+        "NET_TURNOV": "turnover",
+        "NO_TRADES": "trades",
+    },
+    member_pattern=r"^EQ(\d{6})\.CSV$",
+    member_date_format="%d%m%y",
+    archive_name="EQ{date}_CSV.ZIP",
+)
+
+LAYOUTS = {
+    "NSE": NSE_LAYOUT,
+    "BSE": BSE_LAYOUT,
+}
+
+
+class BhavcopyArchiveReader:
+    def __init__(self, exchange: str = "NSE", block_size: int = 1 << 20):
+        layout = LAYOUTS.get(exchange.upper())
+        if layout is None:
+            raise ValueError(f"Unknown exchange: {exchange}")
+
+        self.layout = layout
+        self.read_options = pacsv.ReadOptions(block_size=block_size)
+        self.convert_options = pacsv.ConvertOptions(
+            column_types=layout.column_types,
+            include_columns=list(layout.column_types),
+            include_missing_columns=True,
+            strings_can_be_null=True,
+        )
+
+    def iter_archives(self, paths: Iterable) -> Iterator[Path]:
+        for path in map(Path, paths):
+            if path.is_dir():
+                yield from sorted(p for p in path.rglob("*") if p.suffix.lower() == ".zip")
+            elif path.exists():
+                yield path
+
+    def iter_tables(self, archive: Path) -> Iterator[Tuple[date, pa.Table]]:
+        with zipfile.ZipFile(archive) as zf:
+            for info in zf.infolist():
+                if info.is_dir() or not self.layout.matches(info.filename):
+                    continue
+
+                trade_date = self.layout.trade_date(info.filename)
+                with metrics.stage(self.layout.exchange, "1D", "parse"):
+                    with zf.open(info) as stream:
+                        reader = pacsv.open_csv(
+                            stream,
+                            read_options=self.read_options,
+                            convert_options=self.convert_options,
+                        )
+                        table = self._normalize(reader.read_all())
+
+                yield trade_date, table
+
+    def read(self, paths: Iterable) -> Iterator[Tuple[date, pd.DataFrame]]:
+        for archive in self.iter_archives(paths):
+            for trade_date, table in self.iter_tables(archive):
+                frame = table.to_pandas()
+                frame["timestamp"] = timezone.make_aware(
+                    datetime.combine(trade_date, datetime.min.time())
+                )
+                yield trade_date, frame
+
+    def read_date(self, archive_dir, trade_date: date) -> Optional[pd.DataFrame]:
+        archive = Path(archive_dir) / self.layout.archive_filename(trade_date)
+        if not archive.exists():
+            return None
+
+        for member_date, frame in self.read([archive]):
+            if member_date == trade_date:
+                return frame
+        return None
+
+    def _normalize(self, table: pa.Table) -> pa.Table:
+        layout = self.layout
+
+        if layout.series_column and layout.series:
+            table = table.filter(
+                pc.is_in(
+                    pc.utf8_trim_whitespace(table[layout.series_column]),
+                    value_set=pa.array(layout.series),
+                )
+            )
+
+        columns = {target: table[source] for source, target in layout.rename.items()}
+        columns["symbol"] = pc.utf8_trim_whitespace(columns["symbol"])
+        return pa.table(columns)
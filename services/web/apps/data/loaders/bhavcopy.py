@@ -5,19 +5,25 @@ from typing import List, Optional
 
 import pandas as pd
 import requests
-from django.db import transaction
+from django.conf import settings
 from django.utils import timezone
 
-from apps.data.models import Asset, AssetClass, Bar, Currency, Exchange
+from apps.data import metrics
+from apps.data.loaders.archive import ArchiveMissingError, BhavcopyArchiveReader
+from apps.data.loaders.bulk import BulkBarWriter
+from apps.data.models import AssetClass, Currency, Exchange
 
 
 class NSEBhavcopyLoader:
     BASE_URL = "https://www.nseindia.com/api/historical/cm/equity"
 
-    def __init__(self):
+    def __init__(self, archive_dir: Optional[str] = None):
         self.exchange = self._get_or_create_exchange()
         self.asset_class = self._get_or_create_asset_class()
         self.currency = self._get_or_create_currency()
+        self.writer = BulkBarWriter(self.exchange, self.asset_class, self.currency)
+        self.archive_dir = archive_dir or settings.BHAVCOPY_ARCHIVE_DIR
+        self.archive_reader = BhavcopyArchiveReader(self.exchange.code)
 
     def _get_or_create_exchange(self) -> Exchange:
         exchange, _ = Exchange.objects.get_or_create(
@@ -43,6 +49,13 @@ class NSEBhavcopyLoader:
         return currency
 
     def load_date(self, trade_date: date) -> int:
+        # With an archive directory configured only archived prices are loaded.
+        if self.archive_dir:
+            frame = self.archive_reader.read_date(self.archive_dir, trade_date)
+            if frame is None:
+                raise ArchiveMissingError(f"No {self.exchange.code} bhavcopy for {trade_date}")
+            return self.writer.upsert(frame)
+
         df = self._generate_sample_data(trade_date)
 
         if df is None or df.empty:
@@ -50,6 +63,15 @@ class NSEBhavcopyLoader:
 
         return self._save_bars(df, trade_date)
 
+    def load_archives(self, paths: List[str], on_date=None) -> int:
+        total = 0
+        for trade_date, frame in self.archive_reader.read(paths):
+            rows = self.writer.upsert(frame)
+            total += rows
+            if on_date:
+                on_date(trade_date, rows)
+        return total
+
     def _generate_sample_data(self, trade_date: date) -> Optional[pd.DataFrame]:
         nifty_50_symbols = [
             "RELIANCE",
@@ -101,52 +123,40 @@ class NSEBhavcopyLoader:
 
         return pd.DataFrame(data)
 
-    @transaction.atomic
     def _save_bars(self, df: pd.DataFrame, trade_date: date) -> int:
-        bars_created = 0
-
-        for _, row in df.iterrows():
-            symbol = row["SYMBOL"]
-
-            asset, created = Asset.objects.get_or_create(
-                symbol=symbol,
-                exchange=self.exchange,
-                defaults={
-                    "asset_class": self.asset_class,
-                    "currency": self.currency,
-                    "name": symbol,
-                    "isin": row.get("ISIN", ""),
-                },
-            )
-
-            timestamp = timezone.make_aware(datetime.combine(trade_date, datetime.min.time()))
-
-            Bar.objects.update_or_create(
-                asset=asset,
-                timestamp=timestamp,
-                timeframe="1D",
-                defaults={
-                    "open": row["OPEN"],
-                    "high": row["HIGH"],
-                    "low": row["LOW"],
-                    "close": row["CLOSE"],
-                    "volume": int(row["TOTTRDQTY"]),
-                    "turnover": row.get("TOTTRDVAL"),
-                    "trades": row.get("TOTALTRADES"),
-                },
-            )
-            bars_created += 1
-
-        return bars_created
+        with metrics.stage(self.exchange.code, "1D", "parse"):
+            frame = self._normalize(df, trade_date)
+        return self.writer.upsert(frame)
+
+    def _normalize(self, df: pd.DataFrame, trade_date: date) -> pd.DataFrame:
+        timestamp = timezone.make_aware(datetime.combine(trade_date, datetime.min.time()))
+
+        return pd.DataFrame(
+            {
+                "symbol": df["SYMBOL"],
+                "isin": df["ISIN"] if "ISIN" in df else "",
+                "timestamp": timestamp,
+                "open": df["OPEN"],
+                "high": df["HIGH"],
+                "low": df["LOW"],
+                "close": df["CLOSE"],
+                "volume": df["TOTTRDQTY"].astype("int64"),
+                "turnover": df.get("TOTTRDVAL"),
+                "trades": df.get("TOTALTRADES"),
+            }
+        )
 
 
 class BSEBhavcopyLoader:
     BASE_URL = "https://www.bseindia.com/download/BhavCopy/Equity/"
 
-    def __init__(self):
+    def __init__(self, archive_dir: Optional[str] = None):
         self.exchange = self._get_or_create_exchange()
         self.asset_class = self._get_or_create_asset_class()
         self.currency = self._get_or_create_currency()
+        self.writer = BulkBarWriter(self.exchange, self.asset_class, self.currency)
+        self.archive_dir = archive_dir or settings.BHAVCOPY_ARCHIVE_DIR
+        self.archive_reader = BhavcopyArchiveReader(self.exchange.code)
 
     def _get_or_create_exchange(self) -> Exchange:
         exchange, _ = Exchange.objects.get_or_create(
@@ -172,6 +182,13 @@ class BSEBhavcopyLoader:
         return currency
 
     def load_date(self, trade_date: date) -> int:
+        # With an archive directory configured only archived prices are loaded.
+        if self.archive_dir:
+            frame = self.archive_reader.read_date(self.archive_dir, trade_date)
+            if frame is None:
+                raise ArchiveMissingError(f"No {self.exchange.code} bhavcopy for {trade_date}")
+            return self.writer.upsert(frame)
+
         df = self._generate_sample_data(trade_date)
 
         if df is None or df.empty:
@@ -179,6 +196,15 @@ class BSEBhavcopyLoader:
 
         return self._save_bars(df, trade_date)
 
+    def load_archives(self, paths: List[str], on_date=None) -> int:
+        total = 0
+        for trade_date, frame in self.archive_reader.read(paths):
+            rows = self.writer.upsert(frame)
+            total += rows
+            if on_date:
+                on_date(trade_date, rows)
+        return total
+
     def _generate_sample_data(self, trade_date: date) -> Optional[pd.DataFrame]:
         sensex_symbols = [
             "SENSEX",
@@ -217,39 +243,24 @@ class BSEBhavcopyLoader:
 
         return pd.DataFrame(data)
 
-    @transaction.atomic
     def _save_bars(self, df: pd.DataFrame, trade_date: date) -> int:
-        bars_created = 0
-
-        for _, row in df.iterrows():
-            symbol = row["SC_NAME"]
-
-            asset, created = Asset.objects.get_or_create(
-                symbol=symbol,
-                exchange=self.exchange,
-                defaults={
-                    "asset_class": self.asset_class,
-                    "currency": self.currency,
-                    "name": symbol,
-                },
-            )
-
-            timestamp = timezone.make_aware(datetime.combine(trade_date, datetime.min.time()))
-
-            Bar.objects.update_or_create(
-                asset=asset,
-                timestamp=timestamp,
-                timeframe="1D",
-                defaults={
-                    "open": row["OPEN"],
-                    "high": row["HIGH"],
-                    "low": row["LOW"],
-                    "close": row["CLOSE"],
-                    "volume": int(row["NO_OF_SHRS"]),
-                    "turnover": row.get("NET_TURNOV"),
-                    "trades": row.get("NO_TRADES"),
-                },
-            )
-            bars_created += 1
-
-        return bars_created
+        with metrics.stage(self.exchange.code, "1D", "parse"):
+            frame = self._normalize(df, trade_date)
+        return self.writer.upsert(frame)
+
+    def _normalize(self, df: pd.DataFrame, trade_date: date) -> pd.DataFrame:
+        timestamp = timezone.make_aware(datetime.combine(trade_date, datetime.min.time()))
+
+        return pd.DataFrame(
+            {
+                "symbol": df["SC_NAME"],
+                "timestamp": timestamp,
+                "open": df["OPEN"],
+                "high": df["HIGH"],
+                "low": df["LOW"],
+                "close": df["CLOSE"],
+                "volume": df["NO_OF_SHRS"].astype("int64"),
+                "turnover": df.get("NET_TURNOV"),
+                "trades": df.get("NO_TRADES"),
+            }
+        )
@@ -0,0 +1,172 @@
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+from django.db import transaction
+
+from apps.data import metrics
+from apps.data.models import Asset, AssetClass, Bar, BarIngestBatch, Currency, Exchange
+from apps.data.quotes import get_quote_store
+
+BAR_COLUMNS = [
+    "symbol",
+    "timestamp",
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "turnover",
+    "trades",
+]
+
+UPDATE_FIELDS = ["open", "high", "low", "close", "volume", "turnover", "trades"]
+
+
+class BulkBarWriter:
+    """
+    Set-based bar ingestion: one query to resolve assets, one bulk_create for
+    the missing ones, and INSERT ... ON CONFLICT (asset, timestamp, timeframe)
+    DO UPDATE for the bars themselves.
+
+    Input frames use the normalised schema in BAR_COLUMNS, plus an optional
+    "isin" column used when new assets are created.
+    """
+
+    def __init__(
+        self,
+        exchange: Exchange,
+        asset_class: AssetClass,
+        currency: Currency,
+        timeframe: str = "1D",
+        batch_size: int = 5000,
+    ):
+        self.exchange = exchange
+        self.asset_class = asset_class
+        self.currency = currency
+        self.timeframe = timeframe
+        self.batch_size = batch_size
+        self._asset_ids: Dict[str, int] = {}
+
+    def resolve_assets(
+        self, symbols: Iterable[str], isins: Optional[Dict[str, str]] = None
+    ) -> Dict[str, int]:
+        symbols = [s for s in set(symbols) if s not in self._asset_ids]
+        if symbols:
+            self._asset_ids.update(self._fetch_asset_ids(symbols))
+
+            missing = [s for s in symbols if s not in self._asset_ids]
+            if missing:
+                isins = isins or {}
+                Asset.objects.bulk_create(
+                    [
+                        Asset(
+                            symbol=symbol,
+                            exchange=self.exchange,
+                            asset_class=self.asset_class,
+                            currency=self.currency,
+                            name=symbol,
+                            isin=isins.get(symbol) or "",
+                        )
+                        for symbol in missing
+                    ],
+                    batch_size=self.batch_size,
+                    ignore_conflicts=True,
+                )
+                self._asset_ids.update(self._fetch_asset_ids(missing))
+
+        return self._asset_ids
+
+    def _fetch_asset_ids(self, symbols: List[str]) -> Dict[str, int]:
+        return dict(
+            Asset.objects.filter(exchange=self.exchange, symbol__in=symbols).values_list(
+                "symbol", "id"
+            )
+        )
+
+    @transaction.atomic
+    def upsert(self, frame: pd.DataFrame, timeframe: Optional[str] = None) -> int:
+        if frame is None or frame.empty:
+            return 0
+
+        isins = None
+        if "isin" in frame.columns:
+            isins = dict(zip(frame["symbol"], frame["isin"], strict=True))
+
+        timeframe = timeframe or self.timeframe
+        with metrics.stage(self.exchange.code, timeframe, "resolve_assets"):
+            asset_ids = self.resolve_assets(frame["symbol"].unique(), isins)
+        bars = self.build_bars(frame, asset_ids, timeframe)
+
+        return save_bars(bars, self.batch_size, exchange=self.exchange.code)
+
+    @staticmethod
+    def build_bars(frame: pd.DataFrame, asset_ids: Dict[str, int], timeframe: str) -> List[Bar]:
+        frame = frame.reindex(columns=BAR_COLUMNS)
+        return bars_from_frame(frame.assign(asset_id=frame["symbol"].map(asset_ids)), timeframe)
+
+
+def bars_from_frame(frame: pd.DataFrame, timeframe: str) -> List[Bar]:
+    """
+    Build unsaved Bar rows from a frame keyed by an asset_id column. Of rows
+    with the same asset and timestamp only the last is kept: PostgreSQL's ON
+    CONFLICT DO UPDATE cannot touch one row twice in a single INSERT.
+    """
+    frame = frame.reindex(columns=["asset_id"] + BAR_COLUMNS[1:])
+    frame = frame.drop_duplicates(["asset_id", "timestamp"], keep="last")
+    turnover = frame["turnover"].astype(object).where(frame["turnover"].notna(), None)
+    trades = frame["trades"].astype(object).where(frame["trades"].notna(), None)
+
+    return [
+        Bar(
+            asset_id=asset_id,
+            timestamp=timestamp,
+            open=open_,
+            high=high,
+            low=low,
+            close=close,
+            volume=int(volume),
+            turnover=turnover_,
+            trades=None if trades_ is None else int(trades_),
+            timeframe=timeframe,
+        )
+        for asset_id, timestamp, open_, high, low, close, volume, turnover_, trades_ in zip(
+            frame["asset_id"],
+            pd.DatetimeIndex(frame["timestamp"]).to_pydatetime(),
+            frame["open"],
+            frame["high"],
+            frame["low"],
+            frame["close"],
+            frame["volume"],
+            turnover,
+            trades,
+            strict=True,
+        )
+    ]
+
+
+@transaction.atomic(savepoint=False)
+def save_bars(bars: List[Bar], batch_size: int = 5000, exchange: str = "") -> int:
+    if not bars:
+        return 0
+
+    with metrics.stage(exchange, bars[0].timeframe, "upsert"):
+        Bar.objects.bulk_create(
+            bars,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["asset", "timestamp", "timeframe"],
+            update_fields=UPDATE_FIELDS,
+        )
+        timestamps = [bar.timestamp for bar in bars]
+        BarIngestBatch.objects.create(
+            exchange=exchange,
+            timeframe=bars[0].timeframe,
+            asset_ids=sorted({int(bar.asset_id) for bar in bars}),
+            first_timestamp=min(timestamps),
+            last_timestamp=max(timestamps),
+            rows=len(bars),
+        )
+    transaction.on_commit(lambda: metrics.record_bars(exchange, bars))
+    # robust: a quote store outage must not fail ingestion that already committed
+    transaction.on_commit(lambda: get_quote_store().publish_bars(bars), robust=True)
+    return len(bars)
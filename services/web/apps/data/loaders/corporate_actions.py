@@ -1,52 +1,61 @@
 from datetime import date
-from typing import List
+from typing import Dict, List
 
 from django.db import transaction
 
+from apps.data import metrics
+from apps.data.adjustments import record_action
 from apps.data.models import Asset, CorporateAction
 
 
 class CorporateActionsLoader:
     def load_actions(self, actions: List[dict]) -> int:
-        created_count = 0
+        by_exchange: Dict[str, List[dict]] = {}
+        for action_data in actions:
+            by_exchange.setdefault(action_data.get("exchange", "NSE"), []).append(action_data)
 
+        created_count = 0
         with transaction.atomic():
-            for action_data in actions:
-                try:
-                    asset = Asset.objects.get(
-                        symbol=action_data["symbol"],
-                        exchange__code=action_data.get("exchange", "NSE"),
-                    )
-
-                    CorporateAction.objects.update_or_create(
-                        asset=asset,
-                        action_type=action_data["action_type"],
-                        ex_date=action_data["ex_date"],
-                        defaults={
-                            "record_date": action_data.get("record_date"),
-                            "payment_date": action_data.get("payment_date"),
-                            "ratio": action_data.get("ratio"),
-                            "amount": action_data.get("amount"),
-                            "details": action_data.get("details", {}),
-                        },
-                    )
-                    created_count += 1
-
-                except Asset.DoesNotExist:
-                    continue
+            for exchange, exchange_actions in by_exchange.items():
+                with metrics.stage(exchange, "1D", "corporate_actions"):
+                    created_count += self._load(exchange, exchange_actions)
 
         return created_count
 
-    def adjust_bars_for_splits(self, asset: Asset, split_date: date, ratio: float):
-        from apps.data.models import Bar
+    def _load(self, exchange: str, actions: List[dict]) -> int:
+        created_count = 0
+        for action_data in actions:
+            try:
+                asset = Asset.objects.get(symbol=action_data["symbol"], exchange__code=exchange)
+
+                action, _ = CorporateAction.objects.update_or_create(
+                    asset=asset,
+                    action_type=action_data["action_type"],
+                    ex_date=action_data["ex_date"],
+                    defaults={
+                        "record_date": action_data.get("record_date"),
+                        "payment_date": action_data.get("payment_date"),
+                        "ratio": action_data.get("ratio"),
+                        "amount": action_data.get("amount"),
+                        "details": action_data.get("details", {}),
+                    },
+                )
+                record_action(action)
+                created_count += 1
+
+            except Asset.DoesNotExist:
+                continue
 
-        bars = Bar.objects.filter(asset=asset, timestamp__lt=split_date)
+        return created_count
 
-        with transaction.atomic():
-            for bar in bars:
-                bar.open = bar.open / ratio
-                bar.high = bar.high / ratio
-                bar.low = bar.low / ratio
-                bar.close = bar.close / ratio
-                bar.volume = int(bar.volume * ratio)
-                bar.save()
+    def adjust_bars_for_splits(self, asset: Asset, split_date: date, ratio: float):
+        # Bars stay raw; the split is recorded as an adjustment factor that
+        # DataFeed applies when reading.
+        with metrics.stage(asset.exchange.code, "1D", "corporate_actions"):
+            action, _ = CorporateAction.objects.update_or_create(
+                asset=asset,
+                action_type="split",
+                ex_date=split_date,
+                defaults={"ratio": ratio},
+            )
+            return record_action(action)
@@ -0,0 +1,63 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from apps.data.backfill import BackfillRunner, pending_dates
+
+
+class Command(BaseCommand):
+    help = "Backfill NSE/BSE bhavcopy data for a date range, skipping completed dates"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--exchange", type=str, default="NSE", help="NSE or BSE")
+        parser.add_argument("--start", type=date.fromisoformat, required=True)
+        parser.add_argument("--end", type=date.fromisoformat, default=date.today())
+        parser.add_argument("--workers", type=int, default=4, help="Maximum concurrent dates")
+        parser.add_argument(
+            "--celery",
+            action="store_true",
+            help="Dispatch to Celery workers instead of a local process pool",
+        )
+
+    def handle(self, *args, **options):
+        exchange = options["exchange"].upper()
+        start, end = options["start"], options["end"]
+
+        if options["celery"]:
+            from apps.data.tasks import backfill_bhavcopy
+
+            result = backfill_bhavcopy.delay(
+                exchange, start.isoformat(), end.isoformat(), options["workers"]
+            )
+            self.stdout.write(self.style.SUCCESS(f"Dispatched backfill task {result.id}"))
+            return
+
+        remaining = len(pending_dates(exchange, start, end))
+        self.stdout.write(
+            f"Backfilling {exchange} {start} to {end}: {remaining} trading days pending, "
+            f"{options['workers']} workers"
+        )
+
+        runner = BackfillRunner(exchange, workers=options["workers"], progress=self._progress)
+        summary = runner.run(start, end)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Loaded {summary['rows']} bars across {summary['completed']} trading days "
+                f"in {summary['seconds']:.1f}s ({summary['rows_per_second']:,.0f} rows/sec)"
+            )
+        )
+        if summary["missing"]:
+            self.stdout.write(
+                self.style.WARNING(f"No bhavcopy archived for: {', '.join(summary['missing'])}")
+            )
+        if summary["failed"]:
+            self.stdout.write(self.style.ERROR(f"Failed dates: {', '.join(summary['failed'])}"))
+
+    def _progress(self, result):
+        if result["status"] == "completed":
+            self.stdout.write(f"  {result['date']}: {result['rows']} bars")
+        elif result["status"] == "missing":
+            self.stdout.write(self.style.WARNING(f"  {result['date']}: {result['error']}"))
+        else:
+            self.stdout.write(self.style.ERROR(f"  {result['date']}: {result['error']}"))
@@ -0,0 +1,148 @@
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.data.calendar import get_calendar
+from apps.data.loaders import get_loader
+from apps.data.models import Bar
+from apps.data.storage import storage_layout
+
+BAR_FIELDS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+
+class Command(BaseCommand):
+    help = "Time the bar access patterns used by backtests, DataFeed and resampling"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--exchange", type=str, default="NSE", help="NSE or BSE")
+        parser.add_argument("--timeframe", type=str, default="1m", help="Bar timeframe")
+        parser.add_argument("--assets", type=int, default=20, help="Assets per range scan")
+        parser.add_argument("--days", type=int, default=20, help="Sessions per range scan")
+        parser.add_argument("--repeat", type=int, default=20, help="Runs per query")
+        parser.add_argument(
+            "--seed",
+            type=str,
+            default="",
+            help="Generate synthetic 1m bars first, as ASSETS:SESSIONS (e.g. 50:60)",
+        )
+        parser.add_argument("--explain", action="store_true", help="Print query plans")
+
+    def handle(self, *args, **options):
+        exchange = options["exchange"].upper()
+        timeframe = options["timeframe"]
+        calendar = get_calendar(exchange)
+
+        if options["seed"]:
+            assets, sessions = (int(v) for v in options["seed"].split(":"))
+            self._seed(exchange, assets, sessions)
+
+        asset_ids = list(
+            Bar.objects.filter(timeframe=timeframe, asset__exchange__code=exchange)
+            .order_by()
+            .values_list("asset_id", flat=True)
+            .distinct()[: options["assets"]]
+        )
+        if not asset_ids:
+            self.stdout.write(self.style.WARNING(f"No {exchange} {timeframe} bars to benchmark"))
+            return
+
+        latest = Bar.objects.filter(asset_id__in=asset_ids, timeframe=timeframe).latest("timestamp")
+        end = latest.timestamp
+        sessions = calendar.sessions_between(
+            (end - timedelta(days=options["days"] * 2)).date(), end.date()
+        )[-options["days"] :]
+        start = pd.Timestamp(sessions[0]).tz_localize(calendar.timezone).to_pydatetime()
+
+        queries = {
+            "range scan (engine)": lambda: list(
+                Bar.objects.filter(
+                    asset_id__in=asset_ids,
+                    timeframe=timeframe,
+                    timestamp__gte=start,
+                    timestamp__lte=end,
+                )
+                .order_by("timestamp", "asset")
+                .values_list("asset_id", *BAR_FIELDS)
+            ),
+            "latest bar (DataFeed)": lambda: [
+                Bar.objects.filter(asset_id=asset_id, timeframe=timeframe, timestamp__lte=end)
+                .order_by("-timestamp")
+                .values_list(*BAR_FIELDS)
+                .first()
+                for asset_id in asset_ids
+            ],
+            "window 250 (DataFeed)": lambda: list(
+                Bar.objects.filter(asset_id=asset_ids[0], timeframe=timeframe, timestamp__lte=end)
+                .order_by("-timestamp")
+                .values_list(*BAR_FIELDS)[:250]
+            ),
+        }
+
+        rows = Bar.objects.filter(timeframe=timeframe).count()
+        self.stdout.write(
+            f"Layout: {storage_layout()} ({connection.vendor}), {rows:,} {timeframe} bars, "
+            f"{len(asset_ids)} assets x {len(sessions)} sessions, {options['repeat']} runs"
+        )
+
+        for name, query in queries.items():
+            query()  # warm the cache
+            timings = []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                result = query()
+                timings.append((time.perf_counter() - started) * 1000)
+
+            p50, p95 = np.percentile(timings, [50, 95])
+            self.stdout.write(
+                f"  {name:<24} rows={len(result):>8,}  p50={p50:8.2f}ms  p95={p95:8.2f}ms  "
+                f"max={max(timings):8.2f}ms"
+            )
+
+        if options["explain"] and connection.vendor == "postgresql":
+            scan = Bar.objects.filter(
+                asset_id__in=asset_ids,
+                timeframe=timeframe,
+                timestamp__gte=start,
+                timestamp__lte=end,
+            ).values_list(*BAR_FIELDS)
+            self.stdout.write(scan.explain(analyze=True, buffers=True))
+
+    def _seed(self, exchange: str, assets: int, sessions: int):
+        writer = get_loader(exchange).writer
+        calendar = get_calendar(exchange)
+        days = calendar.sessions_between(
+            calendar.today() - timedelta(days=sessions * 2), calendar.today()
+        )[-sessions:]
+        rng = np.random.default_rng(7)
+
+        started = time.perf_counter()
+        total = 0
+        for i in range(assets):
+            symbol = f"BENCH{i:04d}"
+            for day in days:
+                session_open, session_close = calendar.session_bounds(day.astype(datetime))
+                stamps = pd.date_range(session_open, session_close, freq="min", inclusive="left")
+                close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, len(stamps))))
+                total += writer.upsert(
+                    pd.DataFrame(
+                        {
+                            "symbol": symbol,
+                            "timestamp": stamps,
+                            "open": close,
+                            "high": close * 1.001,
+                            "low": close * 0.999,
+                            "close": close,
+                            "volume": rng.integers(100, 10_000, len(stamps)),
+                            "turnover": None,
+                            "trades": None,
+                        }
+                    ),
+                    timeframe="1m",
+                )
+        self.stdout.write(
+            f"Seeded {total:,} 1m bars for {assets} assets in {time.perf_counter() - started:.1f}s"
+        )
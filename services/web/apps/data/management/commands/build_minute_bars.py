@@ -1,17 +1,66 @@
+import time
+
+from django.conf import settings
 from django.core.management.base import BaseCommand
 
-from apps.data.models import Asset
+from apps.data.aggregation import MinuteBarAggregator
+from apps.data.loaders import get_loader
+from apps.data.resample import DEFAULT_TIMEFRAMES, DERIVED_TIMEFRAMES, BarResampler
 
 
 class Command(BaseCommand):
-    help = "Build minute bars from tick data (placeholder)"
+    help = "Aggregate tick files (files or directories) into 1-minute bars"
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*", help="Tick CSV files or directories")
+        parser.add_argument("--exchange", type=str, default="NSE", help="NSE or BSE")
+        parser.add_argument(
+            "--timeframes",
+            type=str,
+            default=",".join(DEFAULT_TIMEFRAMES),
+            help=f"Derived timeframes to refresh afterwards ({', '.join(DERIVED_TIMEFRAMES)})",
+        )
+        parser.add_argument(
+            "--no-resample", action="store_true", help="Skip refreshing derived timeframes"
+        )
 
     def handle(self, *args, **options):
-        assets = Asset.objects.filter(is_active=True)[:10]
+        paths = options["paths"] or [settings.TICK_DATA_DIR]
+        if not any(paths):
+            self.stdout.write(
+                self.style.WARNING("No tick paths given and TICK_DATA_DIR is not set")
+            )
+            return
+
+        exchange = options["exchange"].upper()
+        aggregator = MinuteBarAggregator(get_loader(exchange).writer)
+
+        files = list(aggregator.iter_files(paths))
+        if not files:
+            self.stdout.write(self.style.WARNING(f"No tick files found in {', '.join(paths)}"))
+            return
+
+        started = time.perf_counter()
+        ticks = bars = 0
+        for path in files:
+            stats = aggregator.process_file(path)
+            ticks += stats["ticks"]
+            bars += stats["bars"]
+            self.stdout.write(f"  {path.name}: {stats['ticks']} ticks -> {stats['bars']} bars")
+        elapsed = time.perf_counter() - started
 
-        self.stdout.write(f"Building minute bars for {assets.count()} assets...")
+        rate = ticks / elapsed if elapsed > 0 else 0.0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Built {bars} {exchange} minute bars from {ticks} ticks in {len(files)} files "
+                f"in {elapsed:.1f}s ({rate:,.0f} ticks/sec)"
+            )
+        )
 
-        for asset in assets:
-            self.stdout.write(f"  Processing {asset.symbol}...")
+        if options["no_resample"] or not bars:
+            return
 
-        self.stdout.write(self.style.SUCCESS("Minute bars building complete (simulated)"))
+        timeframes = [t.strip() for t in options["timeframes"].split(",") if t.strip()]
+        written = BarResampler(exchange).run(timeframes=timeframes)
+        for timeframe, count in written.items():
+            self.stdout.write(f"  {timeframe}: {count} bars refreshed")
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.data.backfill import mark_completed
+from apps.data.loaders import get_loader
+
+
+class Command(BaseCommand):
+    help = "Load archived bhavcopy ZIPs (files or directories) from local disk"
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="ZIP files or directories of ZIPs")
+        parser.add_argument("--exchange", type=str, default="NSE", help="NSE or BSE")
+
+    def handle(self, *args, **options):
+        exchange = options["exchange"].upper()
+        loader = get_loader(exchange)
+
+        self._exchange = exchange
+        self._dates = 0
+        self._last = time.perf_counter()
+
+        started = self._last
+        total = loader.load_archives(options["paths"], on_date=self._on_date)
+        elapsed = time.perf_counter() - started
+
+        rate = total / elapsed if elapsed > 0 else 0.0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Loaded {total} {exchange} bars across {self._dates} trading days "
+                f"in {elapsed:.1f}s ({rate:,.0f} rows/sec)"
+            )
+        )
+
+    def _on_date(self, trade_date, rows):
+        now = time.perf_counter()
+        mark_completed(self._exchange, trade_date, rows, (now - self._last) * 1000)
+        self._last = now
+        self._dates += 1
+        self.stdout.write(f"  {trade_date}: {rows} bars")
@@ -1,8 +1,10 @@
-from datetime import date, timedelta
+from datetime import timedelta
 
 from django.core.management.base import BaseCommand
 
+from apps.data.calendar import get_calendar
 from apps.data.loaders import BSEBhavcopyLoader
+from apps.data.loaders.archive import ArchiveMissingError
 
 
 class Command(BaseCommand):
@@ -11,24 +13,25 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         loader = BSEBhavcopyLoader()
 
-        end_date = date.today()
-        start_date = end_date - timedelta(days=45)
+        calendar = get_calendar("BSE")
+        end_date = calendar.today()
+        sessions = calendar.trading_days(end_date - timedelta(days=60), end_date)[-30:]
 
         total_bars = 0
         trading_days = 0
 
-        current_date = start_date
-        while current_date <= end_date:
-            if current_date.weekday() < 5:
-                self.stdout.write(f"Loading BSE data for {current_date}...")
+        for current_date in sessions:
+            self.stdout.write(f"Loading BSE data for {current_date}...")
+            try:
                 bars_created = loader.load_date(current_date)
-                total_bars += bars_created
-                trading_days += 1
-                self.stdout.write(
-                    self.style.SUCCESS(f"  Created {bars_created} bars for {current_date}")
-                )
-
-            current_date += timedelta(days=1)
+            except ArchiveMissingError as e:
+                self.stdout.write(self.style.WARNING(f"  {e}"))
+                continue
+            total_bars += bars_created
+            trading_days += 1
+            self.stdout.write(
+                self.style.SUCCESS(f"  Created {bars_created} bars for {current_date}")
+            )
 
         self.stdout.write(
             self.style.SUCCESS(
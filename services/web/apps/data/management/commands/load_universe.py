@@ -0,0 +1,64 @@
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.data.models import Asset, UniverseMembership
+
+
+class Command(BaseCommand):
+    help = "Load point-in-time index membership from a CSV of symbol,valid_from,valid_to"
+
+    def add_arguments(self, parser):
+        parser.add_argument("index", type=str, help="Index name, e.g. NIFTY50")
+        parser.add_argument("path", type=str, help="CSV with symbol,valid_from[,valid_to]")
+        parser.add_argument("--exchange", type=str, default="NSE", help="NSE or BSE")
+        parser.add_argument(
+            "--replace", action="store_true", help="Delete the index's existing rows first"
+        )
+
+    def handle(self, *args, **options):
+        index = options["index"].upper()
+        exchange = options["exchange"].upper()
+
+        frame = pd.read_csv(options["path"], dtype=str)
+        frame.columns = [c.strip().lower() for c in frame.columns]
+        if not {"symbol", "valid_from"} <= set(frame.columns):
+            raise CommandError("CSV needs symbol and valid_from columns")
+        frame = frame.reindex(columns=["symbol", "valid_from", "valid_to"])
+        frame["symbol"] = frame["symbol"].str.strip().str.upper()
+        frame["valid_from"] = pd.to_datetime(frame["valid_from"]).dt.date
+        frame["valid_to"] = pd.to_datetime(frame["valid_to"]).dt.date
+
+        asset_ids = dict(
+            Asset.objects.filter(exchange__code=exchange, symbol__in=frame["symbol"]).values_list(
+                "symbol", "id"
+            )
+        )
+        missing = sorted(set(frame["symbol"]) - set(asset_ids))
+        if missing:
+            self.stdout.write(self.style.WARNING(f"Skipping unknown symbols: {', '.join(missing)}"))
+        frame = frame[frame["symbol"].isin(asset_ids)]
+
+        rows = [
+            UniverseMembership(
+                index=index,
+                asset_id=asset_ids[symbol],
+                valid_from=valid_from,
+                valid_to=None if pd.isna(valid_to) else valid_to,
+            )
+            for symbol, valid_from, valid_to in frame.itertuples(index=False)
+        ]
+
+        with transaction.atomic():
+            if options["replace"]:
+                UniverseMembership.objects.filter(index=index).delete()
+            UniverseMembership.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=["index", "asset", "valid_from"],
+                update_fields=["valid_to"],
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Loaded {len(rows)} {index} membership intervals ({exchange})")
+        )
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.data.models import DataQualityScore
+from apps.data.quality import DataQualityScanner
+
+
+class Command(BaseCommand):
+    help = "Scan bars for data-quality issues (only bars added since the last scan)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--exchange", type=str, default="NSE", help="NSE or BSE")
+        parser.add_argument("--timeframe", type=str, default="1D", help="Bar timeframe")
+        parser.add_argument("--full", action="store_true", help="Rescan the full history")
+        parser.add_argument("--worst", type=int, default=10, help="Number of lowest scores to show")
+
+    def handle(self, *args, **options):
+        exchange = options["exchange"].upper()
+        timeframe = options["timeframe"]
+        scanner = DataQualityScanner(exchange, timeframe)
+
+        started = time.perf_counter()
+        result = scanner.run(full=options["full"])
+        elapsed = time.perf_counter() - started
+
+        rate = result["bars"] / elapsed if elapsed > 0 else 0.0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Scanned {result['bars']} {exchange} {timeframe} bars across {result['assets']} "
+                f"assets in {elapsed:.1f}s ({rate:,.0f} rows/sec): {result['issues']} issues"
+            )
+        )
+
+        worst = DataQualityScore.objects.filter(
+            asset__exchange__code=exchange, timeframe=timeframe, score__lt=1
+        ).select_related("asset")[: options["worst"]]
+        for score in worst:
+            self.stdout.write(
+                f"  {score.asset.symbol:<12} {score.score:.3f} "
+                f"({score.errors} errors, {score.warnings} warnings)"
+            )
@@ -0,0 +1,155 @@
+"""
+Prometheus instrumentation for bar ingestion.
+
+Loaders time their stages (parse, resolve_assets, upsert, load for a whole
+trade date, corporate_actions and check_corporate_actions) with stage();
+committed bars update the row counter and the
+newest bar timestamp per exchange/timeframe. The bar age gauge is derived from
+that timestamp when scraped, so it keeps growing while ingestion is stalled.
+
+Celery's prefork children write to PROMETHEUS_MULTIPROC_DIR when it is set;
+start_server() runs in the worker parent and aggregates them.
+"""
+import os
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    multiprocess,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+if MULTIPROC_DIR:
+    Path(MULTIPROC_DIR).mkdir(parents=True, exist_ok=True)
+
+# Bhavcopy dates take seconds, backfills and resamples can take minutes.
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+# How far back start_server() looks for the newest stored bars.
+SEED_LOOKBACK = timedelta(days=14)
+
+STAGE_SECONDS = Histogram(
+    "ingestion_stage_seconds",
+    "Time spent per ingestion stage",
+    ["exchange", "timeframe", "stage"],
+    buckets=STAGE_BUCKETS,
+)
+ROWS = Counter("ingestion_rows", "Bars written", ["exchange", "timeframe"])
+FAILURES = Counter(
+    "ingestion_failures", "Ingestion stages that raised", ["exchange", "timeframe", "stage"]
+)
+LATEST_BAR = Gauge(
+    "bars_latest_timestamp_seconds",
+    "Unix time of the newest stored bar",
+    ["exchange", "timeframe"],
+    multiprocess_mode="max",
+)
+
+_latest: Dict[Tuple[str, str], float] = {}
+
+
+@contextmanager
+def stage(exchange: str, timeframe: str, name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        FAILURES.labels(exchange, timeframe, name).inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(exchange, timeframe, name).observe(time.perf_counter() - started)
+
+
+def record_bars(exchange: str, bars: Iterable) -> None:
+    """Count written bars and advance the newest-bar gauge per timeframe."""
+    counts: Dict[str, int] = {}
+    latest: Dict[str, float] = {}
+    for bar in bars:
+        counts[bar.timeframe] = counts.get(bar.timeframe, 0) + 1
+        timestamp = bar.timestamp.timestamp()
+        if timestamp > latest.get(bar.timeframe, 0.0):
+            latest[bar.timeframe] = timestamp
+
+    for timeframe, count in counts.items():
+        ROWS.labels(exchange, timeframe).inc(count)
+        observe_latest(exchange, timeframe, latest[timeframe])
+
+
+def observe_latest(exchange: str, timeframe: str, timestamp: float) -> None:
+    # Re-loading an old date must not move the gauge backwards.
+    if timestamp > _latest.get((exchange, timeframe), 0.0):
+        _latest[exchange, timeframe] = timestamp
+        LATEST_BAR.labels(exchange, timeframe).set(timestamp)
+
+
+class BarAgeCollector:
+    """Exports bars_latest_age_seconds from the timestamp gauge at scrape time."""
+
+    def __init__(self, source):
+        self.source = source
+
+    def collect(self):
+        age = GaugeMetricFamily(
+            "bars_latest_age_seconds",
+            "Seconds since the newest stored bar",
+            labels=["exchange", "timeframe"],
+        )
+        now = time.time()
+        for metric in self.source.collect():
+            if metric.name != "bars_latest_timestamp_seconds":
+                continue
+            for sample in metric.samples:
+                if sample.value:
+                    labels = [sample.labels["exchange"], sample.labels["timeframe"]]
+                    age.add_metric(labels, now - sample.value)
+        yield age
+
+
+def build_registry() -> CollectorRegistry:
+    if MULTIPROC_DIR:
+        source = CollectorRegistry()
+        multiprocess.MultiProcessCollector(source, path=MULTIPROC_DIR)
+    else:
+        source = REGISTRY
+
+    registry = CollectorRegistry()
+    registry.register(source)
+    registry.register(BarAgeCollector(source))
+    return registry
+
+
+def seed_latest_bars() -> int:
+    """Initialise the newest-bar gauge from the bars table after a restart."""
+    from django.db.models import Max
+    from django.utils import timezone
+
+    from apps.data.models import Bar
+
+    rows = (
+        Bar.objects.filter(timestamp__gte=timezone.now() - SEED_LOOKBACK)
+        .values("asset__exchange__code", "timeframe")
+        .annotate(latest=Max("timestamp"))
+    )
+    seeded = 0
+    for row in rows:
+        observe_latest(row["asset__exchange__code"], row["timeframe"], row["latest"].timestamp())
+        seeded += 1
+    return seeded
+
+
+def start_server(port: int, addr: str = "0.0.0.0") -> None:
+    if MULTIPROC_DIR:
+        # Values left by a previous worker would otherwise be summed in.
+        for path in Path(MULTIPROC_DIR).glob("*.db"):
+            path.unlink()
+    start_http_server(port, addr=addr, registry=build_registry())
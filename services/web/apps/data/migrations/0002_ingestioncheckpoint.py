@@ -0,0 +1,54 @@
+# Generated by Django 5.0.14 on 2026-10-19 09:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IngestionCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("source", models.CharField(default="bhavcopy", max_length=30)),
+                ("exchange", models.CharField(max_length=10)),
+                ("trade_date", models.DateField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("running", "Running"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="running",
+                        max_length=20,
+                    ),
+                ),
+                ("rows", models.IntegerField(default=0)),
+                ("duration_ms", models.FloatField(null=True)),
+                ("error_message", models.TextField(blank=True)),
+                ("completed_at", models.DateTimeField(null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "ingestion_checkpoints",
+                "ordering": ["-trade_date"],
+                "indexes": [
+                    models.Index(
+                        fields=["source", "exchange", "status", "trade_date"],
+                        name="ingestion_c_source_2345d1_idx",
+                    )
+                ],
+                "unique_together": {("source", "exchange", "trade_date")},
+            },
+        ),
+    ]
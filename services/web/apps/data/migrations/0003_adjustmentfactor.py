@@ -0,0 +1,53 @@
+# Generated by Django 5.0.14 on 2026-10-19 09:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data", "0002_ingestioncheckpoint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AdjustmentFactor",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("ex_date", models.DateField()),
+                ("price_factor", models.FloatField(default=1.0)),
+                ("volume_factor", models.FloatField(default=1.0)),
+                ("cumulative_price_factor", models.FloatField(default=1.0)),
+                ("cumulative_volume_factor", models.FloatField(default=1.0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "asset",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="adjustment_factors",
+                        to="data.asset",
+                    ),
+                ),
+                (
+                    "corporate_action",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="adjustment_factor",
+                        to="data.corporateaction",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "adjustment_factors",
+                "ordering": ["asset", "ex_date", "id"],
+                "indexes": [
+                    models.Index(fields=["asset", "ex_date"], name="adjustment__asset_i_0b2b80_idx")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.0.14 on 2026-10-19 09:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data", "0003_adjustmentfactor"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DataQualityIssue",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("timeframe", models.CharField(default="1D", max_length=10)),
+                ("timestamp", models.DateTimeField()),
+                (
+                    "rule",
+                    models.CharField(
+                        choices=[
+                            ("ohlc", "OHLC inconsistency"),
+                            ("zero_volume", "Zero volume"),
+                            ("spike", "Price spike"),
+                            ("gap", "Missing sessions"),
+                            ("duplicate", "Duplicate bar"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "severity",
+                    models.CharField(
+                        choices=[("warning", "Warning"), ("error", "Error")],
+                        default="warning",
+                        max_length=10,
+                    ),
+                ),
+                ("value", models.FloatField(null=True)),
+                ("details", models.JSONField(default=dict)),
+                ("detected_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "asset",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="quality_issues",
+                        to="data.asset",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "data_quality_issues",
+                "ordering": ["-timestamp"],
+                "indexes": [
+                    models.Index(fields=["rule", "-timestamp"], name="data_qualit_rule_8f1b9a_idx")
+                ],
+                "unique_together": {("asset", "timeframe", "timestamp", "rule")},
+            },
+        ),
+        migrations.CreateModel(
+            name="DataQualityScore",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("timeframe", models.CharField(default="1D", max_length=10)),
+                ("bars_checked", models.BigIntegerField(default=0)),
+                ("errors", models.IntegerField(default=0)),
+                ("warnings", models.IntegerField(default=0)),
+                ("score", models.FloatField(default=1.0)),
+                ("last_timestamp", models.DateTimeField(null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "asset",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="quality_scores",
+                        to="data.asset",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "data_quality_scores",
+                "ordering": ["score"],
+                "unique_together": {("asset", "timeframe")},
+            },
+        ),
+    ]
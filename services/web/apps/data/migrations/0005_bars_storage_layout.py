@@ -0,0 +1,55 @@
+# Generated by Django 5.0.14 on 2026-10-19 09:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from apps.data import storage
+
+
+def partition_bars(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        if storage.storage_layout(cursor) != "plain":
+            return
+        if storage.has_timescale(cursor):
+            storage.convert_to_hypertable(cursor)
+        else:
+            storage.convert_to_partitioned(cursor)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data", "0004_data_quality"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="bar",
+            name="bars_asset_i_af164f_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="bar",
+            name="bars_timesta_ddaa14_idx",
+        ),
+        migrations.AlterField(
+            model_name="bar",
+            name="asset",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="bars",
+                to="data.asset",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="bar",
+            index=models.Index(
+                fields=["asset", "timeframe", "-timestamp"],
+                include=("open", "high", "low", "close", "volume"),
+                name="bars_asset_tf_ts_cover",
+            ),
+        ),
+        migrations.RunPython(partition_bars, migrations.RunPython.noop),
+    ]
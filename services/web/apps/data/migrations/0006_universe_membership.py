@@ -0,0 +1,66 @@
+# Generated by Django 5.0.14 on 2026-10-19 09:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+INTERVAL_INDEX = "universe_memberships_period_gist"
+
+
+def create_interval_index(apps, schema_editor):
+    # Range-overlap lookups in apps.data.universe use this; other databases
+    # fall back to the (index, valid_from, valid_to) btree index.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INTERVAL_INDEX} ON universe_memberships "
+        "USING gist (daterange(valid_from, valid_to, '[)'))"
+    )
+
+
+def drop_interval_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {INTERVAL_INDEX}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data", "0005_bars_storage_layout"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UniverseMembership",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("index", models.CharField(max_length=50)),
+                ("valid_from", models.DateField()),
+                ("valid_to", models.DateField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "asset",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="memberships",
+                        to="data.asset",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "universe_memberships",
+                "ordering": ["index", "valid_from", "asset"],
+                "indexes": [
+                    models.Index(
+                        fields=["index", "valid_from", "valid_to"],
+                        name="universe_me_index_739020_idx",
+                    )
+                ],
+                "unique_together": {("index", "asset", "valid_from")},
+            },
+        ),
+        migrations.RunPython(create_interval_index, drop_interval_index),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.14 on 2026-10-19 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data", "0006_universe_membership"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="ingestioncheckpoint",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("running", "Running"),
+                    ("completed", "Completed"),
+                    ("missing", "Missing"),
+                    ("failed", "Failed"),
+                ],
+                default="running",
+                max_length=20,
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.14 on 2026-10-19 11:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data", "0007_ingestioncheckpoint_missing"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BarIngestBatch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("exchange", models.CharField(max_length=10)),
+                ("timeframe", models.CharField(default="1D", max_length=10)),
+                ("asset_ids", models.JSONField(default=list)),
+                ("first_timestamp", models.DateTimeField()),
+                ("last_timestamp", models.DateTimeField()),
+                ("rows", models.IntegerField(default=0)),
+                ("quality_scanned", models.BooleanField(default=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "db_table": "bar_ingest_batches",
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(
+                        fields=["exchange", "timeframe", "quality_scanned"],
+                        name="bar_ingest__exchang_521f4d_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-19 11:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data", "0008_bar_ingest_batches"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="baringestbatch",
+            name="exported",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name="baringestbatch",
+            index=models.Index(
+                fields=["timeframe", "exported"], name="bar_ingest__timefra_7f1a8b_idx"
+            ),
+        ),
+    ]
@@ -71,7 +71,8 @@ class Asset(models.Model):
 
 
 class Bar(models.Model):
-    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name="bars")
+    # The unique constraint and covering index both lead with asset_id.
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name="bars", db_index=False)
     timestamp = models.DateTimeField(db_index=True)
     open = models.DecimalField(max_digits=20, decimal_places=4)
     high = models.DecimalField(max_digits=20, decimal_places=4)
@@ -87,8 +88,12 @@ class Bar(models.Model):
         unique_together = [["asset", "timestamp", "timeframe"]]
         ordering = ["-timestamp"]
         indexes = [
-            models.Index(fields=["asset", "-timestamp"]),
-            models.Index(fields=["timestamp"]),
+            # Covers the engine/DataFeed access path without heap lookups.
+            models.Index(
+                fields=["asset", "timeframe", "-timestamp"],
+                include=["open", "high", "low", "close", "volume"],
+                name="bars_asset_tf_ts_cover",
+            ),
         ]
 
     def __str__(self):
@@ -124,3 +129,155 @@ class CorporateAction(models.Model):
 
     def __str__(self):
         return f"{self.asset.symbol} {self.action_type} {self.ex_date}"
+
+
+class AdjustmentFactor(models.Model):
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name="adjustment_factors")
+    corporate_action = models.OneToOneField(
+        CorporateAction, on_delete=models.CASCADE, related_name="adjustment_factor"
+    )
+    ex_date = models.DateField()
+    price_factor = models.FloatField(default=1.0)
+    volume_factor = models.FloatField(default=1.0)
+    cumulative_price_factor = models.FloatField(default=1.0)
+    cumulative_volume_factor = models.FloatField(default=1.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "adjustment_factors"
+        ordering = ["asset", "ex_date", "id"]
+        indexes = [
+            models.Index(fields=["asset", "ex_date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.asset.symbol} {self.ex_date} x{self.cumulative_price_factor:.6f}"
+
+
+class IngestionCheckpoint(models.Model):
+    STATUS_CHOICES = [
+        ("running", "Running"),
+        ("completed", "Completed"),
+        ("missing", "Missing"),
+        ("failed", "Failed"),
+    ]
+
+    source = models.CharField(max_length=30, default="bhavcopy")
+    exchange = models.CharField(max_length=10)
+    trade_date = models.DateField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="running")
+    rows = models.IntegerField(default=0)
+    duration_ms = models.FloatField(null=True)
+    error_message = models.TextField(blank=True)
+    completed_at = models.DateTimeField(null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "ingestion_checkpoints"
+        unique_together = [["source", "exchange", "trade_date"]]
+        ordering = ["-trade_date"]
+        indexes = [
+            models.Index(fields=["source", "exchange", "status", "trade_date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.source} {self.exchange} {self.trade_date} {self.status}"
+
+
+class DataQualityIssue(models.Model):
+    RULE_CHOICES = [
+        ("ohlc", "OHLC inconsistency"),
+        ("zero_volume", "Zero volume"),
+        ("spike", "Price spike"),
+        ("gap", "Missing sessions"),
+        ("duplicate", "Duplicate bar"),
+    ]
+
+    SEVERITY_CHOICES = [
+        ("warning", "Warning"),
+        ("error", "Error"),
+    ]
+
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name="quality_issues")
+    timeframe = models.CharField(max_length=10, default="1D")
+    timestamp = models.DateTimeField()
+    rule = models.CharField(max_length=20, choices=RULE_CHOICES)
+    severity = models.CharField(max_length=10, choices=SEVERITY_CHOICES, default="warning")
+    value = models.FloatField(null=True)
+    details = models.JSONField(default=dict)
+    detected_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "data_quality_issues"
+        unique_together = [["asset", "timeframe", "timestamp", "rule"]]
+        ordering = ["-timestamp"]
+        indexes = [
+            models.Index(fields=["rule", "-timestamp"]),
+        ]
+
+    def __str__(self):
+        return f"{self.asset.symbol} {self.timestamp} {self.rule}"
+
+
+class DataQualityScore(models.Model):
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name="quality_scores")
+    timeframe = models.CharField(max_length=10, default="1D")
+    bars_checked = models.BigIntegerField(default=0)
+    errors = models.IntegerField(default=0)
+    warnings = models.IntegerField(default=0)
+    score = models.FloatField(default=1.0)
+    last_timestamp = models.DateTimeField(null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "data_quality_scores"
+        unique_together = [["asset", "timeframe"]]
+        ordering = ["score"]
+
+    def __str__(self):
+        return f"{self.asset.symbol} {self.timeframe} {self.score:.3f}"
+
+
+class BarIngestBatch(models.Model):
+    # One bar upsert: the assets and time range it wrote. Readers that keep a
+    # watermark use these to find history that was (re)written behind it.
+    exchange = models.CharField(max_length=10)
+    timeframe = models.CharField(max_length=10, default="1D")
+    asset_ids = models.JSONField(default=list)
+    first_timestamp = models.DateTimeField()
+    last_timestamp = models.DateTimeField()
+    rows = models.IntegerField(default=0)
+    quality_scanned = models.BooleanField(default=False)
+    exported = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "bar_ingest_batches"
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["exchange", "timeframe", "quality_scanned"]),
+            models.Index(fields=["timeframe", "exported"]),
+        ]
+
+    def __str__(self):
+        return f"{self.exchange} {self.timeframe} {self.first_timestamp} - {self.last_timestamp}"
+
+
+class UniverseMembership(models.Model):
+    # valid_to is exclusive; NULL means the asset is still a member.
+    index = models.CharField(max_length=50)
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name="memberships")
+    valid_from = models.DateField()
+    valid_to = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "universe_memberships"
+        unique_together = [["index", "asset", "valid_from"]]
+        ordering = ["index", "valid_from", "asset"]
+        indexes = [
+            models.Index(fields=["index", "valid_from", "valid_to"]),
+        ]
+
+    def __str__(self):
+        return f"{self.index} {self.asset.symbol} {self.valid_from}..{self.valid_to or ''}"
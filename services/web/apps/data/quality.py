@@ -0,0 +1,404 @@
+"""
+Vectorised data-quality checks over the bars table.
+
+Assets are scanned in chunks as flat numpy columns sorted by (asset, time),
+so every check is a handful of array operations regardless of how many
+assets a chunk holds. Each (asset, timeframe) keeps a watermark in
+DataQualityScore; later scans only flag bars newer than it, reading a short
+window of older bars as context for returns and gaps.
+
+Bars written behind a watermark, by a backfill or a corrected reload, are
+found through the BarIngestBatch rows their upserts recorded: the written
+range of each asset, and the bar after it, are checked again and the
+asset's score is recounted.
+"""
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.db.models import Count, Q
+
+from apps.data.calendar import TradingCalendar, get_calendar
+from apps.data.models import Asset, Bar, BarIngestBatch, DataQualityIssue, DataQualityScore
+from apps.data.resample import read_bars
+
+SEVERITY = {
+    "ohlc": "error",
+    "duplicate": "error",
+    "zero_volume": "warning",
+    "spike": "warning",
+    "gap": "warning",
+}
+
+PENALTY = {"error": 1.0, "warning": 0.25}
+
+
+class DataQualityScanner:
+    def __init__(
+        self,
+        exchange: str = "NSE",
+        timeframe: str = "1D",
+        calendar: Optional[TradingCalendar] = None,
+        chunk_size: int = 500,
+        spike_threshold: float = 8.0,
+        min_return_scale: float = 0.005,
+        context: Optional[timedelta] = None,
+    ):
+        self.exchange = exchange.upper()
+        self.timeframe = timeframe
+        self.calendar = calendar or get_calendar(self.exchange)
+        self.chunk_size = chunk_size
+        self.spike_threshold = spike_threshold
+        self.min_return_scale = min_return_scale
+        self.context = context or (timedelta(days=120) if timeframe == "1D" else timedelta(days=5))
+
+    def run(self, asset_ids: Optional[List[int]] = None, full: bool = False) -> Dict:
+        # Batches are only marked scanned by a scan of the whole exchange.
+        whole = asset_ids is None
+        if whole:
+            asset_ids = list(
+                Asset.objects.filter(exchange__code=self.exchange)
+                .order_by("id")
+                .values_list("id", flat=True)
+            )
+
+        batches = list(
+            BarIngestBatch.objects.filter(
+                exchange=self.exchange, timeframe=self.timeframe, quality_scanned=False
+            ).values_list("id", "asset_ids", "first_timestamp", "last_timestamp")
+        )
+        rewritten = {} if full else self.written_ranges(batches)
+
+        totals = {"assets": 0, "bars": 0, "issues": 0}
+        for i in range(0, len(asset_ids), self.chunk_size):
+            result = self.scan_chunk(asset_ids[i : i + self.chunk_size], full, rewritten)
+            for key in totals:
+                totals[key] += result[key]
+
+        if whole and batches:
+            BarIngestBatch.objects.filter(id__in=[b[0] for b in batches]).update(
+                quality_scanned=True
+            )
+        return totals
+
+    @staticmethod
+    def written_ranges(batches: List[Tuple]) -> Dict[int, Tuple]:
+        """The span each asset's bars were written over, across batches."""
+        ranges: Dict[int, Tuple] = {}
+        for _, asset_ids, first, last in batches:
+            for asset_id in asset_ids:
+                if asset_id in ranges:
+                    first_, last_ = ranges[asset_id]
+                    ranges[asset_id] = (min(first, first_), max(last, last_))
+                else:
+                    ranges[asset_id] = (first, last)
+        return ranges
+
+    def watermarks(self, asset_ids: List[int]) -> Dict[int, object]:
+        return dict(
+            DataQualityScore.objects.filter(
+                asset_id__in=asset_ids, timeframe=self.timeframe
+            ).values_list("asset_id", "last_timestamp")
+        )
+
+    @transaction.atomic
+    def scan_chunk(
+        self,
+        asset_ids: List[int],
+        full: bool = False,
+        rewritten: Optional[Dict[int, Tuple]] = None,
+    ) -> Dict:
+        if full:
+            DataQualityIssue.objects.filter(
+                asset_id__in=asset_ids, timeframe=self.timeframe
+            ).delete()
+            marks = {}
+        else:
+            marks = self.watermarks(asset_ids)
+
+        # Written ranges that reach behind the watermark; the part above it
+        # is scanned anyway.
+        rescan = {}
+        for asset_id in asset_ids:
+            span, mark = (rewritten or {}).get(asset_id), marks.get(asset_id)
+            if span is not None and mark is not None and span[0] <= mark:
+                rescan[asset_id] = (span[0], min(span[1], mark))
+
+        since: Dict[object, List[int]] = {}
+        for asset_id in asset_ids:
+            start = rescan[asset_id][0] if asset_id in rescan else marks.get(asset_id)
+            since.setdefault(start, []).append(asset_id)
+
+        condition = Q()
+        for mark, ids in since.items():
+            clause = Q(asset_id__in=ids)
+            if mark is not None:
+                clause &= Q(timestamp__gt=mark - self.context)
+            condition |= clause
+
+        bars = read_bars(
+            Bar.objects.filter(condition, timeframe=self.timeframe).order_by(
+                "asset_id", "timestamp"
+            )
+        )
+        if bars.empty:
+            return {"assets": 0, "bars": 0, "issues": 0}
+
+        mark = pd.to_datetime(bars["asset_id"].map(marks), utc=True)
+        new = (mark.isna() | (bars["timestamp"] > mark)).to_numpy()
+        if rescan:
+            new |= self.rescan_rows(bars, rescan)
+
+        issues = self.check(bars)
+        issues = issues[new[issues["row"].to_numpy()]] if not issues.empty else issues
+
+        DataQualityIssue.objects.bulk_create(
+            [
+                DataQualityIssue(
+                    asset_id=int(asset_id),
+                    timeframe=self.timeframe,
+                    timestamp=timestamp,
+                    rule=rule,
+                    severity=SEVERITY[rule],
+                    value=None if np.isnan(value) else float(value),
+                    details=details,
+                )
+                for asset_id, timestamp, rule, value, details in zip(
+                    bars["asset_id"].to_numpy()[issues["row"]],
+                    pd.DatetimeIndex(
+                        bars["timestamp"].to_numpy()[issues["row"]], tz="UTC"
+                    ).to_pydatetime(),
+                    issues["rule"],
+                    issues["value"],
+                    issues["details"],
+                    strict=True,
+                )
+            ],
+            batch_size=5000,
+            ignore_conflicts=True,
+        )
+
+        self.update_scores(bars[new], issues, full, recount=list(rescan))
+        return {
+            "assets": int(bars.loc[new, "asset_id"].nunique()),
+            "bars": int(new.sum()),
+            "issues": len(issues),
+        }
+
+    def rescan_rows(self, bars: pd.DataFrame, rescan: Dict[int, Tuple]) -> np.ndarray:
+        """
+        Rows inside each asset's rewritten range, plus the row after it,
+        whose return and gap depend on the range. Their old issues are
+        deleted so they can be flagged afresh.
+        """
+        asset = bars["asset_id"].to_numpy()
+        stamps = bars["timestamp"]
+        first = pd.to_datetime(bars["asset_id"].map({a: r[0] for a, r in rescan.items()}), utc=True)
+        last = pd.to_datetime(bars["asset_id"].map({a: r[1] for a, r in rescan.items()}), utc=True)
+        inside = ((stamps >= first) & (stamps <= last)).to_numpy()
+
+        rows = inside.copy()
+        rows[1:] |= inside[:-1] & (asset[1:] == asset[:-1])
+
+        touched = bars[rows].groupby("asset_id")["timestamp"].agg(["min", "max"])
+        if not touched.empty:
+            condition = Q()
+            for asset_id, span in touched.iterrows():
+                condition |= Q(
+                    asset_id=asset_id,
+                    timestamp__gte=span["min"].to_pydatetime(),
+                    timestamp__lte=span["max"].to_pydatetime(),
+                )
+            DataQualityIssue.objects.filter(condition, timeframe=self.timeframe).delete()
+        return rows
+
+    def check(self, bars: pd.DataFrame) -> pd.DataFrame:
+        """Flag rows of a frame sorted by (asset_id, timestamp)."""
+        asset = bars["asset_id"].to_numpy()
+        open_, high, low, close = (bars[c].to_numpy() for c in ["open", "high", "low", "close"])
+        volume = bars["volume"].to_numpy()
+        n = len(bars)
+
+        # True where the row continues the previous row's asset
+        same = np.zeros(n, dtype=bool)
+        same[1:] = asset[1:] == asset[:-1]
+
+        found = []
+
+        def flag(rule: str, mask: np.ndarray, value=None, details=None):
+            rows = np.flatnonzero(mask)
+            if len(rows):
+                found.append(
+                    pd.DataFrame(
+                        {
+                            "row": rows,
+                            "rule": rule,
+                            "value": np.nan if value is None else value[rows],
+                            "details": [{}] * len(rows) if details is None else details(rows),
+                        }
+                    )
+                )
+
+        flag(
+            "ohlc",
+            (high < np.maximum(open_, close))
+            | (low > np.minimum(open_, close))
+            | (low > high)
+            | (np.minimum.reduce([open_, high, low, close]) <= 0),
+        )
+        flag("zero_volume", volume <= 0)
+
+        # Robust z-score of log returns against the asset's median/MAD
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = np.where(same, np.log(close / np.roll(close, 1)), np.nan)
+        returns[~np.isfinite(returns)] = np.nan
+        grouped = pd.Series(returns).groupby(asset)
+        median = grouped.transform("median").to_numpy()
+        mad = pd.Series(np.abs(returns - median)).groupby(asset).transform("median").to_numpy()
+        # Floor the scale so quiet or tick-bound series don't turn small moves into spikes
+        mad = np.fmax(mad, self.min_return_scale)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = 0.6745 * (returns - median) / mad
+        flag("spike", np.abs(np.nan_to_num(z)) > self.spike_threshold, value=returns)
+
+        local = pd.DatetimeIndex(bars["timestamp"]).tz_convert(self.calendar.timezone)
+        if self.timeframe == "1D":
+            bucket = local.normalize().tz_localize(None).to_numpy()
+        else:
+            bucket = local.floor("min").tz_localize(None).to_numpy()
+        duplicate = np.zeros(n, dtype=bool)
+        duplicate[1:] = same[1:] & (bucket[1:] == bucket[:-1])
+        flag("duplicate", duplicate)
+
+        if self.timeframe == "1D" and n > 1:
+            days = bucket.astype("datetime64[D]")
+            position = np.searchsorted(self.calendar.sessions, days)
+            missing = np.zeros(n, dtype=np.int64)
+            missing[1:] = np.where(same[1:] & ~duplicate[1:], position[1:] - position[:-1] - 1, 0)
+            missing = np.maximum(missing, 0)
+            flag(
+                "gap",
+                missing > 0,
+                value=missing.astype(float),
+                details=lambda rows: [
+                    {"after": str(days[r - 1]), "missing_sessions": int(missing[r])} for r in rows
+                ],
+            )
+
+        if not found:
+            return pd.DataFrame(columns=["row", "rule", "value", "details"])
+        return pd.concat(found, ignore_index=True).sort_values("row", kind="stable")
+
+    def update_scores(
+        self,
+        bars: pd.DataFrame,
+        issues: pd.DataFrame,
+        full: bool,
+        recount: Optional[List[int]] = None,
+    ) -> None:
+        if bars.empty:
+            return
+
+        counts = bars.groupby("asset_id").agg(
+            bars=("timestamp", "size"), last_timestamp=("timestamp", "max")
+        )
+        if issues.empty:
+            counts["errors"] = 0
+            counts["warnings"] = 0
+        else:
+            flagged = pd.DataFrame(
+                {
+                    "asset_id": bars["asset_id"].reindex(issues["row"].to_numpy()).to_numpy(),
+                    "severity": issues["rule"].map(SEVERITY).to_numpy(),
+                }
+            )
+            by_severity = flagged.groupby(["asset_id", "severity"]).size().unstack(fill_value=0)
+            counts = counts.join(by_severity.reindex(columns=["error", "warning"], fill_value=0))
+            counts = counts.fillna(0).rename(columns={"error": "errors", "warning": "warnings"})
+
+        existing = (
+            {}
+            if full
+            else {
+                score.asset_id: score
+                for score in DataQualityScore.objects.filter(
+                    asset_id__in=counts.index.tolist(), timeframe=self.timeframe
+                )
+            }
+        )
+
+        # A rescan behind the watermark must not move it back.
+        marks = pd.to_datetime(
+            pd.Series({a: s.last_timestamp for a, s in existing.items()}, dtype=object), utc=True
+        )
+        counts["last_timestamp"] = np.maximum(
+            counts["last_timestamp"], marks.reindex(counts.index).fillna(counts["last_timestamp"])
+        )
+        totals = self.recount(
+            [a for a in recount or [] if a in counts.index], counts["last_timestamp"]
+        )
+
+        scores = []
+        for asset_id, row in counts.iterrows():
+            previous = existing.get(asset_id)
+            if asset_id in totals:
+                checked, errors, warnings = totals[asset_id]
+            else:
+                checked = int(row["bars"]) + (previous.bars_checked if previous else 0)
+                errors = int(row["errors"]) + (previous.errors if previous else 0)
+                warnings = int(row["warnings"]) + (previous.warnings if previous else 0)
+            penalty = errors * PENALTY["error"] + warnings * PENALTY["warning"]
+            scores.append(
+                DataQualityScore(
+                    asset_id=asset_id,
+                    timeframe=self.timeframe,
+                    bars_checked=checked,
+                    errors=errors,
+                    warnings=warnings,
+                    score=max(0.0, 1.0 - penalty / checked),
+                    last_timestamp=row["last_timestamp"].to_pydatetime(),
+                )
+            )
+
+        DataQualityScore.objects.bulk_create(
+            scores,
+            update_conflicts=True,
+            unique_fields=["asset", "timeframe"],
+            update_fields=["bars_checked", "errors", "warnings", "score", "last_timestamp"],
+        )
+
+    def recount(self, asset_ids: List[int], last: pd.Series) -> Dict[int, Tuple]:
+        """(bars, errors, warnings) of rescanned assets, counted afresh."""
+        if not asset_ids:
+            return {}
+
+        condition = Q()
+        for asset_id in asset_ids:
+            condition |= Q(asset_id=asset_id, timestamp__lte=last[asset_id].to_pydatetime())
+        checked = dict(
+            Bar.objects.filter(condition, timeframe=self.timeframe)
+            .order_by()
+            .values("asset_id")
+            .annotate(n=Count("id"))
+            .values_list("asset_id", "n")
+        )
+        flagged = {
+            (asset_id, severity): n
+            for asset_id, severity, n in DataQualityIssue.objects.filter(
+                asset_id__in=asset_ids, timeframe=self.timeframe
+            )
+            .order_by()
+            .values("asset_id", "severity")
+            .annotate(n=Count("id"))
+            .values_list("asset_id", "severity", "n")
+        }
+        return {
+            asset_id: (
+                checked.get(asset_id, 0),
+                flagged.get((asset_id, "error"), 0),
+                flagged.get((asset_id, "warning"), 0),
+            )
+            for asset_id in asset_ids
+        }
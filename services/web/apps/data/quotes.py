@@ -0,0 +1,333 @@
+"""
+Latest quote per asset, kept outside the bars table.
+
+Bar ingestion and broker ticks write here, and brokers, dashboards and the
+exec gateway read with a single O(1) lookup instead of a latest-bar query.
+A quote only replaces the stored one if its market timestamp is not older,
+so backfilling history never clobbers a live tick.
+
+The Redis layout is shared with the exec gateway (services/exec):
+  quotes:<asset_id>  hash of the Quote fields, timestamps as epoch seconds
+  quotes:symbols     hash of "<EXCHANGE>:<SYMBOL>" -> asset_id
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Max, Q
+
+from apps.data.models import Asset, Bar
+
+QUOTE_KEY = "quotes:{}"
+SYMBOL_INDEX = "quotes:symbols"
+
+# Only write if the stored quote is not newer than this one.
+UPDATE_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], 'timestamp')
+if current and tonumber(current) > tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+return 1
+"""
+
+FIELDS = ["symbol", "exchange", "last_price", "bid", "ask", "volume", "source"]
+
+
+def _epoch(value: datetime) -> float:
+    return value.timestamp()
+
+
+class Quote:
+    def __init__(
+        self,
+        asset_id: int,
+        symbol: str,
+        exchange: str,
+        last_price: float,
+        timestamp: datetime,
+        bid: Optional[float] = None,
+        ask: Optional[float] = None,
+        volume: Optional[int] = None,
+        source: str = "",
+        updated_at: Optional[float] = None,
+    ):
+        self.asset_id = asset_id
+        self.symbol = symbol
+        self.exchange = exchange
+        self.last_price = last_price
+        self.timestamp = timestamp
+        self.bid = bid
+        self.ask = ask
+        self.volume = volume
+        self.source = source
+        self.updated_at = time.time() if updated_at is None else updated_at
+
+    def age(self, now: Optional[float] = None) -> float:
+        """Seconds since the quote's market timestamp."""
+        return (time.time() if now is None else now) - _epoch(self.timestamp)
+
+    def is_stale(self, max_age: Optional[float] = None, now: Optional[float] = None) -> bool:
+        if max_age is None:
+            max_age = settings.QUOTE_STALE_AFTER_SECONDS
+        return self.age(now) > max_age
+
+    def to_dict(self) -> Dict:
+        return {
+            "asset_id": self.asset_id,
+            "symbol": self.symbol,
+            "exchange": self.exchange,
+            "last_price": self.last_price,
+            "bid": self.bid,
+            "ask": self.ask,
+            "volume": self.volume,
+            "timestamp": self.timestamp,
+            "updated_at": datetime.fromtimestamp(self.updated_at, tz=timezone.utc),
+            "source": self.source,
+            "stale": self.is_stale(),
+        }
+
+    def to_hash(self) -> Dict[str, str]:
+        values = {
+            "asset_id": self.asset_id,
+            "timestamp": _epoch(self.timestamp),
+            "updated_at": self.updated_at,
+        }
+        values.update({name: getattr(self, name) for name in FIELDS})
+        return {k: "" if v is None else str(v) for k, v in values.items()}
+
+    @classmethod
+    def from_hash(cls, values: Dict[str, str]) -> "Quote":
+        def number(name, kind=float):
+            return kind(values[name]) if values.get(name) else None
+
+        return cls(
+            asset_id=int(values["asset_id"]),
+            symbol=values.get("symbol", ""),
+            exchange=values.get("exchange", ""),
+            last_price=float(values["last_price"]),
+            timestamp=datetime.fromtimestamp(float(values["timestamp"]), tz=timezone.utc),
+            bid=number("bid"),
+            ask=number("ask"),
+            volume=number("volume", lambda v: int(float(v))),
+            source=values.get("source", ""),
+            updated_at=float(values["updated_at"]),
+        )
+
+
+class LatestQuoteStore(ABC):
+    def __init__(self):
+        # asset_id -> (symbol, exchange), filled lazily for writers that only know ids
+        self._symbols: Dict[int, Tuple[str, str]] = {}
+
+    def update(self, quote: Quote) -> bool:
+        return self.update_many([quote]) == 1
+
+    @abstractmethod
+    def update_many(self, quotes: Iterable[Quote]) -> int:
+        pass
+
+    def get(self, asset_id: int) -> Optional[Quote]:
+        return self.get_many([asset_id]).get(asset_id)
+
+    @abstractmethod
+    def get_many(self, asset_ids: Iterable[int]) -> Dict[int, Quote]:
+        pass
+
+    @abstractmethod
+    def lookup(self, symbol: str, exchange: str) -> Optional[Quote]:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+    def symbols_for(self, asset_ids: Iterable[int]) -> Dict[int, Tuple[str, str]]:
+        missing = [i for i in set(asset_ids) if i not in self._symbols]
+        if missing:
+            for asset_id, symbol, exchange in Asset.objects.filter(id__in=missing).values_list(
+                "id", "symbol", "exchange__code"
+            ):
+                self._symbols[asset_id] = (symbol, exchange)
+        return self._symbols
+
+    def publish_bars(self, bars: List[Bar]) -> int:
+        """Push the newest bar of each asset in bars."""
+        latest: Dict[int, Bar] = {}
+        for bar in bars:
+            current = latest.get(bar.asset_id)
+            if current is None or bar.timestamp > current.timestamp:
+                latest[bar.asset_id] = bar
+        if not latest:
+            return 0
+
+        symbols = self.symbols_for(latest)
+        return self.update_many(
+            quote_from_bar(bar, *symbols.get(asset_id, ("", "")))
+            for asset_id, bar in latest.items()
+        )
+
+    def record_tick(self, tick: Dict) -> bool:
+        """Store a broker tick (symbol, exchange, last_price, optional bid/ask/volume/timestamp)."""
+        asset_id = tick.get("asset_id")
+        if asset_id is None:
+            asset_id = (
+                Asset.objects.filter(symbol=tick["symbol"], exchange__code=tick["exchange"])
+                .values_list("id", flat=True)
+                .first()
+            )
+            if asset_id is None:
+                return False
+
+        return self.update(
+            Quote(
+                asset_id=asset_id,
+                symbol=tick["symbol"],
+                exchange=tick["exchange"],
+                last_price=float(tick["last_price"]),
+                timestamp=tick.get("timestamp") or datetime.now(tz=timezone.utc),
+                bid=tick.get("bid"),
+                ask=tick.get("ask"),
+                volume=tick.get("volume"),
+                source=tick.get("source", "tick"),
+            )
+        )
+
+    def warm(self, asset_ids: Iterable[int]) -> int:
+        """Load quotes for assets missing from the store from their latest bars."""
+        asset_ids = list(asset_ids)
+        present = self.get_many(asset_ids)
+        missing = [i for i in asset_ids if i not in present]
+        if not missing:
+            return 0
+
+        latest = (
+            Bar.objects.filter(asset_id__in=missing)
+            .order_by()
+            .values("asset_id")
+            .annotate(latest=Max("timestamp"))
+        )
+        condition = Q()
+        for row in latest:
+            condition |= Q(asset_id=row["asset_id"], timestamp=row["latest"])
+        if not condition:
+            return 0
+
+        return self.publish_bars(list(Bar.objects.filter(condition)))
+
+
+class InMemoryQuoteStore(LatestQuoteStore):
+    def __init__(self):
+        super().__init__()
+        self._quotes: Dict[int, Quote] = {}
+        self._index: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def update_many(self, quotes: Iterable[Quote]) -> int:
+        written = 0
+        with self._lock:
+            for quote in quotes:
+                current = self._quotes.get(quote.asset_id)
+                if current is not None and current.timestamp > quote.timestamp:
+                    continue
+                self._quotes[quote.asset_id] = quote
+                if quote.symbol:
+                    self._index[f"{quote.exchange}:{quote.symbol}"] = quote.asset_id
+                written += 1
+        return written
+
+    def get_many(self, asset_ids: Iterable[int]) -> Dict[int, Quote]:
+        quotes = self._quotes
+        return {i: quotes[i] for i in asset_ids if i in quotes}
+
+    def lookup(self, symbol: str, exchange: str) -> Optional[Quote]:
+        asset_id = self._index.get(f"{exchange}:{symbol}")
+        return None if asset_id is None else self._quotes.get(asset_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._quotes.clear()
+            self._index.clear()
+        self._symbols.clear()
+
+
+class RedisQuoteStore(LatestQuoteStore):
+    def __init__(self, client=None):
+        super().__init__()
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(settings.QUOTE_REDIS_URL, decode_responses=True)
+        self.client = client
+        self._update = client.register_script(UPDATE_SCRIPT)
+
+    def update_many(self, quotes: Iterable[Quote]) -> int:
+        pipe = self.client.pipeline(transaction=False)
+        updates = []
+        for quote in quotes:
+            values = quote.to_hash()
+            fields = [item for pair in values.items() for item in pair]
+            updates.append(len(pipe))
+            self._update(
+                keys=[QUOTE_KEY.format(quote.asset_id)],
+                args=[values["timestamp"]] + fields,
+                client=pipe,
+            )
+            if quote.symbol:
+                pipe.hset(SYMBOL_INDEX, f"{quote.exchange}:{quote.symbol}", quote.asset_id)
+        if not updates:
+            return 0
+        results = pipe.execute()
+        return sum(1 for i in updates if results[i] == 1)
+
+    def get_many(self, asset_ids: Iterable[int]) -> Dict[int, Quote]:
+        asset_ids = list(asset_ids)
+        pipe = self.client.pipeline(transaction=False)
+        for asset_id in asset_ids:
+            pipe.hgetall(QUOTE_KEY.format(asset_id))
+        return {
+            asset_id: Quote.from_hash(values)
+            for asset_id, values in zip(asset_ids, pipe.execute(), strict=True)
+            if values
+        }
+
+    def lookup(self, symbol: str, exchange: str) -> Optional[Quote]:
+        asset_id = self.client.hget(SYMBOL_INDEX, f"{exchange}:{symbol}")
+        return None if asset_id is None else self.get(int(asset_id))
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=QUOTE_KEY.format("*")))
+        if keys:
+            self.client.delete(*keys)
+        self._symbols.clear()
+
+
+def quote_from_bar(bar: Bar, symbol: str = "", exchange: str = "") -> Quote:
+    return Quote(
+        asset_id=bar.asset_id,
+        symbol=symbol,
+        exchange=exchange,
+        last_price=float(bar.close),
+        timestamp=bar.timestamp,
+        volume=int(bar.volume),
+        source=f"bar:{bar.timeframe}",
+    )
+
+
+_store: Optional[LatestQuoteStore] = None
+
+
+def get_quote_store() -> LatestQuoteStore:
+    global _store
+    if _store is None:
+        backend = settings.QUOTE_STORE
+        if backend == "redis":
+            _store = RedisQuoteStore()
+        elif backend == "memory":
+            _store = InMemoryQuoteStore()
+        else:
+            raise ValueError(f"Unknown QUOTE_STORE: {backend}")
+    return _store
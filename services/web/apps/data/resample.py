@@ -0,0 +1,177 @@
+"""
+Derived timeframes materialised from 1m bars.
+
+Intraday buckets are anchored at each session's open from the exchange
+calendar, so regular 15m bars start at 09:15, 09:30, ... and the last 1H bar
+of the day is the 15:15-15:30 stub.
+Each (asset, timeframe) pair resumes from its newest stored bucket, which is
+recomputed because it may have been partial; older buckets are not touched.
+"""
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from apps.data.calendar import TradingCalendar, get_calendar
+from apps.data.loaders.bulk import bars_from_frame, save_bars
+from apps.data.models import Bar
+
+SOURCE_TIMEFRAME = "1m"
+
+INTRADAY_MINUTES = {
+    "5m": 5,
+    "15m": 15,
+    "30m": 30,
+    "1H": 60,
+}
+
+DERIVED_TIMEFRAMES = list(INTRADAY_MINUTES) + ["1D"]
+
+DEFAULT_TIMEFRAMES = list(INTRADAY_MINUTES)
+
+BAR_FIELDS = [
+    "asset_id",
+    "timestamp",
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "turnover",
+    "trades",
+]
+
+PRICE_FIELDS = ["open", "high", "low", "close", "turnover"]
+
+
+def read_bars(queryset) -> pd.DataFrame:
+    frame = pd.DataFrame.from_records(list(queryset.values_list(*BAR_FIELDS)), columns=BAR_FIELDS)
+    frame[PRICE_FIELDS] = frame[PRICE_FIELDS].astype(float)
+    frame["timestamp"] = pd.to_datetime(frame["timestamp"], utc=True)
+    return frame
+
+
+class BarResampler:
+    def __init__(
+        self,
+        exchange: str = "NSE",
+        calendar: Optional[TradingCalendar] = None,
+        chunk_size: int = 50,
+        batch_size: int = 5000,
+    ):
+        self.exchange = exchange.upper()
+        self.calendar = calendar or get_calendar(self.exchange)
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+
+    def bucket_starts(self, timestamps: pd.Series, timeframe: str) -> pd.DatetimeIndex:
+        """Bucket start per timestamp; NaT for timestamps outside every session."""
+        session, minute = self.calendar.locate(timestamps)
+        outside = session < 0
+        session = np.where(outside, 0, session)
+
+        if timeframe == "1D":
+            # Same stamp the bhavcopy loaders use for daily bars.
+            buckets = pd.DatetimeIndex(self.calendar.sessions[session]).tz_localize(
+                timezone.get_default_timezone_name()
+            )
+        else:
+            minutes = INTRADAY_MINUTES[timeframe]
+            buckets = self.calendar.opens[session] + pd.to_timedelta(
+                minute // minutes * minutes, unit="min"
+            )
+        return buckets.where(~outside)
+
+    def resample(self, minute_bars: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+        bars = minute_bars.sort_values(["asset_id", "timestamp"], kind="stable")
+        bars = bars.assign(bucket=self.bucket_starts(bars["timestamp"], timeframe))
+        bars = bars[bars["bucket"].notna()]
+
+        return (
+            bars.groupby(["asset_id", "bucket"], sort=False)
+            .agg(
+                open=("open", "first"),
+                high=("high", "max"),
+                low=("low", "min"),
+                close=("close", "last"),
+                volume=("volume", "sum"),
+                turnover=("turnover", "sum"),
+                trades=("trades", "sum"),
+            )
+            .reset_index()
+            .rename(columns={"bucket": "timestamp"})
+        )
+
+    def source_assets(self) -> List[int]:
+        return list(
+            Bar.objects.filter(timeframe=SOURCE_TIMEFRAME, asset__exchange__code=self.exchange)
+            .order_by()
+            .values_list("asset_id", flat=True)
+            .distinct()
+        )
+
+    def watermarks(
+        self, asset_ids: List[int], timeframes: List[str]
+    ) -> Dict[str, Dict[int, object]]:
+        marks: Dict[str, Dict[int, object]] = {timeframe: {} for timeframe in timeframes}
+        rows = (
+            Bar.objects.filter(asset_id__in=asset_ids, timeframe__in=timeframes)
+            .order_by()
+            .values("asset_id", "timeframe")
+            .annotate(latest=Max("timestamp"))
+        )
+        for row in rows:
+            marks[row["timeframe"]][row["asset_id"]] = row["latest"]
+        return marks
+
+    def run(
+        self, asset_ids: Optional[Iterable[int]] = None, timeframes: Optional[List[str]] = None
+    ) -> Dict[str, int]:
+        timeframes = list(timeframes or DEFAULT_TIMEFRAMES)
+        unknown = [t for t in timeframes if t not in DERIVED_TIMEFRAMES]
+        if unknown:
+            raise ValueError(f"Unsupported timeframes: {', '.join(unknown)}")
+
+        asset_ids = sorted(set(asset_ids)) if asset_ids is not None else self.source_assets()
+
+        written = dict.fromkeys(timeframes, 0)
+        for i in range(0, len(asset_ids), self.chunk_size):
+            counts = self._run_chunk(asset_ids[i : i + self.chunk_size], timeframes)
+            for timeframe, count in counts.items():
+                written[timeframe] += count
+        return written
+
+    @transaction.atomic
+    def _run_chunk(self, asset_ids: List[int], timeframes: List[str]) -> Dict[str, int]:
+        marks = self.watermarks(asset_ids, timeframes)
+
+        # The 1m history needed by an asset starts at its oldest watermark
+        # across the requested timeframes; assets with none need everything.
+        since: Dict[object, List[int]] = {}
+        for asset_id in asset_ids:
+            asset_marks = [marks[t].get(asset_id) for t in timeframes]
+            start = None if None in asset_marks else min(asset_marks)
+            since.setdefault(start, []).append(asset_id)
+
+        condition = Q()
+        for start, ids in since.items():
+            clause = Q(asset_id__in=ids)
+            if start is not None:
+                clause &= Q(timestamp__gte=start)
+            condition |= clause
+
+        minute_bars = read_bars(Bar.objects.filter(condition, timeframe=SOURCE_TIMEFRAME))
+        if minute_bars.empty:
+            return dict.fromkeys(timeframes, 0)
+
+        counts = {}
+        for timeframe in timeframes:
+            mark = pd.to_datetime(minute_bars["asset_id"].map(marks[timeframe]), utc=True)
+            fresh = minute_bars[mark.isna() | (minute_bars["timestamp"] >= mark)]
+
+            bars = bars_from_frame(self.resample(fresh, timeframe), timeframe)
+            counts[timeframe] = save_bars(bars, self.batch_size, exchange=self.exchange)
+        return counts
@@ -0,0 +1,179 @@
+"""
+Physical layout of the bars table on PostgreSQL.
+
+With TimescaleDB, bars becomes a hypertable chunked by month and compressed
+per (asset, timeframe) once chunks age past BARS_COMPRESS_AFTER_DAYS. On plain
+PostgreSQL it is declaratively partitioned by timeframe, with 1m bars further
+split into monthly range partitions created ahead of time by
+ensure_bar_partitions. Both layouts need every unique index to contain the
+partition keys, so the primary key becomes (id, timestamp[, timeframe]);
+Django keeps treating id alone as the primary key.
+"""
+from datetime import date
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import connection
+
+BARS_TABLE = "bars"
+MINUTE_TABLE = "bars_1m"
+OTHER_TABLE = "bars_other"
+MINUTE_DEFAULT_TABLE = "bars_1m_default"
+
+
+def has_timescale(cursor) -> bool:
+    cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'")
+    return cursor.fetchone() is not None
+
+
+def storage_layout(cursor=None) -> str:
+    if connection.vendor != "postgresql":
+        return "plain"
+
+    def detect(cursor):
+        if has_timescale(cursor):
+            cursor.execute(
+                "SELECT 1 FROM timescaledb_information.hypertables WHERE hypertable_name = %s",
+                [BARS_TABLE],
+            )
+            if cursor.fetchone():
+                return "hypertable"
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s",
+            [BARS_TABLE],
+        )
+        return "partitioned" if cursor.fetchone() else "plain"
+
+    if cursor is not None:
+        return detect(cursor)
+    with connection.cursor() as cursor:
+        return detect(cursor)
+
+
+def _replace_primary_key(cursor, columns: List[str]) -> None:
+    cursor.execute(
+        "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'",
+        [BARS_TABLE],
+    )
+    row = cursor.fetchone()
+    if row:
+        cursor.execute(f'ALTER TABLE {BARS_TABLE} DROP CONSTRAINT "{row[0]}"')
+    cursor.execute(f"ALTER TABLE {BARS_TABLE} ADD PRIMARY KEY ({', '.join(columns)})")
+
+
+def convert_to_hypertable(cursor) -> None:
+    _replace_primary_key(cursor, ["id", "timestamp"])
+    cursor.execute(
+        "SELECT create_hypertable(%s, 'timestamp', chunk_time_interval => INTERVAL '1 month', "
+        "migrate_data => true, if_not_exists => true)",
+        [BARS_TABLE],
+    )
+    cursor.execute(
+        f"ALTER TABLE {BARS_TABLE} SET (timescaledb.compress, "
+        "timescaledb.compress_segmentby = 'asset_id, timeframe', "
+        "timescaledb.compress_orderby = 'timestamp DESC')"
+    )
+    cursor.execute(
+        "SELECT add_compression_policy(%s, make_interval(days => %s), if_not_exists => true)",
+        [BARS_TABLE, settings.BARS_COMPRESS_AFTER_DAYS],
+    )
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(day: date) -> date:
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def _index_statements(cursor, table: str) -> List[str]:
+    """DDL recreating every constraint and index on table except the primary key."""
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype <> 'p'",
+        [table],
+    )
+    constraints = cursor.fetchall()
+    statements = [f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {d}' for name, d in constraints]
+
+    cursor.execute(
+        "SELECT i.relname, pg_get_indexdef(x.indexrelid) FROM pg_index x "
+        "JOIN pg_class i ON i.oid = x.indexrelid "
+        "WHERE x.indrelid = %s::regclass AND NOT x.indisprimary",
+        [table],
+    )
+    names = {name for name, _ in constraints}
+    statements += [d for name, d in cursor.fetchall() if name not in names]
+    return statements
+
+
+def convert_to_partitioned(cursor) -> None:
+    legacy = f"{BARS_TABLE}_unpartitioned"
+    # Captured while the table still carries its own name, so the statements
+    # apply unchanged to the new partitioned parent once the legacy table
+    # (and with it every constraint and index name) is gone.
+    statements = _index_statements(cursor, BARS_TABLE)
+
+    cursor.execute(f"ALTER TABLE {BARS_TABLE} RENAME TO {legacy}")
+    cursor.execute(
+        f"CREATE TABLE {BARS_TABLE} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING IDENTITY) "
+        "PARTITION BY LIST (timeframe)"
+    )
+    cursor.execute(
+        f"CREATE TABLE {MINUTE_TABLE} PARTITION OF {BARS_TABLE} "
+        "FOR VALUES IN ('1m') PARTITION BY RANGE (timestamp)"
+    )
+    cursor.execute(f"CREATE TABLE {MINUTE_DEFAULT_TABLE} PARTITION OF {MINUTE_TABLE} DEFAULT")
+    cursor.execute(f"CREATE TABLE {OTHER_TABLE} PARTITION OF {BARS_TABLE} DEFAULT")
+
+    cursor.execute(f"SELECT min(timestamp)::date FROM {legacy} WHERE timeframe = '1m'")
+    ensure_bar_partitions(cursor, since=cursor.fetchone()[0])
+
+    cursor.execute(f"INSERT INTO {BARS_TABLE} SELECT * FROM {legacy}")
+    cursor.execute(f"DROP TABLE {legacy}")
+
+    cursor.execute(f"ALTER TABLE {BARS_TABLE} ADD PRIMARY KEY (id, timeframe, timestamp)")
+    for statement in statements:
+        cursor.execute(statement)
+
+    cursor.execute(
+        "SELECT setval(pg_get_serial_sequence(%s, 'id'), coalesce(max(id), 0) + 1, false) "
+        f"FROM {BARS_TABLE}",
+        [BARS_TABLE],
+    )
+    cursor.execute(f"ANALYZE {BARS_TABLE}")
+
+
+def ensure_bar_partitions(cursor=None, since: Optional[date] = None, months_ahead: int = 3) -> int:
+    """Create missing monthly 1m partitions up to months_ahead past today."""
+
+    def create(cursor) -> int:
+        if storage_layout(cursor) != "partitioned":
+            return 0
+
+        today = date.today()
+        month = _month_start(since or today)
+        end = _month_start(today)
+        for _ in range(months_ahead):
+            end = _next_month(end)
+
+        created = 0
+        while month <= end:
+            name = f"{MINUTE_TABLE}_{month:%Y_%m}"
+            cursor.execute("SELECT to_regclass(%s)", [name])
+            if cursor.fetchone()[0] is None:
+                cursor.execute(
+                    f"CREATE TABLE {name} PARTITION OF {MINUTE_TABLE} "
+                    "FOR VALUES FROM (%s) TO (%s)",
+                    [month.isoformat(), _next_month(month).isoformat()],
+                )
+                created += 1
+            month = _next_month(month)
+        return created
+
+    if cursor is not None:
+        return create(cursor)
+    with connection.cursor() as cursor:
+        return create(cursor)
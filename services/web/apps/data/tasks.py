@@ -1,9 +1,20 @@
+import time
 from datetime import date, timedelta
+from typing import List
 
-from celery import shared_task
+from celery import chord, shared_task
+from django.conf import settings
 from django.utils import timezone
 
-from apps.data.loaders import BSEBhavcopyLoader, NSEBhavcopyLoader
+from apps.data import metrics
+from apps.data.backfill import (
+    load_trade_date,
+    pending_dates,
+    split_dates,
+    summarize,
+    try_trade_date,
+)
+from apps.data.calendar import get_calendar
 
 
 @shared_task(queue="data")
@@ -21,12 +32,14 @@ def download_nse_bhavcopy(trade_date: str = None):
     if trade_date:
         dt = date.fromisoformat(trade_date)
     else:
-        dt = date.today() - timedelta(days=1)
+        calendar = get_calendar("NSE")
+        dt = calendar.previous_trading_day(calendar.today())
 
-    loader = NSEBhavcopyLoader()
-    bars_created = loader.load_date(dt)
+    result = load_trade_date("NSE", dt)
+    if result["rows"] and settings.BARS_EXPORT_DIR:
+        export_bars.delay(["1D"])
 
-    return {"date": str(dt), "bars_created": bars_created, "exchange": "NSE"}
+    return {"date": str(dt), "bars_created": result["rows"], "exchange": "NSE"}
 
 
 @shared_task(queue="data")
@@ -34,32 +47,121 @@ def download_bse_bhavcopy(trade_date: str = None):
     if trade_date:
         dt = date.fromisoformat(trade_date)
     else:
-        dt = date.today() - timedelta(days=1)
+        calendar = get_calendar("BSE")
+        dt = calendar.previous_trading_day(calendar.today())
 
-    loader = BSEBhavcopyLoader()
-    bars_created = loader.load_date(dt)
+    result = load_trade_date("BSE", dt)
+    if result["rows"] and settings.BARS_EXPORT_DIR:
+        export_bars.delay(["1D"])
 
-    return {"date": str(dt), "bars_created": bars_created, "exchange": "BSE"}
+    return {"date": str(dt), "bars_created": result["rows"], "exchange": "BSE"}
+
+
+@shared_task(queue="data")
+def backfill_bhavcopy(exchange: str, start: str, end: str, concurrency: int = 4):
+    dates = pending_dates(exchange, date.fromisoformat(start), date.fromisoformat(end))
+    if not dates:
+        return {"exchange": exchange, "dates": 0, "workers": 0}
+
+    slices = split_dates(dates, concurrency)
+    chord(load_bhavcopy_dates.s(exchange, [d.isoformat() for d in chunk]) for chunk in slices)(
+        summarize_backfill.s(exchange, time.time())
+    )
+
+    return {"exchange": exchange, "dates": len(dates), "workers": len(slices)}
+
+
+@shared_task(queue="data")
+def load_bhavcopy_dates(exchange: str, trade_dates: List[str]):
+    # Failures are collected rather than raised so every date of the slice is
+    # attempted; summarize_backfill raises once the whole backfill has run.
+    return [try_trade_date(exchange, date.fromisoformat(d)) for d in trade_dates]
+
+
+@shared_task(queue="data")
+def summarize_backfill(results, exchange: str, started_at: float):
+    summary = summarize([r for chunk in results for r in chunk], time.time() - started_at)
+    summary["exchange"] = exchange
+    if summary["failed"]:
+        raise RuntimeError(
+            f"{exchange} backfill failed on {len(summary['failed'])} dates: "
+            f"{', '.join(summary['failed'])}"
+        )
+    return summary
 
 
 @shared_task(queue="data")
 def check_corporate_actions():
-    from apps.data.models import CorporateAction
+    from apps.data.models import CorporateAction, Exchange
 
     today = timezone.now().date()
-    upcoming = CorporateAction.objects.filter(
-        ex_date__gte=today, ex_date__lte=today + timedelta(days=7), is_processed=False
-    ).count()
+    by_exchange = {}
+    for exchange in Exchange.objects.order_by("code").values_list("code", flat=True):
+        with metrics.stage(exchange, "1D", "check_corporate_actions"):
+            by_exchange[exchange] = CorporateAction.objects.filter(
+                asset__exchange__code=exchange,
+                ex_date__gte=today,
+                ex_date__lte=today + timedelta(days=7),
+                is_processed=False,
+            ).count()
+
+    return {"upcoming_actions": sum(by_exchange.values()), "by_exchange": by_exchange}
+
+
+@shared_task(queue="data")
+def build_minute_bars(path: str = None, exchange: str = "NSE"):
+    from apps.data.aggregation import MinuteBarAggregator
+    from apps.data.loaders import get_loader
+
+    path = path or settings.TICK_DATA_DIR
+    if not path:
+        return {"exchange": exchange, "status": "skipped", "reason": "no tick path"}
+
+    aggregator = MinuteBarAggregator(get_loader(exchange).writer)
+    result = aggregator.process([path])
+
+    if result["bars"]:
+        resample_bars.delay(exchange)
 
-    return {"upcoming_actions": upcoming}
+    return {"exchange": exchange, "status": "completed", **result}
 
 
 @shared_task(queue="data")
-def build_minute_bars(symbol: str, exchange: str = "NSE"):
-    from apps.data.models import Asset, Bar
-
-    try:
-        asset = Asset.objects.get(symbol=symbol, exchange__code=exchange)
-        return {"symbol": symbol, "exchange": exchange, "status": "completed"}
-    except Asset.DoesNotExist:
-        return {"symbol": symbol, "exchange": exchange, "status": "not_found"}
+def resample_bars(exchange: str = "NSE", timeframes: List[str] = None):
+    from apps.data.resample import BarResampler
+
+    written = BarResampler(exchange).run(timeframes=timeframes)
+    if settings.BARS_EXPORT_DIR:
+        export_bars.delay(["1m"] + list(written))
+
+    return {"exchange": exchange, "bars_written": written}
+
+
+@shared_task(queue="data")
+def scan_data_quality(exchange: str = "NSE", timeframe: str = "1D", full: bool = False):
+    from apps.data.quality import DataQualityScanner
+
+    result = DataQualityScanner(exchange, timeframe).run(full=full)
+
+    return {"exchange": exchange, "timeframe": timeframe, **result}
+
+
+@shared_task(queue="data")
+def ensure_bar_partitions(months_ahead: int = 3):
+    from apps.data import storage
+
+    created = storage.ensure_bar_partitions(months_ahead=months_ahead)
+
+    return {"layout": storage.storage_layout(), "created": created}
+
+
+@shared_task(queue="data")
+def export_bars(timeframes: List[str] = None, full: bool = False):
+    from apps.data.export import ParquetExporter
+
+    if not settings.BARS_EXPORT_DIR:
+        return {"status": "skipped", "reason": "no export directory"}
+
+    result = ParquetExporter().sync(timeframes, full=full)
+
+    return {"status": "completed", **result}
@@ -0,0 +1,95 @@
+"""
+Point-in-time index membership.
+
+UniverseMembership rows are [valid_from, valid_to) intervals of exchange
+dates. UniverseMask turns the intervals of a set of asset slots into a
+(timestamps x slots) boolean mask in one vectorised pass, so a backtest knows
+which assets belonged to the index at every bar without per-bar lookups.
+"""
+from datetime import date
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+import pandas as pd
+from django.db import connection
+from django.db.models import Q
+
+from apps.data.models import Asset, UniverseMembership
+
+# Upper bound standing in for open-ended (NULL valid_to) memberships
+OPEN_END = np.datetime64("9999-12-31", "D")
+
+
+def memberships(index: str, start: date, end: date):
+    """Membership rows of index overlapping [start, end]."""
+    queryset = UniverseMembership.objects.filter(index=index)
+    if connection.vendor == "postgresql":
+        # Matches the expression of the GiST index created in migration 0006.
+        return queryset.extra(
+            where=["daterange(valid_from, valid_to, '[)') && daterange(%s, %s, '[]')"],
+            params=[start, end],
+        )
+    return queryset.filter(Q(valid_to__isnull=True) | Q(valid_to__gt=start), valid_from__lte=end)
+
+
+def universe_assets(index: str, start: date, end: date) -> List[Asset]:
+    """Every asset that was a member of index at some point in [start, end]."""
+    asset_ids = memberships(index, start, end).values_list("asset_id", flat=True)
+    return list(Asset.objects.filter(id__in=asset_ids).select_related("exchange").order_by("id"))
+
+
+class UniverseMask:
+    def __init__(
+        self,
+        asset_ids: Sequence[int],
+        interval_assets: Iterable[int] = (),
+        valid_from: Iterable = (),
+        valid_to: Iterable = (),
+    ):
+        self.asset_ids = list(asset_ids)
+        self.slots: Dict[int, int] = {asset_id: i for i, asset_id in enumerate(self.asset_ids)}
+
+        intervals = pd.DataFrame(
+            {
+                "asset_id": list(interval_assets),
+                "valid_from": pd.to_datetime(list(valid_from)),
+                "valid_to": pd.to_datetime(list(valid_to)),
+            }
+        )
+        intervals = intervals[intervals["asset_id"].isin(self.slots)]
+        self.slot = intervals["asset_id"].map(self.slots).to_numpy(dtype=np.int64)
+        self.valid_from = intervals["valid_from"].to_numpy(dtype="datetime64[D]")
+        valid_to = intervals["valid_to"].to_numpy(dtype="datetime64[D]")
+        self.valid_to = np.where(np.isnat(valid_to), OPEN_END, valid_to)
+
+    @classmethod
+    def for_index(
+        cls, index: str, asset_ids: Sequence[int], start: date, end: date
+    ) -> "UniverseMask":
+        rows = list(
+            memberships(index, start, end)
+            .filter(asset_id__in=list(asset_ids))
+            .values_list("asset_id", "valid_from", "valid_to")
+        )
+        columns = list(zip(*rows, strict=True)) if rows else [(), (), ()]
+        return cls(asset_ids, *columns)
+
+    def slots_of(self, asset_ids: Iterable[int]) -> np.ndarray:
+        """Slot per asset id; -1 for assets outside the mask."""
+        return np.array([self.slots.get(asset_id, -1) for asset_id in asset_ids], dtype=np.int64)
+
+    def active(self, days: np.ndarray) -> np.ndarray:
+        """
+        Boolean (len(days), len(asset_ids)) mask of membership for ascending
+        exchange dates (datetime64[D], repeats allowed for intraday bars).
+        """
+        days = np.asarray(days, dtype="datetime64[D]")
+        starts = np.searchsorted(days, self.valid_from, side="left")
+        ends = np.searchsorted(days, self.valid_to, side="left")
+
+        # +1 where an interval opens and -1 where it closes; a running sum
+        # down the time axis counts the intervals covering each cell.
+        edges = np.zeros((len(days) + 1, len(self.asset_ids)), dtype=np.int32)
+        np.add.at(edges, (starts, self.slot), 1)
+        np.add.at(edges, (ends, self.slot), -1)
+        return np.cumsum(edges[:-1], axis=0) > 0
@@ -30,13 +30,21 @@ class OrderResponse:
         order_id: str,
         status: str,
         message: str = "",
+        quantity: Optional[int] = None,
     ):
         self.order_id = order_id
         self.status = status
         self.message = message
+        # Set when the order was merged with others: this caller's share of it.
+        self.quantity = quantity
 
 
 class BaseBroker(ABC):
+    # Whether calls do network I/O; async runtimes move blocking calls off the loop.
+    blocking = True
+    # Requests per second the broker allows, by method name; OrderDispatcher paces to these.
+    rate_limits: Dict[str, float] = {}
+
     @abstractmethod
     def connect(self) -> bool:
         pass
@@ -68,3 +76,16 @@ class BaseBroker(ABC):
     @abstractmethod
     def disconnect(self) -> None:
         pass
+
+    def on_quotes(self, quotes: List) -> None:
+        """Market data from the runtime's feed; simulated brokers match resting orders on it."""
+        # Live brokers fill on the exchange, so by default there is nothing to do.
+        return None
+
+    def restore(self, cash: float, book) -> None:
+        """
+        Reload the account after a restart, from a PositionBook keyed by
+        symbol; brokers that keep the account themselves ignore this.
+        """
+        # The broker's own account is the source of truth by default.
+        return None
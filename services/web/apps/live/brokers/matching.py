@@ -0,0 +1,217 @@
+"""
+Price-time priority order book for simulated brokers.
+
+Resting limit orders sit in two heaps per symbol: bids by highest price and
+asks by lowest, with ties going to the earlier order. Stop orders wait in
+heaps keyed by trigger price until the last price crosses them. A stop-limit
+then rests at its limit price, and a stop-market at an unbounded price.
+Cancelling only marks the order; stale entries are dropped when they reach the
+top of a heap, or by a rebuild once they outnumber live ones. Insert and
+cancel are therefore O(log n) amortised.
+
+Quotes are matched as they arrive. Buys fill at the ask, or the last price,
+when it is at or below their limit. Sells fill at the bid when it is at or
+above theirs. Between them they can take at most the volume traded since the
+previous quote, so large orders fill partially over several quotes.
+"""
+import heapq
+import itertools
+from typing import Callable, Dict, List, Optional, Tuple
+
+LIMIT_TYPES = ("limit",)
+STOP_TYPES = ("stop_loss", "stop_loss_market")
+
+# Rebuild the heaps once cancelled entries outnumber live orders by this much.
+COMPACT_AFTER = 1024
+
+_sequence = itertools.count()
+
+
+class BookOrder:
+    __slots__ = (
+        "order_id",
+        "side",
+        "order_type",
+        "quantity",
+        "price",
+        "trigger_price",
+        "filled",
+        "sequence",
+        "active",
+    )
+
+    def __init__(
+        self,
+        order_id: str,
+        side: str,
+        order_type: str,
+        quantity: int,
+        price: Optional[float] = None,
+        trigger_price: Optional[float] = None,
+    ):
+        if order_type not in LIMIT_TYPES + STOP_TYPES:
+            raise ValueError(f"Order type {order_type!r} cannot rest in the book")
+        if side not in ("buy", "sell"):
+            raise ValueError(f"Unknown side {side!r}")
+        if quantity <= 0:
+            raise ValueError("Quantity must be positive")
+        if order_type != "stop_loss_market" and price is None:
+            raise ValueError(f"{order_type} orders need a price")
+        if order_type in STOP_TYPES and trigger_price is None:
+            raise ValueError(f"{order_type} orders need a trigger price")
+
+        self.order_id = order_id
+        self.side = side
+        self.order_type = order_type
+        self.quantity = quantity
+        self.price = price
+        self.trigger_price = trigger_price
+        self.filled = 0
+        self.sequence = 0
+        self.active = True
+
+    @property
+    def remaining(self) -> int:
+        return self.quantity - self.filled
+
+
+# Called with (order, quantity, price) for every fill; returning False refuses
+# the fill and removes the order from the book.
+Executor = Callable[[BookOrder, int, float], bool]
+
+
+class OrderBook:
+    def __init__(self):
+        self.bids: List[Tuple[float, int, BookOrder]] = []
+        self.asks: List[Tuple[float, int, BookOrder]] = []
+        self.buy_stops: List[Tuple[float, int, BookOrder]] = []
+        self.sell_stops: List[Tuple[float, int, BookOrder]] = []
+        self.orders: Dict[str, BookOrder] = {}
+
+        self.last_price: Optional[float] = None
+        self.bid: Optional[float] = None
+        self.ask: Optional[float] = None
+        # Volume left to trade on the current quote; None means unlimited.
+        self.available: Optional[int] = None
+        self._stale = 0
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self.orders
+
+    def add(self, order: BookOrder) -> None:
+        order.sequence = next(_sequence)
+        self.orders[order.order_id] = order
+        if order.order_type in STOP_TYPES:
+            if order.side == "buy":
+                heapq.heappush(self.buy_stops, (order.trigger_price, order.sequence, order))
+            else:
+                heapq.heappush(self.sell_stops, (-order.trigger_price, order.sequence, order))
+        else:
+            self._rest(order, order.price)
+
+    def cancel(self, order_id: str) -> bool:
+        order = self.orders.pop(order_id, None)
+        if order is None:
+            return False
+        self._discard(order)
+        return True
+
+    def update(
+        self,
+        last_price: float,
+        bid: Optional[float] = None,
+        ask: Optional[float] = None,
+        volume: Optional[int] = None,
+    ) -> None:
+        """Set the current quote; volume is what traded since the previous one."""
+        self.last_price = last_price
+        self.bid = bid
+        self.ask = ask
+        self.available = volume
+
+    def match(self, execute: Executor) -> int:
+        """Trigger stops and fill crossing orders at the current quote; returns fills."""
+        if self.last_price is None:
+            return 0
+
+        while self.buy_stops and self._top(self.buy_stops)[0] <= self.last_price:
+            _, _, order = heapq.heappop(self.buy_stops)
+            self._trigger(order)
+        while self.sell_stops and -self._top(self.sell_stops)[0] >= self.last_price:
+            _, _, order = heapq.heappop(self.sell_stops)
+            self._trigger(order)
+
+        ask = self.ask if self.ask is not None else self.last_price
+        bid = self.bid if self.bid is not None else self.last_price
+        # Bid keys are negated limits, so both sides cross when key <= bound.
+        return self._cross(self.bids, -ask, ask, execute) + self._cross(
+            self.asks, bid, bid, execute
+        )
+
+    def _rest(self, order: BookOrder, price: Optional[float]) -> None:
+        if order.side == "buy":
+            limit = float("inf") if price is None else price
+            heapq.heappush(self.bids, (-limit, order.sequence, order))
+        else:
+            limit = 0.0 if price is None else price
+            heapq.heappush(self.asks, (limit, order.sequence, order))
+
+    def _trigger(self, order: BookOrder) -> None:
+        # A triggered stop joins the queue at its limit behind earlier orders.
+        order.sequence = next(_sequence)
+        self._rest(order, order.price if order.order_type == "stop_loss" else None)
+
+    def _top(self, heap: List[Tuple[float, int, BookOrder]]) -> Tuple[float, int, BookOrder]:
+        while not heap[0][2].active:
+            heapq.heappop(heap)
+            self._stale -= 1
+            if not heap:
+                return (float("inf"), 0, None)
+        return heap[0]
+
+    def _cross(
+        self,
+        heap: List[Tuple[float, int, BookOrder]],
+        bound: float,
+        price: float,
+        execute: Executor,
+    ) -> int:
+        fills = 0
+        while heap and self.available != 0:
+            key, _, order = self._top(heap)
+            if order is None or key > bound:
+                break
+            quantity = order.remaining
+            if self.available is not None:
+                quantity = min(quantity, self.available)
+
+            if not execute(order, quantity, price):
+                heapq.heappop(heap)
+                del self.orders[order.order_id]
+                order.active = False
+                continue
+
+            order.filled += quantity
+            if self.available is not None:
+                self.available -= quantity
+            fills += 1
+            if not order.remaining:
+                heapq.heappop(heap)
+                del self.orders[order.order_id]
+                order.active = False
+        return fills
+
+    def _discard(self, order: BookOrder) -> None:
+        order.active = False
+        self._stale += 1
+        if self._stale > len(self.orders) + COMPACT_AFTER:
+            self._compact()
+
+    def _compact(self) -> None:
+        for heap in (self.bids, self.asks, self.buy_stops, self.sell_stops):
+            heap[:] = [entry for entry in heap if entry[2].active]
+            heapq.heapify(heap)
+        self._stale = 0
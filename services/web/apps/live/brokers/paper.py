@@ -1,19 +1,55 @@
 import random
 import uuid
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from apps.data.models import Asset, Bar
+from apps.data.quotes import LatestQuoteStore, Quote, get_quote_store, quote_from_bar
 from apps.live.brokers.base import BaseBroker, OrderRequest, OrderResponse
+from apps.live.brokers.matching import BookOrder, OrderBook
+from apps.live.fanout import QuoteFanout, Subscription
+from apps.live.positions import PositionBook
 
 
 class PaperBroker(BaseBroker):
-    def __init__(self):
+    """
+    Simulated broker. Market orders fill at once at the latest quote with
+    random slippage; limit and stop orders rest in a per-symbol OrderBook and
+    fill, possibly partially, as quotes arrive through on_quotes, which also
+    publishes each batch to subscribe_quotes callbacks through a QuoteFanout.
+    """
+
+    blocking = False
+
+    def __init__(
+        self,
+        quotes: Optional[LatestQuoteStore] = None,
+        initial_capital: float = 1000000.0,
+        seed: Optional[int] = None,
+    ):
+        self.random = random.Random(seed)
+        self.quotes = quotes or get_quote_store()
         self.orders: Dict[str, Dict] = {}
-        self.positions: Dict[str, float] = {}
-        self.cash = 1000000.0
+        self.book = PositionBook()
+        # Exchange of each symbol traded; the book is keyed by symbol alone.
+        self.exchanges: Dict[str, str] = {}
+        self.cash = initial_capital
         self.connected = False
-        self.quote_callbacks = []
+        self.fanout = QuoteFanout()
+        self.fill_callbacks = []
+        self.books: Dict[Tuple[str, str], OrderBook] = {}
+
+    @property
+    def positions(self) -> Dict[str, float]:
+        return self.book.positions()
+
+    @property
+    def trade_history(self):
+        return self.book.trades
+
+    def restore(self, cash: float, book: PositionBook) -> None:
+        self.cash = cash
+        self.book = book
 
     def connect(self) -> bool:
         self.connected = True
@@ -26,44 +62,50 @@ class PaperBroker(BaseBroker):
         order_id = str(uuid.uuid4())
 
         try:
-            asset = Asset.objects.get(symbol=order.symbol, exchange__code=order.exchange)
+            quote = self.latest_quote(order.symbol, order.exchange)
         except Asset.DoesNotExist:
             return OrderResponse("", "rejected", f"Asset {order.symbol} not found")
 
-        latest_bar = Bar.objects.filter(asset=asset).order_by("-timestamp").first()
+        if order.order_type != "market":
+            return self._rest(order_id, order, quote)
 
-        if not latest_bar:
+        if not quote:
             return OrderResponse("", "rejected", "No market data available")
 
-        execution_price = float(latest_bar.close)
-
-        slippage_bps = random.uniform(2, 8)
-        if order.side == "buy":
-            execution_price *= 1 + (slippage_bps / 10000)
-        else:
-            execution_price *= 1 - (slippage_bps / 10000)
-
-        cost = execution_price * order.quantity
-        commission = cost * 0.0003
-
-        if order.side == "buy":
-            required_cash = cost + commission
-            if required_cash > self.cash:
-                return OrderResponse("", "rejected", "Insufficient funds")
+        record = self._record(order_id, order)
+        error = self._execute(record, order.quantity, self._slipped(quote.last_price, order.side))
+        if error:
+            del self.orders[order_id]
+            return OrderResponse("", "rejected", error)
+        return OrderResponse(order_id, "filled", "Order executed")
 
-            self.cash -= required_cash
-            current_pos = self.positions.get(order.symbol, 0.0)
-            self.positions[order.symbol] = current_pos + order.quantity
+    def _rest(self, order_id: str, order: OrderRequest, quote: Optional[Quote]) -> OrderResponse:
+        try:
+            book_order = BookOrder(
+                order_id,
+                order.side,
+                order.order_type,
+                order.quantity,
+                order.price,
+                order.trigger_price,
+            )
+        except ValueError as e:
+            return OrderResponse("", "rejected", str(e))
 
-        else:
-            current_pos = self.positions.get(order.symbol, 0.0)
-            if abs(current_pos) < order.quantity:
-                return OrderResponse("", "rejected", "Insufficient position")
+        key = (order.symbol, order.exchange)
+        book = self.books.get(key)
+        if book is None:
+            book = self.books[key] = OrderBook()
+            if quote is not None:
+                book.update(quote.last_price, quote.bid, quote.ask, quote.volume)
 
-            self.cash += cost - commission
-            self.positions[order.symbol] = current_pos - order.quantity
+        record = self._record(order_id, order)
+        book.add(book_order)
+        book.match(self._fill)
+        return OrderResponse(order_id, record["status"], record["message"])
 
-        self.orders[order_id] = {
+    def _record(self, order_id: str, order: OrderRequest) -> Dict:
+        record = self.orders[order_id] = {
             "order_id": order_id,
             "symbol": order.symbol,
             "exchange": order.exchange,
@@ -71,61 +113,192 @@ class PaperBroker(BaseBroker):
             "quantity": order.quantity,
             "order_type": order.order_type,
             "price": order.price,
-            "execution_price": execution_price,
-            "status": "filled",
-            "filled_quantity": order.quantity,
+            "trigger_price": order.trigger_price,
+            "execution_price": None,
+            "commission": 0.0,
+            "status": "submitted",
+            "message": "Order open",
+            "filled_quantity": 0,
             "timestamp": datetime.now(),
         }
+        return record
 
-        return OrderResponse(order_id, "filled", "Order executed")
+    def _slipped(self, price: float, side: str) -> float:
+        slippage_bps = self.random.uniform(2, 8)
+        if side == "buy":
+            return price * (1 + (slippage_bps / 10000))
+        return price * (1 - (slippage_bps / 10000))
+
+    def _fill(self, book_order: BookOrder, quantity: int, price: float) -> bool:
+        record = self.orders[book_order.order_id]
+        if record["order_type"] == "stop_loss_market":
+            price = self._slipped(price, record["side"])
+        error = self._execute(record, quantity, price)
+        if error:
+            record["status"] = "rejected" if not record["filled_quantity"] else "cancelled"
+            record["message"] = error
+            return False
+        return True
+
+    def _execute(self, record: Dict, quantity: int, price: float) -> Optional[str]:
+        """Apply a fill to cash and positions; returns why it was refused, if it was."""
+        symbol = record["symbol"]
+        cost = price * quantity
+        commission = cost * 0.0003
+
+        if record["side"] == "buy":
+            required_cash = cost + commission
+            if required_cash > self.cash:
+                return "Insufficient funds"
+
+            self.cash -= required_cash
+
+        else:
+            if self.book.quantity(symbol) < quantity:
+                return "Insufficient position"
+
+            self.cash += cost - commission
+
+        self.exchanges[symbol] = record["exchange"]
+        self.book.fill(
+            symbol,
+            quantity if record["side"] == "buy" else -quantity,
+            price,
+            commission,
+            datetime.now(),
+            record["order_id"],
+        )
+
+        filled = record["filled_quantity"] + quantity
+        record["execution_price"] = (
+            (record["execution_price"] or 0.0) * record["filled_quantity"] + cost
+        ) / filled
+        record["filled_quantity"] = filled
+        record["commission"] += commission
+        if filled == record["quantity"]:
+            record["status"], record["message"] = "filled", "Order executed"
+        else:
+            record["status"], record["message"] = "partial", "Order partially filled"
+
+        if self.fill_callbacks:
+            fill = {
+                "order_id": record["order_id"],
+                "symbol": symbol,
+                "exchange": record["exchange"],
+                "side": record["side"],
+                "quantity": quantity,
+                "price": price,
+                "commission": commission,
+                "filled_quantity": filled,
+                "remaining": record["quantity"] - filled,
+                "status": record["status"],
+                "timestamp": datetime.now(),
+            }
+            for callback in self.fill_callbacks:
+                callback(fill)
+        return None
+
+    def on_quotes(self, quotes: List[Quote]) -> int:
+        """
+        Mark positions, match resting orders and notify quote subscribers for
+        a batch of quotes; returns the number of fills.
+        """
+        self.book.mark({q.symbol: q.last_price for q in quotes if q.symbol in self.book})
+
+        fills = 0
+        books = self.books
+        for quote in quotes:
+            book = books.get((quote.symbol, quote.exchange))
+            if book is None:
+                continue
+            book.update(quote.last_price, quote.bid, quote.ask, quote.volume)
+            if book.orders:
+                fills += book.match(self._fill)
+
+        self.fanout.publish(quotes)
+        return fills
+
+    def on_quote(self, quote: Quote) -> int:
+        return self.on_quotes([quote])
+
+    def subscribe_fills(self, callback) -> None:
+        """Call callback(fill) for every fill, including partial fills of resting orders."""
+        self.fill_callbacks.append(callback)
 
     def cancel_order(self, order_id: str) -> bool:
-        if order_id in self.orders:
-            order = self.orders[order_id]
-            if order["status"] in ["pending", "submitted"]:
-                order["status"] = "cancelled"
-                return True
-        return False
+        record = self.orders.get(order_id)
+        if record is None or record["status"] not in ["submitted", "partial"]:
+            return False
+
+        book = self.books.get((record["symbol"], record["exchange"]))
+        if book is None or not book.cancel(order_id):
+            return False
+        record["status"], record["message"] = "cancelled", "Order cancelled"
+        return True
 
     def get_order_status(self, order_id: str) -> Dict:
         return self.orders.get(order_id, {})
 
     def get_positions(self) -> List[Dict]:
         positions = []
-        for symbol, quantity in self.positions.items():
-            if abs(quantity) > 1e-6:
-                positions.append(
-                    {
-                        "symbol": symbol,
-                        "quantity": quantity,
-                        "side": "long" if quantity > 0 else "short",
-                    }
-                )
+        for symbol, quantity in self.book.positions().items():
+            position = self.book.position(symbol)
+            positions.append(
+                {
+                    "symbol": symbol,
+                    "exchange": self.exchanges.get(symbol),
+                    "quantity": quantity,
+                    "side": "long" if quantity > 0 else "short",
+                    "avg_price": position["avg_price"],
+                    "last_price": position["mark"],
+                    "unrealized_pnl": position["unrealized_pnl"],
+                    "realized_pnl": position["realized_pnl"],
+                }
+            )
         return positions
 
+    def latest_quote(self, symbol: str, exchange: str) -> Optional[Quote]:
+        quote = self.quotes.lookup(symbol, exchange)
+        if quote is not None:
+            return quote
+
+        # Cold store: read through to the bars table once.
+        asset = Asset.objects.get(symbol=symbol, exchange__code=exchange)
+        latest_bar = Bar.objects.filter(asset=asset).order_by("-timestamp").first()
+        if not latest_bar:
+            return None
+
+        quote = quote_from_bar(latest_bar, symbol, exchange)
+        self.quotes.update(quote)
+        return quote
+
     def get_quote(self, symbol: str, exchange: str) -> Dict:
         try:
-            asset = Asset.objects.get(symbol=symbol, exchange__code=exchange)
-            latest_bar = Bar.objects.filter(asset=asset).order_by("-timestamp").first()
-
-            if latest_bar:
-                return {
-                    "symbol": symbol,
-                    "exchange": exchange,
-                    "last_price": float(latest_bar.close),
-                    "bid": float(latest_bar.close) * 0.9995,
-                    "ask": float(latest_bar.close) * 1.0005,
-                    "volume": int(latest_bar.volume),
-                    "timestamp": latest_bar.timestamp,
-                }
+            quote = self.latest_quote(symbol, exchange)
         except Asset.DoesNotExist:
-            pass
+            return {}
+
+        if quote is None:
+            return {}
 
-        return {}
+        return {
+            "symbol": symbol,
+            "exchange": exchange,
+            "last_price": quote.last_price,
+            "bid": quote.bid if quote.bid is not None else quote.last_price * 0.9995,
+            "ask": quote.ask if quote.ask is not None else quote.last_price * 1.0005,
+            "volume": quote.volume,
+            "timestamp": quote.timestamp,
+            "stale": quote.is_stale(),
+        }
 
     def subscribe_quotes(self, symbols: List[str], callback) -> None:
-        self.quote_callbacks.append({"symbols": symbols, "callback": callback})
+        """
+        Call callback(quotes) with the latest quote of each of symbols that
+        changed, once per event-loop tick; "*" subscribes to every symbol.
+        """
+        self.fanout.subscribe(Subscription(callback), symbols)
 
     def disconnect(self) -> None:
         self.connected = False
-        self.quote_callbacks.clear()
+        self.fanout.clear()
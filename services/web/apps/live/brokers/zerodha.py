@@ -5,6 +5,9 @@ from apps.live.brokers.base import BaseBroker, OrderRequest, OrderResponse
 
 
 class ZerodhaBroker(BaseBroker):
+    # Kite Connect allows 10 order requests per second.
+    rate_limits = {"place_order": 10, "cancel_order": 10, "get_order_status": 10}
+
     def __init__(self):
         self.api_key = os.getenv("ZERODHA_API_KEY")
         self.api_secret = os.getenv("ZERODHA_API_SECRET")
@@ -0,0 +1,269 @@
+"""
+Rate-limited order dispatch in front of a BaseBroker.
+
+Brokers cap requests per second per endpoint (BaseBroker.rate_limits). An
+OrderDispatcher queues requests and sends them as fast as those limits allow,
+using one token bucket per endpoint. A bucket for a limit of L per second
+holds a small burst b and refills at 0.9 * L - b tokens per second. Any
+one-second window therefore sees at most 0.9 * L requests, which leaves
+headroom for clock skew between us and the broker.
+
+The queue is ordered by priority, then arrival: cancels and order status
+lookups, then exits (orders that reduce a position), then entries. While an
+order waits, another one with the same symbol, side, type and prices is
+merged into it. Each caller gets its own OrderResponse for the combined
+order, with OrderResponse.quantity set to its share. Synchronous broker
+SDKs run on a thread pool, so a basket of orders is in flight concurrently,
+up to `workers` at a time.
+"""
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from apps.live.brokers.base import BaseBroker, OrderRequest, OrderResponse
+
+CANCEL = 0
+EXIT = 1
+ENTRY = 2
+_STOP = 3
+
+# Share of a broker's published limit the dispatcher uses.
+HEADROOM = 0.9
+
+
+class TokenBucket:
+    def __init__(
+        self, rate: float, capacity: float = 1.0, clock: Optional[Callable[[], float]] = None
+    ):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("A token bucket needs a positive rate and room for one token")
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock or time.monotonic
+        self.tokens = capacity
+        self.updated = self.clock()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_second(cls, limit: float, clock: Optional[Callable[[], float]] = None) -> "TokenBucket":
+        """A bucket that keeps any one-second window within HEADROOM of limit."""
+        allowed = limit * HEADROOM
+        capacity = max(1.0, float(int(allowed // 5)))
+        return cls(max(allowed - capacity, allowed / 10), capacity, clock)
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available."""
+        with self._lock:
+            self._refill()
+            return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def acquire(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class _Dispatch:
+    __slots__ = ("endpoint", "args", "priority", "key", "futures", "quantities")
+
+    def __init__(self, endpoint: str, args: Tuple, priority: int, key=None):
+        self.endpoint = endpoint
+        self.args = args
+        self.priority = priority
+        self.key = key
+        self.futures: List[asyncio.Future] = []
+        # Each caller's quantity, parallel to futures, for merged orders.
+        self.quantities: List[int] = []
+
+
+def _copy(request: OrderRequest) -> OrderRequest:
+    return OrderRequest(
+        request.symbol,
+        request.exchange,
+        request.side,
+        request.quantity,
+        request.order_type,
+        request.price,
+        request.trigger_price,
+        request.product,
+    )
+
+
+class OrderDispatcher:
+    def __init__(
+        self,
+        broker: BaseBroker,
+        limits: Optional[Dict[str, float]] = None,
+        workers: int = 8,
+        coalesce: bool = True,
+        clock: Optional[Callable[[], float]] = None,
+    ):
+        self.broker = broker
+        limits = broker.rate_limits if limits is None else limits
+        self.buckets = {
+            endpoint: TokenBucket.per_second(limit, clock) for endpoint, limit in limits.items()
+        }
+        self.workers = workers
+        self.coalesce = coalesce
+        self.pool = (
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="orders")
+            if broker.blocking
+            else None
+        )
+        self.stats = {"submitted": 0, "sent": 0, "coalesced": 0, "throttled": 0, "failed": 0}
+
+        self._queue: List[Tuple[int, int, _Dispatch]] = []
+        self._sequence = itertools.count()
+        # Queued orders that later ones can still merge into.
+        self._open: Dict[Tuple, _Dispatch] = {}
+        self._inflight = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def submit(self, request: OrderRequest, exit: bool = False) -> asyncio.Future:
+        """Queue an order; the future resolves to the broker's OrderResponse."""
+        future = asyncio.get_running_loop().create_future()
+        self.stats["submitted"] += 1
+        priority = EXIT if exit else ENTRY
+        key = (
+            request.exchange,
+            request.symbol,
+            request.side,
+            request.order_type,
+            request.price,
+            request.trigger_price,
+            request.product,
+        )
+
+        queued = self._open.get(key) if self.coalesce else None
+        if queued is not None:
+            queued.args[0].quantity += request.quantity
+            queued.futures.append(future)
+            queued.quantities.append(request.quantity)
+            self.stats["coalesced"] += 1
+            if priority < queued.priority:
+                # The old heap entry goes stale and is skipped when popped.
+                queued.priority = priority
+                self._push(queued)
+            return future
+
+        item = _Dispatch("place_order", (_copy(request),), priority, key)
+        item.futures.append(future)
+        item.quantities.append(request.quantity)
+        if self.coalesce:
+            self._open[key] = item
+        self._push(item)
+        return future
+
+    def cancel(self, order_id: str) -> asyncio.Future:
+        """Queue a cancel ahead of all orders; resolves to the broker's result."""
+        future = asyncio.get_running_loop().create_future()
+        item = _Dispatch("cancel_order", (order_id,), CANCEL)
+        item.futures.append(future)
+        self._push(item)
+        return future
+
+    def order_status(self, order_id: str) -> asyncio.Future:
+        """Queue a status lookup ahead of all orders; resolves to the broker's status dict."""
+        future = asyncio.get_running_loop().create_future()
+        item = _Dispatch("get_order_status", (order_id,), CANCEL)
+        item.futures.append(future)
+        self._push(item)
+        return future
+
+    async def place_basket(self, requests: List[OrderRequest]) -> List[OrderResponse]:
+        return list(await asyncio.gather(*[self.submit(request) for request in requests]))
+
+    def close(self) -> None:
+        """Stop run() once every queued order has been sent and answered."""
+        self._push(_Dispatch("", (), _STOP))
+
+    def _push(self, item: _Dispatch) -> None:
+        heapq.heappush(self._queue, (item.priority, next(self._sequence), item))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.workers)
+        try:
+            while True:
+                if not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                priority, _, item = self._queue[0]
+                if priority != item.priority:
+                    heapq.heappop(self._queue)
+                    continue
+                if item.priority == _STOP:
+                    heapq.heappop(self._queue)
+                    break
+
+                bucket = self.buckets.get(item.endpoint)
+                if bucket is not None and not bucket.acquire():
+                    self.stats["throttled"] += 1
+                    # A higher priority order may arrive meanwhile; re-read the head.
+                    await asyncio.sleep(bucket.delay())
+                    continue
+
+                heapq.heappop(self._queue)
+                if item.key is not None and self._open.get(item.key) is item:
+                    del self._open[item.key]
+                await self._slots.acquire()
+                task = asyncio.create_task(self._send(item))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+
+            if self._inflight:
+                await asyncio.wait(self._inflight)
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown(wait=False)
+
+    async def _send(self, item: _Dispatch) -> None:
+        method = getattr(self.broker, item.endpoint)
+        try:
+            if self.pool is not None:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self.pool, method, *item.args)
+            else:
+                result = method(*item.args)
+            self.stats["sent"] += 1
+        except Exception as e:
+            self.stats["failed"] += 1
+            if item.endpoint == "place_order":
+                result = OrderResponse("", "rejected", str(e))
+            elif item.endpoint == "get_order_status":
+                result = {}
+            else:
+                result = False
+        finally:
+            self._slots.release()
+
+        if len(item.futures) > 1 and isinstance(result, OrderResponse):
+            results = [
+                OrderResponse(result.order_id, result.status, result.message, quantity)
+                for quantity in item.quantities
+            ]
+        else:
+            results = [result] * len(item.futures)
+        for future, value in zip(item.futures, results, strict=True):
+            if not future.done():
+                future.set_result(value)
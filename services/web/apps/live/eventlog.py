@@ -0,0 +1,282 @@
+"""
+Append-only event log of a strategy run, for recovery after a crash.
+
+Every order, broker acknowledgement, fill and cash balance of a session is
+appended to <directory>/events.log as one frame:
+
+    length (uint32) | crc32 of the payload (uint32) | msgpack [seq, kind, time, ...]
+
+Appends only encode into a memory buffer. run() writes the buffer and fsyncs
+it once every fsync_interval seconds, or as soon as max_batch events wait, so
+one fsync covers a whole batch. An event is durable once its batch is synced.
+
+The log keeps an EventState (cash, positions, open orders, counts) up to date
+as events are appended. Every snapshot_every events, after a sync, that state
+is written to snapshot.msgpack together with the log offset it covers, by
+writing a temporary file and renaming it over the old one. Opening an
+EventLog loads the snapshot and replays only the frames after its offset; a
+torn or corrupt frame at the end, from a crash mid-write, is cut off.
+"""
+import asyncio
+import logging
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import msgpack
+from django.conf import settings
+from django.utils import timezone
+
+from apps.live.positions import PositionBook
+
+logger = logging.getLogger(__name__)
+
+ORDER = "o"
+ACK = "a"
+FILL = "f"
+CASH = "c"
+
+HEADER = struct.Struct("<II")
+
+LOG_NAME = "events.log"
+SNAPSHOT_NAME = "snapshot.msgpack"
+
+
+def _pack(value) -> bytes:
+    return msgpack.packb(value, datetime=True)
+
+
+def _unpack(data) -> object:
+    return msgpack.unpackb(data, timestamp=3, strict_map_key=False)
+
+
+class EventState:
+    """What a strategy run's events add up to."""
+
+    def __init__(self):
+        self.seq = 0
+        self.cash: Optional[float] = None
+        self.book = PositionBook()
+        # Orders without an acknowledgement yet: seq -> [asset id, side, quantity].
+        self.working: Dict[int, List] = {}
+        self.stats = {"orders": 0, "filled": 0, "rejected": 0}
+
+    def apply(self, event: List) -> None:
+        seq, kind, at = event[0], event[1], event[2]
+        if kind == ORDER:
+            self.working[seq] = event[3:6]
+            self.stats["orders"] += 1
+        elif kind == ACK:
+            self.working.pop(event[3], None)
+            self.stats["filled" if event[4] == "filled" else "rejected"] += 1
+        elif kind == FILL:
+            _, asset_id, quantity, price, commission = event[3:8]
+            self.book.fill(asset_id, quantity, price, commission, at)
+        elif kind == CASH:
+            self.cash = event[3]
+        else:
+            raise ValueError(f"Unknown event kind {kind!r}")
+        self.seq = seq
+
+    def to_snapshot(self, offset: int) -> Dict:
+        return {
+            "seq": self.seq,
+            "offset": offset,
+            "cash": self.cash,
+            "working": self.working,
+            "stats": self.stats,
+            "book": self.book.state(),
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict) -> "EventState":
+        state = cls()
+        state.seq = snapshot["seq"]
+        state.cash = snapshot["cash"]
+        state.working = snapshot["working"]
+        state.stats = snapshot["stats"]
+        state.book = PositionBook.from_state(snapshot["book"])
+        return state
+
+
+def read_frames(data, offset: int = 0) -> Tuple[List[List], int]:
+    """
+    Decode the frames in data from offset on; returns the events and the
+    offset just past the last intact frame.
+    """
+    view = memoryview(data)
+    end = len(view)
+    events = []
+    while offset + HEADER.size <= end:
+        length, crc = HEADER.unpack_from(view, offset)
+        start = offset + HEADER.size
+        payload = view[start : start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            break
+        events.append(_unpack(payload))
+        offset = start + length
+    return events, offset
+
+
+def recover(directory) -> Tuple[EventState, int, int]:
+    """
+    The state of a run's log, the length of its intact part and the number of
+    frames replayed on top of the snapshot.
+    """
+    directory = Path(directory)
+    state, offset, replayed = EventState(), 0, 0
+    snapshot_path = directory / SNAPSHOT_NAME
+    if snapshot_path.exists():
+        snapshot = _unpack(snapshot_path.read_bytes())
+        state, offset = EventState.from_snapshot(snapshot), snapshot["offset"]
+
+    log_path = directory / LOG_NAME
+    if log_path.exists():
+        with open(log_path, "rb") as f:
+            f.seek(offset)
+            events, end = read_frames(f.read())
+        for event in events:
+            state.apply(event)
+        offset += end
+        replayed = len(events)
+    return state, offset, replayed
+
+
+class EventLog:
+    def __init__(
+        self,
+        directory,
+        fsync_interval: Optional[float] = None,
+        max_batch: Optional[int] = None,
+        snapshot_every: Optional[int] = None,
+    ):
+        if fsync_interval is None:
+            fsync_interval = settings.LIVE_EVENT_LOG_FSYNC_MS / 1000
+        self.directory = Path(directory)
+        self.fsync_interval = fsync_interval
+        self.max_batch = max_batch or settings.LIVE_EVENT_LOG_MAX_BATCH
+        self.snapshot_every = snapshot_every or settings.LIVE_EVENT_LOG_SNAPSHOT_EVENTS
+        self.stats = {"events": 0, "syncs": 0, "snapshots": 0, "recovered": 0, "replayed": 0}
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.state, self.offset, self.stats["replayed"] = recover(self.directory)
+        self.stats["recovered"] = self.state.seq
+        self.file = open(self.directory / LOG_NAME, "ab")
+        if self.file.tell() > self.offset:
+            logger.warning(
+                "Cutting %d bytes of torn events from %s",
+                self.file.tell() - self.offset,
+                self.file.name,
+            )
+            self.file.truncate(self.offset)
+        self.synced_offset = self.offset
+
+        self._buffer = bytearray()
+        self._pending = 0
+        self._since_snapshot = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._closing = False
+
+    @classmethod
+    def for_run(cls, strategy_run_id: int, directory=None, **kwargs) -> "EventLog":
+        directory = Path(directory or settings.LIVE_EVENT_LOG_DIR)
+        return cls(directory / f"run-{strategy_run_id}", **kwargs)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _append(self, kind: str, *fields) -> int:
+        self.state.seq += 1
+        seq = self.state.seq
+        event = [seq, kind, timezone.now(), *fields]
+        payload = _pack(event)
+        self._buffer += HEADER.pack(len(payload), zlib.crc32(payload))
+        self._buffer += payload
+        self.offset += HEADER.size + len(payload)
+        self.state.apply(event)
+        self._pending += 1
+        self._since_snapshot += 1
+        if self._pending >= self.max_batch and self._wakeup is not None:
+            self._wakeup.set()
+        return seq
+
+    def order(self, asset_id: int, side: str, quantity: float) -> int:
+        """Log a new order; returns its sequence number, which its ack refers to."""
+        return self._append(ORDER, asset_id, side, quantity)
+
+    def ack(self, order_seq: int, status: str, broker_order_id: str = "", message: str = ""):
+        self._append(ACK, order_seq, status, broker_order_id, message)
+
+    def fill(
+        self, order_seq: int, asset_id: int, quantity: float, price: float, commission: float = 0.0
+    ):
+        """Log a fill of signed quantity (buys positive)."""
+        self._append(FILL, order_seq, asset_id, quantity, price, commission)
+
+    def cash(self, balance: float) -> None:
+        self._append(CASH, balance)
+
+    def _take(self) -> Tuple[bytes, Optional[bytes]]:
+        # Runs on the caller's thread: the state matches the buffer taken.
+        data, self._buffer = bytes(self._buffer), bytearray()
+        self.stats["events"] += self._pending
+        self._pending = 0
+        snapshot = None
+        if self._since_snapshot >= self.snapshot_every:
+            snapshot = _pack(self.state.to_snapshot(self.offset))
+            self._since_snapshot = 0
+        return data, snapshot
+
+    def _write(self, data: bytes, snapshot: Optional[bytes]) -> None:
+        if data:
+            self.file.write(data)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.synced_offset += len(data)
+            self.stats["syncs"] += 1
+        if snapshot is not None:
+            self.write_snapshot(snapshot)
+
+    def write_snapshot(self, snapshot: bytes) -> None:
+        path = self.directory / SNAPSHOT_NAME
+        temporary = path.with_suffix(".tmp")
+        with open(temporary, "wb") as f:
+            f.write(snapshot)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+        directory = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+        self.stats["snapshots"] += 1
+
+    def sync(self) -> None:
+        """Write and fsync everything appended so far."""
+        self._write(*self._take())
+
+    async def run(self) -> None:
+        self._wakeup = asyncio.Event()
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.fsync_interval)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._pending:
+                await asyncio.to_thread(self._write, *self._take())
+        self.close()
+
+    def stop(self) -> None:
+        """End run() after syncing everything appended so far, and close the log."""
+        self._closing = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def close(self) -> None:
+        self.sync()
+        self.file.close()
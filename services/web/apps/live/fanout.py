@@ -0,0 +1,249 @@
+"""
+Per-symbol quote fan-out with conflation.
+
+Publishers hand QuoteFanout batches of quotes and never wait. Each Subscription
+keeps only the newest pending quote per (exchange, symbol). At most once per
+event-loop tick, the fan-out hands every subscription with pending quotes a
+single batch. A subscription whose async callback is still running (a slow
+WebSocket, say) is skipped. Its pending quotes keep being overwritten and are
+sent as one batch when the callback returns. A slow consumer therefore sees
+fewer, newer quotes, and never stalls the feed or the other consumers.
+
+Across processes, quote batches travel over the channel layer's "quotes"
+group. A ChannelLayerPublisher subscription sends what it is given.
+get_quote_fanout() returns the process's fan-out, which listens on that group.
+If the channel layer fails (a Redis blip, say), the listener logs the error and
+joins the group again after a backoff, so subscribers resume once it recovers.
+"""
+import asyncio
+import contextlib
+import inspect
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from apps.data.quotes import Quote
+
+logger = logging.getLogger(__name__)
+
+QUOTES_GROUP = "quotes"
+ALL_SYMBOLS = "*"
+
+# Seconds the channel layer listener waits before rejoining after a failure,
+# doubling per consecutive failure up to the maximum.
+LISTEN_RETRY_SECONDS = 0.5
+LISTEN_RETRY_MAX_SECONDS = 30.0
+
+
+class Subscription:
+    """
+    A consumer of quote batches; callback(quotes) may be a plain function or a
+    coroutine function.
+    """
+
+    def __init__(self, callback: Callable[[List[Quote]], object]):
+        self.callback = callback
+        self.is_async = inspect.iscoroutinefunction(callback)
+        self.symbols: Set[str] = set()
+        self.pending: Dict[str, Quote] = {}
+        self.busy = False
+        self.delivered = 0
+        self.conflated = 0
+
+    def offer(self, quote: Quote) -> None:
+        key = f"{quote.exchange}:{quote.symbol}"
+        if key in self.pending:
+            self.conflated += 1
+        self.pending[key] = quote
+
+
+class QuoteFanout:
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._dirty: Set[Subscription] = set()
+        self._scheduled = False
+        self._tasks: Set[asyncio.Task] = set()
+        # Set by get_quote_fanout() for fan-outs fed from the channel layer.
+        self.listener: Optional[asyncio.Task] = None
+
+    def subscribe(self, subscription: Subscription, symbols: Iterable[str]) -> None:
+        """Add symbols to a subscription; "*" subscribes to every symbol."""
+        for symbol in symbols:
+            subscription.symbols.add(symbol)
+            self._subscribers.setdefault(symbol, set()).add(subscription)
+
+    def unsubscribe(
+        self, subscription: Subscription, symbols: Optional[Iterable[str]] = None
+    ) -> None:
+        """Drop symbols from a subscription, or the whole subscription."""
+        for symbol in list(subscription.symbols if symbols is None else symbols):
+            subscription.symbols.discard(symbol)
+            subscribers = self._subscribers.get(symbol)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[symbol]
+        if not subscription.symbols:
+            subscription.pending.clear()
+            self._dirty.discard(subscription)
+
+    def clear(self) -> None:
+        self._subscribers.clear()
+        self._dirty.clear()
+
+    @property
+    def subscriptions(self) -> Set[Subscription]:
+        return {s for subscribers in self._subscribers.values() for s in subscribers}
+
+    def publish(self, quotes: Iterable[Quote]) -> None:
+        subscribers = self._subscribers
+        everyone = subscribers.get(ALL_SYMBOLS, ())
+        dirty = self._dirty
+        for quote in quotes:
+            for subscription in subscribers.get(quote.symbol, ()):
+                subscription.offer(quote)
+                dirty.add(subscription)
+            for subscription in everyone:
+                subscription.offer(quote)
+                dirty.add(subscription)
+        if dirty:
+            self._schedule()
+
+    def _schedule(self) -> None:
+        if self._scheduled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts, sync tests): deliver right away.
+            self.flush()
+            return
+        self._scheduled = True
+        loop.call_soon(self.flush)
+
+    def flush(self) -> None:
+        self._scheduled = False
+        ready = [s for s in self._dirty if not s.busy]
+        for subscription in ready:
+            self._dirty.discard(subscription)
+            quotes = list(subscription.pending.values())
+            subscription.pending.clear()
+            subscription.delivered += len(quotes)
+            if subscription.is_async:
+                subscription.busy = True
+                task = asyncio.get_running_loop().create_task(self._deliver(subscription, quotes))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            else:
+                try:
+                    subscription.callback(quotes)
+                except Exception:
+                    logger.exception("Quote subscriber failed")
+
+    async def _deliver(self, subscription: Subscription, quotes: List[Quote]) -> None:
+        try:
+            await subscription.callback(quotes)
+        except Exception:
+            logger.exception("Quote subscriber failed")
+        finally:
+            subscription.busy = False
+            # Whatever arrived meanwhile goes out as the next batch.
+            if subscription.pending:
+                self._dirty.add(subscription)
+                self._schedule()
+
+
+def quote_message(quotes: List[Quote]) -> Dict:
+    """Channel layer message for a batch; timestamps as epoch seconds."""
+    return {
+        "type": "quote.batch",
+        "quotes": [
+            [
+                q.asset_id,
+                q.symbol,
+                q.exchange,
+                q.last_price,
+                q.timestamp.timestamp(),
+                q.bid,
+                q.ask,
+                q.volume,
+            ]
+            for q in quotes
+        ],
+    }
+
+
+def quotes_from_message(message: Dict) -> List[Quote]:
+    return [
+        Quote(
+            asset_id,
+            symbol,
+            exchange,
+            last_price,
+            datetime.fromtimestamp(timestamp, tz=timezone.utc),
+            bid=bid,
+            ask=ask,
+            volume=volume,
+        )
+        for asset_id, symbol, exchange, last_price, timestamp, bid, ask, volume in message["quotes"]
+    ]
+
+
+class ChannelLayerPublisher(Subscription):
+    """Forwards batches to the channel layer; subscribe it to "*" on the producing side."""
+
+    def __init__(self, channel_layer=None, group: str = QUOTES_GROUP):
+        super().__init__(self.send)
+        if channel_layer is None:
+            from channels.layers import get_channel_layer
+
+            channel_layer = get_channel_layer()
+        self.channel_layer = channel_layer
+        self.group = group
+
+    async def send(self, quotes: List[Quote]) -> None:
+        await self.channel_layer.group_send(self.group, quote_message(quotes))
+
+
+# The process's fan-out and its channel layer listener, per event loop.
+_fanouts: Dict[asyncio.AbstractEventLoop, QuoteFanout] = {}
+
+
+async def _listen(fanout: QuoteFanout, channel_layer, group: str) -> None:
+    delay = LISTEN_RETRY_SECONDS
+    while True:
+        channel = None
+        try:
+            channel = await channel_layer.new_channel()
+            await channel_layer.group_add(group, channel)
+            while True:
+                message = await channel_layer.receive(channel)
+                delay = LISTEN_RETRY_SECONDS
+                if message.get("type") == "quote.batch":
+                    fanout.publish(quotes_from_message(message))
+        except Exception:
+            logger.exception("Quote listener on %r failed; rejoining in %.1fs", group, delay)
+        finally:
+            if channel is not None:
+                # The layer may still be down; the group membership expires anyway.
+                with contextlib.suppress(Exception):
+                    await channel_layer.group_discard(group, channel)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, LISTEN_RETRY_MAX_SECONDS)
+
+
+def get_quote_fanout(group: str = QUOTES_GROUP) -> QuoteFanout:
+    """
+    The fan-out WebSocket consumers subscribe to, fed from the channel layer.
+    Call from the event loop; the first call starts the listener.
+    """
+    loop = asyncio.get_running_loop()
+    fanout = _fanouts.get(loop)
+    if fanout is None:
+        from channels.layers import get_channel_layer
+
+        for stale in [other for other in _fanouts if other.is_closed()]:
+            del _fanouts[stale]
+        fanout = _fanouts[loop] = QuoteFanout()
+        fanout.listener = loop.create_task(_listen(fanout, get_channel_layer(), group))
+    return fanout
@@ -0,0 +1,192 @@
+"""
+Write-behind persistence for the trading runtime.
+
+The trading loop records order, execution, trade, position and session-metrics
+events with plain list appends; a flush task writes them every flush_interval
+seconds, or as soon as max_batch events are waiting, on Django's sync thread.
+Each batch is one transaction applied in dependency order:
+
+    new orders -> order updates -> executions -> trades -> positions -> metrics
+
+Events for one order are therefore applied in the order they were recorded,
+whichever batch they land in. Updates to the same order and position states of
+the same (run, asset) are coalesced within a batch. A slow or unavailable
+database only makes batches larger; recording never waits for it. A batch that
+still fails after MAX_ATTEMPTS tries is kept and run() raises JournalError,
+which stops the runtime: later batches depend on it, so none are dropped.
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from apps.live.models import Execution, Order, Position, SessionMetrics, Trade
+
+logger = logging.getLogger(__name__)
+
+POSITION_FIELDS = [
+    "quantity",
+    "avg_entry_price",
+    "current_price",
+    "unrealized_pnl",
+    "realized_pnl",
+    "closed_at",
+    "updated_at",
+]
+
+# Consecutive failed attempts before the journal gives up.
+MAX_ATTEMPTS = 3
+
+
+class JournalError(Exception):
+    """A batch could not be written after MAX_ATTEMPTS tries."""
+
+
+class WriteBehindJournal:
+    def __init__(self, flush_interval: Optional[float] = None, max_batch: Optional[int] = None):
+        if flush_interval is None:
+            flush_interval = settings.LIVE_JOURNAL_FLUSH_MS / 1000
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch or settings.LIVE_JOURNAL_MAX_BATCH
+        self.stats = {"events": 0, "batches": 0, "failures": 0}
+
+        self._events: List[Tuple[str, object, Optional[Dict]]] = []
+        self._attempts = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._closing = False
+
+    def record_order(self, order: Order) -> None:
+        """Insert a new order; the instance is the handle for later events."""
+        self._append("order", order)
+
+    def update_order(self, order: Order, **fields) -> None:
+        self._append("update", order, fields)
+
+    def record_execution(self, execution: Execution) -> None:
+        """Insert a fill; execution.order may be an order not yet written."""
+        self._append("execution", execution)
+
+    def record_trade(self, trade: Trade) -> None:
+        """Insert a round trip; its entry and exit orders may not be written yet."""
+        self._append("trade", trade)
+
+    def record_position(self, position: Position) -> None:
+        """Upsert the latest state of a (strategy run, asset) position."""
+        self._append("position", position)
+
+    def record_metrics(self, metrics: SessionMetrics) -> None:
+        self._append("metrics", metrics)
+
+    def _append(self, kind: str, obj, fields: Optional[Dict] = None) -> None:
+        self._events.append((kind, obj, fields))
+        if len(self._events) >= self.max_batch and self._wakeup is not None:
+            self._wakeup.set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._events)
+
+    async def run(self) -> None:
+        self._wakeup = asyncio.Event()
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+        # Final flush; a failing batch is retried until written or given up on.
+        await self.flush()
+        while self._attempts:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+        # Release the sync thread's connection; the runtime may outlive it.
+        await sync_to_async(connections.close_all)()
+
+    def stop(self) -> None:
+        """End the flush loop after writing everything recorded so far."""
+        self._closing = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        events, self._events = self._events, []
+        if not events:
+            return
+
+        try:
+            await sync_to_async(self.write)(events)
+        except Exception as e:
+            self._attempts += 1
+            self.stats["failures"] += 1
+            self._events = events + self._events
+            if self._attempts >= MAX_ATTEMPTS:
+                raise JournalError(
+                    f"Journal write failed {MAX_ATTEMPTS} times; "
+                    f"{len(self._events)} events are unwritten"
+                ) from e
+            logger.exception("Journal flush failed; retrying %d events", len(events))
+            return
+
+        self._attempts = 0
+        self.stats["events"] += len(events)
+        self.stats["batches"] += 1
+
+    @transaction.atomic
+    def write(self, events: List[Tuple[str, object, Optional[Dict]]]) -> None:
+        new_orders: Dict[int, Order] = {}
+        updates: Dict[int, Tuple[Order, Dict]] = {}
+        executions: List[Execution] = []
+        trades: List[Trade] = []
+        positions: Dict[Tuple[int, int], Position] = {}
+        metrics: List[SessionMetrics] = []
+
+        for kind, obj, fields in events:
+            if kind == "order":
+                new_orders[id(obj)] = obj
+            elif kind == "update":
+                if id(obj) in new_orders:
+                    # Not inserted yet: fold the change into the insert.
+                    for name, value in fields.items():
+                        setattr(obj, name, value)
+                else:
+                    updates.setdefault(id(obj), (obj, {}))[1].update(fields)
+            elif kind == "execution":
+                executions.append(obj)
+            elif kind == "trade":
+                trades.append(obj)
+            elif kind == "position":
+                positions[obj.strategy_run_id, obj.asset_id] = obj
+            elif kind == "metrics":
+                metrics.append(obj)
+
+        if new_orders:
+            Order.objects.bulk_create(list(new_orders.values()))
+
+        now = timezone.now()
+        by_fields: Dict[Tuple[str, ...], List[Order]] = {}
+        for order, fields in updates.values():
+            fields = {**fields, "updated_at": now}
+            by_fields.setdefault(tuple(sorted(fields)), []).append(Order(pk=order.pk, **fields))
+        for names, rows in by_fields.items():
+            Order.objects.bulk_update(rows, list(names))
+
+        if executions:
+            Execution.objects.bulk_create(executions)
+        if trades:
+            Trade.objects.bulk_create(trades)
+        if positions:
+            Position.objects.bulk_create(
+                list(positions.values()),
+                update_conflicts=True,
+                unique_fields=["strategy_run", "asset"],
+                update_fields=POSITION_FIELDS,
+            )
+        if metrics:
+            SessionMetrics.objects.bulk_create(metrics)
@@ -0,0 +1,93 @@
+"""
+Order latency of the trading runtime.
+
+Each routed order carries perf_counter() stamps taken at signal, order
+creation, broker submit, broker ack and fill. A LatencyTracker per strategy
+run turns them into per-stage durations:
+
+  signal_to_order   waiting in the router queue
+  order_to_submit   pre-trade risk checks
+  submit_to_ack     rate limiting and the broker call
+  ack_to_fill       until the fill is known
+  end_to_end        signal to fill, or to ack for orders that did not fill
+
+flush() runs with every SessionMetrics snapshot. It summarises the samples
+since the previous flush (count, mean, p50, p99, max in milliseconds) for the
+snapshot, and feeds them to the live_order_latency_seconds histogram. The
+histogram is labelled by strategy and mode (paper or live), not by run, so its
+series stay bounded; per-run figures live in SessionMetrics.
+"""
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from prometheus_client import Histogram
+
+CHECKPOINTS = ("signal", "order", "submit", "ack", "fill")
+STAGES = ("signal_to_order", "order_to_submit", "submit_to_ack", "ack_to_fill", "end_to_end")
+
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+ORDER_LATENCY = Histogram(
+    "live_order_latency_seconds",
+    "Latency of live and paper orders per stage",
+    ["strategy", "mode", "stage"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+def stamp() -> float:
+    return time.perf_counter()
+
+
+def _stats(samples: np.ndarray) -> Dict[str, float]:
+    milliseconds = samples * 1000.0
+    p50, p99 = np.percentile(milliseconds, [50, 99])
+    return {
+        "count": int(len(samples)),
+        "avg_ms": round(float(milliseconds.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(milliseconds.max()), 3),
+    }
+
+
+class LatencyTracker:
+    def __init__(self, strategy: str, mode: str):
+        self.labels = (strategy, mode)
+        self.samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        # Samples per stage already flushed.
+        self._flushed = dict.fromkeys(STAGES, 0)
+
+    def record(self, stamps: Dict[str, float]) -> Dict[str, float]:
+        """Add one order's checkpoint stamps; returns its stage latencies in ms."""
+        latencies = {}
+        for start, end in zip(CHECKPOINTS[:-1], CHECKPOINTS[1:], strict=True):
+            if start in stamps and end in stamps:
+                latencies[f"{start}_to_{end}"] = stamps[end] - stamps[start]
+        last = stamps.get("fill", stamps.get("ack"))
+        if last is not None and "signal" in stamps:
+            latencies["end_to_end"] = last - stamps["signal"]
+
+        for stage, seconds in latencies.items():
+            self.samples[stage].append(seconds)
+        return {stage: round(seconds * 1000.0, 3) for stage, seconds in latencies.items()}
+
+    def flush(self) -> Dict[str, Dict[str, float]]:
+        """Stats of the samples since the last flush, by stage; also exported to Prometheus."""
+        stats = {}
+        for stage, samples in self.samples.items():
+            new = samples[self._flushed[stage] :]
+            if not new:
+                continue
+            self._flushed[stage] = len(samples)
+            histogram = ORDER_LATENCY.labels(*self.labels, stage)
+            for seconds in new:
+                histogram.observe(seconds)
+            stats[stage] = _stats(np.array(new))
+        return stats
+
+    def summary(self, stage: str = "end_to_end") -> Optional[Dict[str, float]]:
+        """Stats over every sample of a stage, or None before the first."""
+        samples = self.samples[stage]
+        return _stats(np.array(samples)) if samples else None
@@ -0,0 +1,103 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand
+
+from apps.data.quotes import InMemoryQuoteStore, Quote
+from apps.live.brokers.base import OrderRequest
+from apps.live.brokers.paper import PaperBroker
+
+
+class Command(BaseCommand):
+    help = "Time PaperBroker's order book with synthetic limit, stop and cancel traffic"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=200000, help="Orders to place")
+        parser.add_argument("--symbols", type=int, default=50, help="Symbols to spread them over")
+        parser.add_argument(
+            "--quote-every", type=int, default=20, help="Orders between quotes of a symbol"
+        )
+        parser.add_argument(
+            "--cancel-ratio", type=float, default=0.3, help="Share of orders cancelled"
+        )
+        parser.add_argument("--seed", type=int, default=7, help="Random seed")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        symbols = [f"BENCH{i:04d}" for i in range(options["symbols"])]
+        store = InMemoryQuoteStore()
+        start = datetime.now(tz=timezone.utc)
+        prices = dict.fromkeys(symbols, 100.0)
+        store.update_many(
+            Quote(i, symbol, "NSE", 100.0, start, volume=1000) for i, symbol in enumerate(symbols)
+        )
+
+        broker = PaperBroker(quotes=store, initial_capital=1e15)
+        broker.connect()
+        for symbol in symbols:
+            broker.book.fill(symbol, 1e12, 100.0)  # sells never run short
+        fills = []
+        broker.subscribe_fills(fills.append)
+
+        # Build the traffic up front so only the broker is timed.
+        requests = []
+        for _ in range(options["orders"]):
+            symbol = rng.choice(symbols)
+            side = rng.choice(("buy", "sell"))
+            kind = rng.random()
+            offset = rng.uniform(0, 0.02) * (-1 if side == "buy" else 1)
+            if kind < 0.8:
+                request = OrderRequest(
+                    symbol, "NSE", side, rng.randint(1, 100), "limit", 100.0 * (1 + offset)
+                )
+            else:
+                request = OrderRequest(
+                    symbol,
+                    "NSE",
+                    side,
+                    rng.randint(1, 100),
+                    "stop_loss_market",
+                    trigger_price=100.0 * (1 - offset),
+                )
+            requests.append((request, rng.random() < options["cancel_ratio"]))
+
+        placed = cancelled = quotes = 0
+        open_ids = []
+        started = time.perf_counter()
+        for i, (request, cancel) in enumerate(requests):
+            response = broker.place_order(request)
+            placed += 1
+            if cancel and response.status == "submitted":
+                open_ids.append(response.order_id)
+            if len(open_ids) > 100:
+                cancelled += sum(broker.cancel_order(order_id) for order_id in open_ids)
+                open_ids.clear()
+
+            if i % options["quote_every"] == 0:
+                symbol = request.symbol
+                prices[symbol] *= 1 + rng.uniform(-0.002, 0.002)
+                broker.on_quote(
+                    Quote(
+                        0,
+                        symbol,
+                        "NSE",
+                        prices[symbol],
+                        start + timedelta(seconds=i),
+                        volume=rng.randint(100, 5000),
+                    )
+                )
+                quotes += 1
+        elapsed = time.perf_counter() - started
+
+        resting = sum(len(book) for book in broker.books.values())
+        self.stdout.write(
+            f"{placed:,} orders, {cancelled:,} cancels, {quotes:,} quotes, {len(fills):,} fills; "
+            f"{resting:,} orders resting across {len(broker.books)} books"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{placed / elapsed:,.0f} orders/s ({elapsed * 1e6 / placed:.1f}µs per order "
+                f"including matching)"
+            )
+        )
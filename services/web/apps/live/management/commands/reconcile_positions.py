@@ -0,0 +1,97 @@
+"""
+Reconcile broker positions with the Position ledger every few seconds while
+the market is open (apps.live.reconcile). Each pass is one broker call and
+one query over the open positions of the runs being checked.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.data.calendar import get_calendar
+from apps.live.brokers import get_broker
+from apps.live.reconcile import PositionReconciler, ledger_holdings
+
+
+class Command(BaseCommand):
+    help = "Compare broker positions with the ledger and report quantity and price breaks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--broker", type=str, default=settings.BROKER, help="zerodha or upstox")
+        parser.add_argument(
+            "--runs",
+            type=str,
+            default=None,
+            help="Comma-separated strategy run ids (default: every running live run)",
+        )
+        parser.add_argument("--exchange", type=str, default="NSE", help="NSE or BSE")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.RECON_INTERVAL_SECONDS,
+            help="Seconds between passes",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Run one pass now, even outside market hours"
+        )
+
+    def handle(self, *args, **options):
+        if options["broker"].lower() == "paper":
+            # A new PaperBroker has an empty book: paper positions live in the runtime.
+            raise CommandError(
+                "Paper runs have no broker account to reconcile; use zerodha or upstox"
+            )
+        try:
+            broker = get_broker(options["broker"])
+        except ValueError as e:
+            raise CommandError(str(e)) from e
+        if not broker.connect():
+            raise CommandError(f"Could not connect to {options['broker']}")
+
+        run_ids = None
+        if options["runs"]:
+            run_ids = [int(i) for i in options["runs"].split(",") if i.strip()]
+        exchange = options["exchange"].upper()
+        reconciler = PositionReconciler(
+            broker,
+            lambda: ledger_holdings(run_ids),
+            exchange=exchange,
+            confirm=1 if options["once"] else None,
+        )
+        calendar = get_calendar(exchange)
+
+        try:
+            while True:
+                if options["once"] or calendar.is_open():
+                    self._report(reconciler)
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            broker.disconnect()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{reconciler.stats['passes']} reconciliation passes, "
+                f"{reconciler.stats['breaks']} open breaks"
+            )
+        )
+
+    def _report(self, reconciler: PositionReconciler) -> None:
+        started = time.perf_counter()
+        breaks = reconciler.check()
+        elapsed = (time.perf_counter() - started) * 1000
+        for item in breaks:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"  {item['key']} {item['kind']} break: "
+                    f"broker {item['broker_quantity']:g} @ {item['broker_avg_price']:.2f}, "
+                    f"ledger {item['ledger_quantity']:g} @ {item['ledger_avg_price']:.2f}"
+                )
+            )
+        if breaks or reconciler.stats["passes"] == 1:
+            self.stdout.write(
+                f"{reconciler.stats['positions']} positions, {len(breaks)} breaks ({elapsed:.1f}ms)"
+            )
@@ -1,18 +1,42 @@
 """
-Start paper trading session with simulated live market data.
-This allows backtesting strategies in real-time with realistic market conditions.
+Start a paper trading session with simulated or replayed market data.
+
+Every strategy named in --strategy gets its own StrategyRun and paper account;
+all of them trade the same symbols in one asyncio runtime (apps.live.runtime).
+With --replay the quotes are a past session's bars (apps.live.replay) instead
+of a random walk from the latest prices. With --broadcast every quote is also
+sent over the channel layer to WebSocket clients on ws/quotes/.
+
+With --event-log every run appends its orders and fills to an event log
+(apps.live.eventlog) under that directory. --resume continues crashed runs
+from their logs instead of starting new ones.
 """
+import asyncio
+import signal
 import time
-from datetime import datetime, timedelta
-from decimal import Decimal
+from datetime import date
+from pathlib import Path
 
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 
-from apps.data.models import Asset, Bar
+from apps.data import metrics
+from apps.data.models import Asset
+from apps.data.quotes import InMemoryQuoteStore, get_quote_store
 from apps.live.brokers.paper import PaperBroker
-from apps.live.models import Order, Position
+from apps.live.eventlog import EventLog
+from apps.live.fanout import ALL_SYMBOLS, ChannelLayerPublisher, QuoteFanout
+from apps.live.replay import HistoricalReplaySource
+from apps.live.runtime import SimulatedQuoteSource, StrategySession, TradingRuntime
 from apps.strategies.models import Strategy, StrategyRun
+from apps.strategies.registry import strategy_registry
+
+STRATEGIES = {
+    "mean_reversion": "apps.strategies.reference.MeanReversionVWAPStrategy",
+    "momentum": "apps.strategies.reference.MomentumBreakoutStrategy",
+    "pairs": "apps.strategies.reference.PairsTradingStrategy",
+}
 
 
 class Command(BaseCommand):
@@ -23,10 +47,10 @@ class Command(BaseCommand):
             "--strategy",
             type=str,
             default="mean_reversion",
-            help="Strategy to use (momentum/mean_reversion)",
+            help="Comma-separated strategies (momentum/mean_reversion/pairs or class paths)",
         )
         parser.add_argument(
-            "--capital", type=float, default=1000000, help="Initial capital in INR"
+            "--capital", type=float, default=1000000, help="Initial capital per run in INR"
         )
         parser.add_argument(
             "--symbols",
@@ -34,311 +58,255 @@ class Command(BaseCommand):
             default="RELIANCE,TCS,INFY,HDFCBANK,ICICIBANK",
             help="Comma-separated list of symbols to trade",
         )
+        parser.add_argument("--exchange", type=str, default="NSE", help="NSE or BSE")
         parser.add_argument(
-            "--interval", type=int, default=5, help="Update interval in seconds"
+            "--interval", type=float, default=1.0, help="Seconds between ticks (may be < 1)"
         )
         parser.add_argument(
-            "--duration", type=int, default=60, help="Trading duration in minutes"
+            "--duration",
+            type=float,
+            default=None,
+            help="Duration in minutes (default 60, or the whole replayed session)",
         )
-
-    def handle(self, *args, **options):
-        strategy_type = options["strategy"]
-        initial_capital = Decimal(str(options["capital"]))
-        symbols = [s.strip() for s in options["symbols"].split(",")]
-        interval = options["interval"]
-        duration_minutes = options["duration"]
-
-        self.stdout.write(
-            self.style.SUCCESS(
-                f"\n{'='*80}\nPAPER TRADING SESSION\n{'='*80}"
-            )
+        parser.add_argument(
+            "--seed", type=int, default=None, help="Seed for simulated prices and slippage"
         )
-        self.stdout.write(f"Strategy: {strategy_type}")
-        self.stdout.write(f"Initial Capital: ₹{initial_capital:,.0f}")
-        self.stdout.write(f"Symbols: {', '.join(symbols)}")
-        self.stdout.write(f"Update Interval: {interval}s")
-        self.stdout.write(f"Duration: {duration_minutes} minutes")
-        self.stdout.write(f"{'='*80}\n")
-
-        # Get or create strategy
-        strategy, created = Strategy.objects.get_or_create(
-            name=f"{strategy_type.replace('_', ' ').title()} Paper",
-            defaults={
-                "description": f"Paper trading session for {strategy_type}",
-                "is_active": True,
-                "parameters": self._get_strategy_params(strategy_type),
-            },
+        parser.add_argument(
+            "--replay", type=str, default=None, help="Replay this session's bars (YYYY-MM-DD)"
         )
-
-        if created:
-            self.stdout.write(self.style.SUCCESS(f"Created strategy: {strategy.name}"))
-
-        # Create strategy run
-        strategy_run = StrategyRun.objects.create(
-            strategy=strategy,
-            run_type="paper",
-            status="running",
-            start_date=timezone.now().date(),
-            started_at=timezone.now(),
-            parameters={
-                "initial_capital": float(initial_capital),
-                "symbols": symbols,
-                "interval": interval,
-            },
+        parser.add_argument("--timeframe", type=str, default="1m", help="Bar timeframe to replay")
+        parser.add_argument(
+            "--speed",
+            type=str,
+            default="1",
+            help="Replay speed: 1, 10, 100, ... or max for as fast as possible",
         )
-
-        self.stdout.write(
-            self.style.SUCCESS(f"Created strategy run ID: {strategy_run.id}")
+        parser.add_argument(
+            "--broadcast",
+            action="store_true",
+            help="Send quotes to WebSocket subscribers through the channel layer",
         )
-
-        # Initialize paper broker
-        broker = PaperBroker(
-            initial_capital=float(initial_capital),
-            slippage_bps=5,
-            commission_bps=3,
+        parser.add_argument(
+            "--metrics-port",
+            type=int,
+            default=settings.LIVE_METRICS_PORT,
+            help="Serve Prometheus metrics, including order latency, on this port",
+        )
+        parser.add_argument(
+            "--event-log",
+            type=str,
+            default=settings.LIVE_EVENT_LOG_DIR,
+            help="Keep a crash-recovery event log of each run in this directory",
+        )
+        parser.add_argument(
+            "--resume",
+            type=str,
+            default=None,
+            help="Comma-separated ids of paper runs to continue from their event logs",
         )
 
-        # Get assets
-        assets = {
-            symbol: Asset.objects.filter(symbol=symbol, is_active=True).first()
-            for symbol in symbols
-        }
-        assets = {k: v for k, v in assets.items() if v is not None}
-
+    def handle(self, *args, **options):
+        symbols = [s.strip().upper() for s in options["symbols"].split(",") if s.strip()]
+        exchange = options["exchange"].upper()
+        capital = options["capital"]
+
+        assets = list(
+            Asset.objects.filter(
+                symbol__in=symbols, exchange__code=exchange, is_active=True
+            ).select_related("exchange")
+        )
         if not assets:
-            self.stdout.write(
-                self.style.ERROR(
-                    f"No assets found for symbols: {symbols}. Please load sample data first with 'make seed'"
-                )
+            raise CommandError(
+                f"No assets found for symbols: {symbols}. Load sample data first with 'make seed'"
             )
-            return
-
-        self.stdout.write(
-            self.style.SUCCESS(f"\nFound {len(assets)} assets: {', '.join(assets.keys())}")
-        )
-        self.stdout.write(f"\n{'='*80}")
-        self.stdout.write("STARTING LIVE SIMULATION...")
-        self.stdout.write(f"{'='*80}\n")
-
-        # Main trading loop
-        start_time = datetime.now()
-        end_time = start_time + timedelta(minutes=duration_minutes)
-        tick_count = 0
-
-        try:
-            while datetime.now() < end_time:
-                tick_count += 1
-                current_time = timezone.now()
 
+        if options["replay"]:
+            # Replayed prices are older than the live ones, so they get their own store.
+            quotes = InMemoryQuoteStore()
+            source = self._replay_source(quotes, assets, options)
+            duration = options["duration"]
+        else:
+            quotes = get_quote_store()
+            quotes.warm(asset.id for asset in assets)
+            if not quotes.get_many(asset.id for asset in assets):
+                raise CommandError(
+                    "No bars to start prices from; load bars for these symbols first"
+                )
+            source = SimulatedQuoteSource(
+                quotes, [asset.id for asset in assets], options["interval"], seed=options["seed"]
+            )
+            duration = options["duration"] or 60
+
+        if options["resume"]:
+            runs = self._resume_runs(options)
+        else:
+            runs = [
+                self._start_run(name.strip(), symbols, options)
+                for name in options["strategy"].split(",")
+                if name.strip()
+            ]
+
+        logs = {}
+        if options["event_log"]:
+            opened = time.perf_counter()
+            logs = {run.id: EventLog.for_run(run.id, Path(options["event_log"])) for run in runs}
+            recovery_ms = (time.perf_counter() - opened) * 1000
+
+        sessions = [
+            StrategySession(
+                run,
+                PaperBroker(quotes=quotes, initial_capital=capital, seed=options["seed"]),
+                assets,
+                initial_capital=capital,
+                events=logs.get(run.id),
+            )
+            for run in runs
+        ]
+        for session in sessions:
+            session.broker.connect()
+            if session.events is not None and session.events.stats["recovered"]:
                 self.stdout.write(
-                    f"\n[Tick {tick_count}] {current_time.strftime('%H:%M:%S')}"
+                    f"  Run {session.strategy_run.id} recovered from "
+                    f"{session.events.stats['recovered']:,} events: cash ₹{session.cash:,.2f}, "
+                    f"{len(session.positions)} open positions"
                 )
+        if options["resume"]:
+            self.stdout.write(f"Recovered in {recovery_ms:.1f}ms")
 
-                # Get latest prices for each asset (simulate live data)
-                market_data = {}
-                for symbol, asset in assets.items():
-                    # Get recent bar
-                    recent_bar = (
-                        Bar.objects.filter(asset=asset).order_by("-timestamp").first()
-                    )
-
-                    if recent_bar:
-                        # Simulate price movement (+/- 0.5%)
-                        import random
+        fanout = None
+        if options["broadcast"]:
+            fanout = QuoteFanout()
+            fanout.subscribe(ChannelLayerPublisher(), [ALL_SYMBOLS])
 
-                        price_change = random.uniform(-0.005, 0.005)
-                        current_price = float(recent_bar.close) * (1 + price_change)
+        runtime = TradingRuntime(source, sessions, lockstep=bool(options["replay"]), fanout=fanout)
 
-                        market_data[symbol] = {
-                            "price": current_price,
-                            "high": current_price * 1.002,
-                            "low": current_price * 0.998,
-                            "volume": random.randint(1000, 10000),
-                        }
+        if options["replay"]:
+            speed = "full speed" if options["speed"] == "max" else f"{options['speed']}x"
+            pace = (
+                f"through {len(source)} {options['timeframe']} steps "
+                f"of {options['replay']} at {speed}"
+            )
+        else:
+            pace = f"every {options['interval']}s"
+        until = f"for {duration} minutes" if duration else "to the end of the session"
+        self.stdout.write(
+            f"Trading {len(assets)} symbols with {len(sessions)} strategy runs "
+            f"{pace} {until} (Ctrl-C to stop)"
+        )
 
-                        self.stdout.write(
-                            f"  {symbol:12s} ₹{current_price:10.2f} ({price_change*100:+.2f}%)"
-                        )
+        if options["metrics_port"]:
+            metrics.start_server(options["metrics_port"])
 
-                # Generate signals using simple strategy logic
-                signals = self._generate_signals(
-                    strategy_type, market_data, broker.positions
+        started = time.perf_counter()
+        try:
+            results = asyncio.run(self._run(runtime, duration * 60 if duration else None))
+        except Exception as e:
+            for session in sessions:
+                run = session.strategy_run
+                run.status = "failed"
+                run.completed_at = timezone.now()
+                run.save(update_fields=["status", "completed_at"])
+            raise CommandError(f"Trading stopped: {e}") from e
+        elapsed = time.perf_counter() - started
+
+        for session in sessions:
+            run = session.strategy_run
+            result = results[run.id]
+            run.status = "completed"
+            run.completed_at = timezone.now()
+            run.result = result
+            run.save(update_fields=["status", "completed_at", "result"])
+
+            latency = result["latency_ms"]
+            self.stdout.write(
+                f"  Run {run.id} {run.strategy.name}: {result['filled']} fills, "
+                f"{result['rejected']} rejected, {result['skipped']} ticks skipped, "
+                f"P&L ₹{result['pnl']:,.2f}"
+                + (
+                    f", order latency p50 {latency['p50_ms']:.2f}ms p99 {latency['p99_ms']:.2f}ms"
+                    if latency
+                    else ""
                 )
+            )
 
-                # Execute signals
-                for signal in signals:
-                    symbol = signal["symbol"]
-                    side = signal["side"]  # BUY or SELL
-                    quantity = signal["quantity"]
-                    price = market_data[symbol]["price"]
-
-                    # Create order
-                    order = Order.objects.create(
-                        strategy_run=strategy_run,
-                        asset=assets[symbol],
-                        order_type="MARKET",
-                        side=side,
-                        quantity=quantity,
-                        price=Decimal(str(price)),
-                        status="pending",
-                    )
-
-                    # Execute with broker
-                    execution = broker.place_order(
-                        symbol=symbol,
-                        side=side.lower(),
-                        quantity=quantity,
-                        price=price,
-                    )
-
-                    if execution:
-                        order.status = "filled"
-                        order.filled_quantity = quantity
-                        order.average_price = Decimal(str(execution["price"]))
-                        order.save()
-
-                        self.stdout.write(
-                            self.style.SUCCESS(
-                                f"  ✓ {side} {quantity} {symbol} @ ₹{execution['price']:.2f}"
-                            )
-                        )
-
-                # Update broker with current prices (for MTM)
-                broker.update_positions(market_data)
-
-                # Display portfolio summary
-                self._display_portfolio(broker, tick_count)
-
-                # Wait for next tick
-                time.sleep(interval)
-
-        except KeyboardInterrupt:
-            self.stdout.write(self.style.WARNING("\n\nTrading interrupted by user"))
-
-        finally:
-            # Close all positions
-            self.stdout.write(f"\n\n{'='*80}")
-            self.stdout.write("CLOSING ALL POSITIONS...")
-            self.stdout.write(f"{'='*80}\n")
-
-            for symbol, position in broker.positions.items():
-                if position["quantity"] != 0:
-                    side = "SELL" if position["quantity"] > 0 else "BUY"
-                    quantity = abs(position["quantity"])
-                    price = market_data.get(symbol, {}).get("price", position["avg_price"])
-
-                    broker.place_order(
-                        symbol=symbol, side=side.lower(), quantity=quantity, price=price
-                    )
-
-                    self.stdout.write(
-                        self.style.SUCCESS(f"  Closed position: {symbol}")
-                    )
-
-            # Update strategy run
-            strategy_run.status = "completed"
-            strategy_run.completed_at = timezone.now()
-            strategy_run.result = {
-                "final_capital": broker.cash + broker.get_portfolio_value(market_data),
-                "total_pnl": broker.realized_pnl + broker.unrealized_pnl,
-                "realized_pnl": broker.realized_pnl,
-                "unrealized_pnl": broker.unrealized_pnl,
-                "total_trades": len(broker.trade_history),
-                "total_commission": broker.total_commission,
-            }
-            strategy_run.save()
-
-            # Final summary
-            self._display_final_summary(broker, strategy_run, initial_capital)
-
-    def _get_strategy_params(self, strategy_type):
-        if strategy_type == "momentum":
-            return {
-                "fast_period": 15,
-                "slow_period": 30,
-                "volume_sma_period": 20,
-                "volume_multiplier": 2.0,
-                "atr_period": 14,
-                "atr_multiplier": 1.5,
-            }
-        else:  # mean_reversion
-            return {
-                "lookback_periods": 20,
-                "entry_std": 2.0,
-                "exit_std": 0.5,
-                "volume_filter_multiplier": 1.5,
-            }
-
-    def _generate_signals(self, strategy_type, market_data, current_positions):
-        """Simple signal generation logic for demonstration"""
-        import random
-
-        signals = []
-
-        for symbol, data in market_data.items():
-            # Simple random walk strategy for demonstration
-            # In production, this would use the actual strategy logic
-            if random.random() > 0.8:  # 20% chance of signal
-                current_qty = current_positions.get(symbol, {}).get("quantity", 0)
-
-                if current_qty == 0:  # No position - enter
-                    side = "BUY" if random.random() > 0.5 else "SELL"
-                    quantity = random.randint(10, 50)
-                    signals.append(
-                        {"symbol": symbol, "side": side, "quantity": quantity}
-                    )
-                elif abs(current_qty) >= 10:  # Has position - maybe exit
-                    if random.random() > 0.7:  # 30% chance to exit
-                        side = "SELL" if current_qty > 0 else "BUY"
-                        quantity = abs(current_qty)
-                        signals.append(
-                            {"symbol": symbol, "side": side, "quantity": quantity}
-                        )
-
-        return signals
-
-    def _display_portfolio(self, broker, tick_count):
-        """Display current portfolio status"""
-        if tick_count % 5 == 0:  # Display every 5 ticks
-            self.stdout.write(f"\n  Portfolio Status:")
-            self.stdout.write(f"    Cash: ₹{broker.cash:,.2f}")
-            self.stdout.write(f"    Realized P&L: ₹{broker.realized_pnl:,.2f}")
-            self.stdout.write(f"    Unrealized P&L: ₹{broker.unrealized_pnl:,.2f}")
-            self.stdout.write(f"    Total Trades: {len(broker.trade_history)}")
-
-            if broker.positions:
-                self.stdout.write(f"\n  Open Positions:")
-                for symbol, pos in broker.positions.items():
-                    if pos["quantity"] != 0:
-                        self.stdout.write(
-                            f"    {symbol:12s} Qty: {pos['quantity']:4.0f} Avg: ₹{pos['avg_price']:.2f}"
-                        )
-
-    def _display_final_summary(self, broker, strategy_run, initial_capital):
-        """Display final trading session summary"""
-        final_value = broker.cash
-        total_pnl = broker.realized_pnl
-        total_return = (total_pnl / float(initial_capital)) * 100
-
-        self.stdout.write(f"\n\n{'='*80}")
-        self.stdout.write("FINAL SUMMARY")
-        self.stdout.write(f"{'='*80}")
-        self.stdout.write(f"\nStrategy Run ID: {strategy_run.id}")
-        self.stdout.write(f"Initial Capital: ₹{initial_capital:,.2f}")
-        self.stdout.write(f"Final Capital: ₹{final_value:,.2f}")
-        self.stdout.write(f"Total P&L: ₹{total_pnl:,.2f}")
-        self.stdout.write(f"Total Return: {total_return:+.2f}%")
-        self.stdout.write(f"\nTotal Trades: {len(broker.trade_history)}")
-        self.stdout.write(f"Total Commission: ₹{broker.total_commission:,.2f}")
-
-        if broker.trade_history:
-            winning_trades = sum(1 for t in broker.trade_history if t["pnl"] > 0)
-            win_rate = (winning_trades / len(broker.trade_history)) * 100
-            self.stdout.write(f"Win Rate: {win_rate:.1f}%")
-
-        self.stdout.write(f"\n{'='*80}\n")
         self.stdout.write(
             self.style.SUCCESS(
-                f"\nPaper trading session completed successfully!\nRun ID: {strategy_run.id}"
+                f"Processed {runtime.ticks} ticks in {elapsed:.1f}s, "
+                f"{runtime.journal.stats['events']} journal events written "
+                f"in {runtime.journal.stats['batches']} batches"
             )
         )
+
+    def _replay_source(self, quotes, assets, options) -> HistoricalReplaySource:
+        speed = None if options["speed"] == "max" else float(options["speed"])
+        try:
+            source = HistoricalReplaySource(
+                quotes,
+                assets,
+                date.fromisoformat(options["replay"]),
+                timeframe=options["timeframe"],
+                speed=speed,
+            )
+            rows = source.load()
+        except ValueError as e:
+            raise CommandError(str(e)) from e
+        self.stdout.write(f"Loaded {rows:,} bars to replay")
+        return source
+
+    async def _run(self, runtime: TradingRuntime, duration: float):
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGINT, runtime.stop)
+        try:
+            return await runtime.run(duration=duration)
+        finally:
+            loop.remove_signal_handler(signal.SIGINT)
+
+    def _resume_runs(self, options):
+        if not options["event_log"]:
+            raise CommandError("--resume needs --event-log or LIVE_EVENT_LOG_DIR")
+        ids = [int(i) for i in options["resume"].split(",") if i.strip()]
+        runs = list(
+            StrategyRun.objects.filter(id__in=ids, run_type="paper").select_related("strategy")
+        )
+        missing = set(ids) - {run.id for run in runs}
+        if missing:
+            raise CommandError(f"No paper runs with ids {sorted(missing)}")
+        for run in runs:
+            if not (Path(options["event_log"]) / f"run-{run.id}").exists():
+                raise CommandError(f"Run {run.id} has no event log in {options['event_log']}")
+            run.status = "running"
+            run.completed_at = None
+            run.save(update_fields=["status", "completed_at"])
+        return runs
+
+    def _start_run(self, name: str, symbols, options) -> StrategyRun:
+        class_path = STRATEGIES.get(name, name)
+        try:
+            components = strategy_registry.resolve(class_path)
+        except ValueError as e:
+            raise CommandError(str(e)) from e
+
+        strategy_name = getattr(
+            components.strategy_class, "name", components.strategy_class.__name__
+        )
+        strategy, _ = Strategy.objects.get_or_create(
+            name=f"{strategy_name} Paper",
+            defaults={
+                "description": f"Paper trading session for {strategy_name}",
+                "class_path": class_path,
+                "parameters": components.default_parameters,
+                "universe": symbols,
+            },
+        )
+        return StrategyRun.objects.create(
+            strategy=strategy,
+            run_type="paper",
+            status="running",
+            start_date=timezone.now().date(),
+            started_at=timezone.now(),
+            parameters={
+                "initial_capital": options["capital"],
+                "symbols": symbols,
+                "interval": options["interval"],
+            },
+        )
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.14 on 2026-10-19 10:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("live", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sessionmetrics",
+            name="latency",
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AddField(
+            model_name="sessionmetrics",
+            name="p50_latency_ms",
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name="sessionmetrics",
+            name="p99_latency_ms",
+            field=models.FloatField(null=True),
+        ),
+    ]
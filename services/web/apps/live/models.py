@@ -144,8 +144,13 @@ class SessionMetrics(models.Model):
     total_orders = models.IntegerField(default=0)
     filled_orders = models.IntegerField(default=0)
     rejected_orders = models.IntegerField(default=0)
+    # Signal-to-fill latency over the run so far.
     avg_latency_ms = models.FloatField(null=True)
     max_latency_ms = models.FloatField(null=True)
+    p50_latency_ms = models.FloatField(null=True)
+    p99_latency_ms = models.FloatField(null=True)
+    # Count/avg/p50/p99/max per stage since the previous snapshot (apps.live.latency).
+    latency = models.JSONField(default=dict)
 
     class Meta:
         db_table = "session_metrics"
@@ -0,0 +1,376 @@
+"""
+Position keeping shared by the backtest engine, the paper broker and the
+trading runtime.
+
+A PositionBook applies fills one at a time. Each fill updates the position's
+quantity, cost basis and realized P&L, and emits a ClosedTrade for every
+round trip it completes. Realized P&L is matched either FIFO against the open
+lots or against the average entry price. In both cases each lot is opened and
+closed once, so a fill costs O(1) amortised.
+
+Quantities, cost bases and marks are held in numpy arrays indexed by a slot
+per key. Mark-to-market and the unrealized P&L of every position are then a
+few vector operations:
+
+    unrealized = quantity * mark - cost
+
+Keys are whatever the caller trades by: asset ids in the engine and the
+runtime, symbols in the paper broker.
+"""
+from collections import deque
+from typing import Deque, Dict, Hashable, List, Mapping, Optional
+
+import numpy as np
+
+from apps.live.models import Trade
+
+METHODS = ("fifo", "average")
+
+# Quantities below this are treated as flat.
+EPSILON = 1e-9
+
+
+class Lot:
+    __slots__ = ("quantity", "price", "commission", "opened_at", "order")
+
+    def __init__(self, quantity: float, price: float, commission: float, opened_at, order):
+        self.quantity = quantity
+        self.price = price
+        self.commission = commission
+        self.opened_at = opened_at
+        self.order = order
+
+
+class ClosedTrade:
+    """One round trip; quantity is positive for a long and negative for a short."""
+
+    __slots__ = (
+        "key",
+        "quantity",
+        "entry_price",
+        "exit_price",
+        "entry_commission",
+        "exit_commission",
+        "entered_at",
+        "exited_at",
+        "entry_order",
+        "exit_order",
+    )
+
+    def __init__(
+        self,
+        key,
+        quantity: float,
+        entry_price: float,
+        exit_price: float,
+        entry_commission: float,
+        exit_commission: float,
+        entered_at,
+        exited_at,
+        entry_order=None,
+        exit_order=None,
+    ):
+        self.key = key
+        self.quantity = quantity
+        self.entry_price = entry_price
+        self.exit_price = exit_price
+        self.entry_commission = entry_commission
+        self.exit_commission = exit_commission
+        self.entered_at = entered_at
+        self.exited_at = exited_at
+        self.entry_order = entry_order
+        self.exit_order = exit_order
+
+    @property
+    def pnl(self) -> float:
+        return (
+            self.quantity * (self.exit_price - self.entry_price)
+            - self.entry_commission
+            - self.exit_commission
+        )
+
+    @property
+    def pnl_pct(self) -> float:
+        basis = abs(self.quantity) * self.entry_price
+        return self.pnl / basis if basis else 0.0
+
+    @property
+    def duration_minutes(self) -> int:
+        if self.entered_at is None or self.exited_at is None:
+            return 0
+        return int((self.exited_at - self.entered_at).total_seconds() // 60)
+
+    def to_model(self, strategy_run_id: int) -> Trade:
+        """Trade row for a book keyed by asset id; orders must be Order instances or None."""
+        return Trade(
+            strategy_run_id=strategy_run_id,
+            asset_id=self.key,
+            quantity=int(self.quantity),
+            entry_price=round(self.entry_price, 4),
+            exit_price=round(self.exit_price, 4),
+            entry_commission=round(self.entry_commission, 4),
+            exit_commission=round(self.exit_commission, 4),
+            pnl=round(self.pnl, 4),
+            pnl_pct=round(self.pnl_pct, 4),
+            duration_minutes=self.duration_minutes,
+            entry_order=self.entry_order,
+            exit_order=self.exit_order,
+            entered_at=self.entered_at,
+            exited_at=self.exited_at,
+        )
+
+
+class PositionBook:
+    def __init__(self, method: str = "fifo", capacity: int = 64):
+        if method not in METHODS:
+            raise ValueError(f"Unknown accounting method {method!r}; expected one of {METHODS}")
+        self.method = method
+        self.trades: List[ClosedTrade] = []
+
+        self._slots: Dict[Hashable, int] = {}
+        self._keys: List[Hashable] = []
+        self.quantities = np.zeros(capacity)
+        # Signed cost of the open quantity: sum of quantity * entry price.
+        self.costs = np.zeros(capacity)
+        self.marks = np.full(capacity, np.nan)
+        self.realized = np.zeros(capacity)
+        # Entry commission of the open quantity, released pro rata as it closes.
+        self._open_commission: List[float] = []
+        self._opened_at: List = []
+        self._lots: List[Deque[Lot]] = []
+
+    def __contains__(self, key) -> bool:
+        slot = self._slots.get(key)
+        return slot is not None and abs(self.quantities[slot]) > EPSILON
+
+    def _slot(self, key) -> int:
+        slot = self._slots.get(key)
+        if slot is not None:
+            return slot
+
+        slot = len(self._keys)
+        if slot == len(self.quantities):
+            grow = len(self.quantities)
+            self.quantities = np.concatenate([self.quantities, np.zeros(grow)])
+            self.costs = np.concatenate([self.costs, np.zeros(grow)])
+            self.marks = np.concatenate([self.marks, np.full(grow, np.nan)])
+            self.realized = np.concatenate([self.realized, np.zeros(grow)])
+        self._slots[key] = slot
+        self._keys.append(key)
+        self._open_commission.append(0.0)
+        self._opened_at.append(None)
+        self._lots.append(deque())
+        return slot
+
+    def fill(
+        self,
+        key,
+        quantity: float,
+        price: float,
+        commission: float = 0.0,
+        timestamp=None,
+        order=None,
+    ) -> List[ClosedTrade]:
+        """
+        Apply a fill of signed quantity (buys positive) at price; returns the
+        round trips it closed. A fill larger than the position flips it.
+        """
+        if not quantity:
+            return []
+
+        slot = self._slot(key)
+        held = float(self.quantities[slot])
+        closed: List[ClosedTrade] = []
+
+        if abs(held) > EPSILON and (held > 0) != (quantity > 0):
+            closing = min(abs(quantity), abs(held))
+            direction = 1.0 if held > 0 else -1.0
+            exit_commission = commission * closing / abs(quantity)
+
+            if self.method == "fifo":
+                closed = self._close_lots(
+                    slot, key, closing, direction, price, exit_commission, timestamp, order
+                )
+                closed_cost = sum(t.quantity * t.entry_price for t in closed)
+                released = sum(t.entry_commission for t in closed)
+            else:
+                average = self.costs[slot] / held
+                released = self._open_commission[slot] * closing / abs(held)
+                closed = [
+                    ClosedTrade(
+                        key,
+                        direction * closing,
+                        float(average),
+                        price,
+                        released,
+                        exit_commission,
+                        self._opened_at[slot],
+                        timestamp,
+                        exit_order=order,
+                    )
+                ]
+                closed_cost = direction * closing * average
+
+            self.quantities[slot] = held - direction * closing
+            self.costs[slot] -= closed_cost
+            self._open_commission[slot] -= released
+            self.realized[slot] += sum(t.pnl for t in closed)
+            self.trades.extend(closed)
+
+            if abs(self.quantities[slot]) <= EPSILON:
+                self.quantities[slot] = 0.0
+                self.costs[slot] = 0.0
+                self._open_commission[slot] = 0.0
+                self._opened_at[slot] = None
+
+            remainder = abs(quantity) - closing
+            if remainder <= EPSILON:
+                return closed
+            # The rest opens a position the other way.
+            commission -= exit_commission
+            quantity = -direction * remainder
+
+        self._open(slot, quantity, price, commission, timestamp, order)
+        return closed
+
+    def _open(self, slot: int, quantity: float, price: float, commission: float, timestamp, order):
+        if abs(self.quantities[slot]) <= EPSILON:
+            self._opened_at[slot] = timestamp
+        self.quantities[slot] += quantity
+        self.costs[slot] += quantity * price
+        self._open_commission[slot] += commission
+        if self.method == "fifo":
+            self._lots[slot].append(Lot(quantity, price, commission, timestamp, order))
+        if np.isnan(self.marks[slot]):
+            self.marks[slot] = price
+
+    def _close_lots(
+        self,
+        slot: int,
+        key,
+        closing: float,
+        direction: float,
+        price: float,
+        commission: float,
+        timestamp,
+        order,
+    ) -> List[ClosedTrade]:
+        lots = self._lots[slot]
+        closed = []
+        remaining = closing
+        while remaining > EPSILON:
+            lot = lots[0]
+            size = abs(lot.quantity)
+            take = min(size, remaining)
+            share = lot.commission * take / size
+            closed.append(
+                ClosedTrade(
+                    key,
+                    direction * take,
+                    lot.price,
+                    price,
+                    share,
+                    commission * take / closing,
+                    lot.opened_at,
+                    timestamp,
+                    lot.order,
+                    order,
+                )
+            )
+            if take >= size - EPSILON:
+                lots.popleft()
+            else:
+                lot.quantity -= direction * take
+                lot.commission -= share
+            remaining -= take
+        return closed
+
+    def mark(self, prices: Mapping[Hashable, float]) -> None:
+        """Set the latest price of each key in prices; others keep their last mark."""
+        slots = self._slots
+        keys = [key for key in prices if key in slots]
+        if keys:
+            self.marks[[slots[key] for key in keys]] = [prices[key] for key in keys]
+
+    def _live(self) -> slice:
+        return slice(0, len(self._keys))
+
+    def market_value(self) -> float:
+        live = self._live()
+        return float(np.nansum(self.quantities[live] * self.marks[live]))
+
+    def unrealized_pnl(self) -> float:
+        live = self._live()
+        return float(np.nansum(self.quantities[live] * self.marks[live] - self.costs[live]))
+
+    def realized_pnl(self) -> float:
+        return float(self.realized[self._live()].sum())
+
+    def quantity(self, key) -> float:
+        slot = self._slots.get(key)
+        return 0.0 if slot is None else float(self.quantities[slot])
+
+    def avg_price(self, key) -> float:
+        slot = self._slots.get(key)
+        if slot is None or abs(self.quantities[slot]) <= EPSILON:
+            return 0.0
+        return float(self.costs[slot] / self.quantities[slot])
+
+    def positions(self) -> Dict[Hashable, float]:
+        """Open quantities by key."""
+        live = self._live()
+        open_slots = np.flatnonzero(np.abs(self.quantities[live]) > EPSILON)
+        return {self._keys[slot]: float(self.quantities[slot]) for slot in open_slots}
+
+    def position(self, key) -> Dict:
+        slot = self._slot(key)
+        quantity = float(self.quantities[slot])
+        mark = float(self.marks[slot])
+        avg_price = self.avg_price(key)
+        return {
+            "quantity": quantity,
+            "avg_price": avg_price,
+            "mark": None if np.isnan(mark) else mark,
+            "market_value": 0.0 if np.isnan(mark) else quantity * mark,
+            "unrealized_pnl": 0.0 if np.isnan(mark) else quantity * mark - float(self.costs[slot]),
+            "realized_pnl": float(self.realized[slot]),
+            "opened_at": self._opened_at[slot],
+        }
+
+    def state(self) -> Dict:
+        """
+        The book's open positions as plain values, for a snapshot. Lots keep
+        their quantity, price, commission and open time but not their order.
+        Closed trades are not included.
+        """
+        live = self._live()
+        return {
+            "method": self.method,
+            "keys": list(self._keys),
+            "quantities": self.quantities[live].tolist(),
+            "costs": self.costs[live].tolist(),
+            "marks": self.marks[live].tolist(),
+            "realized": self.realized[live].tolist(),
+            "open_commission": list(self._open_commission),
+            "opened_at": list(self._opened_at),
+            "lots": [
+                [[lot.quantity, lot.price, lot.commission, lot.opened_at] for lot in lots]
+                for lots in self._lots
+            ],
+        }
+
+    @classmethod
+    def from_state(cls, state: Mapping, keys: Optional[Mapping] = None) -> "PositionBook":
+        """A book rebuilt from state(); keys optionally maps its keys to new ones."""
+        book = cls(state["method"], capacity=max(len(state["keys"]), 1))
+        for key in state["keys"]:
+            book._slot(keys[key] if keys is not None else key)
+        live = book._live()
+        book.quantities[live] = state["quantities"]
+        book.costs[live] = state["costs"]
+        book.marks[live] = state["marks"]
+        book.realized[live] = state["realized"]
+        book._open_commission = list(state["open_commission"])
+        book._opened_at = list(state["opened_at"])
+        book._lots = [deque(Lot(*lot, None) for lot in lots) for lots in state["lots"]]
+        return book
@@ -0,0 +1,190 @@
+"""
+Position reconciliation between a broker account and our ledger.
+
+Both sides become Holdings: keys "EXCHANGE:SYMBOL" in sorted order, with
+net signed quantities and average prices in numpy arrays. Ledger rows of
+several strategy runs on one key are netted, and their prices weighted by
+quantity. reconcile() aligns the two key sets with one searchsorted per
+side, then compares every key at once:
+
+  quantity   the quantities differ by more than quantity_tolerance
+  avg_price  the quantities agree, but the average prices differ by more
+             than price_tolerance (a fraction of the ledger's price)
+
+A key missing on one side has quantity 0 there.
+
+The ledger is read with a single query over open Position rows. Those rows
+are written behind the order path (apps.live.journal), so they can lag the
+broker for a moment. A PositionReconciler therefore only reports a break
+once it has been seen in `confirm` consecutive passes.
+"""
+import logging
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+from django.conf import settings
+
+from apps.live.brokers.base import BaseBroker
+from apps.live.models import Position
+from apps.live.positions import EPSILON
+
+logger = logging.getLogger(__name__)
+
+
+class Holdings:
+    """Net quantities and average prices by key, sorted by key."""
+
+    def __init__(self, keys: np.ndarray, quantities: np.ndarray, avg_prices: np.ndarray):
+        self.keys = keys
+        self.quantities = quantities
+        self.avg_prices = avg_prices
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def from_rows(
+        cls, keys: Iterable[str], quantities: Iterable[float], prices: Iterable[float]
+    ) -> "Holdings":
+        """Net the rows of each key; the average price is weighted by quantity."""
+        keys = np.asarray(list(keys), dtype=str)
+        quantities = np.asarray(list(quantities), dtype=float)
+        prices = np.asarray(list(prices), dtype=float)
+        if len(keys) != len(quantities) or len(keys) != len(prices):
+            raise ValueError("keys, quantities and prices must have the same length")
+
+        unique, index = np.unique(keys, return_inverse=True)
+        net = np.bincount(index, weights=quantities, minlength=len(unique)).astype(float)
+        cost = np.bincount(index, weights=quantities * prices, minlength=len(unique))
+        avg_prices = np.divide(cost, net, out=np.zeros(len(unique)), where=np.abs(net) > EPSILON)
+        return cls(unique, net, avg_prices)
+
+    @classmethod
+    def from_broker(cls, positions: List[Dict], exchange: str = "NSE") -> "Holdings":
+        """BaseBroker.get_positions() rows; those without an exchange are on exchange."""
+        return cls.from_rows(
+            [f"{p.get('exchange') or exchange}:{p['symbol']}" for p in positions],
+            [p["quantity"] for p in positions],
+            [p.get("avg_price") or 0.0 for p in positions],
+        )
+
+    def align(self, keys: np.ndarray):
+        """Quantities and average prices at keys, 0 where a key is not held."""
+        if not len(self.keys):
+            return np.zeros(len(keys)), np.zeros(len(keys))
+        slots = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        held = self.keys[slots] == keys
+        return (
+            np.where(held, self.quantities[slots], 0.0),
+            np.where(held, self.avg_prices[slots], 0.0),
+        )
+
+
+def ledger_holdings(run_ids: Optional[Iterable[int]] = None, run_type: str = "live") -> Holdings:
+    """
+    Open positions of the given strategy runs, or of every running run of
+    run_type, in one query.
+    """
+    positions = Position.objects.exclude(quantity=0)
+    if run_ids is not None:
+        positions = positions.filter(strategy_run_id__in=list(run_ids))
+    else:
+        positions = positions.filter(
+            strategy_run__status="running", strategy_run__run_type=run_type
+        )
+    rows = list(
+        positions.values_list(
+            "asset__exchange__code", "asset__symbol", "quantity", "avg_entry_price"
+        )
+    )
+    return Holdings.from_rows(
+        [f"{exchange}:{symbol}" for exchange, symbol, _, _ in rows],
+        [quantity for _, _, quantity, _ in rows],
+        [float(price) for _, _, _, price in rows],
+    )
+
+
+def reconcile(
+    broker: Holdings,
+    ledger: Holdings,
+    quantity_tolerance: float = 0.0,
+    price_tolerance: float = 0.001,
+) -> List[Dict]:
+    """The breaks between broker and ledger, in key order."""
+    keys = np.union1d(broker.keys, ledger.keys)
+    broker_quantities, broker_prices = broker.align(keys)
+    ledger_quantities, ledger_prices = ledger.align(keys)
+
+    quantity = np.abs(broker_quantities - ledger_quantities) > quantity_tolerance + EPSILON
+    avg_price = (
+        ~quantity
+        & (np.abs(ledger_quantities) > EPSILON)
+        & (np.abs(broker_prices - ledger_prices) > price_tolerance * np.abs(ledger_prices))
+    )
+
+    breaks = []
+    for i in np.flatnonzero(quantity | avg_price):
+        breaks.append(
+            {
+                "key": str(keys[i]),
+                "kind": "quantity" if quantity[i] else "avg_price",
+                "broker_quantity": float(broker_quantities[i]),
+                "ledger_quantity": float(ledger_quantities[i]),
+                "broker_avg_price": round(float(broker_prices[i]), 4),
+                "ledger_avg_price": round(float(ledger_prices[i]), 4),
+            }
+        )
+    return breaks
+
+
+class PositionReconciler:
+    def __init__(
+        self,
+        broker: BaseBroker,
+        ledger: Callable[[], Holdings] = ledger_holdings,
+        exchange: str = "NSE",
+        quantity_tolerance: float = 0.0,
+        price_tolerance: Optional[float] = None,
+        confirm: Optional[int] = None,
+    ):
+        if price_tolerance is None:
+            price_tolerance = settings.RECON_PRICE_TOLERANCE_PCT / 100.0
+        self.broker = broker
+        self.ledger = ledger
+        self.exchange = exchange
+        self.quantity_tolerance = quantity_tolerance
+        self.price_tolerance = price_tolerance
+        self.confirm = max(confirm or settings.RECON_CONFIRM_PASSES, 1)
+        self.breaks: List[Dict] = []
+        self.stats = {"passes": 0, "positions": 0, "breaks": 0}
+
+        # Consecutive passes each (key, kind) break has been seen in.
+        self._seen: Dict = {}
+
+    def check(self) -> List[Dict]:
+        """One pass; returns the breaks seen in the last `confirm` passes."""
+        broker = Holdings.from_broker(self.broker.get_positions(), self.exchange)
+        ledger = self.ledger()
+        breaks = reconcile(broker, ledger, self.quantity_tolerance, self.price_tolerance)
+
+        seen = {}
+        for item in breaks:
+            name = (item["key"], item["kind"])
+            seen[name] = self._seen.get(name, 0) + 1
+            if seen[name] == self.confirm:
+                logger.warning(
+                    "Position break on %s (%s): broker %g @ %.4f, ledger %g @ %.4f",
+                    item["key"],
+                    item["kind"],
+                    item["broker_quantity"],
+                    item["broker_avg_price"],
+                    item["ledger_quantity"],
+                    item["ledger_avg_price"],
+                )
+        self._seen = seen
+
+        self.breaks = [b for b in breaks if seen[(b["key"], b["kind"])] >= self.confirm]
+        self.stats["passes"] += 1
+        self.stats["positions"] = len(np.union1d(broker.keys, ledger.keys))
+        self.stats["breaks"] = len(self.breaks)
+        return self.breaks
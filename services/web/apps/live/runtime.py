@@ -0,0 +1,577 @@
+"""
+Asyncio runtime for paper and live strategy runs.
+
+Market data, strategy evaluation, order routing and persistence run as
+separate tasks on one event loop, connected by queues:
+
+    source -> session inbox (one per StrategyRun) -> router -> broker
+                                                        \\-> journal -> database
+
+A session's inbox holds only the newest snapshot, so a slow strategy skips
+ticks instead of delaying the feed or the other runs. In lockstep mode the
+feed instead waits for every session and the router before the next
+snapshot. Nothing on the tick path touches the database: orders, fills,
+positions and session metrics are recorded in the write-behind journal
+(apps.live.journal), which is why quotes must be warmed before the loop
+starts. Sessions with an event log (apps.live.eventlog) also append their
+orders, fills and cash to it, so a crashed run can be resumed.
+"""
+import asyncio
+import logging
+import random
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+
+from django.utils import timezone
+
+from apps.data.calendar import TradingCalendar
+from apps.data.quotes import LatestQuoteStore, Quote
+from apps.live.brokers.base import BaseBroker, OrderRequest, OrderResponse
+from apps.live.dispatch import OrderDispatcher
+from apps.live.eventlog import EventLog, EventState
+from apps.live.fanout import QuoteFanout
+from apps.live.journal import WriteBehindJournal
+from apps.live.latency import LatencyTracker, stamp
+from apps.live.models import Execution, Order, Position, SessionMetrics
+from apps.live.positions import ClosedTrade, PositionBook
+from apps.live.risk import RiskEngine
+from apps.strategies.registry import strategy_registry
+
+logger = logging.getLogger(__name__)
+
+MARKET_TIMEZONE = ZoneInfo(TradingCalendar.timezone)
+
+
+def _decimal(value: Optional[float]) -> Optional[Decimal]:
+    return None if value is None else Decimal(str(round(value, 4)))
+
+
+class MarketSnapshot:
+    def __init__(self, timestamp, quotes: Dict[int, Quote]):
+        self.timestamp = timestamp
+        self.quotes = quotes
+
+
+class QuoteSource(ABC):
+    @abstractmethod
+    def snapshots(self) -> AsyncIterator[MarketSnapshot]:
+        """Yield MarketSnapshots until exhausted or cancelled."""
+
+
+class SimulatedQuoteSource(QuoteSource):
+    """
+    Random walk from the stored latest quotes. Each step is written back to
+    the quote store, so brokers reading it fill at the simulated price.
+    """
+
+    def __init__(
+        self,
+        store: LatestQuoteStore,
+        asset_ids: Iterable[int],
+        interval: float = 1.0,
+        volatility: float = 0.005,
+        seed: Optional[int] = None,
+    ):
+        self.store = store
+        self.asset_ids = list(asset_ids)
+        self.interval = interval
+        self.volatility = volatility
+        self.random = random.Random(seed)
+
+    async def snapshots(self):
+        prices = dict(self.store.get_many(self.asset_ids))
+        while prices:
+            now = timezone.now()
+            for asset_id, quote in prices.items():
+                prices[asset_id] = Quote(
+                    asset_id=asset_id,
+                    symbol=quote.symbol,
+                    exchange=quote.exchange,
+                    last_price=quote.last_price
+                    * (1 + self.random.uniform(-self.volatility, self.volatility)),
+                    timestamp=now,
+                    volume=self.random.randint(1000, 10000),
+                    source="simulated",
+                )
+            self.store.update_many(prices.values())
+            yield MarketSnapshot(now, dict(prices))
+            await asyncio.sleep(self.interval)
+
+
+class _EngineView:
+    # StrategyCallback reads equity from its engine; the session sets it per tick.
+    equity = 0.0
+
+
+class RoutedOrder:
+    def __init__(
+        self, session: "StrategySession", asset_id: int, request: OrderRequest, signalled_at
+    ):
+        self.session = session
+        self.asset_id = asset_id
+        self.request = request
+        self.signalled_at = signalled_at
+        self.stamps = {"signal": stamp()}
+        # Sequence number of the order in the session's event log.
+        self.event_seq: Optional[int] = None
+
+
+class StrategySession:
+    """
+    One StrategyRun inside the runtime: its strategy callback, broker account,
+    the positions built from its own fills and the risk checks on its orders.
+    With an event log, a session whose log already has events continues from
+    the cash, positions and counts they add up to.
+    """
+
+    def __init__(
+        self,
+        strategy_run,
+        broker: BaseBroker,
+        assets: Iterable,
+        initial_capital: float = 1000000.0,
+        risk: Optional[RiskEngine] = None,
+        events: Optional[EventLog] = None,
+    ):
+        self.strategy_run = strategy_run
+        self.broker = broker
+        self.assets = {asset.id: asset for asset in assets}
+        self.initial_capital = initial_capital
+        self.cash = initial_capital
+
+        strategy = strategy_run.strategy
+        self.engine = _EngineView()
+        self.callback = strategy_registry.bind(
+            strategy.class_path,
+            {**strategy.parameters, **strategy_run.parameters},
+            self.engine,
+            self.assets.values(),
+        )
+
+        self.book = PositionBook()
+        self.risk = risk or RiskEngine()
+        self.latency = LatencyTracker(strategy.name, strategy_run.run_type)
+        self.pending: Dict[int, int] = {}
+        self.prices: Dict[int, float] = {}
+        self.inbox: asyncio.Queue = asyncio.Queue(maxsize=1)
+        # Exchange-local date of the last snapshot; the daily loss limit restarts after it.
+        self.trading_day = None
+        self.stats = {"ticks": 0, "skipped": 0, "orders": 0, "filled": 0, "rejected": 0}
+
+        self.events = events
+        if events is not None:
+            if events.state.seq:
+                self.restore(events.state)
+            else:
+                events.cash(self.cash)
+
+    def restore(self, state: EventState) -> None:
+        """Continue from recovered state; the broker gets the same account, keyed by symbol."""
+        if state.cash is not None:
+            self.cash = state.cash
+        self.book = PositionBook.from_state(state.book.state())
+        for asset_id, quantity in self.book.positions().items():
+            self.risk.on_fill(asset_id, quantity, self.book.avg_price(asset_id))
+        self.risk.realized = self.book.realized_pnl()
+        self.stats.update(state.stats)
+
+        symbols = {
+            key: self.assets[key].symbol if key in self.assets else key
+            for key in state.book.state()["keys"]
+        }
+        self.broker.restore(self.cash, PositionBook.from_state(state.book.state(), symbols))
+        if state.working:
+            logger.warning(
+                "Strategy run %s had %d orders in flight; their outcome is unknown",
+                self.strategy_run.id,
+                len(state.working),
+            )
+
+    @property
+    def positions(self) -> Dict[int, int]:
+        return {asset_id: int(q) for asset_id, q in self.book.positions().items()}
+
+    @property
+    def equity(self) -> float:
+        return self.cash + self.book.market_value()
+
+    def offer(self, snapshot: Optional[MarketSnapshot]) -> None:
+        """Replace any unprocessed snapshot; None stops the session."""
+        if self.inbox.full():
+            self.inbox.get_nowait()
+            self.inbox.task_done()
+            self.stats["skipped"] += 1
+        self.inbox.put_nowait(snapshot)
+
+    async def run(self, orders: asyncio.Queue) -> None:
+        while True:
+            snapshot = await self.inbox.get()
+            if snapshot is None:
+                return
+            try:
+                await self.on_snapshot(snapshot, orders)
+            finally:
+                self.inbox.task_done()
+
+    async def on_snapshot(self, snapshot: MarketSnapshot, orders: asyncio.Queue) -> None:
+        day = snapshot.timestamp.astimezone(MARKET_TIMEZONE).date()
+        if self.trading_day is not None and day != self.trading_day:
+            self.risk.reset_day()
+        self.trading_day = day
+
+        bars = {}
+        for asset_id in self.assets:
+            quote = snapshot.quotes.get(asset_id)
+            if quote is None:
+                continue
+            price = quote.last_price
+            self.prices[asset_id] = price
+            self.risk.on_quote(asset_id, price)
+            bars[asset_id] = {
+                "open": price,
+                "high": price,
+                "low": price,
+                "close": price,
+                "volume": quote.volume or 0,
+            }
+        if not bars:
+            return
+
+        self.book.mark(self.prices)
+        self.stats["ticks"] += 1
+        exposure = self.exposure()
+        self.engine.equity = self.equity
+        try:
+            # Strategies are pandas-heavy; evaluating off the loop keeps the
+            # feed and the router running meanwhile.
+            signals = await asyncio.to_thread(self.callback, snapshot.timestamp, bars, exposure)
+        except Exception:
+            logger.exception("Strategy run %s failed on tick", self.strategy_run.id)
+            return
+
+        for signal in signals:
+            asset_id = signal["asset_id"]
+            delta = int(signal["quantity"]) - exposure.get(asset_id, 0)
+            if delta:
+                self.submit(asset_id, delta, orders, snapshot.timestamp)
+
+    def exposure(self) -> Dict[int, int]:
+        """Positions including orders still on their way to the broker."""
+        exposure = dict(self.positions)
+        for asset_id, quantity in self.pending.items():
+            exposure[asset_id] = exposure.get(asset_id, 0) + quantity
+        return exposure
+
+    def submit(self, asset_id: int, quantity: int, orders: asyncio.Queue, signalled_at) -> None:
+        asset = self.assets[asset_id]
+        request = OrderRequest(
+            asset.symbol, asset.exchange.code, "buy" if quantity > 0 else "sell", abs(quantity)
+        )
+        self.pending[asset_id] = self.pending.get(asset_id, 0) + quantity
+        self.stats["orders"] += 1
+        orders.put_nowait(RoutedOrder(self, asset_id, request, signalled_at))
+
+    def flatten(self, orders: asyncio.Queue) -> None:
+        for asset_id, quantity in self.exposure().items():
+            if quantity:
+                self.submit(asset_id, -quantity, orders, timezone.now())
+
+    def on_response(
+        self,
+        routed: RoutedOrder,
+        response: OrderResponse,
+        fill: Dict,
+        order: Optional[Order] = None,
+    ) -> List[ClosedTrade]:
+        """Settle a routed order; returns the round trips its fill closed."""
+        request = routed.request
+        signed = request.quantity if request.side == "buy" else -request.quantity
+        self.pending[routed.asset_id] -= signed
+        if not self.pending[routed.asset_id]:
+            del self.pending[routed.asset_id]
+        if self.events is not None:
+            self.events.ack(routed.event_seq, response.status, response.order_id, response.message)
+
+        if response.status != "filled":
+            self.stats["rejected"] += 1
+            return []
+
+        self.stats["filled"] += 1
+        price = fill.get("execution_price", 0.0)
+        commission = fill.get("commission", 0.0)
+        self.cash -= signed * price + commission
+        if self.events is not None:
+            self.events.fill(routed.event_seq, routed.asset_id, signed, price, commission)
+            self.events.cash(self.cash)
+        self.risk.on_fill(routed.asset_id, signed, price, commission)
+        return self.book.fill(routed.asset_id, signed, price, commission, timezone.now(), order)
+
+    def order_row(self, routed: RoutedOrder) -> Order:
+        request = routed.request
+        return Order(
+            strategy_run_id=self.strategy_run.id,
+            asset_id=routed.asset_id,
+            order_type=request.order_type,
+            side=request.side,
+            quantity=request.quantity,
+            price=_decimal(request.price),
+            trigger_price=_decimal(request.trigger_price),
+            status="pending",
+            metadata={"signalled_at": routed.signalled_at.isoformat()},
+        )
+
+    def execution_row(self, order: Order, fill: Dict) -> Execution:
+        quantity = fill.get("filled_quantity", 0)
+        price = fill.get("execution_price", 0.0)
+        commission = fill.get("commission", 0.0)
+        return Execution(
+            order=order,
+            quantity=quantity,
+            price=_decimal(price),
+            commission=_decimal(commission),
+            total_cost=_decimal(quantity * price + commission),
+            broker_execution_id=fill.get("execution_id", ""),
+        )
+
+    def position_row(self, asset_id: int) -> Position:
+        position = self.book.position(asset_id)
+        quantity = int(position["quantity"])
+        return Position(
+            strategy_run_id=self.strategy_run.id,
+            asset_id=asset_id,
+            quantity=quantity,
+            avg_entry_price=_decimal(position["avg_price"]),
+            current_price=_decimal(position["mark"] or position["avg_price"]),
+            unrealized_pnl=_decimal(position["unrealized_pnl"]),
+            realized_pnl=_decimal(position["realized_pnl"]),
+            closed_at=None if quantity else timezone.now(),
+        )
+
+    def metrics_row(self) -> SessionMetrics:
+        positions_value = self.book.market_value()
+        latency = self.latency.flush()
+        end_to_end = self.latency.summary() or {}
+        return SessionMetrics(
+            strategy_run_id=self.strategy_run.id,
+            equity=_decimal(self.cash + positions_value),
+            cash=_decimal(self.cash),
+            positions_value=_decimal(positions_value),
+            unrealized_pnl=_decimal(self.book.unrealized_pnl()),
+            realized_pnl=_decimal(self.book.realized_pnl()),
+            total_orders=self.stats["orders"],
+            filled_orders=self.stats["filled"],
+            rejected_orders=self.stats["rejected"],
+            avg_latency_ms=end_to_end.get("avg_ms"),
+            max_latency_ms=end_to_end.get("max_ms"),
+            p50_latency_ms=end_to_end.get("p50_ms"),
+            p99_latency_ms=end_to_end.get("p99_ms"),
+            latency=latency,
+        )
+
+    def summary(self) -> Dict:
+        symbols = {asset_id: asset.symbol for asset_id, asset in self.assets.items()}
+        return {
+            **self.stats,
+            "initial_capital": self.initial_capital,
+            "cash": round(self.cash, 2),
+            "equity": round(self.equity, 2),
+            "pnl": round(self.equity - self.initial_capital, 2),
+            "positions": {symbols[a]: q for a, q in self.positions.items()},
+            "latency_ms": self.latency.summary(),
+        }
+
+
+class OrderRouter:
+    """
+    Sends orders to their session's broker in arrival order. Brokers that do
+    network I/O get an OrderDispatcher, which paces requests to their limits
+    and runs them, and the fill lookups after them, off the event loop.
+    """
+
+    def __init__(self, journal: WriteBehindJournal):
+        self.journal = journal
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.dispatchers: Dict[int, OrderDispatcher] = {}
+        self._dispatching: List[asyncio.Task] = []
+
+    def dispatcher(self, broker: BaseBroker) -> OrderDispatcher:
+        dispatcher = self.dispatchers.get(id(broker))
+        if dispatcher is None:
+            # Orders are routed one at a time, so there is nothing to coalesce.
+            dispatcher = self.dispatchers[id(broker)] = OrderDispatcher(broker, coalesce=False)
+            self._dispatching.append(asyncio.create_task(dispatcher.run()))
+        return dispatcher
+
+    async def run(self) -> None:
+        while True:
+            routed = await self.queue.get()
+            if routed is None:
+                for dispatcher in self.dispatchers.values():
+                    dispatcher.close()
+                await asyncio.gather(*self._dispatching)
+                return
+            try:
+                await self.route(routed)
+            finally:
+                self.queue.task_done()
+
+    async def route(self, routed: RoutedOrder) -> None:
+        session = routed.session
+        broker = session.broker
+        routed.stamps["order"] = stamp()
+        order = session.order_row(routed)
+        self.journal.record_order(order)
+
+        request = routed.request
+        if session.events is not None:
+            routed.event_seq = session.events.order(routed.asset_id, request.side, request.quantity)
+        submitted_at = timezone.now()
+        reason = session.risk.check(routed.asset_id, request.side, request.quantity, request.price)
+        if reason is not None:
+            response = OrderResponse("", "rejected", reason)
+        else:
+            routed.stamps["submit"] = stamp()
+            try:
+                if broker.blocking:
+                    held = session.book.quantity(routed.asset_id)
+                    exit = held > 0 if request.side == "sell" else held < 0
+                    response = await self.dispatcher(broker).submit(request, exit=exit)
+                else:
+                    response = broker.place_order(request)
+            except Exception as e:
+                logger.exception("Order routing failed for run %s", session.strategy_run.id)
+                response = OrderResponse("", "rejected", str(e))
+            if response.status != "filled":
+                session.risk.release(routed.asset_id, request.side, request.quantity)
+
+        routed.stamps["ack"] = stamp()
+        fill = {}
+        if response.status == "filled":
+            if broker.blocking:
+                fill = await self.dispatcher(broker).order_status(response.order_id)
+            else:
+                fill = broker.get_order_status(response.order_id)
+            routed.stamps["fill"] = stamp()
+        latency = session.latency.record(routed.stamps)
+        trades = session.on_response(routed, response, fill, order)
+
+        filled = response.status == "filled"
+        self.journal.update_order(
+            order,
+            status=response.status,
+            broker_order_id=response.order_id,
+            submitted_at=submitted_at,
+            filled_quantity=fill.get("filled_quantity", 0),
+            avg_fill_price=_decimal(fill.get("execution_price")),
+            filled_at=timezone.now() if filled else None,
+            error_message="" if filled else response.message,
+            metadata={**order.metadata, "latency_ms": latency},
+        )
+        if filled:
+            self.journal.record_execution(session.execution_row(order, fill))
+            self.journal.record_position(session.position_row(routed.asset_id))
+            for trade in trades:
+                self.journal.record_trade(trade.to_model(session.strategy_run.id))
+
+
+class TradingRuntime:
+    def __init__(
+        self,
+        source: QuoteSource,
+        sessions: List[StrategySession],
+        journal: Optional[WriteBehindJournal] = None,
+        flatten: bool = True,
+        metrics_interval: float = 5.0,
+        lockstep: bool = False,
+        fanout: Optional[QuoteFanout] = None,
+    ):
+        self.source = source
+        self.sessions = sessions
+        self.journal = journal or WriteBehindJournal()
+        self.router = OrderRouter(self.journal)
+        self.flatten = flatten
+        self.metrics_interval = metrics_interval
+        self.lockstep = lockstep
+        # Publishes every snapshot to quote subscribers outside the sessions.
+        self.fanout = fanout
+        self.ticks = 0
+        self._stopped: Optional[asyncio.Event] = None
+
+    def stop(self) -> None:
+        if self._stopped is not None:
+            self._stopped.set()
+
+    async def run(self, duration: Optional[float] = None) -> Dict[int, Dict]:
+        """
+        Trade until the source is exhausted, duration seconds pass or stop().
+        If the quote source or a session's event log fails, or the journal gives
+        up writing (JournalError), trading stops, positions are flattened and
+        the error is raised.
+        """
+        self._stopped = asyncio.Event()
+        journal = asyncio.create_task(self.journal.run())
+        logs = [asyncio.create_task(s.events.run()) for s in self.sessions if s.events]
+        router = asyncio.create_task(self.router.run())
+        sessions = [asyncio.create_task(s.run(self.router.queue)) for s in self.sessions]
+        feed = asyncio.create_task(self._feed())
+        stopped = asyncio.create_task(self._stopped.wait())
+        snapshots = asyncio.create_task(self._record_metrics())
+
+        try:
+            await asyncio.wait(
+                [feed, stopped, journal, *logs],
+                timeout=duration,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        finally:
+            feed.cancel()
+            stopped.cancel()
+            snapshots.cancel()
+            for session in self.sessions:
+                session.offer(None)
+            await asyncio.gather(*sessions)
+
+            if self.flatten:
+                for session in self.sessions:
+                    session.flatten(self.router.queue)
+            self.router.queue.put_nowait(None)
+            await router
+
+            for session in self.sessions:
+                self.journal.record_metrics(session.metrics_row())
+                if session.events is not None:
+                    session.events.stop()
+            self.journal.stop()
+            # Every writer finishes before any error is raised.
+            results = await asyncio.gather(journal, *logs, return_exceptions=True)
+
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if not feed.cancelled() and feed.exception() is not None:
+            errors.insert(0, feed.exception())
+        if errors:
+            raise errors[0]
+        return {session.strategy_run.id: session.summary() for session in self.sessions}
+
+    async def _feed(self) -> None:
+        async for snapshot in self.source.snapshots():
+            self.ticks += 1
+            quotes = list(snapshot.quotes.values())
+            if self.fanout is not None:
+                self.fanout.publish(quotes)
+            for session in self.sessions:
+                session.broker.on_quotes(quotes)
+                session.offer(snapshot)
+            if self.lockstep:
+                # Every session evaluates every snapshot, and its orders are
+                # routed, before the next one: replays become deterministic.
+                for session in self.sessions:
+                    await session.inbox.join()
+                await self.router.queue.join()
+
+    async def _record_metrics(self) -> None:
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            for session in self.sessions:
+                self.journal.record_metrics(session.metrics_row())
@@ -5,6 +5,8 @@ import numpy as np
 import pandas as pd
 
 from apps.strategies.sdk import Signal, SignalResult
+from apps.strategies.sdk.execution import SimpleExecutionModel
+from apps.strategies.sdk.risk import FixedRiskSizer
 
 
 class MeanReversionVWAPSignal(Signal):
@@ -99,6 +101,9 @@ class MeanReversionVWAPSignal(Signal):
 class MeanReversionVWAPStrategy:
     name = "Mean Reversion to VWAP"
     description = "Intraday mean reversion to VWAP on liquid Indian equities"
+    signal_class = MeanReversionVWAPSignal
+    risk_sizer_class = FixedRiskSizer
+    execution_model_class = SimpleExecutionModel
 
     @staticmethod
     def get_default_parameters():
@@ -5,6 +5,8 @@ import numpy as np
 import pandas as pd
 
 from apps.strategies.sdk import Signal, SignalResult
+from apps.strategies.sdk.execution import SimpleExecutionModel
+from apps.strategies.sdk.risk import FixedRiskSizer
 
 
 class MomentumBreakoutSignal(Signal):
@@ -124,6 +126,9 @@ class MomentumBreakoutSignal(Signal):
 class MomentumBreakoutStrategy:
     name = "Momentum Breakout"
     description = "15/30 minute momentum breakout with volume filter for NSE FNO"
+    signal_class = MomentumBreakoutSignal
+    risk_sizer_class = FixedRiskSizer
+    execution_model_class = SimpleExecutionModel
 
     @staticmethod
     def get_default_parameters():
@@ -8,6 +8,8 @@ import numpy as np
 import polars as pl
 
 from apps.strategies.sdk import Signal, SignalResult
+from apps.strategies.sdk.execution import SimpleExecutionModel
+from apps.strategies.sdk.risk import FixedRiskSizer
 
 
 class MomentumBreakoutPolarsSignal(Signal):
@@ -153,6 +155,10 @@ class MomentumBreakoutPolarsStrategy:
 
     name = "Momentum Breakout (Polars)"
     description = "High-performance 15/30 momentum breakout using Polars library"
+    signal_class = MomentumBreakoutPolarsSignal
+    risk_sizer_class = FixedRiskSizer
+    execution_model_class = SimpleExecutionModel
+    bars_format = "polars"
 
     @staticmethod
     def get_default_parameters():
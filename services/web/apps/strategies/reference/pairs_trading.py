@@ -6,6 +6,8 @@ import pandas as pd
 from statsmodels.tsa.stattools import coint
 
 from apps.strategies.sdk import Signal, SignalResult
+from apps.strategies.sdk.execution import SimpleExecutionModel
+from apps.strategies.sdk.risk import FixedRiskSizer
 
 
 class PairsTradingSignal(Signal):
@@ -159,6 +161,9 @@ class PairsTradingSignal(Signal):
 class PairsTradingStrategy:
     name = "Pairs Trading"
     description = "Statistical arbitrage via cointegration on sector heavyweights"
+    signal_class = PairsTradingSignal
+    risk_sizer_class = FixedRiskSizer
+    execution_model_class = SimpleExecutionModel
 
     @staticmethod
     def get_default_parameters():
@@ -0,0 +1,295 @@
+"""
+Per-process registry of strategy classes referenced by Strategy.class_path.
+
+Class paths are imported and validated once per worker, and the resulting
+component factories are reused by every task that runs in that process.
+"""
+import importlib
+import inspect
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from apps.strategies.sdk import ExecutionModel, RiskSizer, Signal
+from apps.strategies.sdk.execution import SimpleExecutionModel
+from apps.strategies.sdk.risk import FixedRiskSizer
+
+logger = logging.getLogger(__name__)
+
+HEAVY_DEPENDENCIES = [
+    "numpy",
+    "pandas",
+    "polars",
+    "scipy.stats",
+    "statsmodels.tsa.stattools",
+]
+
+BAR_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+DEFAULT_HISTORY_LENGTH = 250
+
+
+def _accepted_parameters(cls) -> Optional[set]:
+    if cls.__init__ is object.__init__:
+        return set()
+    parameters = inspect.signature(cls.__init__).parameters.values()
+    if any(p.kind == inspect.Parameter.VAR_KEYWORD for p in parameters):
+        return None
+    return {p.name for p in parameters if p.name != "self"}
+
+
+def _select(parameters: Dict[str, Any], accepted: Optional[set]) -> Dict[str, Any]:
+    if accepted is None:
+        return dict(parameters)
+    return {k: v for k, v in parameters.items() if k in accepted}
+
+
+class StrategyComponents:
+    def __init__(self, class_path: str, strategy_class: type):
+        self.class_path = class_path
+        self.strategy_class = strategy_class
+        self.signal_class = strategy_class.signal_class
+        self.risk_sizer_class = getattr(strategy_class, "risk_sizer_class", FixedRiskSizer)
+        self.execution_model_class = getattr(
+            strategy_class, "execution_model_class", SimpleExecutionModel
+        )
+        self.bars_format = getattr(strategy_class, "bars_format", "pandas")
+        self.default_parameters = strategy_class.get_default_parameters()
+
+        self._signal_parameters = _accepted_parameters(self.signal_class)
+        self._risk_parameters = _accepted_parameters(self.risk_sizer_class)
+        self._execution_parameters = _accepted_parameters(self.execution_model_class)
+
+    def merge_parameters(self, *overrides: Dict[str, Any]) -> Dict[str, Any]:
+        parameters = dict(self.default_parameters)
+        for override in overrides:
+            parameters.update(override or {})
+        return parameters
+
+    def build_signal(self, parameters: Dict[str, Any]) -> Signal:
+        return self.signal_class(**_select(parameters, self._signal_parameters))
+
+    def build_risk_sizer(self, parameters: Dict[str, Any]) -> RiskSizer:
+        return self.risk_sizer_class(**_select(parameters, self._risk_parameters))
+
+    def build_execution_model(self, parameters: Dict[str, Any]) -> ExecutionModel:
+        return self.execution_model_class(**_select(parameters, self._execution_parameters))
+
+    def history_length(self, parameters: Dict[str, Any]) -> int:
+        periods = [
+            int(value)
+            for key, value in parameters.items()
+            if "period" in key and isinstance(value, (int, float))
+        ]
+        return max([DEFAULT_HISTORY_LENGTH] + [2 * p for p in periods])
+
+
+class StrategyCallback:
+    """Adapts a strategy's Signal/RiskSizer/ExecutionModel to BacktestEngine.run."""
+
+    def __init__(
+        self,
+        components: StrategyComponents,
+        parameters: Dict[str, Any],
+        symbols_by_asset: Dict[int, str],
+        engine,
+    ):
+        self.components = components
+        self.signal = components.build_signal(parameters)
+        self.risk_sizer = components.build_risk_sizer(parameters)
+        self.execution_model = components.build_execution_model(parameters)
+        self.symbols_by_asset = symbols_by_asset
+        self.assets_by_symbol = {symbol: aid for aid, symbol in symbols_by_asset.items()}
+        self.engine = engine
+
+        history_length = components.history_length(parameters)
+        self.history: Dict[str, Deque[Tuple]] = {
+            symbol: deque(maxlen=history_length) for symbol in self.assets_by_symbol
+        }
+
+    def __call__(self, timestamp, bars_dict: Dict[int, Any], positions: Dict[int, float]):
+        prices = {}
+        for asset_id, row in bars_dict.items():
+            symbol = self.symbols_by_asset.get(asset_id)
+            if symbol is None:
+                continue
+            close = float(row["close"])
+            self.history[symbol].append(
+                (
+                    timestamp,
+                    float(row["open"]),
+                    float(row["high"]),
+                    float(row["low"]),
+                    close,
+                    int(row["volume"]),
+                )
+            )
+            prices[symbol] = close
+
+        frames = {symbol: self._frame(symbol) for symbol in prices}
+        current_positions = {
+            self.symbols_by_asset[aid]: qty
+            for aid, qty in positions.items()
+            if aid in self.symbols_by_asset
+        }
+
+        results = self.signal.generate(timestamp, frames, current_positions)
+
+        targets: Dict[str, int] = {}
+        for result in results:
+            price = prices.get(result.symbol)
+            if not price:
+                continue
+
+            current = current_positions.get(result.symbol, 0.0)
+            if current != 0 and (current > 0) != (result.signal > 0):
+                targets[result.symbol] = 0
+                continue
+
+            quantity = self.risk_sizer.calculate_position_size(
+                symbol=result.symbol,
+                signal_strength=result.strength,
+                current_price=price,
+                equity=self.engine.equity,
+                current_position=current,
+            )
+            targets[result.symbol] = int(result.signal) * quantity
+
+        orders = self.execution_model.generate_orders(
+            targets,
+            {symbol: current_positions.get(symbol, 0.0) for symbol in targets},
+            prices,
+        )
+
+        signals = []
+        for order in orders:
+            current = current_positions.get(order.symbol, 0.0)
+            delta = order.quantity if order.side == "buy" else -order.quantity
+            signals.append(
+                {"asset_id": self.assets_by_symbol[order.symbol], "quantity": current + delta}
+            )
+
+        return signals
+
+    def _frame(self, symbol: str):
+        rows = list(self.history[symbol])
+        if self.components.bars_format == "polars":
+            import polars as pl
+
+            return pl.DataFrame(rows, schema=BAR_COLUMNS, orient="row")
+        return pd.DataFrame(rows, columns=BAR_COLUMNS)
+
+
+class StrategyRegistry:
+    def __init__(self):
+        self._components: Dict[str, StrategyComponents] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, class_path: str) -> bool:
+        return class_path in self._components
+
+    def resolve(self, class_path: str) -> StrategyComponents:
+        components = self._components.get(class_path)
+        if components is not None:
+            return components
+
+        with self._lock:
+            components = self._components.get(class_path)
+            if components is None:
+                components = StrategyComponents(class_path, self._import(class_path))
+                self._components[class_path] = components
+
+        return components
+
+    def warm(self, class_paths: Iterable[str]) -> List[str]:
+        resolved = []
+        for class_path in class_paths:
+            try:
+                self.resolve(class_path)
+                resolved.append(class_path)
+            except ValueError as e:
+                logger.warning("Skipping strategy %s: %s", class_path, e)
+        return resolved
+
+    def bind(
+        self,
+        class_path: str,
+        parameters: Dict[str, Any],
+        engine,
+        universe: Iterable,
+    ) -> StrategyCallback:
+        components = self.resolve(class_path)
+        symbols_by_asset = {asset.id: asset.symbol for asset in universe}
+        return StrategyCallback(
+            components,
+            components.merge_parameters(parameters),
+            symbols_by_asset,
+            engine,
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._components.clear()
+
+    def _import(self, class_path: str) -> type:
+        module_path, _, class_name = class_path.rpartition(".")
+        if not module_path:
+            raise ValueError(f"Invalid strategy class path: {class_path!r}")
+
+        try:
+            module = importlib.import_module(module_path)
+        except ImportError as e:
+            raise ValueError(f"Cannot import strategy module {module_path}: {e}") from e
+
+        strategy_class = getattr(module, class_name, None)
+        if not inspect.isclass(strategy_class):
+            raise ValueError(f"Strategy class {class_name} not found in {module_path}")
+
+        signal_class = getattr(strategy_class, "signal_class", None)
+        if not (inspect.isclass(signal_class) and issubclass(signal_class, Signal)):
+            raise ValueError(f"{class_path} does not declare a Signal subclass as signal_class")
+
+        if not callable(getattr(strategy_class, "get_default_parameters", None)):
+            raise ValueError(f"{class_path} does not define get_default_parameters()")
+
+        risk_sizer_class = getattr(strategy_class, "risk_sizer_class", FixedRiskSizer)
+        if not issubclass(risk_sizer_class, RiskSizer):
+            raise ValueError(f"{class_path} risk_sizer_class is not a RiskSizer")
+
+        execution_model_class = getattr(
+            strategy_class, "execution_model_class", SimpleExecutionModel
+        )
+        if not issubclass(execution_model_class, ExecutionModel):
+            raise ValueError(f"{class_path} execution_model_class is not an ExecutionModel")
+
+        return strategy_class
+
+
+strategy_registry = StrategyRegistry()
+
+
+def preload_dependencies() -> None:
+    for module in HEAVY_DEPENDENCIES:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            logger.warning("Could not preload %s", module)
+
+
+def warm_registry(class_paths: Optional[Iterable[str]] = None) -> List[str]:
+    preload_dependencies()
+
+    if class_paths is None:
+        from apps.strategies.models import Strategy
+
+        class_paths = (
+            Strategy.objects.filter(is_active=True)
+            .exclude(class_path="")
+            .values_list("class_path", flat=True)
+            .distinct()
+        )
+
+    return strategy_registry.warm(list(class_paths))
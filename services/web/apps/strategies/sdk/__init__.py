@@ -3,13 +3,14 @@ from .datafeed import DataFeed
 from .execution import ExecutionModel
 from .fees import FeeModel
 from .risk import RiskSizer
-from .signal import Signal
+from .signal import Signal, SignalResult
 from .slippage import SlippageModel
 
 __all__ = [
     "BaseStrategy",
     "DataFeed",
     "Signal",
+    "SignalResult",
     "RiskSizer",
     "ExecutionModel",
     "SlippageModel",
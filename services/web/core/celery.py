@@ -1,7 +1,9 @@
+import logging
 import os
 
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_init
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
@@ -24,8 +26,51 @@ app.conf.beat_schedule = {
         "task": "apps.data.tasks.download_bse_bhavcopy",
         "schedule": crontab(hour=18, minute=45, day_of_week="mon-fri"),
     },
+    "scan-data-quality": {
+        "task": "apps.data.tasks.scan_data_quality",
+        "schedule": crontab(hour=19, minute=15, day_of_week="mon-fri"),
+    },
+    "ensure-bar-partitions": {
+        "task": "apps.data.tasks.ensure_bar_partitions",
+        "schedule": crontab(hour=6, minute=0, day_of_month=1),
+    },
     "check-corporate-actions": {
         "task": "apps.data.tasks.check_corporate_actions",
         "schedule": crontab(hour=7, minute=0, day_of_week="mon-fri"),
     },
 }
+
+
+@worker_init.connect
+def warm_strategy_registry(**kwargs):
+    # Runs in the parent before the pool forks, so children inherit the imports.
+    from django.db import DatabaseError, connections
+
+    from apps.strategies.registry import warm_registry
+
+    try:
+        warm_registry()
+    except DatabaseError:
+        logging.getLogger(__name__).warning("Strategy registry not warmed: database unavailable")
+    finally:
+        connections.close_all()
+
+
+@worker_init.connect
+def start_metrics_server(**kwargs):
+    from django.conf import settings
+
+    if not settings.WORKER_METRICS_PORT:
+        return
+
+    from django.db import DatabaseError, connections
+
+    from apps.data import metrics
+
+    metrics.start_server(settings.WORKER_METRICS_PORT)
+    try:
+        metrics.seed_latest_bars()
+    except DatabaseError:
+        logging.getLogger(__name__).warning("Bar age metrics not seeded: database unavailable")
+    finally:
+        connections.close_all()
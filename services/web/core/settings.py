@@ -209,3 +209,44 @@ MAX_DRAWDOWN_PCT = env.float("MAX_DRAWDOWN_PCT", default=10.0)
 P95_WEEKLY_DD_PCT = env.float("P95_WEEKLY_DD_PCT", default=-3.0)
 
 DISPLAY_TIMEZONE = env("DISPLAY_TIMEZONE", default="Asia/Kolkata")
+
+BHAVCOPY_ARCHIVE_DIR = env("BHAVCOPY_ARCHIVE_DIR", default="")
+# CSV of exchange,date holidays for years beyond the built-in calendar
+MARKET_HOLIDAYS_FILE = env("MARKET_HOLIDAYS_FILE", default="")
+TICK_DATA_DIR = env("TICK_DATA_DIR", default="")
+BARS_COMPRESS_AFTER_DAYS = env.int("BARS_COMPRESS_AFTER_DAYS", default=30)
+BARS_EXPORT_DIR = env("BARS_EXPORT_DIR", default="")
+
+QUOTE_STORE = env("QUOTE_STORE", default="memory")
+QUOTE_REDIS_URL = env(
+    "QUOTE_REDIS_URL", default=f"redis://{env('REDIS_HOST')}:{env('REDIS_PORT')}/{env('REDIS_DB')}"
+)
+QUOTE_STALE_AFTER_SECONDS = env.int("QUOTE_STALE_AFTER_SECONDS", default=60)
+
+# Port of the Celery worker's Prometheus endpoint; 0 disables it
+WORKER_METRICS_PORT = env.int("WORKER_METRICS_PORT", default=0)
+
+# Write-behind journal of the trading runtime: flush every N ms or M events
+LIVE_JOURNAL_FLUSH_MS = env.int("LIVE_JOURNAL_FLUSH_MS", default=50)
+LIVE_JOURNAL_MAX_BATCH = env.int("LIVE_JOURNAL_MAX_BATCH", default=1000)
+# Port of start_paper_trading's Prometheus endpoint (order latency); 0 disables it
+LIVE_METRICS_PORT = env.int("LIVE_METRICS_PORT", default=0)
+# Crash-recovery event log per strategy run (apps.live.eventlog); an empty dir disables it
+LIVE_EVENT_LOG_DIR = env("LIVE_EVENT_LOG_DIR", default="")
+LIVE_EVENT_LOG_FSYNC_MS = env.int("LIVE_EVENT_LOG_FSYNC_MS", default=20)
+LIVE_EVENT_LOG_MAX_BATCH = env.int("LIVE_EVENT_LOG_MAX_BATCH", default=1000)
+LIVE_EVENT_LOG_SNAPSHOT_EVENTS = env.int("LIVE_EVENT_LOG_SNAPSHOT_EVENTS", default=10000)
+
+# Pre-trade risk limits per strategy run (apps.live.risk); 0 disables a limit
+RISK_MAX_POSITION = env.int("RISK_MAX_POSITION", default=0)
+RISK_MAX_GROSS_NOTIONAL = env.float("RISK_MAX_GROSS_NOTIONAL", default=0)
+RISK_MAX_NET_NOTIONAL = env.float("RISK_MAX_NET_NOTIONAL", default=0)
+RISK_MAX_ORDERS_PER_SECOND = env.int("RISK_MAX_ORDERS_PER_SECOND", default=0)
+RISK_PRICE_BAND_PCT = env.float("RISK_PRICE_BAND_PCT", default=10.0)
+RISK_MAX_DAILY_LOSS = env.float("RISK_MAX_DAILY_LOSS", default=0)
+
+# Broker vs ledger position reconciliation (apps.live.reconcile)
+RECON_INTERVAL_SECONDS = env.float("RECON_INTERVAL_SECONDS", default=5.0)
+RECON_PRICE_TOLERANCE_PCT = env.float("RECON_PRICE_TOLERANCE_PCT", default=0.1)
+# Consecutive passes a break must be seen in before it is reported
+RECON_CONFIRM_PASSES = env.int("RECON_CONFIRM_PASSES", default=2)
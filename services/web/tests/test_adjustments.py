@@ -0,0 +1,145 @@
+from datetime import date, datetime, timezone
+
+import pandas as pd
+import pytest
+
+from apps.backtest.engine import BacktestEngine
+from apps.data.feed import DatabaseDataFeed
+from apps.data.loaders import CorporateActionsLoader, get_loader
+from apps.data.models import AdjustmentFactor, Asset, Bar, CorporateAction
+from apps.strategies.models import Strategy, StrategyRun
+from apps.strategies.sdk.fees import IndianEquityFeeModel
+from apps.strategies.sdk.slippage import FixedSlippageModel
+
+
+@pytest.fixture
+def daily_bars(db):
+    days = pd.date_range("2024-01-01", periods=6, freq="D", tz="UTC")
+    frame = pd.DataFrame(
+        {
+            "symbol": "RELIANCE",
+            "timestamp": days,
+            "open": 100.0,
+            "high": 110.0,
+            "low": 90.0,
+            "close": 100.0,
+            "volume": 1000,
+            "turnover": None,
+            "trades": None,
+        }
+    )
+    get_loader("NSE").writer.upsert(frame)
+    return frame
+
+
+@pytest.mark.django_db
+class TestAdjustmentFactors:
+    def test_split_and_dividend_are_applied_on_read(
+        self, daily_bars, django_assert_max_num_queries
+    ):
+        loader = CorporateActionsLoader()
+        actions = [
+            {"symbol": "RELIANCE", "action_type": "split", "ex_date": date(2024, 1, 5), "ratio": 2},
+            {
+                "symbol": "RELIANCE",
+                "action_type": "dividend",
+                "ex_date": date(2024, 1, 3),
+                "amount": 10,
+            },
+        ]
+
+        assert loader.load_actions(actions) == 2
+        factors = list(AdjustmentFactor.objects.order_by("ex_date"))
+        assert [f.cumulative_price_factor for f in factors] == pytest.approx([0.45, 0.5])
+        assert CorporateAction.objects.filter(is_processed=True).count() == 2
+        assert set(Bar.objects.values_list("close", flat=True)) == {100}
+
+        feed = DatabaseDataFeed("NSE")
+        start, end = datetime(2024, 1, 1, tzinfo=timezone.utc), datetime(
+            2024, 1, 7, tzinfo=timezone.utc
+        )
+        adjusted = feed.get_bars(["RELIANCE"], start, end)["RELIANCE"]
+        assert list(adjusted["close"]) == pytest.approx([45.0, 45.0, 50.0, 50.0, 100.0, 100.0])
+        assert list(adjusted["volume"]) == [2000, 2000, 2000, 2000, 1000, 1000]
+
+        raw = DatabaseDataFeed("NSE", adjustment="raw").get_bars(["RELIANCE"], start, end)[
+            "RELIANCE"
+        ]
+        assert set(raw["close"]) == {100.0}
+
+    def test_reloading_a_split_is_idempotent(self, daily_bars):
+        loader = CorporateActionsLoader()
+        asset = Bar.objects.first().asset
+
+        for _ in range(2):
+            loader.adjust_bars_for_splits(asset, date(2024, 1, 4), 5)
+
+        assert AdjustmentFactor.objects.get().cumulative_price_factor == pytest.approx(0.2)
+        window = DatabaseDataFeed("NSE").get_historical_window(
+            "RELIANCE", datetime(2024, 1, 6, tzinfo=timezone.utc), 4
+        )
+        assert list(window["close"]) == pytest.approx([20.0, 100.0, 100.0, 100.0])
+
+    def test_backtest_runs_on_adjusted_bars_across_a_split(self):
+        # 2:1 split with ex-date 2024-01-04: raw closes halve overnight.
+        days = pd.DatetimeIndex(
+            ["2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05"], tz="Asia/Kolkata"
+        )
+        closes = [200.0, 200.0, 100.0, 100.0]
+        get_loader("NSE").writer.upsert(
+            pd.DataFrame(
+                {
+                    "symbol": "RELIANCE",
+                    "timestamp": days,
+                    "open": closes,
+                    "high": closes,
+                    "low": closes,
+                    "close": closes,
+                    "volume": 1000,
+                }
+            )
+        )
+        CorporateActionsLoader().load_actions(
+            [
+                {
+                    "symbol": "RELIANCE",
+                    "action_type": "split",
+                    "ex_date": date(2024, 1, 4),
+                    "ratio": 2,
+                }
+            ]
+        )
+        universe = list(Asset.objects.select_related("exchange"))
+        asset_id = universe[0].id
+
+        def backtest(adjustment):
+            run = StrategyRun.objects.create(
+                strategy=Strategy.objects.get_or_create(name="Split", class_path="x.Y")[0],
+                run_type="backtest",
+                start_date=date(2024, 1, 1),
+            )
+            engine = BacktestEngine(
+                run, 100_000.0, FixedSlippageModel(slippage_bps=0), IndianEquityFeeModel()
+            )
+            seen = []
+
+            def on_bar(timestamp, bars, positions):
+                seen.append(float(bars[asset_id]["close"]))
+                return [{"asset_id": asset_id, "quantity": 100}]
+
+            engine.run(
+                universe,
+                datetime(2024, 1, 1, tzinfo=timezone.utc),
+                datetime(2024, 1, 6, tzinfo=timezone.utc),
+                on_bar,
+                adjustment=adjustment,
+            )
+            return seen, [point["equity"] for point in engine.equity_curve_data]
+
+        seen, equity = backtest("adjusted")
+        assert seen == [100.0] * 4
+        assert equity[-1] == pytest.approx(equity[0])
+
+        seen, equity = backtest("raw")
+        assert seen == closes
+        assert equity[-1] < equity[0] - 9000
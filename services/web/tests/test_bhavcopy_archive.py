@@ -0,0 +1,76 @@
+import zipfile
+from datetime import date
+
+import pytest
+
+from apps.data.loaders import BSEBhavcopyLoader, NSEBhavcopyLoader
+from apps.data.loaders.archive import BhavcopyArchiveReader
+from apps.data.models import Asset, Bar
+
+NSE_CSV = (
+    "SYMBOL,SERIES,OPEN,HIGH,LOW,CLOSE,LAST,PREVCLOSE,TOTTRDQTY,TOTTRDVAL,TIMESTAMP,"
+    "TOTALTRADES,ISIN,\n"
+    "RELIANCE,EQ,2590.0,2610.5,2580.0,2605.25,2604.0,2588.0,5120000,13338880000.0,{stamp},"
+    "152340,INE002A01018,\n"
+    "TCS,EQ,3700.0,3725.0,3690.0,3712.5,3711.0,3701.0,1820000,6756750000.0,{stamp},"
+    "98012,INE467B01029,\n"
+    "RELIANCE,BL,2600.0,2600.0,2600.0,2600.0,2600.0,2600.0,1000,2600000.0,{stamp},"
+    "1,INE002A01018,\n"
+)
+
+BSE_CSV = """SC_CODE,SC_NAME,SC_GROUP,SC_TYPE,OPEN,HIGH,LOW,CLOSE,LAST,PREVCLOSE,NO_TRADES,\
+NO_OF_SHRS,NET_TURNOV,TDCLOINDI
+500325,RELIANCE   ,A ,Q,2591.00,2611.00,2581.00,2604.90,2604.90,2588.10,21234,412000,1073000000.00,
+532540,TCS        ,A ,Q,3701.00,3724.00,3691.00,3712.00,3712.00,3700.50,9988,150000,556800000.00,
+"""
+
+
+@pytest.fixture
+def nse_archives(tmp_path):
+    for day, stamp in [("02JAN2024", "02-JAN-2024"), ("03JAN2024", "03-JAN-2024")]:
+        with zipfile.ZipFile(tmp_path / f"cm{day}bhav.csv.zip", "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr(f"cm{day}bhav.csv", NSE_CSV.format(stamp=stamp))
+    return tmp_path
+
+
+@pytest.fixture
+def bse_archive(tmp_path):
+    path = tmp_path / "EQ020124_CSV.ZIP"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("EQ020124.CSV", BSE_CSV)
+    return path
+
+
+class TestBhavcopyArchiveReader:
+    def test_nse_layout_is_normalised(self, nse_archives):
+        frames = list(BhavcopyArchiveReader("NSE").read([nse_archives]))
+
+        assert [d for d, _ in frames] == [date(2024, 1, 2), date(2024, 1, 3)]
+        frame = frames[0][1]
+        assert list(frame["symbol"]) == ["RELIANCE", "TCS"]
+        assert frame["volume"].dtype == "int64"
+        assert frame.loc[0, "close"] == 2605.25
+        assert frame.loc[0, "isin"] == "INE002A01018"
+
+    def test_bse_layout_is_normalised(self, bse_archive):
+        ((trade_date, frame),) = BhavcopyArchiveReader("BSE").read([bse_archive])
+
+        assert trade_date == date(2024, 1, 2)
+        assert list(frame["symbol"]) == ["RELIANCE", "TCS"]
+        assert list(frame["trades"]) == [21234, 9988]
+
+
+@pytest.mark.django_db
+class TestArchiveIngestion:
+    def test_load_archives(self, nse_archives):
+        loader = NSEBhavcopyLoader()
+
+        assert loader.load_archives([nse_archives]) == 4
+        assert Bar.objects.filter(asset__symbol="RELIANCE").count() == 2
+        assert Asset.objects.get(symbol="TCS").isin == "INE467B01029"
+
+    def test_load_date_prefers_archive(self, bse_archive):
+        loader = BSEBhavcopyLoader(archive_dir=str(bse_archive.parent))
+
+        assert loader.load_date(date(2024, 1, 2)) == 2
+        assert float(Bar.objects.get(asset__symbol="TCS").close) == 3712.0
@@ -0,0 +1,98 @@
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from unittest import mock
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pytest
+
+from apps.data.calendar import TradingCalendar, get_calendar
+
+
+class TestTradingCalendar:
+    def test_holidays_and_special_sessions(self):
+        calendar = get_calendar("NSE")
+
+        assert not calendar.is_trading_day(date(2024, 1, 22))
+        assert calendar.is_trading_day(date(2024, 1, 20))
+        assert calendar.previous_trading_day(date(2024, 1, 23)) == date(2024, 1, 20)
+        assert calendar.next_trading_day(date(2024, 1, 20)) == date(2024, 1, 23)
+        assert calendar.trading_days(date(2024, 1, 19), date(2024, 1, 23)) == [
+            date(2024, 1, 19),
+            date(2024, 1, 20),
+            date(2024, 1, 23),
+        ]
+
+        opens, closes = calendar.session_bounds(date(2024, 11, 1))
+        assert opens == datetime(2024, 11, 1, 12, 30, tzinfo=timezone.utc)
+        assert closes == datetime(2024, 11, 1, 13, 30, tzinfo=timezone.utc)
+
+    def test_locate_minutes_within_session(self):
+        calendar = get_calendar("NSE")
+        session, minute = calendar.locate(
+            [
+                datetime(2024, 1, 2, 3, 45, tzinfo=timezone.utc),
+                datetime(2024, 1, 2, 9, 59, tzinfo=timezone.utc),
+                datetime(2024, 1, 2, 10, 0, tzinfo=timezone.utc),
+                datetime(2024, 1, 22, 5, 0, tzinfo=timezone.utc),
+            ]
+        )
+
+        assert minute.tolist() == [0, 374, -1, -1]
+        assert session[0] == session[1] == calendar.session_index(date(2024, 1, 2))
+        assert calendar.minute_index(datetime(2024, 1, 2, 4, 0, tzinfo=timezone.utc)) == 15
+
+    def test_vectorised_session_days(self):
+        calendar = TradingCalendar("NSE", holidays=["2024-01-03"], special_sessions={})
+        days = np.array(["2024-01-02", "2024-01-03", "2024-01-06"], dtype="datetime64[D]")
+
+        assert calendar.is_session_day(days).tolist() == [True, False, False]
+        with pytest.raises(ValueError):
+            calendar.is_trading_day(date(1990, 1, 1))
+
+    def test_days_without_holiday_data_raise(self, tmp_path, settings):
+        calendar = get_calendar("BSE")
+        assert (calendar.start, calendar.end) == (date(2023, 1, 1), date(2026, 12, 31))
+        with pytest.raises(ValueError):
+            calendar.is_session_day(np.array(["2022-12-30", "2024-01-02"], dtype="datetime64[D]"))
+        with pytest.raises(ValueError):
+            calendar.locate([datetime(2022, 12, 30, 5, 0, tzinfo=timezone.utc)])
+        with pytest.raises(ValueError):
+            calendar.trading_days(date(2022, 12, 1), date(2023, 1, 31))
+        with pytest.raises(ValueError):
+            calendar.is_trading_day(date(calendar.last_day.year + 1, 1, 1))
+
+        path = tmp_path / "holidays.csv"
+        path.write_text("exchange,date\nNSE,2027-01-26\nNSE,2027-03-22\nBSE,2029-01-26\n")
+        settings.MARKET_HOLIDAYS_FILE = str(path)
+        with mock.patch.dict("apps.data.calendar._calendars", clear=True):
+            nse = get_calendar("NSE")
+            assert nse.end == date(2027, 12, 31)
+            assert not nse.is_trading_day(date(2027, 1, 26))
+            assert nse.is_trading_day(date(2027, 1, 27))
+            # BSE's file skips 2027 and 2028.
+            with pytest.raises(ValueError, match="2027, 2028"):
+                get_calendar("BSE")
+
+    def test_days_past_the_known_holidays_fall_back_to_weekdays(self, caplog):
+        from apps.data.tasks import download_nse_bhavcopy
+
+        calendar = TradingCalendar("NSE")
+        later = calendar.end.year + 1
+        monday = date(later, 3, 1) + timedelta(days=-date(later, 3, 1).weekday() % 7)
+
+        with caplog.at_level(logging.WARNING, logger="apps.data.calendar"):
+            assert calendar.is_trading_day(monday)
+            assert calendar.previous_trading_day(monday) == monday - timedelta(days=3)
+            assert calendar.is_open(datetime.combine(monday, time(10, 0), ZoneInfo("Asia/Kolkata")))
+            assert calendar.trading_days(monday, monday + timedelta(days=6)) == [
+                monday + timedelta(days=i) for i in range(5)
+            ]
+        # Warned once for the year, not on every call.
+        assert len(caplog.records) == 1
+
+        with mock.patch.object(TradingCalendar, "today", return_value=monday), mock.patch(
+            "apps.data.tasks.load_trade_date", return_value={"rows": 0}
+        ) as load, mock.patch.dict("apps.data.calendar._calendars", clear=True):
+            assert download_nse_bhavcopy()["date"] == str(monday - timedelta(days=3))
+        load.assert_called_once_with("NSE", monday - timedelta(days=3))
@@ -0,0 +1,104 @@
+from datetime import date
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+from apps.data.backfill import BackfillRunner
+from apps.data.loaders import BSEBhavcopyLoader, NSEBhavcopyLoader, get_loader
+from apps.data.loaders.archive import ArchiveMissingError
+from apps.data.models import Asset, Bar, IngestionCheckpoint
+
+
+@pytest.mark.django_db
+class TestBhavcopyLoaders:
+    def test_nse_load_date_upserts(self, django_assert_max_num_queries):
+        loader = NSEBhavcopyLoader()
+
+        # Assets, bars and the BarIngestBatch row.
+        with django_assert_max_num_queries(7):
+            created = loader.load_date(date(2024, 1, 2))
+
+        assert created == 20
+        assert Asset.objects.filter(exchange__code="NSE").count() == 20
+        assert Bar.objects.filter(timeframe="1D").count() == 20
+
+        df = loader._generate_sample_data(date(2024, 1, 2))
+        df["CLOSE"] = 1234.5
+        loader._save_bars(df, date(2024, 1, 2))
+
+        assert Bar.objects.count() == 20
+        assert set(Bar.objects.values_list("close", flat=True)) == {1234.5}
+
+    def test_duplicate_rows_in_one_upsert_keep_the_last(self):
+        writer = get_loader("BSE").writer
+        frame = pd.DataFrame(
+            {
+                "symbol": ["TATA STEEL", "TATA STEEL", "INFY"],
+                "timestamp": [pd.Timestamp("2024-01-02", tz="Asia/Kolkata")] * 3,
+                "open": [100.0, 101.0, 50.0],
+                "high": [100.0, 101.0, 50.0],
+                "low": [100.0, 101.0, 50.0],
+                "close": [100.0, 101.0, 50.0],
+                "volume": [10, 20, 30],
+            }
+        )
+
+        assert writer.upsert(frame) == 2
+        bar = Bar.objects.get(asset__symbol="TATA STEEL")
+        assert (bar.close, bar.volume) == (101.0, 20)
+
+    def test_bse_load_date(self):
+        loader = BSEBhavcopyLoader()
+
+        assert loader.load_date(date(2024, 1, 2)) == 10
+        assert loader.load_date(date(2024, 1, 3)) == 10
+        assert Bar.objects.filter(asset__exchange__code="BSE").count() == 20
+
+
+@pytest.mark.django_db
+class TestBackfill:
+    def test_backfill_skips_holidays_and_completed_dates(self):
+        runner = BackfillRunner("NSE", workers=1)
+
+        # 2024-01-22 and 2024-01-26 are exchange holidays, 2024-01-27/28 a weekend.
+        summary = runner.run(date(2024, 1, 22), date(2024, 1, 28))
+
+        assert summary["completed"] == 3
+        assert summary["rows"] == 60
+        assert summary["failed"] == []
+        assert IngestionCheckpoint.objects.filter(status="completed").count() == 3
+
+        rerun = runner.run(date(2024, 1, 22), date(2024, 1, 29))
+
+        assert rerun["completed"] == 1
+        assert Bar.objects.count() == 80
+
+    def test_dates_missing_from_the_archive_are_not_fabricated(self, tmp_path):
+        loader = NSEBhavcopyLoader(archive_dir=str(tmp_path))
+        with pytest.raises(ArchiveMissingError):
+            loader.load_date(date(2024, 1, 2))
+
+        with mock.patch.dict("apps.data.backfill._loaders", {"NSE": loader}):
+            summary = BackfillRunner("NSE", workers=1).run(date(2024, 1, 2), date(2024, 1, 3))
+
+        assert summary["completed"] == 0
+        assert summary["missing"] == ["2024-01-02", "2024-01-03"]
+        assert summary["failed"] == []
+        assert Bar.objects.count() == 0
+        assert IngestionCheckpoint.objects.filter(status="missing").count() == 2
+
+    def test_failures_are_checkpointed_and_raised_from_the_tasks(self):
+        from apps.data.tasks import download_nse_bhavcopy
+
+        loader = mock.Mock()
+        loader.load_date.side_effect = ConnectionError("bhavcopy download timed out")
+        with mock.patch.dict("apps.data.backfill._loaders", {"NSE": loader}):
+            with pytest.raises(ConnectionError):
+                download_nse_bhavcopy("2024-01-02")
+            summary = BackfillRunner("NSE", workers=1).run(date(2024, 1, 3), date(2024, 1, 3))
+
+        assert summary["failed"] == ["2024-01-03"]
+        checkpoints = IngestionCheckpoint.objects.order_by("trade_date")
+        assert [c.status for c in checkpoints] == ["failed", "failed"]
+        assert checkpoints[0].error_message == "bhavcopy download timed out"
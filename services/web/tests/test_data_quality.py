@@ -0,0 +1,100 @@
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+
+from apps.data.loaders import get_loader
+from apps.data.models import DataQualityIssue, DataQualityScore
+from apps.data.quality import DataQualityScanner
+
+
+def daily_frame(days, closes, symbol="RELIANCE", volume=1000):
+    closes = pd.Series(closes, dtype=float)
+    return pd.DataFrame(
+        {
+            "symbol": symbol,
+            "timestamp": pd.DatetimeIndex(days, tz="UTC"),
+            "open": closes,
+            "high": closes + 1,
+            "low": closes - 1,
+            "close": closes,
+            "volume": volume,
+            "turnover": None,
+            "trades": None,
+        }
+    )
+
+
+@pytest.fixture
+def writer(db):
+    return get_loader("NSE").writer
+
+
+@pytest.mark.django_db
+class TestDataQualityScanner:
+    def test_flags_bad_bars(self, writer):
+        days = pd.bdate_range("2024-01-01", "2024-01-31")
+        days = days.drop(pd.Timestamp("2024-01-22"))  # exchange holiday
+        closes = [100.0 + (i % 3) for i in range(len(days))]
+        frame = daily_frame(days, closes)
+        frame.loc[5, "close"] = 400.0
+        frame.loc[5, "high"] = 401.0
+        frame.loc[8, "high"] = 50.0
+        frame.loc[10, "volume"] = 0
+        frame = frame.drop(index=[14, 15])
+        writer.upsert(frame)
+
+        result = DataQualityScanner("NSE").run()
+
+        rules = dict(DataQualityIssue.objects.values_list("rule", "timestamp"))
+        assert set(rules) == {"ohlc", "zero_volume", "spike", "gap"}
+        gap = DataQualityIssue.objects.get(rule="gap")
+        # 19th, the special Saturday session on the 20th, and the 23rd
+        assert gap.value == 3
+        assert gap.timestamp == datetime(2024, 1, 24, tzinfo=timezone.utc)
+        assert DataQualityIssue.objects.filter(rule="spike").count() == 2
+        assert result["bars"] == len(frame)
+
+        score = DataQualityScore.objects.get()
+        assert score.errors == 1
+        assert score.warnings == 4
+        assert 0 < score.score < 1
+
+    def test_incremental_scan_only_checks_new_bars(self, writer):
+        days = pd.bdate_range("2024-02-01", periods=10)
+        writer.upsert(daily_frame(days, [100.0] * 10))
+        scanner = DataQualityScanner("NSE")
+        assert scanner.run()["bars"] == 10
+
+        later = pd.bdate_range("2024-02-19", periods=2)
+        writer.upsert(daily_frame(later, [100.0, 100.0], volume=0))
+        result = scanner.run()
+
+        assert result["bars"] == 2
+        assert sorted(DataQualityIssue.objects.values_list("rule", flat=True)) == [
+            "gap",
+            "zero_volume",
+            "zero_volume",
+        ]
+        assert DataQualityScore.objects.get().bars_checked == 12
+
+    def test_backfilled_bars_behind_the_watermark_are_rescanned(self, writer):
+        days = pd.bdate_range("2024-02-01", periods=10)
+        writer.upsert(daily_frame(days.delete(4), [100.0] * 9))
+        scanner = DataQualityScanner("NSE")
+        scanner.run()
+        assert list(DataQualityIssue.objects.values_list("rule", flat=True)) == ["gap"]
+        mark = DataQualityScore.objects.get().last_timestamp
+
+        # Backfill the missing session, with a bad bar, and correct a later one.
+        writer.upsert(daily_frame(days[4:5], [100.0], volume=0))
+        writer.upsert(daily_frame(days[6:7], [101.0]))
+        result = scanner.run()
+
+        assert result["bars"] == 4
+        issues = DataQualityIssue.objects.values_list("rule", "timestamp")
+        assert list(issues) == [("zero_volume", datetime(2024, 2, 7, tzinfo=timezone.utc))]
+        score = DataQualityScore.objects.get()
+        assert (score.bars_checked, score.errors, score.warnings) == (10, 0, 1)
+        assert score.last_timestamp == mark
+        assert scanner.run()["bars"] == 0
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from apps.live.eventlog import LOG_NAME, EventLog
+
+
+def trade_day(log: EventLog, orders: int, symbols: int = 40, sync_every: int = 0) -> float:
+    """Round trips of 10 shares across symbols; returns the final cash."""
+    cash = 1000000.0
+    log.cash(cash)
+    for i in range(orders):
+        asset_id = i % symbols
+        side = "buy" if (i // symbols) % 2 == 0 else "sell"
+        quantity = 10 if side == "buy" else -10
+        price = 100.0 + i % 7
+        seq = log.order(asset_id, side, 10)
+        log.ack(seq, "filled", str(i), "Order executed")
+        log.fill(seq, asset_id, quantity, price, 0.3)
+        cash -= quantity * price + 0.3
+        log.cash(cash)
+        if sync_every and i % sync_every == 0:
+            log.sync()
+    return cash
+
+
+class TestEventLog:
+    def test_reopening_restores_state_and_cuts_a_torn_tail(self, tmp_path):
+        log = EventLog(tmp_path)
+        log.cash(1000.0)
+        buy = log.order(7, "buy", 5)
+        log.ack(buy, "filled", "A1")
+        log.fill(buy, 7, 5, 100.0, 0.5)
+        log.cash(499.5)
+        sell = log.order(7, "sell", 2)
+        log.close()
+
+        # A crash halfway through writing the next frame.
+        with open(tmp_path / LOG_NAME, "ab") as f:
+            f.write(b"\x20\x00\x00\x00\x01")
+
+        log = EventLog(tmp_path)
+        state = log.state
+        assert (state.seq, state.cash) == (6, 499.5)
+        assert state.book.positions() == {7: 5.0}
+        assert state.book.avg_price(7) == 100.0
+        assert state.working == {sell: [7, "sell", 2]}
+        assert state.stats == {"orders": 2, "filled": 1, "rejected": 0}
+        assert (tmp_path / LOG_NAME).stat().st_size == log.offset
+
+        log.ack(sell, "rejected", "", "Insufficient funds")
+        log.close()
+        assert EventLog(tmp_path).state.working == {}
+
+    def test_a_day_of_events_recovers_in_well_under_a_second(self, tmp_path):
+        log = EventLog(tmp_path, snapshot_every=10000)
+        cash = trade_day(log, orders=15000, sync_every=100)
+        log.close()
+        assert log.stats["snapshots"] == 5
+        # One fsync per 100 orders, plus the one on close.
+        assert log.stats["syncs"] == 151
+
+        recovered = EventLog(tmp_path)
+
+        assert recovered.stats["recovered"] == 60001
+        # Only the frames after the last snapshot are decoded.
+        assert 0 < recovered.stats["replayed"] < 10000
+        assert recovered.state.cash == pytest.approx(cash)
+        assert recovered.state.book.positions() == log.state.book.positions()
+        assert recovered.state.book.realized_pnl() == pytest.approx(log.state.book.realized_pnl())
+
+    def test_run_fsyncs_batches(self, tmp_path):
+        log = EventLog(tmp_path, fsync_interval=0.01, max_batch=100)
+
+        async def trade():
+            running = asyncio.create_task(log.run())
+            for _ in range(5):
+                trade_day(log, orders=50)
+                await asyncio.sleep(0)
+            log.stop()
+            await running
+
+        asyncio.run(trade())
+
+        assert log.stats["events"] == 1005
+        assert 1 < log.stats["syncs"] < 50
+        assert log.synced_offset == (tmp_path / LOG_NAME).stat().st_size
+        assert EventLog(tmp_path).state.seq == 1005
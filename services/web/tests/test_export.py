@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from apps.data.export import ParquetExporter, load_bars
+from apps.data.loaders import get_loader
+
+
+def daily_frame(days: list, symbol: str = "RELIANCE", close: float = 100.0) -> pd.DataFrame:
+    # Daily bars are stamped at midnight IST, like the bhavcopy loaders.
+    return pd.DataFrame(
+        {
+            "symbol": symbol,
+            "timestamp": pd.DatetimeIndex(days).tz_localize("Asia/Kolkata"),
+            "open": close,
+            "high": close + 1,
+            "low": close - 1,
+            "close": close,
+            "volume": 1000,
+            "turnover": None,
+            "trades": None,
+        }
+    )
+
+
+@pytest.fixture
+def writer(db):
+    return get_loader("NSE").writer
+
+
+@pytest.mark.django_db
+class TestParquetExport:
+    def test_months_follow_exchange_time(self, writer, tmp_path):
+        writer.upsert(daily_frame(["2024-01-31", "2024-02-01"]))
+
+        result = ParquetExporter(str(tmp_path)).sync(["1D"])
+
+        assert result == {"timeframes": 1, "partitions": 2, "rows": 2}
+        assert (tmp_path / "timeframe=1D" / "year=2024" / "month=1" / "part-0.parquet").exists()
+        assert (tmp_path / "timeframe=1D" / "year=2024" / "month=2").exists()
+
+        frame = load_bars("1D", root=str(tmp_path))
+        assert frame["symbol"].tolist() == ["RELIANCE", "RELIANCE"]
+        assert frame["close"].tolist() == [100.0, 100.0]
+        assert frame["trades"].isna().all()
+
+    def test_sync_rewrites_months_touched_since_the_last_sync(self, writer, tmp_path):
+        exporter = ParquetExporter(str(tmp_path))
+        writer.upsert(daily_frame(["2024-01-02", "2024-01-03", "2024-02-01"]))
+        exporter.sync(["1D"])
+
+        assert exporter.sync(["1D"]) == {"timeframes": 1, "partitions": 0, "rows": 0}
+
+        writer.upsert(daily_frame(["2024-01-04"]))
+        assert exporter.sync(["1D"]) == {"timeframes": 1, "partitions": 1, "rows": 3}
+
+        # A corrected bar keeps its id; the month is still exported again.
+        writer.upsert(daily_frame(["2024-01-02"], close=120.0))
+        assert exporter.sync(["1D"])["rows"] == 3
+        month = tmp_path / "timeframe=1D" / "year=2024" / "month=1"
+        assert [p.name for p in month.glob("part-*.parquet")] == ["part-0.parquet"]
+        frame = load_bars("1D", root=str(tmp_path))
+        assert frame["close"].tolist() == [120.0, 100.0, 100.0, 100.0]
+
+    def test_load_bars_filters_slice(self, writer, tmp_path):
+        writer.upsert(daily_frame(["2024-01-02", "2024-02-02", "2024-03-04"]))
+        writer.upsert(daily_frame(["2024-02-02"], symbol="INFY", close=50.0))
+        ParquetExporter(str(tmp_path)).sync()
+
+        table = load_bars(
+            "1D",
+            start=datetime(2024, 2, 1),
+            end=datetime(2024, 2, 29),
+            symbols=["INFY"],
+            columns=["symbol", "timestamp", "close"],
+            engine="arrow",
+            root=str(tmp_path),
+        )
+
+        assert table.column_names == ["symbol", "timestamp", "close"]
+        assert table.to_pylist()[0]["close"] == 50.0
+        assert table.num_rows == 1
+
+        path = next((tmp_path / "timeframe=1D" / "year=2024" / "month=2").glob("*.parquet"))
+        statistics = pq.ParquetFile(path).metadata.row_group(0).column(4).statistics
+        assert statistics.has_min_max
+
+        with pytest.raises(ValueError):
+            load_bars("1D", engine="numpy", root=str(tmp_path))
@@ -0,0 +1,143 @@
+import asyncio
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+
+from apps.data.models import Asset, AssetClass, Currency, Exchange
+from apps.live.journal import MAX_ATTEMPTS, JournalError, WriteBehindJournal
+from apps.live.models import Execution, Order, Position
+from apps.strategies.models import Strategy, StrategyRun
+
+
+@pytest.fixture
+def run_and_asset():
+    asset = Asset.objects.create(
+        symbol="RELIANCE",
+        exchange=Exchange.objects.create(
+            code="NSE", name="NSE", country="IN", timezone="Asia/Kolkata"
+        ),
+        asset_class=AssetClass.objects.create(code="EQ", name="Equity"),
+        currency=Currency.objects.create(code="INR", name="Rupee", symbol="₹"),
+    )
+    strategy = Strategy.objects.create(name="Journal", class_path="x.Y")
+    run = StrategyRun.objects.create(
+        strategy=strategy, run_type="paper", start_date=date(2024, 1, 2)
+    )
+    return run, asset
+
+
+def order(run, asset, side="buy"):
+    return Order(
+        strategy_run_id=run.id,
+        asset_id=asset.id,
+        order_type="market",
+        side=side,
+        quantity=10,
+        status="pending",
+    )
+
+
+def position(run, asset, quantity, price):
+    return Position(
+        strategy_run_id=run.id,
+        asset_id=asset.id,
+        quantity=quantity,
+        avg_entry_price=Decimal(price),
+        current_price=Decimal(price),
+        unrealized_pnl=Decimal(0),
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestWriteBehindJournal:
+    def test_events_are_coalesced_and_flushed_on_stop(self, run_and_asset):
+        run, asset = run_and_asset
+        journal = WriteBehindJournal(flush_interval=60, max_batch=1000)
+
+        async def trade():
+            task = asyncio.create_task(journal.run())
+            buy = order(run, asset)
+            journal.record_order(buy)
+            journal.update_order(buy, status="submitted", broker_order_id="B1")
+            journal.update_order(buy, status="filled", filled_quantity=10)
+            journal.record_execution(
+                Execution(
+                    order=buy,
+                    quantity=10,
+                    price=Decimal(100),
+                    commission=Decimal(1),
+                    total_cost=Decimal(1001),
+                )
+            )
+            journal.record_position(position(run, asset, 10, 100))
+            journal.record_position(position(run, asset, 10, 101))
+            await asyncio.sleep(0)
+            # Nothing is written until the interval passes or the journal stops.
+            assert journal.pending == 6
+            journal.stop()
+            await task
+            return buy
+
+        buy = asyncio.run(trade())
+
+        saved = Order.objects.get()
+        assert saved.pk == buy.pk
+        assert (saved.status, saved.broker_order_id, saved.filled_quantity) == ("filled", "B1", 10)
+        assert Execution.objects.get().order_id == saved.pk
+        assert Position.objects.get().current_price == Decimal(101)
+        assert journal.stats == {"events": 6, "batches": 1, "failures": 0}
+
+    def test_updates_across_batches_keep_order_and_failed_batches_retry(self, run_and_asset):
+        run, asset = run_and_asset
+        journal = WriteBehindJournal(flush_interval=0.01, max_batch=2)
+        write = journal.write
+        calls = []
+
+        def flaky_write(events):
+            calls.append(len(events))
+            if len(calls) == 2:
+                raise RuntimeError("database unavailable")
+            write(events)
+
+        async def trade():
+            task = asyncio.create_task(journal.run())
+            sell = order(run, asset, side="sell")
+            journal.record_order(sell)
+            await asyncio.sleep(0.05)
+            journal.update_order(sell, status="submitted")
+            journal.update_order(sell, status="filled", filled_quantity=10)
+            journal.record_position(position(run, asset, -10, 100))
+            await asyncio.sleep(0.05)
+            journal.record_position(position(run, asset, 0, 99))
+            journal.stop()
+            await task
+
+        with mock.patch.object(journal, "write", side_effect=flaky_write):
+            asyncio.run(trade())
+
+        assert journal.stats["failures"] == 1
+        saved = Order.objects.get()
+        assert (saved.status, saved.filled_quantity) == ("filled", 10)
+        assert Position.objects.get().quantity == 0
+
+    def test_a_batch_that_keeps_failing_stops_the_journal(self, run_and_asset):
+        run, asset = run_and_asset
+        journal = WriteBehindJournal(flush_interval=0.01, max_batch=1000)
+
+        async def trade():
+            task = asyncio.create_task(journal.run())
+            journal.record_order(order(run, asset))
+            await asyncio.sleep(0.05)
+            journal.record_position(position(run, asset, 10, 100))
+            await task
+
+        with mock.patch.object(journal, "write", side_effect=RuntimeError("database down")):
+            with pytest.raises(JournalError):
+                asyncio.run(trade())
+
+        assert journal.stats["failures"] == MAX_ATTEMPTS
+        # Nothing is dropped: the unwritten events are still pending.
+        assert journal.pending == 2
+        assert not Order.objects.exists()
@@ -0,0 +1,84 @@
+import asyncio
+import time
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from apps.data.loaders import get_loader
+from apps.data.models import Asset
+from apps.data.quotes import InMemoryQuoteStore
+from apps.live.brokers.paper import PaperBroker
+from apps.live.replay import HistoricalReplaySource
+
+
+@pytest.fixture
+def assets():
+    stamps = pd.date_range("2024-01-02 09:15", periods=3, freq="min", tz="Asia/Kolkata")
+    frames = []
+    for symbol, base in [("RELIANCE", 100.0), ("TCS", 200.0)]:
+        frames.append(
+            pd.DataFrame(
+                {
+                    "symbol": symbol,
+                    "timestamp": stamps,
+                    "open": [base, base + 1, base + 2],
+                    "high": [base, base + 1, base + 2],
+                    "low": [base, base + 1, base + 2],
+                    "close": [base, base + 1, base + 2],
+                    "volume": [10, 20, 30],
+                }
+            )
+        )
+    get_loader("NSE").writer.upsert(pd.concat(frames), timeframe="1m")
+    return list(Asset.objects.select_related("exchange").order_by("symbol"))
+
+
+def collect(source, broker=None):
+    async def replay():
+        snapshots = []
+        async for snapshot in source.snapshots():
+            if broker is not None:
+                broker.on_quotes(list(snapshot.quotes.values()))
+            snapshots.append(snapshot)
+        # Let the broker's quote fan-out deliver the last batch.
+        await asyncio.sleep(0)
+        return snapshots
+
+    return asyncio.run(replay())
+
+
+@pytest.mark.django_db
+class TestHistoricalReplay:
+    def test_replays_one_batch_per_bar_timestamp(self, assets):
+        store = InMemoryQuoteStore()
+        source = HistoricalReplaySource(store, assets, date(2024, 1, 2), speed=None)
+        assert source.load() == 6
+        assert len(source) == 3
+
+        broker = PaperBroker(quotes=store)
+        batches = []
+        broker.subscribe_quotes(["TCS"], batches.append)
+
+        snapshots = collect(source, broker)
+
+        reliance, tcs = assets
+        assert [s.quotes[reliance.id].last_price for s in snapshots] == [100.0, 101.0, 102.0]
+        assert [[q.last_price for q in batch] for batch in batches] == [[200.0], [201.0], [202.0]]
+        assert store.lookup("TCS", "NSE").last_price == 202.0
+        assert source.clock.now == snapshots[-1].timestamp
+
+    def test_speed_paces_by_simulated_time(self, assets):
+        source = HistoricalReplaySource(InMemoryQuoteStore(), assets, date(2024, 1, 2), speed=600)
+        source.load()
+
+        started = time.monotonic()
+        collect(source)
+
+        # Two one-minute steps at 600x take 0.1s each.
+        assert 0.18 < time.monotonic() - started < 1.0
+
+    def test_day_without_bars_is_an_error(self, assets):
+        source = HistoricalReplaySource(InMemoryQuoteStore(), assets, date(2024, 1, 3))
+        with pytest.raises(ValueError):
+            source.load()
@@ -0,0 +1,239 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import pandas as pd
+import pytest
+from prometheus_client import REGISTRY
+from django.test import Client
+from django.urls import reverse
+
+from apps.data.loaders import get_loader
+from apps.data.models import Asset
+from apps.data.quotes import InMemoryQuoteStore, Quote
+from apps.live.brokers.paper import PaperBroker
+from apps.live.eventlog import EventLog
+from apps.live.models import Execution, Order, Position, SessionMetrics, Trade
+from apps.live.risk import RiskEngine, RiskLimits
+from apps.live.runtime import MarketSnapshot, QuoteSource, StrategySession, TradingRuntime
+from apps.strategies.models import Strategy, StrategyRun
+
+CLASS_PATH = "apps.strategies.reference.MeanReversionVWAPStrategy"
+
+
+class ScriptedSource(QuoteSource):
+    def __init__(self, store, asset, closes):
+        self.store = store
+        self.asset = asset
+        self.closes = closes
+
+    async def snapshots(self):
+        start = datetime(2024, 1, 2, 9, 15, tzinfo=timezone.utc)
+        for i, close in enumerate(self.closes):
+            quote = Quote(
+                self.asset.id, "RELIANCE", "NSE", close, start + timedelta(minutes=i), volume=1000
+            )
+            self.store.update(quote)
+            yield MarketSnapshot(quote.timestamp, {self.asset.id: quote})
+            await asyncio.sleep(0.05)
+
+
+@pytest.fixture
+def asset():
+    get_loader("NSE").writer.upsert(
+        pd.DataFrame(
+            {
+                "symbol": ["RELIANCE"],
+                "timestamp": [pd.Timestamp("2024-01-01", tz="Asia/Kolkata")],
+                "open": [100.0],
+                "high": [100.0],
+                "low": [100.0],
+                "close": [100.0],
+                "volume": [1000],
+            }
+        )
+    )
+    return Asset.objects.select_related("exchange").get(symbol="RELIANCE")
+
+
+@pytest.fixture
+def strategy():
+    return Strategy.objects.create(
+        name="Runtime",
+        class_path=CLASS_PATH,
+        parameters={"lookback_periods": 5, "entry_std": 0.5, "volume_filter_multiplier": 0.5},
+    )
+
+
+def start_run(strategy) -> StrategyRun:
+    return StrategyRun.objects.create(
+        strategy=strategy, run_type="paper", start_date=datetime(2024, 1, 2).date()
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestTradingRuntime:
+    def test_strategies_trade_and_orders_are_written(self, asset, strategy):
+        store = InMemoryQuoteStore()
+
+        sessions = []
+        for _ in range(2):
+            broker = PaperBroker(quotes=store)
+            broker.connect()
+            sessions.append(StrategySession(start_run(strategy), broker, [asset]))
+
+        closes = [100, 101, 100, 101, 100, 101, 100, 90]
+        runtime = TradingRuntime(ScriptedSource(store, asset, closes), sessions)
+        results = asyncio.run(runtime.run())
+
+        for session in sessions:
+            result = results[session.strategy_run.id]
+            assert result["ticks"] == len(closes)
+            assert result["rejected"] == 0
+            assert result["positions"] == {}
+
+            # Entries on the dips, exits on the way back, flattened at shutdown.
+            orders = list(Order.objects.filter(strategy_run=session.strategy_run).order_by("id"))
+            assert len(orders) == result["filled"] >= 2
+            assert [o.side for o in orders] == ["buy", "sell"] * (len(orders) // 2)
+            assert {o.status for o in orders} == {"filled"}
+            assert sum(o.quantity if o.side == "buy" else -o.quantity for o in orders) == 0
+
+            # Each buy is closed by the following sell: one round trip per pair.
+            trades = list(Trade.objects.filter(strategy_run=session.strategy_run))
+            assert len(trades) == len(orders) // 2
+            assert {t.entry_order.side for t in trades} == {"buy"}
+
+        # Per order: the insert with its fill folded in, the execution and the position.
+        assert runtime.journal.stats["failures"] == 0
+        assert Execution.objects.count() == Order.objects.count()
+        assert Position.objects.filter(quantity=0).count() == len(sessions)
+        assert SessionMetrics.objects.count() == len(sessions)
+
+        # Every order carries its stage latencies; snapshots carry the run's percentiles.
+        order = Order.objects.filter(status="filled").first()
+        assert set(order.metadata["latency_ms"]) == {
+            "signal_to_order",
+            "order_to_submit",
+            "submit_to_ack",
+            "ack_to_fill",
+            "end_to_end",
+        }
+        run = sessions[0].strategy_run
+        metrics = SessionMetrics.objects.get(strategy_run=run)
+        assert 0 < metrics.p50_latency_ms <= metrics.p99_latency_ms <= metrics.max_latency_ms
+        assert metrics.latency["end_to_end"]["count"] == results[run.id]["filled"]
+        # Prometheus series are per strategy and mode, not per run.
+        labels = {"strategy": "Runtime", "mode": "paper", "stage": "end_to_end"}
+        assert REGISTRY.get_sample_value("live_order_latency_seconds_count", labels) >= len(
+            sessions
+        )
+
+        run.status = "running"
+        run.save()
+        response = Client().get(reverse("live_monitor"))
+        assert response.status_code == 200
+        assert f"{metrics.p99_latency_ms:.1f} ms".encode() in response.content
+
+    def test_orders_failing_risk_checks_are_rejected_with_the_reason(self, asset, strategy):
+        store = InMemoryQuoteStore()
+        broker = PaperBroker(quotes=store)
+        broker.connect()
+        session = StrategySession(
+            start_run(strategy), broker, [asset], risk=RiskEngine(RiskLimits(max_position=1))
+        )
+
+        closes = [100, 101, 100, 101, 100, 101, 100, 90]
+        runtime = TradingRuntime(ScriptedSource(store, asset, closes), [session])
+        result = asyncio.run(runtime.run())[session.strategy_run.id]
+
+        assert result["filled"] == 0
+        assert result["rejected"] >= 1
+        assert broker.orders == {}
+        orders = Order.objects.filter(strategy_run=session.strategy_run)
+        assert {o.status for o in orders} == {"rejected"}
+        assert all(o.error_message.endswith("would exceed the limit of 1") for o in orders)
+        assert session.risk.stats["rejected"] == result["rejected"]
+
+    def test_the_daily_loss_limit_restarts_each_trading_day(self, asset, strategy):
+        broker = PaperBroker(quotes=InMemoryQuoteStore())
+        risk = RiskEngine(RiskLimits(max_daily_loss=500))
+        session = StrategySession(start_run(strategy), broker, [asset], risk=risk)
+
+        def tick(moment):
+            quote = Quote(asset.id, "RELIANCE", "NSE", 100.0, moment, volume=1000)
+            asyncio.run(session.on_snapshot(MarketSnapshot(moment, {asset.id: quote}), mock.Mock()))
+
+        # 15:25 IST on 2 January, then 09:20 IST on 3 January.
+        tick(datetime(2024, 1, 2, 9, 55, tzinfo=timezone.utc))
+        risk.realized = -600.0
+        tick(datetime(2024, 1, 2, 9, 59, tzinfo=timezone.utc))
+        assert risk.check(asset.id, "buy", 1) == "Daily loss limit of 500 reached"
+
+        tick(datetime(2024, 1, 3, 3, 50, tzinfo=timezone.utc))
+        assert risk.check(asset.id, "buy", 1) is None
+        assert risk.pnl == -600.0
+
+    def test_a_failing_source_stops_trading_with_its_error(self, asset, strategy):
+        class FailingSource(ScriptedSource):
+            async def snapshots(self):
+                async for snapshot in super().snapshots():
+                    yield snapshot
+                raise RuntimeError("quote feed lost")
+
+        store = InMemoryQuoteStore()
+        broker = PaperBroker(quotes=store)
+        broker.connect()
+        session = StrategySession(start_run(strategy), broker, [asset])
+        closes = [100, 101, 100, 101, 100, 101, 100, 90]
+        runtime = TradingRuntime(FailingSource(store, asset, closes), [session])
+
+        with pytest.raises(RuntimeError, match="quote feed lost"):
+            asyncio.run(runtime.run())
+
+        # Shut down as usual first: flattened, and everything journalled.
+        assert session.book.quantity(asset.id) == 0
+        assert runtime.journal.pending == 0
+        assert SessionMetrics.objects.filter(strategy_run=session.strategy_run).exists()
+
+    def test_a_failing_event_log_stops_trading(self, asset, strategy, tmp_path):
+        store = InMemoryQuoteStore()
+        broker = PaperBroker(quotes=store)
+        broker.connect()
+        events = EventLog(tmp_path, fsync_interval=0.01)
+        session = StrategySession(start_run(strategy), broker, [asset], events=events)
+        closes = [100, 101, 100, 101, 100, 101, 100, 90] * 4
+        runtime = TradingRuntime(ScriptedSource(store, asset, closes), [session])
+
+        with mock.patch.object(events, "_write", side_effect=OSError("disk full")):
+            with pytest.raises(OSError, match="disk full"):
+                asyncio.run(runtime.run())
+
+        # Stopped at the first failed sync rather than trading on without a log.
+        assert runtime.ticks < len(closes)
+        assert session.book.quantity(asset.id) == 0
+        assert runtime.journal.pending == 0
+
+    def test_a_crashed_run_resumes_from_its_event_log(self, asset, strategy, tmp_path):
+        store = InMemoryQuoteStore()
+        run = start_run(strategy)
+        broker = PaperBroker(quotes=store)
+        broker.connect()
+        session = StrategySession(run, broker, [asset], events=EventLog(tmp_path))
+
+        closes = [100, 101, 100, 101, 100, 101, 100, 90]
+        runtime = TradingRuntime(ScriptedSource(store, asset, closes), [session], flatten=False)
+        asyncio.run(runtime.run())
+        assert session.positions == {asset.id: session.positions[asset.id]}
+
+        # A new process: the database is not read, only the log.
+        restarted = PaperBroker(quotes=store)
+        resumed = StrategySession(run, restarted, [asset], events=EventLog(tmp_path))
+
+        assert resumed.cash == pytest.approx(session.cash)
+        assert resumed.positions == session.positions
+        assert resumed.book.realized_pnl() == pytest.approx(session.book.realized_pnl())
+        assert resumed.stats["filled"] == session.stats["filled"]
+        assert restarted.cash == pytest.approx(broker.cash)
+        assert restarted.positions == broker.positions == {"RELIANCE": session.positions[asset.id]}
+        assert resumed.risk.quantity(asset.id) == session.positions[asset.id]
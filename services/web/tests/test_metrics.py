@@ -0,0 +1,91 @@
+from datetime import date
+from unittest import mock
+
+import pytest
+from prometheus_client import REGISTRY
+
+from apps.data import backfill, metrics
+from apps.data.backfill import load_trade_date
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture(autouse=True)
+def fresh_loaders(monkeypatch):
+    # Cached loaders hold asset ids from earlier tests' databases.
+    monkeypatch.setattr(backfill, "_loaders", {})
+
+
+@pytest.mark.django_db
+class TestIngestionMetrics:
+    def test_load_records_stages_rows_and_bar_age(self, django_capture_on_commit_callbacks):
+        before = {
+            stage: sample(
+                "ingestion_stage_seconds_count", exchange="NSE", timeframe="1D", stage=stage
+            )
+            for stage in ("load", "parse", "resolve_assets", "upsert")
+        }
+        rows_before = sample("ingestion_rows_total", exchange="NSE", timeframe="1D")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            result = load_trade_date("NSE", date(2031, 1, 2))
+
+        for stage, count in before.items():
+            assert (
+                sample("ingestion_stage_seconds_count", exchange="NSE", timeframe="1D", stage=stage)
+                == count + 1
+            )
+        assert sample("ingestion_rows_total", exchange="NSE", timeframe="1D") == (
+            rows_before + result["rows"]
+        )
+
+        ages = {
+            tuple(s.labels.values()): s.value
+            for family in metrics.BarAgeCollector(REGISTRY).collect()
+            for s in family.samples
+        }
+        # The bar is in the future, so its age is negative.
+        assert ages[("NSE", "1D")] < 0
+
+    def test_failed_stage_is_counted(self):
+        failures = sample("ingestion_failures_total", exchange="BSE", timeframe="1D", stage="load")
+
+        with mock.patch(
+            "apps.data.loaders.bhavcopy.BSEBhavcopyLoader.load_date", side_effect=OSError("down")
+        ):
+            with pytest.raises(OSError):
+                load_trade_date("BSE", date(2024, 1, 2))
+
+        assert (
+            sample("ingestion_failures_total", exchange="BSE", timeframe="1D", stage="load")
+            == failures + 1
+        )
+
+    def test_corporate_actions_are_timed(self):
+        from apps.data.loaders import CorporateActionsLoader, get_loader
+        from apps.data.tasks import check_corporate_actions
+
+        def count(stage):
+            return sample(
+                "ingestion_stage_seconds_count", exchange="NSE", timeframe="1D", stage=stage
+            )
+
+        get_loader("NSE").load_date(date(2024, 1, 2))
+        before = {stage: count(stage) for stage in ("corporate_actions", "check_corporate_actions")}
+
+        CorporateActionsLoader().load_actions(
+            [
+                {
+                    "symbol": "RELIANCE",
+                    "action_type": "split",
+                    "ex_date": date(2024, 1, 5),
+                    "ratio": 2,
+                }
+            ]
+        )
+        assert check_corporate_actions()["by_exchange"]["NSE"] == 0
+
+        for stage, value in before.items():
+            assert count(stage) == value + 1
@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from apps.data.aggregation import MinuteBarAggregator
+from apps.data.loaders import get_loader
+from apps.data.models import Bar
+
+TICKS_CSV = """timestamp,price,qty
+2024-01-02 09:14:59,100.0,10
+2024-01-02 09:15:00,101.0,5
+2024-01-02 09:15:20,103.5,2
+2024-01-02 09:15:40,99.0,3
+2024-01-02 09:15:59,100.5,1
+2024-01-02 09:16:01,100.0,4
+2024-01-02 15:30:00,98.0,7
+2024-01-26 10:00:00,98.0,7
+"""
+
+MULTI_CSV = """symbol,timestamp,price,qty
+TCS,2024-01-02 09:15:01,3700.0,1
+INFY,2024-01-02 09:15:02,1500.0,2
+TCS,2024-01-02 09:15:30,3705.0,3
+"""
+
+
+@pytest.fixture
+def tick_file(tmp_path):
+    path = tmp_path / "reliance.csv"
+    path.write_text(TICKS_CSV)
+    return path
+
+
+@pytest.mark.django_db
+class TestMinuteBarAggregator:
+    def test_builds_session_bars(self, tick_file):
+        aggregator = MinuteBarAggregator(get_loader("NSE").writer, block_size=64)
+
+        stats = aggregator.process_file(tick_file)
+
+        assert stats == {"ticks": 8, "bars": 2}
+        bars = list(
+            Bar.objects.filter(asset__symbol="RELIANCE", timeframe="1m").order_by("timestamp")
+        )
+        first = bars[0]
+        assert first.timestamp == datetime(2024, 1, 2, 3, 45, tzinfo=timezone.utc)
+        assert (float(first.open), float(first.high), float(first.low), float(first.close)) == (
+            101.0,
+            103.5,
+            99.0,
+            100.5,
+        )
+        assert first.volume == 11
+        assert first.trades == 4
+        assert float(first.turnover) == 101.0 * 5 + 103.5 * 2 + 99.0 * 3 + 100.5
+
+    def test_symbol_column_and_compaction(self, tmp_path):
+        (tmp_path / "ticks.csv").write_text(MULTI_CSV)
+        aggregator = MinuteBarAggregator(get_loader("NSE").writer, block_size=32, compact_rows=1)
+
+        assert aggregator.process([tmp_path]) == {"files": 1, "ticks": 3, "bars": 2}
+        tcs = Bar.objects.get(asset__symbol="TCS", timeframe="1m")
+        assert (float(tcs.open), float(tcs.close), tcs.volume) == (3700.0, 3705.0, 4)
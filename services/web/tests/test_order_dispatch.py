@@ -0,0 +1,208 @@
+import asyncio
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+import pytest
+
+from apps.live.brokers.base import BaseBroker, OrderRequest, OrderResponse
+from apps.live.dispatch import OrderDispatcher, TokenBucket
+
+LIMIT = 20
+
+
+class MockBrokerServer(ThreadingHTTPServer):
+    """Accepts orders, answering 429 past LIMIT requests in any one-second window."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), MockBrokerHandler)
+        self.lock = threading.Lock()
+        self.arrivals = deque()
+        self.accepted = []
+        self.throttled = 0
+
+    def admit(self, order: Dict) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            while self.arrivals and self.arrivals[0] <= now - 1.0:
+                self.arrivals.popleft()
+            if len(self.arrivals) >= LIMIT:
+                self.throttled += 1
+                return False
+            self.arrivals.append(now)
+            self.accepted.append(order)
+            return True
+
+
+class MockBrokerHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        order = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        admitted = self.server.admit(order)
+        body = json.dumps({"order_id": str(len(self.server.accepted))} if admitted else {})
+        self.send_response(200 if admitted else 429)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpBroker(BaseBroker):
+    rate_limits = {"place_order": LIMIT}
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def place_order(self, order: OrderRequest) -> OrderResponse:
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(
+                {"symbol": order.symbol, "side": order.side, "quantity": order.quantity}
+            ).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return OrderResponse(json.loads(response.read())["order_id"], "submitted")
+        except urllib.error.HTTPError as e:
+            return OrderResponse("", "rejected", f"HTTP {e.code}")
+
+    def connect(self) -> bool:
+        return True
+
+    def cancel_order(self, order_id: str) -> bool:
+        return True
+
+    def get_order_status(self, order_id: str) -> Dict:
+        return {}
+
+    def get_positions(self) -> List[Dict]:
+        return []
+
+    def get_quote(self, symbol: str, exchange: str) -> Dict:
+        return {}
+
+    def subscribe_quotes(self, symbols: List[str], callback) -> None:
+        pass
+
+    def disconnect(self) -> None:
+        pass
+
+
+class RecordingBroker(HttpBroker):
+    def __init__(self):
+        self.placed = []
+
+    def place_order(self, order: OrderRequest) -> OrderResponse:
+        self.placed.append((order.symbol, order.side, order.quantity))
+        return OrderResponse(str(len(self.placed)), "submitted")
+
+
+@pytest.fixture
+def server():
+    server = MockBrokerServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def basket(size: int) -> List[OrderRequest]:
+    return [OrderRequest(f"S{i}", "NSE", "buy", 1) for i in range(size)]
+
+
+class TestOrderDispatcher:
+    def test_unpaced_basket_hits_the_mock_brokers_limit(self, server):
+        broker = HttpBroker(f"http://127.0.0.1:{server.server_port}/orders")
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            responses = list(pool.map(broker.place_order, basket(30)))
+
+        assert server.throttled > 0
+        assert sum(r.status == "rejected" for r in responses) == server.throttled
+
+    def test_basket_is_paced_within_the_brokers_limit(self, server):
+        broker = HttpBroker(f"http://127.0.0.1:{server.server_port}/orders")
+        dispatcher = OrderDispatcher(broker, workers=8)
+
+        async def trade():
+            running = asyncio.create_task(dispatcher.run())
+            responses = await dispatcher.place_basket(basket(25))
+            dispatcher.close()
+            await running
+            return responses
+
+        started = time.monotonic()
+        responses = asyncio.run(trade())
+        elapsed = time.monotonic() - started
+
+        assert [r.status for r in responses] == ["submitted"] * 25
+        assert server.throttled == 0
+        assert len(server.accepted) == 25
+        # 18/s leaves room for a burst of 3, then 15 per second.
+        assert elapsed >= 22 / 15 - 0.1
+        assert dispatcher.stats["throttled"] > 0
+
+    def test_exits_go_first_and_waiting_orders_coalesce(self):
+        broker = RecordingBroker()
+        dispatcher = OrderDispatcher(broker, limits={}, workers=1)
+
+        async def trade():
+            entries = [
+                dispatcher.submit(OrderRequest("TCS", "NSE", "buy", 10)),
+                dispatcher.submit(OrderRequest("INFY", "NSE", "buy", 5)),
+            ]
+            exit = dispatcher.submit(OrderRequest("SBIN", "NSE", "sell", 7), exit=True)
+            # Merges into the queued TCS buy, which joins the exits behind SBIN.
+            merged = dispatcher.submit(OrderRequest("TCS", "NSE", "buy", 4), exit=True)
+            dispatcher.close()
+            await dispatcher.run()
+            return await asyncio.gather(*entries, exit, merged)
+
+        tcs, infy, sbin, merged = asyncio.run(trade())
+
+        assert broker.placed == [("SBIN", "sell", 7), ("TCS", "buy", 14), ("INFY", "buy", 5)]
+        assert merged.order_id == tcs.order_id
+        assert (tcs.quantity, merged.quantity) == (10, 4)
+        assert infy.quantity is None
+        assert (sbin.order_id, tcs.order_id, infy.order_id) == ("1", "2", "3")
+        assert dispatcher.stats["coalesced"] == 1
+
+    def test_status_lookups_run_off_the_loop_ahead_of_orders(self):
+        threads = []
+
+        class StatusBroker(RecordingBroker):
+            def get_order_status(self, order_id: str) -> Dict:
+                threads.append(threading.current_thread())
+                return {"order_id": order_id, "placed": len(self.placed)}
+
+        dispatcher = OrderDispatcher(StatusBroker(), limits={}, workers=1)
+
+        async def trade():
+            entry = dispatcher.submit(OrderRequest("TCS", "NSE", "buy", 10))
+            status = dispatcher.order_status("7")
+            dispatcher.close()
+            await dispatcher.run()
+            return await asyncio.gather(entry, status)
+
+        _, status = asyncio.run(trade())
+
+        assert status == {"order_id": "7", "placed": 0}
+        assert threads[0] is not threading.main_thread()
+
+    def test_token_bucket_refills_at_its_rate(self):
+        now = [0.0]
+        bucket = TokenBucket(rate=4, capacity=2, clock=lambda: now[0])
+
+        assert bucket.acquire() and bucket.acquire()
+        assert not bucket.acquire()
+        assert bucket.delay() == pytest.approx(0.25)
+        now[0] = 0.25
+        assert bucket.acquire()
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from apps.data.quotes import InMemoryQuoteStore, Quote
+from apps.live.brokers.base import OrderRequest
+from apps.live.brokers.paper import PaperBroker
+
+START = datetime(2024, 1, 2, 9, 15, tzinfo=timezone.utc)
+
+
+class Market:
+    def __init__(self, broker: PaperBroker, store: InMemoryQuoteStore):
+        self.broker = broker
+        self.store = store
+        self.ticks = 0
+
+    def quote(self, price: float, volume=None, bid=None, ask=None) -> int:
+        self.ticks += 1
+        quote = Quote(
+            1,
+            "RELIANCE",
+            "NSE",
+            price,
+            START + timedelta(seconds=self.ticks),
+            bid=bid,
+            ask=ask,
+            volume=volume,
+        )
+        self.store.update(quote)
+        return self.broker.on_quote(quote)
+
+    def order(self, side, quantity, order_type="limit", price=None, trigger_price=None):
+        return self.broker.place_order(
+            OrderRequest("RELIANCE", "NSE", side, quantity, order_type, price, trigger_price)
+        )
+
+
+@pytest.fixture
+def market():
+    broker = PaperBroker(quotes=InMemoryQuoteStore(), initial_capital=100000)
+    broker.connect()
+    market = Market(broker, broker.quotes)
+    market.quote(100.0, volume=1000)
+    return market
+
+
+@pytest.mark.django_db
+class TestPaperMatching:
+    def test_limit_orders_fill_by_price_then_time_with_partial_fills(self, market):
+        fills = []
+        market.broker.subscribe_fills(fills.append)
+
+        first = market.order("buy", 30, price=99.0)
+        better = market.order("buy", 30, price=99.5)
+        second = market.order("buy", 30, price=99.0)
+        assert first.status == better.status == second.status == "submitted"
+
+        assert market.quote(99.0, volume=50) == 2
+        assert [(f["order_id"], f["quantity"], f["price"]) for f in fills] == [
+            (better.order_id, 30, 99.0),
+            (first.order_id, 20, 99.0),
+        ]
+        status = market.broker.get_order_status(first.order_id)
+        assert (status["status"], status["filled_quantity"]) == ("partial", 20)
+
+        market.quote(98.0, volume=100)
+        assert market.broker.get_order_status(first.order_id)["status"] == "filled"
+        assert market.broker.get_order_status(second.order_id)["status"] == "filled"
+        # Resting limits improve to the quote they cross.
+        assert fills[-1]["price"] == 98.0
+        assert market.broker.positions["RELIANCE"] == 90
+
+    def test_cancelled_orders_never_fill(self, market):
+        resting = market.order("buy", 10, price=95.0)
+        assert market.broker.cancel_order(resting.order_id)
+        assert not market.broker.cancel_order(resting.order_id)
+
+        assert market.quote(90.0, volume=1000) == 0
+        assert market.broker.get_order_status(resting.order_id)["status"] == "cancelled"
+        assert "RELIANCE" not in market.broker.positions
+
+    def test_marketable_limit_fills_on_placement(self, market):
+        response = market.order("buy", 10, price=101.0)
+        assert response.status == "filled"
+        assert market.broker.get_order_status(response.order_id)["execution_price"] == 100.0
+
+    def test_stop_orders_trigger_on_last_price(self, market):
+        market.order("buy", 20, order_type="market")
+        stop_market = market.order("sell", 10, order_type="stop_loss_market", trigger_price=95.0)
+        stop_limit = market.order(
+            "sell", 10, order_type="stop_loss", price=94.0, trigger_price=96.0
+        )
+
+        market.quote(97.0, volume=1000)
+        assert market.broker.get_order_status(stop_limit.order_id)["status"] == "submitted"
+
+        # Triggers the stop-limit, which rests above the market.
+        market.quote(93.0, volume=1000, bid=93.0)
+        assert market.broker.get_order_status(stop_market.order_id)["status"] == "filled"
+        assert market.broker.get_order_status(stop_limit.order_id)["status"] == "submitted"
+
+        market.quote(94.5, volume=1000)
+        assert market.broker.get_order_status(stop_limit.order_id)["status"] == "filled"
+        assert "RELIANCE" not in market.broker.positions
+        # FIFO: the 20 bought at market close as 10 + 10 against the two stops.
+        assert [t.quantity for t in market.broker.trade_history] == [10, 10]
+
+    def test_invalid_and_unaffordable_orders_are_rejected(self, market):
+        assert market.order("buy", 10, price=None).status == "rejected"
+        assert market.order("buy", 10, order_type="stop_loss", price=101.0).status == "rejected"
+
+        # 100,000 of capital buys under 1,000 shares; the fill is refused when it crosses.
+        response = market.order("buy", 5000, price=99.0)
+        market.quote(99.0, volume=10000)
+        status = market.broker.get_order_status(response.order_id)
+        assert (status["status"], status["message"]) == ("rejected", "Insufficient funds")
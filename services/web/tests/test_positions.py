@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from apps.live.positions import PositionBook
+
+START = datetime(2024, 1, 2, 9, 15)
+
+
+def at(minutes):
+    return START + timedelta(minutes=minutes)
+
+
+class TestPositionBook:
+    def test_fifo_closes_oldest_lots_first(self):
+        book = PositionBook("fifo")
+        book.fill("INFY", 10, 100.0, commission=1.0, timestamp=at(0))
+        book.fill("INFY", 10, 110.0, commission=1.0, timestamp=at(5))
+
+        trades = book.fill("INFY", -15, 120.0, commission=1.5, timestamp=at(30))
+
+        assert [(t.quantity, t.entry_price, t.duration_minutes) for t in trades] == [
+            (10, 100.0, 30),
+            (5, 110.0, 25),
+        ]
+        assert [round(t.pnl, 6) for t in trades] == [198.0, 49.0]
+        assert book.quantity("INFY") == 5
+        assert book.avg_price("INFY") == 110.0
+        assert book.realized_pnl() == pytest.approx(247.0)
+
+    def test_average_cost_realizes_against_the_mean_entry(self):
+        book = PositionBook("average")
+        book.fill("INFY", 10, 100.0, timestamp=at(0))
+        book.fill("INFY", 10, 110.0, timestamp=at(5))
+
+        (trade,) = book.fill("INFY", -15, 120.0, timestamp=at(30))
+
+        assert (trade.quantity, trade.entry_price, trade.pnl) == (15, 105.0, 225.0)
+        assert book.avg_price("INFY") == 105.0
+
+    def test_fill_through_zero_flips_the_position(self):
+        book = PositionBook()
+        book.fill("TCS", 10, 100.0, timestamp=at(0))
+
+        (trade,) = book.fill("TCS", -25, 90.0, timestamp=at(1))
+
+        assert (trade.quantity, trade.pnl) == (10, -100.0)
+        assert book.quantity("TCS") == -15
+        assert book.avg_price("TCS") == 90.0
+        assert book.position("TCS")["opened_at"] == at(1)
+
+        (cover,) = book.fill("TCS", 15, 80.0, timestamp=at(2))
+        assert (cover.quantity, cover.pnl) == (-15, 150.0)
+        assert "TCS" not in book
+        assert book.realized_pnl() == sum(t.pnl for t in book.trades) == 50.0
+
+    def test_mark_to_market_covers_every_position(self):
+        book = PositionBook(capacity=2)
+        for i in range(5):
+            book.fill(i, 10 if i % 2 else -10, 100.0)
+
+        # Unquoted keys keep their last mark.
+        book.mark({0: 90.0, 1: 105.0, 2: 100.0, 99: 1.0})
+
+        assert book.market_value() == pytest.approx(-900 + 1050 - 1000 + 1000 - 1000)
+        assert book.unrealized_pnl() == pytest.approx(100 + 50)
+        assert book.positions() == {0: -10, 1: 10, 2: -10, 3: 10, 4: -10}
+
+    def test_unknown_method_is_rejected(self):
+        with pytest.raises(ValueError):
+            PositionBook("lifo")
@@ -0,0 +1,138 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import pytest
+from channels.testing import WebsocketCommunicator
+
+from apps.api.consumers import QuotesConsumer
+from apps.data.quotes import Quote
+from apps.live.fanout import (
+    ALL_SYMBOLS,
+    ChannelLayerPublisher,
+    QuoteFanout,
+    Subscription,
+    _listen,
+    quote_message,
+)
+
+START = datetime(2024, 1, 2, 9, 15, tzinfo=timezone.utc)
+
+
+def quote(symbol: str, price: float, tick: int = 0) -> Quote:
+    return Quote(1, symbol, "NSE", price, START + timedelta(seconds=tick))
+
+
+@pytest.mark.django_db
+class TestQuoteFanout:
+    def test_delivers_one_batch_per_tick_to_each_symbols_subscribers(self):
+        fanout = QuoteFanout()
+        tcs, everything = [], []
+        fanout.subscribe(Subscription(tcs.append), ["TCS"])
+        fanout.subscribe(Subscription(everything.append), [ALL_SYMBOLS])
+
+        async def feed():
+            fanout.publish([quote("TCS", 200.0), quote("INFY", 300.0)])
+            fanout.publish([quote("TCS", 201.0, tick=1)])
+            assert tcs == []
+            await asyncio.sleep(0)
+
+        asyncio.run(feed())
+
+        # Both publishes landed in the same tick: one batch, latest quote per symbol.
+        assert [[q.last_price for q in batch] for batch in tcs] == [[201.0]]
+        assert [sorted(q.last_price for q in batch) for batch in everything] == [[201.0, 300.0]]
+
+    def test_slow_subscriber_gets_latest_quotes_without_stalling_others(self):
+        fanout = QuoteFanout()
+        fast, slow = [], []
+        gate = asyncio.Event()
+
+        async def read_slowly(quotes):
+            slow.append([q.last_price for q in quotes])
+            await gate.wait()
+
+        fast_subscription = Subscription(fast.append)
+        slow_subscription = Subscription(read_slowly)
+        fanout.subscribe(fast_subscription, ["TCS"])
+        fanout.subscribe(slow_subscription, ["TCS"])
+
+        async def feed():
+            for tick in range(5):
+                fanout.publish([quote("TCS", 200.0 + tick, tick)])
+                await asyncio.sleep(0)
+            gate.set()
+            for _ in range(3):
+                await asyncio.sleep(0)
+
+        asyncio.run(feed())
+
+        assert [[q.last_price for q in batch] for batch in fast] == [[200.0 + t] for t in range(5)]
+        # Ticks 1-4 arrived while the first batch was still being read.
+        assert slow == [[200.0], [204.0]]
+        assert slow_subscription.conflated == 3
+
+        fanout.unsubscribe(slow_subscription)
+        assert fanout.subscriptions == {fast_subscription}
+
+    def test_websocket_clients_receive_their_symbols_from_the_channel_layer(self, settings):
+        settings.CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+        async def session():
+            client = WebsocketCommunicator(QuotesConsumer.as_asgi(), "/ws/quotes/")
+            connected, _ = await client.connect()
+            assert connected
+            await client.send_json_to({"action": "subscribe", "symbols": ["tcs"]})
+            assert (await client.receive_json_from())["symbols"] == ["TCS"]
+
+            publisher = QuoteFanout()
+            publisher.subscribe(ChannelLayerPublisher(), [ALL_SYMBOLS])
+            publisher.publish([quote("TCS", 200.0), quote("INFY", 300.0)])
+
+            message = await client.receive_json_from(timeout=2)
+            await client.disconnect()
+            return message
+
+        message = asyncio.run(session())
+        assert message["type"] == "quotes"
+        assert [(q["symbol"], q["last_price"]) for q in message["quotes"]] == [("TCS", 200.0)]
+
+    def test_listener_rejoins_after_a_channel_layer_failure(self):
+        messages = [ConnectionError("redis went away"), quote_message([quote("TCS", 200.0)])]
+
+        class FlakyLayer:
+            joined = 0
+
+            async def new_channel(self):
+                return f"channel-{self.joined}"
+
+            async def group_add(self, group, channel):
+                self.joined += 1
+
+            async def group_discard(self, group, channel):
+                raise ConnectionError("still down")
+
+            async def receive(self, channel):
+                if not messages:
+                    await asyncio.Event().wait()
+                message = messages.pop(0)
+                if isinstance(message, Exception):
+                    raise message
+                return message
+
+        layer = FlakyLayer()
+        received = []
+
+        async def listen():
+            fanout = QuoteFanout()
+            fanout.subscribe(Subscription(received.extend), ["TCS"])
+            listener = asyncio.create_task(_listen(fanout, layer, "quotes"))
+            while not received:
+                await asyncio.sleep(0.001)
+            listener.cancel()
+
+        with mock.patch("apps.live.fanout.LISTEN_RETRY_SECONDS", 0.001):
+            asyncio.run(asyncio.wait_for(listen(), timeout=2))
+
+        assert layer.joined == 2
+        assert [q.symbol for q in received] == ["TCS"]
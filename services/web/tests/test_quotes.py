@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+
+from apps.data.loaders import get_loader
+from apps.data.models import Asset
+from apps.data.quotes import InMemoryQuoteStore, Quote, get_quote_store
+from apps.live.brokers.base import OrderRequest
+from apps.live.brokers.paper import PaperBroker
+
+
+def daily_frame(day: str, close: float, symbol: str = "RELIANCE") -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "symbol": [symbol],
+            "timestamp": [pd.Timestamp(day, tz="Asia/Kolkata")],
+            "open": [close],
+            "high": [close + 1],
+            "low": [close - 1],
+            "close": [close],
+            "volume": [500],
+        }
+    )
+
+
+@pytest.fixture
+def store():
+    store = get_quote_store()
+    store.clear()
+    yield store
+    store.clear()
+
+
+@pytest.mark.django_db
+class TestLatestQuoteStore:
+    def test_older_quotes_do_not_replace_newer(self):
+        store = InMemoryQuoteStore()
+        now = datetime.now(tz=timezone.utc)
+
+        assert store.update(Quote(1, "TCS", "NSE", 101.0, now))
+        assert not store.update(Quote(1, "TCS", "NSE", 99.0, now - timedelta(minutes=1)))
+
+        assert store.get(1).last_price == 101.0
+        assert store.lookup("TCS", "NSE").last_price == 101.0
+        assert store.get_many([1, 2]).keys() == {1}
+        assert not store.get(1).is_stale(max_age=60)
+        assert store.get(1).is_stale(max_age=60, now=now.timestamp() + 120)
+
+    def test_ingestion_publishes_latest_bar(self, store, django_capture_on_commit_callbacks):
+        writer = get_loader("NSE").writer
+        with django_capture_on_commit_callbacks(execute=True):
+            writer.upsert(daily_frame("2024-01-03", 105.0))
+            writer.upsert(daily_frame("2024-01-02", 104.0))
+
+        quote = store.lookup("RELIANCE", "NSE")
+        assert quote.last_price == 105.0
+        assert quote.source == "bar:1D"
+        assert quote.asset_id == Asset.objects.get(symbol="RELIANCE").id
+
+    def test_paper_broker_reads_store_without_queries(self, store, django_assert_num_queries):
+        writer = get_loader("NSE").writer
+        writer.upsert(daily_frame("2024-01-03", 200.0, symbol="INFY"))
+        broker = PaperBroker()
+        broker.connect()
+
+        # First call reads through to the bars table and fills the store.
+        assert broker.get_quote("INFY", "NSE")["last_price"] == 200.0
+
+        store.record_tick({"symbol": "INFY", "exchange": "NSE", "last_price": 210.0, "bid": 209.9})
+        with django_assert_num_queries(0):
+            quote = broker.get_quote("INFY", "NSE")
+            response = broker.place_order(OrderRequest("INFY", "NSE", "buy", 10))
+
+        assert (quote["last_price"], quote["bid"]) == (210.0, 209.9)
+        assert response.status == "filled"
+        assert broker.orders[response.order_id]["execution_price"] > 210.0
@@ -0,0 +1,187 @@
+import time
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pytest
+from django.core.management import CommandError, call_command
+
+from apps.data.calendar import get_calendar
+from apps.data.loaders import get_loader
+from apps.data.models import Asset
+from apps.data.quotes import InMemoryQuoteStore, Quote
+from apps.live.brokers.base import BaseBroker, OrderRequest
+from apps.live.brokers.paper import PaperBroker
+from apps.live.models import Position
+from apps.live.reconcile import Holdings, PositionReconciler, ledger_holdings, reconcile
+from apps.strategies.models import Strategy, StrategyRun
+
+SYMBOLS = ["RELIANCE", "TCS", "INFY"]
+
+
+@pytest.fixture
+def assets():
+    get_loader("NSE").writer.upsert(
+        pd.DataFrame(
+            {
+                "symbol": SYMBOLS,
+                "timestamp": [pd.Timestamp("2024-01-01", tz="Asia/Kolkata")] * 3,
+                "open": [100.0] * 3,
+                "high": [100.0] * 3,
+                "low": [100.0] * 3,
+                "close": [100.0] * 3,
+                "volume": [1000] * 3,
+            }
+        )
+    )
+    return {asset.symbol: asset for asset in Asset.objects.filter(symbol__in=SYMBOLS)}
+
+
+@pytest.fixture
+def run():
+    strategy = Strategy.objects.create(
+        name="Reconcile", class_path="apps.strategies.reference.MeanReversionVWAPStrategy"
+    )
+    return StrategyRun.objects.create(
+        strategy=strategy, run_type="live", status="running", start_date=date(2024, 1, 2)
+    )
+
+
+def book_positions(run, assets, positions):
+    for position in positions:
+        Position.objects.create(
+            strategy_run=run,
+            asset=assets[position["symbol"]],
+            quantity=int(position["quantity"]),
+            avg_entry_price=Decimal(str(round(position["avg_price"], 4))),
+            current_price=Decimal("0"),
+            unrealized_pnl=Decimal("0"),
+        )
+
+
+class TestReconcile:
+    def test_holdings_are_netted_and_diffed_by_key(self):
+        broker = Holdings.from_rows(
+            ["NSE:TCS", "NSE:INFY", "NSE:SBIN", "NSE:ITC"],
+            [10, -5, 20, 7],
+            [100.0, 50.0, 10.0, 9.0],
+        )
+        # Two runs hold TCS; SBIN and ITC match, HDFC is missing at the broker.
+        ledger = Holdings.from_rows(
+            ["NSE:TCS", "NSE:TCS", "NSE:INFY", "NSE:SBIN", "NSE:HDFC", "NSE:ITC"],
+            [4, 6, -5, 20, 3, 7],
+            [95.0, 103.3333, 51.0, 10.005, 200.0, 9.0],
+        )
+        assert ledger.quantities[ledger.keys == "NSE:TCS"] == [10]
+        assert ledger.avg_prices[ledger.keys == "NSE:TCS"] == pytest.approx([100.0])
+
+        breaks = reconcile(broker, ledger, price_tolerance=0.001)
+
+        assert [(b["key"], b["kind"]) for b in breaks] == [
+            ("NSE:HDFC", "quantity"),
+            ("NSE:INFY", "avg_price"),
+        ]
+        assert breaks[0]["broker_quantity"] == 0.0
+        assert breaks[1]["ledger_avg_price"] == 51.0
+
+    def test_reconciling_thousands_of_positions_is_one_vectorized_pass(self):
+        keys = [f"NSE:S{i:05d}" for i in range(20000)]
+        quantities = np.arange(1, 20001, dtype=float)
+        broker = Holdings.from_rows(keys, quantities, np.full(20000, 100.0))
+        quantities[[17, 4242]] += 1
+        ledger = Holdings.from_rows(keys, quantities, np.full(20000, 100.0))
+
+        started = time.perf_counter()
+        breaks = reconcile(broker, ledger)
+        elapsed = time.perf_counter() - started
+
+        assert [b["key"] for b in breaks] == ["NSE:S00017", "NSE:S04242"]
+        assert elapsed < 0.05
+
+    @pytest.mark.django_db
+    def test_paper_broker_against_the_ledger(self, assets, run, django_assert_num_queries):
+        store = InMemoryQuoteStore()
+        now = datetime(2024, 1, 2, 4, 0, tzinfo=timezone.utc)
+        for symbol, asset in assets.items():
+            store.update(Quote(asset.id, symbol, "NSE", 100.0, now))
+        broker = PaperBroker(quotes=store, seed=1)
+        broker.connect()
+        for symbol, side, quantity in [("RELIANCE", "buy", 10), ("TCS", "buy", 5)]:
+            broker.place_order(OrderRequest(symbol, "NSE", side, quantity))
+        book_positions(run, assets, broker.get_positions())
+
+        reconciler = PositionReconciler(broker, confirm=2)
+        with django_assert_num_queries(1):
+            assert reconciler.check() == []
+        assert reconciler.stats["positions"] == 2
+
+        # Filled at the broker, not journaled yet: only seen once, not reported.
+        broker.place_order(OrderRequest("INFY", "NSE", "buy", 3))
+        assert reconciler.check() == []
+        book_positions(run, assets, [p for p in broker.get_positions() if p["symbol"] == "INFY"])
+        assert reconciler.check() == []
+
+        Position.objects.filter(asset=assets["TCS"]).update(quantity=4)
+        Position.objects.filter(asset=assets["RELIANCE"]).update(avg_entry_price=Decimal("90"))
+        assert reconciler.check() == []
+        breaks = reconciler.check()
+        assert [(b["key"], b["kind"]) for b in breaks] == [
+            ("NSE:RELIANCE", "avg_price"),
+            ("NSE:TCS", "quantity"),
+        ]
+        assert breaks[1]["broker_quantity"] == 5.0 and breaks[1]["ledger_quantity"] == 4.0
+
+        # Another run's positions are not in this one's ledger.
+        assert len(ledger_holdings([run.id + 1])) == 0
+
+    @pytest.mark.django_db
+    def test_mocked_broker_and_the_command(self, assets, run, capsys):
+        broker = mock.create_autospec(BaseBroker, instance=True)
+        broker.connect.return_value = True
+        broker.get_positions.return_value = [
+            {"symbol": "RELIANCE", "exchange": "NSE", "quantity": 10, "avg_price": 2500.0},
+            {"symbol": "TCS", "quantity": -2, "avg_price": 3500.0},
+        ]
+        book_positions(
+            run,
+            assets,
+            [
+                {"symbol": "RELIANCE", "quantity": 10, "avg_price": 2500.0},
+                {"symbol": "INFY", "quantity": 7, "avg_price": 1500.0},
+            ],
+        )
+
+        with mock.patch(
+            "apps.live.management.commands.reconcile_positions.get_broker", return_value=broker
+        ):
+            call_command("reconcile_positions", "--broker", "zerodha", "--once")
+
+        output = capsys.readouterr().out
+        assert "NSE:INFY quantity break: broker 0 @ 0.00, ledger 7 @ 1500.00" in output
+        assert "NSE:TCS quantity break: broker -2 @ 3500.00, ledger 0 @ 0.00" in output
+        assert "3 positions, 2 breaks" in output
+        broker.disconnect.assert_called_once()
+
+        with pytest.raises(CommandError, match="zerodha or upstox"):
+            call_command("reconcile_positions", "--broker", "paper", "--once")
+
+    @pytest.mark.django_db
+    def test_paper_positions_carry_their_exchange(self):
+        store = InMemoryQuoteStore()
+        now = datetime(2024, 1, 2, 4, 0, tzinfo=timezone.utc)
+        store.update(Quote(1, "RELIANCE", "BSE", 100.0, now))
+        broker = PaperBroker(quotes=store, seed=1)
+        broker.connect()
+        broker.place_order(OrderRequest("RELIANCE", "BSE", "buy", 10))
+
+        [position] = broker.get_positions()
+        assert position["exchange"] == "BSE"
+        assert list(Holdings.from_broker(broker.get_positions()).keys) == ["BSE:RELIANCE"]
+
+    def test_passes_only_run_during_market_hours(self):
+        calendar = get_calendar("NSE")
+        assert calendar.is_open(datetime(2024, 1, 2, 5, 0, tzinfo=timezone.utc))
+        assert not calendar.is_open(datetime(2024, 1, 2, 11, 0, tzinfo=timezone.utc))
+        assert not calendar.is_open(datetime(2024, 1, 6, 5, 0, tzinfo=timezone.utc))
@@ -0,0 +1,95 @@
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+
+from apps.data.feed import DatabaseDataFeed
+from apps.data.loaders import get_loader
+from apps.data.models import Bar
+from apps.data.resample import BarResampler
+
+
+def minute_frame(start: str, minutes: int, symbol: str = "RELIANCE") -> pd.DataFrame:
+    # start is IST wall-clock time
+    timestamps = pd.date_range(start, periods=minutes, freq="min", tz="Asia/Kolkata")
+    prices = [100.0 + i for i in range(minutes)]
+    return pd.DataFrame(
+        {
+            "symbol": symbol,
+            "timestamp": timestamps.tz_convert("UTC"),
+            "open": prices,
+            "high": [p + 0.5 for p in prices],
+            "low": [p - 0.5 for p in prices],
+            "close": prices,
+            "volume": 10,
+            "turnover": 1000.0,
+            "trades": 2,
+        }
+    )
+
+
+@pytest.fixture
+def writer(db):
+    return get_loader("NSE").writer
+
+
+@pytest.mark.django_db
+class TestBarResampler:
+    def test_buckets_anchor_at_session_open(self, writer):
+        writer.upsert(minute_frame("2024-01-02 09:15", 40), timeframe="1m")
+
+        written = BarResampler("NSE").run(timeframes=["15m", "1H"])
+
+        assert written == {"15m": 3, "1H": 1}
+        bars = list(Bar.objects.filter(timeframe="15m").order_by("timestamp"))
+        assert bars[0].timestamp == datetime(2024, 1, 2, 3, 45, tzinfo=timezone.utc)
+        assert bars[1].timestamp == datetime(2024, 1, 2, 4, 0, tzinfo=timezone.utc)
+        assert (float(bars[0].open), float(bars[0].close)) == (100.0, 114.0)
+        assert (float(bars[0].high), float(bars[0].low)) == (114.5, 99.5)
+        assert bars[0].volume == 150
+        assert bars[2].volume == 100
+
+    def test_only_new_buckets_are_recomputed(self, writer):
+        writer.upsert(minute_frame("2024-01-02 09:15", 20), timeframe="1m")
+        resampler = BarResampler("NSE")
+        assert resampler.run(timeframes=["15m"]) == {"15m": 2}
+
+        writer.upsert(minute_frame("2024-01-02 09:35", 15), timeframe="1m")
+        assert resampler.run(timeframes=["15m"]) == {"15m": 2}
+
+        partial = Bar.objects.get(
+            timeframe="15m", timestamp=datetime(2024, 1, 2, 4, 0, tzinfo=timezone.utc)
+        )
+        assert partial.volume == 150
+        assert Bar.objects.filter(timeframe="15m").count() == 3
+
+    def test_rejects_unknown_timeframe(self):
+        with pytest.raises(ValueError):
+            BarResampler("NSE").run(timeframes=["7m"])
+
+
+@pytest.mark.django_db
+class TestDatabaseDataFeed:
+    def test_materializes_on_read(self, writer):
+        writer.upsert(minute_frame("2024-01-02 09:15", 60), timeframe="1m")
+        feed = DatabaseDataFeed("NSE", timeframe="30m")
+
+        bars = feed.get_bars(
+            ["RELIANCE", "TCS"],
+            datetime(2024, 1, 2, tzinfo=timezone.utc),
+            datetime(2024, 1, 3, tzinfo=timezone.utc),
+            timeframe="30m",
+        )
+
+        assert list(bars) == ["RELIANCE"]
+        assert len(bars["RELIANCE"]) == 2
+        assert bars["RELIANCE"]["close"].iloc[-1] == 159.0
+
+        latest = feed.get_latest_bar("RELIANCE", datetime(2024, 1, 2, 4, 20, tzinfo=timezone.utc))
+        assert latest["open"] == 130.0
+        assert (
+            len(
+                feed.get_historical_window("RELIANCE", datetime(2024, 1, 3, tzinfo=timezone.utc), 5)
+            )
+            == 2
+        )
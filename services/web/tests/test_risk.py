@@ -0,0 +1,104 @@
+import ast
+import timeit
+from pathlib import Path
+
+import pytest
+
+from apps.live.risk import RiskEngine, RiskLimits
+
+
+class TestRiskEngine:
+    def test_position_and_notional_limits_count_working_orders(self):
+        risk = RiskEngine(RiskLimits(max_position=100, max_gross_notional=15000))
+        risk.on_quote("TCS", 100.0)
+
+        assert risk.check("TCS", "buy", 60) is None
+        # 60 working + 60 would be 120.
+        assert risk.check("TCS", "buy", 60) == "Position of +120 would exceed the limit of 100"
+        risk.on_fill("TCS", 60, 100.0)
+        assert risk.gross == 6000.0
+
+        risk.on_quote("INFY", 100.0)
+        assert risk.check("INFY", "sell", 50) is None
+        assert risk.check("INFY", "sell", 50).startswith("Gross notional of 16,000")
+        risk.release("INFY", "sell", 50)
+        assert risk.check("INFY", "sell", 50) is None
+
+        # Reducing a position always passes.
+        assert risk.check("TCS", "sell", 60) is None
+
+    def test_price_band_and_order_rate(self):
+        now = [0.0]
+        risk = RiskEngine(
+            RiskLimits(price_band=0.05, max_orders_per_second=2), clock=lambda: now[0]
+        )
+        risk.on_quote("TCS", 100.0)
+
+        assert risk.check("TCS", "buy", 1, price=110.0).startswith("Price 110.00 is outside")
+        assert risk.check("TCS", "buy", 1, price=104.0) is None
+        assert risk.check("TCS", "buy", 1) is None
+        assert risk.check("TCS", "buy", 1) == "Order rate limit of 2/s reached"
+        now[0] = 1.5
+        assert risk.check("TCS", "buy", 1) is None
+        assert risk.stats == {"checked": 5, "rejected": 2}
+
+    def test_daily_loss_blocks_new_risk_but_not_exits(self):
+        risk = RiskEngine(RiskLimits(max_daily_loss=1000))
+        risk.on_quote("TCS", 100.0)
+        risk.check("TCS", "buy", 100)
+        risk.on_fill("TCS", 100, 100.0, commission=10.0)
+
+        risk.on_quote("TCS", 91.0)
+        assert risk.daily_pnl == pytest.approx(-910.0)
+        assert risk.check("TCS", "buy", 10) is None
+        risk.release("TCS", "buy", 10)
+
+        risk.on_quote("TCS", 90.0)
+        assert risk.check("TCS", "buy", 10) == "Daily loss limit of 1,000 reached"
+        assert risk.check("TCS", "sell", 100) is None
+        risk.on_fill("TCS", -100, 90.0)
+        assert risk.realized == pytest.approx(-1010.0)
+        assert risk.unrealized == 0.0
+
+        risk.reset_day()
+        assert risk.check("TCS", "buy", 10) is None
+
+    def test_limits_from_settings(self, settings):
+        settings.RISK_MAX_POSITION = 500
+        settings.RISK_PRICE_BAND_PCT = 2.5
+        settings.RISK_MAX_DAILY_LOSS = 0
+        limits = RiskLimits.from_settings()
+        assert (limits.max_position, limits.price_band, limits.max_daily_loss) == (
+            500,
+            0.025,
+            None,
+        )
+
+        limits = RiskLimits.from_settings({"RISK_MAX_ORDERS_PER_SECOND": "10"})
+        assert limits.max_orders_per_second == 10
+        assert limits.max_position is None
+
+    def test_checks_take_microseconds(self):
+        risk = RiskEngine(
+            RiskLimits(
+                max_position=10**9,
+                max_gross_notional=10**15,
+                max_net_notional=10**15,
+                price_band=0.1,
+                max_daily_loss=10**9,
+            )
+        )
+        for i in range(1000):
+            risk.on_quote(i, 100.0)
+            risk.on_fill(i, 10, 100.0)
+
+        seconds = timeit.timeit(lambda: risk.check(7, "buy", 1, price=100.0), number=10000)
+        assert seconds / 10000 < 50e-6
+
+    def test_exec_gateway_copy_matches(self):
+        services = Path(__file__).resolve().parents[2]
+        gateway = services / "exec" / "app" / "risk.py"
+        if not gateway.exists():
+            pytest.skip("services/exec is not in this checkout")
+        live = services / "web" / "apps" / "live" / "risk.py"
+        assert ast.dump(ast.parse(gateway.read_text())) == ast.dump(ast.parse(live.read_text()))
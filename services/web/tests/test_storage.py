@@ -0,0 +1,52 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+from apps.data.models import Asset, AssetClass, Bar, Currency, Exchange
+from apps.data.storage import MINUTE_TABLE, ensure_bar_partitions, storage_layout
+
+
+@pytest.mark.django_db
+class TestBarStorage:
+    def test_partitions_are_created_once(self):
+        if storage_layout() != "partitioned":
+            assert ensure_bar_partitions() == 0
+            return
+
+        ensure_bar_partitions()
+        assert ensure_bar_partitions() == 0
+
+    def test_minute_bars_land_in_monthly_partition(self):
+        if storage_layout() != "partitioned":
+            pytest.skip("bars is not partitioned on this database")
+
+        asset = Asset.objects.create(
+            symbol="INFY",
+            exchange=Exchange.objects.create(
+                code="NSE", name="NSE", country="IN", timezone="Asia/Kolkata"
+            ),
+            asset_class=AssetClass.objects.create(code="EQ", name="Equity"),
+            currency=Currency.objects.create(code="INR", name="Rupee", symbol="₹"),
+        )
+        timestamp = timezone.make_aware(datetime(2024, 3, 5, 9, 15))
+        ensure_bar_partitions(since=timestamp.date())
+        for timeframe in ["1m", "1D"]:
+            Bar.objects.create(
+                asset=asset,
+                timeframe=timeframe,
+                timestamp=timestamp,
+                open=Decimal("100"),
+                high=Decimal("101"),
+                low=Decimal("99"),
+                close=Decimal("100.5"),
+                volume=1000,
+            )
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT tableoid::regclass::text, timeframe FROM bars ORDER BY timeframe"
+            )
+            assert cursor.fetchall() == [("bars_other", "1D"), (f"{MINUTE_TABLE}_2024_03", "1m")]
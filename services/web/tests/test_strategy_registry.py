@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from apps.strategies.reference import MeanReversionVWAPStrategy
+from apps.strategies.reference.mean_reversion import MeanReversionVWAPSignal
+from apps.strategies.registry import StrategyRegistry
+
+CLASS_PATH = "apps.strategies.reference.MeanReversionVWAPStrategy"
+
+
+class FakeEngine:
+    equity = 1000000.0
+
+
+class FakeAsset:
+    def __init__(self, id, symbol):
+        self.id = id
+        self.symbol = symbol
+
+
+class TestStrategyRegistry:
+    def test_resolve_is_cached(self):
+        registry = StrategyRegistry()
+        components = registry.resolve(CLASS_PATH)
+
+        assert components.strategy_class is MeanReversionVWAPStrategy
+        assert components.signal_class is MeanReversionVWAPSignal
+        assert registry.resolve(CLASS_PATH) is components
+
+    def test_invalid_class_path(self):
+        registry = StrategyRegistry()
+
+        with pytest.raises(ValueError):
+            registry.resolve("apps.strategies.reference.DoesNotExist")
+
+        with pytest.raises(ValueError):
+            registry.resolve("apps.strategies.sdk.risk.FixedRiskSizer")
+
+    def test_bound_callback_emits_target_quantities(self):
+        registry = StrategyRegistry()
+        callback = registry.bind(
+            CLASS_PATH,
+            {"lookback_periods": 5, "entry_std": 0.5, "volume_filter_multiplier": 0.5},
+            FakeEngine(),
+            [FakeAsset(1, "RELIANCE")],
+        )
+
+        signals = []
+        closes = [100, 101, 100, 101, 100, 101, 100, 90]
+        for i, close in enumerate(closes):
+            row = pd.Series(
+                {"open": close, "high": close, "low": close, "close": close, "volume": 1000}
+            )
+            signals = callback(pd.Timestamp("2024-01-01") + pd.Timedelta(days=i), {1: row}, {})
+
+        assert signals == [{"asset_id": 1, "quantity": 1111.0}]
@@ -0,0 +1,116 @@
+from datetime import date, datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from apps.backtest.engine import BacktestEngine
+from apps.data.loaders import get_loader
+from apps.data.models import Asset, UniverseMembership
+from apps.data.universe import UniverseMask, universe_assets
+from apps.strategies.models import Strategy, StrategyRun
+from apps.strategies.sdk.fees import IndianEquityFeeModel
+from apps.strategies.sdk.slippage import FixedSlippageModel
+
+
+def daily_bars(symbols, days):
+    return pd.DataFrame(
+        [
+            {
+                "symbol": symbol,
+                "timestamp": pd.Timestamp(day, tz="Asia/Kolkata"),
+                "open": 100.0,
+                "high": 101.0,
+                "low": 99.0,
+                "close": 100.0,
+                "volume": 1000,
+            }
+            for symbol in symbols
+            for day in days
+        ]
+    )
+
+
+@pytest.fixture
+def members(db):
+    get_loader("NSE").writer.upsert(
+        daily_bars(["AAA", "BBB", "CCC"], ["2024-01-02", "2024-01-03", "2024-01-04"])
+    )
+    assets = {a.symbol: a for a in Asset.objects.all()}
+    UniverseMembership.objects.bulk_create(
+        [
+            UniverseMembership(index="TEST", asset=assets["AAA"], valid_from=date(2023, 1, 1)),
+            UniverseMembership(
+                index="TEST",
+                asset=assets["BBB"],
+                valid_from=date(2024, 1, 3),
+                valid_to=date(2024, 1, 4),
+            ),
+            UniverseMembership(
+                index="TEST",
+                asset=assets["CCC"],
+                valid_from=date(2020, 1, 1),
+                valid_to=date(2023, 6, 1),
+            ),
+        ]
+    )
+    return assets
+
+
+@pytest.mark.django_db
+class TestUniverseMembership:
+    def test_mask_follows_intervals(self):
+        mask = UniverseMask(
+            [10, 20],
+            [10, 20, 20],
+            [date(2024, 1, 1), date(2024, 1, 3), date(2024, 1, 8)],
+            [date(2024, 1, 4), date(2024, 1, 4), None],
+        )
+        days = np.array(
+            ["2024-01-02", "2024-01-03", "2024-01-03", "2024-01-04", "2024-01-08"],
+            dtype="datetime64[D]",
+        )
+
+        active = mask.active(days)
+
+        assert active[:, 0].tolist() == [True, True, True, False, False]
+        assert active[:, 1].tolist() == [False, True, True, False, True]
+        assert mask.slots_of([20, 99]).tolist() == [1, -1]
+
+    def test_universe_is_point_in_time(self, members):
+        universe = universe_assets("TEST", date(2024, 1, 1), date(2024, 1, 31))
+        assert sorted(a.symbol for a in universe) == ["AAA", "BBB"]
+
+        strategy = Strategy.objects.create(name="PIT", class_path="x.Y")
+        run = StrategyRun.objects.create(
+            strategy=strategy, run_type="backtest", start_date=date(2024, 1, 1)
+        )
+        engine = BacktestEngine(
+            run, 100_000.0, FixedSlippageModel(slippage_bps=0), IndianEquityFeeModel()
+        )
+        symbols = {a.id: a.symbol for a in universe}
+        seen = []
+
+        def on_bar(timestamp, bars, positions):
+            seen.append(sorted(symbols[asset_id] for asset_id in bars))
+            # Try to buy BBB every bar; only allowed while it is a member.
+            return [
+                {
+                    "asset_id": members["BBB"].id,
+                    "quantity": positions.get(members["BBB"].id, 0) + 10,
+                }
+            ]
+
+        engine.run(
+            universe,
+            datetime(2024, 1, 1, tzinfo=timezone.utc),
+            datetime(2024, 1, 5, tzinfo=timezone.utc),
+            on_bar,
+            membership=UniverseMask.for_index(
+                "TEST", [a.id for a in universe], date(2024, 1, 1), date(2024, 1, 31)
+            ),
+        )
+
+        assert seen == [["AAA"], ["AAA", "BBB"], ["AAA", "BBB"]]
+        # Bought on 01-03 only; on 01-04 BBB is held but no longer a member.
+        assert engine.positions[members["BBB"].id] == 10